@@ -0,0 +1,121 @@
+"""
+Tiempo de importación de la aplicación (``python -X importtime``).
+
+Importa ``src.main`` en un intérprete nuevo varias veces, muestra la mediana
+del tiempo acumulado de la importación y los módulos que más tardan, y
+comprueba que no se cargan los módulos pesados que deben importarse de forma
+diferida (el cliente de Ollama, langchain, atlassian, transformers...). Los
+tests usan las mismas funciones como presupuesto de regresión.
+
+    poetry run python -m benchmarks.bench_import_time --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Módulos que no deben cargarse al importar la aplicación: se importan al crear
+# el servicio LLM (lifespan), al crear el cliente de Jira o al contar tokens
+DEFERRED_MODULES = [
+    "langchain",
+    "langchain_ollama",
+    "langchain_core.chat_history",
+    "langchain_core.prompts",
+    "langsmith",
+    "ollama",
+    "atlassian",
+    "requests",
+    "transformers",
+    "torch",
+    "src.llm.instance",
+]
+
+# Presupuesto por defecto del tiempo de importación de src.main, con margen
+# sobre lo que tarda FastAPI en importarse
+DEFAULT_BUDGET_MS = 1500
+
+
+def measure_import(module: str = "src.main") -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Importa ``module`` en un intérprete nuevo con ``-X importtime``.
+
+    Devuelve el tiempo acumulado de la importación en milisegundos, el tiempo
+    propio de cada módulo importado y los módulos diferidos que se cargaron.
+    """
+    probe = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    self_times: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # Cabecera
+        name = parts[2].strip()
+        self_times[name] = self_us / 1000
+        if name == module:
+            total_us = cumulative_us
+
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return total_us / 1000, self_times, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Importaciones en intérpretes nuevos")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más lentos que se muestran")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Presupuesto en milisegundos")
+    parser.add_argument("--module", default="src.main", help="Módulo que se importa")
+    args = parser.parse_args()
+
+    totals = []
+    self_times: Dict[str, List[float]] = {}
+    loaded: List[str] = []
+    for _ in range(args.runs):
+        total, times, loaded = measure_import(args.module)
+        totals.append(total)
+        for name, value in times.items():
+            self_times.setdefault(name, []).append(value)
+
+    median = statistics.median(totals)
+    print(f"Importación de {args.module}: mediana {median:.0f} ms (mín {min(totals):.0f}, máx {max(totals):.0f}) en {args.runs} ejecuciones")
+    print(f"\nMódulos más lentos (tiempo propio, mediana):")
+    slowest = sorted(((statistics.median(v), k) for k, v in self_times.items()), reverse=True)[:args.top]
+    for value, name in slowest:
+        print(f"  {value:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"\nMódulos pesados cargados al importar: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"\nSe supera el presupuesto de {args.budget_ms:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\nDentro del presupuesto de {args.budget_ms:.0f} ms y sin importaciones pesadas")
+
+
+if __name__ == "__main__":
+    main()
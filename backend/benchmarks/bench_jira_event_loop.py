@@ -0,0 +1,85 @@
+"""
+Benchmark del impacto de un Jira lento en el resto de endpoints.
+
+Lanza peticiones concurrentes a ``GET /api/v1/jira/story/{id}`` contra un
+servidor Jira falso con latencia y, mientras tanto, mide la latencia de
+``GET /``. Compara las llamadas ejecutadas en el bucle de eventos (como antes
+del adaptador asíncrono) con el pool de hilos de ``AsyncJira``.
+
+Uso:
+    poetry run python -m benchmarks.bench_jira_event_loop
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import Executor, Future
+from unittest.mock import patch
+
+import httpx
+
+from benchmarks.fake_jira import FakeJiraServer
+
+
+class InlineExecutor(Executor):
+    """Ejecuta las llamadas en el propio bucle de eventos, bloqueándolo."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+async def measure(app, jira_requests: int, probe_interval: float = 0.02):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            # La latencia se mide desde el instante en que la petición debía salir,
+            # así se incluye el tiempo que el bucle de eventos estuvo bloqueado
+            scheduled = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                await client.get("/")
+                latencies.append(time.perf_counter() - scheduled)
+                scheduled += probe_interval
+
+        async def jira_load():
+            responses = await asyncio.gather(*(
+                client.get(f"/api/v1/jira/story/TEST-{i}") for i in range(jira_requests)
+            ))
+            assert all(r.status_code == 200 for r in responses)
+            done.set()
+
+        start = time.perf_counter()
+        await asyncio.gather(probe(), jira_load())
+        return time.perf_counter() - start, latencies
+
+
+def report(name, elapsed, latencies):
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p95 = latencies_ms[int(len(latencies_ms) * 0.95) - 1] if len(latencies_ms) > 1 else latencies_ms[0]
+    print(
+        f"{name:<28} total {elapsed:6.2f} s | GET / n={len(latencies_ms):3d} "
+        f"mediana {statistics.median(latencies_ms):8.1f} ms  p95 {p95:8.1f} ms  "
+        f"máx {latencies_ms[-1]:8.1f} ms"
+    )
+
+
+def main(delay: float = 0.5, jira_requests: int = 8) -> None:
+    with FakeJiraServer(delay=delay) as jira:
+        os.environ["JIRA_URL"] = jira.url
+        os.environ["JIRA_TOKEN"] = "token"
+        from src.main import app
+
+        print(f"Jira con {delay * 1000:.0f} ms de latencia, {jira_requests} peticiones concurrentes")
+        with patch("src.integrations.jira_client.get_jira_executor", return_value=InlineExecutor()):
+            report("bloqueante (en el bucle)", *asyncio.run(measure(app, jira_requests)))
+        report("AsyncJira (pool de hilos)", *asyncio.run(measure(app, jira_requests)))
+
+
+if __name__ == "__main__":
+    main()
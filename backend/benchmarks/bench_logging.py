@@ -0,0 +1,150 @@
+"""
+Coste de los logs de una petición de finalización con el nivel en INFO.
+
+Compara los logs anteriores (f-strings con el prompt, la respuesta y la
+historia completos, construidos aunque el nivel esté desactivado, y la
+historia volcada entera en INFO) con ``log_event``. Mide el tiempo de CPU
+por petición y los bytes escritos en el log, con un handler que escribe en
+memoria.
+
+Uso:
+    poetry run python -m benchmarks.bench_logging --requests 2000
+"""
+
+import argparse
+import io
+import logging
+import re
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from src.api.routes.finalize_story import FinalizeStoryRequest, _check_functional_tests, _log_finalize_request
+from src.observability.log import Payload, log_event
+
+logger = logging.getLogger("bench_logging")
+
+
+def build_request(items: int = 12, tests: int = 15) -> Dict[str, object]:
+    """Textos de una petición de finalización de tamaño realista."""
+    story = "Como usuario registrado quiero iniciar sesión con mi correo y contraseña. " * 20
+    corner_cases = [f"{i}. Caso esquina {i}: credenciales caducadas tras {i} intentos fallidos" for i in range(items)]
+    strategies = [f"{i}. Estrategia {i}: pruebas de integración del flujo de autenticación" for i in range(items)]
+    tests_body = "\n".join(
+        f"#### Test {i} - Escenario {i}\n**Dado** un usuario {i}\n**Cuando** inicia sesión\n**Entonces** accede"
+        for i in range(tests)
+    )
+    finalized = (
+        f"**Historia Finalizada:**\n{story}\n\n#### Criterios de Aceptación Funcionales\n{tests_body}\n\n"
+        f"#### Tests Funcionales\n{tests_body}\n\n#### Conclusiones\nTodo correcto."
+    )
+    prompt = "Eres un experto en historias de usuario. " * 60 + story + "\n".join(corner_cases + strategies)
+    request = FinalizeStoryRequest(
+        session_id=uuid.uuid4(),
+        refined_story=story,
+        corner_cases=corner_cases,
+        testing_strategy=strategies,
+        feedback="Añadir recuperación de contraseña"
+    )
+    response = {"finalized_story": finalized, "feedback": "Se añadieron criterios de recuperación"}
+    sections = {"**Historia Finalizada:**": finalized, "**Feedback:**": response["feedback"]}
+    return {"request": request, "prompt": prompt, "response": finalized, "sections": sections, "result": response}
+
+
+def legacy_logging(data: Dict[str, object]) -> None:
+    """Logs de una petición de finalización antes de ``log_event``."""
+    request = data["request"]
+    logger.info("Finalize Story Request Details:")
+    logger.info(f"Session ID: {request.session_id}")
+    logger.info(f"Refined Story: {request.refined_story}")
+    logger.info(f"Corner Cases: {request.corner_cases}")
+    logger.info(f"Testing Strategy: {request.testing_strategy}")
+    logger.info(f"Feedback: {request.feedback}")
+    # LLMService._process_step, _generate y _complete_step
+    logger.debug(f"Prompt formateado: {data['prompt']}")
+    logger.debug(f"Respuesta del LLM: {data['response']}")
+    logger.debug(f"Secciones extraídas: {data['sections']}")
+    logger.debug(f"Resultado post-procesado: {data['result']}")
+    # Ruta finalize_story
+    response = data["result"]
+    logger.info("Full LLM Response:")
+    logger.info(str(response))
+    finalized_story = response["finalized_story"]
+    logger.info("Searching for Functional Tests Section:")
+    logger.info("Full Finalized Story:")
+    logger.info(finalized_story)
+    tests_section_start = finalized_story.find("#### Tests Funcionales")
+    logger.info(f"Tests Section Start Index: {tests_section_start}")
+    if tests_section_start != -1:
+        tests_section_end = finalized_story.find("#### Conclusiones", tests_section_start)
+        if tests_section_end == -1:
+            tests_section_end = len(finalized_story)
+        tests_section = finalized_story[tests_section_start:tests_section_end]
+        logger.info("Functional Tests Section Found:")
+        logger.info(tests_section)
+        test_matches = re.findall(r"#### Test \d+ - .*", tests_section, re.MULTILINE)
+        logger.info("Detailed Test Extraction:")
+        logger.info(f"Number of Tests Found: {len(test_matches)}")
+        for test in test_matches:
+            logger.info(test)
+
+
+def structured_logging(data: Dict[str, object]) -> None:
+    """Logs de la misma petición con ``log_event``."""
+    request = data["request"]
+    _log_finalize_request(request)
+    log_event(logger, logging.DEBUG, "llm.prompt", session_id=request.session_id, step="finalization", prompt=Payload(data["prompt"]))
+    log_event(logger, logging.DEBUG, "llm.response", step="finalization", response=Payload(data["response"]))
+    log_event(logger, logging.DEBUG, "llm.sections", step="finalization", sections=Payload(data["sections"]))
+    log_event(logger, logging.DEBUG, "llm.result", step="finalization", result=Payload(data["result"]))
+    _check_functional_tests(request.session_id, data["result"]["finalized_story"])
+
+
+def measure(func: Callable[[Dict[str, object]], None], data: Dict[str, object], requests: int) -> Dict[str, float]:
+    """Tiempo de CPU por petición (µs) y bytes escritos en el log por petición."""
+    sink = io.StringIO()
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    loggers = [logger, logging.getLogger("src.api.routes.finalize_story")]
+    saved = [(target.handlers, target.level, target.propagate) for target in loggers]
+    for target in loggers:
+        target.handlers = [handler]
+        target.setLevel(logging.INFO)
+        target.propagate = False
+    try:
+        func(data)  # Calentamiento
+        sink.seek(0)
+        sink.truncate()
+        started = time.process_time()
+        for _ in range(requests):
+            func(data)
+        elapsed = time.process_time() - started
+        written = sink.tell()
+    finally:
+        for target, (handlers, level, propagate) in zip(loggers, saved):
+            target.handlers = handlers
+            target.setLevel(level)
+            target.propagate = propagate
+    return {"cpu_us": elapsed / requests * 1e6, "bytes": written / requests}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Peticiones simuladas")
+    args = parser.parse_args()
+
+    data = build_request()
+    results: List = []
+    for name, func in (("f-strings anteriores", legacy_logging), ("log_event", structured_logging)):
+        result = measure(func, data, args.requests)
+        results.append(result)
+        print(f"{name:<22} {result['cpu_us']:10.1f} µs CPU/petición {result['bytes']:10.0f} bytes/petición")
+    legacy, structured = results
+    print(
+        f"\nAhorro en INFO: {legacy['cpu_us'] - structured['cpu_us']:.1f} µs de CPU y "
+        f"{legacy['bytes'] - structured['bytes']:.0f} bytes de log por petición"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Tiempo de evaluación del prompt con la disposición anterior y la actual.
+
+Las plantillas colocan primero las instrucciones fijas y al final los datos
+de cada petición, de modo que el prefijo es idéntico entre peticiones y
+Ollama reutiliza su caché KV. Este script recorre el flujo completo
+(refinamiento, casos esquina, testing y finalización) para varias historias
+con las dos disposiciones: la anterior (datos antes de las instrucciones) y
+la actual, y compara los tokens que el modelo tiene que evaluar y el tiempo
+de evaluación del prompt.
+
+Contra Ollama (pide un único token por llamada y lee ``prompt_eval_count`` y
+``prompt_eval_duration`` de ``/api/generate``):
+    poetry run python -m benchmarks.bench_prompt_prefix --model llama3.2:1b
+
+Sin Ollama, con un servidor simulado que reutiliza, como Ollama, el prefijo
+común más largo entre sus ranuras de caché:
+    poetry run python -m benchmarks.bench_prompt_prefix --stand-in
+"""
+
+import argparse
+import asyncio
+import re
+from typing import Dict, List, Tuple
+
+import httpx
+
+from src.llm.backends import parse_keep_alive
+from src.llm.config import LLMConfig
+from src.llm.prompts.corner_case import CORNER_CASE_INPUTS, CORNER_CASE_INSTRUCTIONS
+from src.llm.prompts.finalize import FINALIZE_INPUTS, FINALIZE_INSTRUCTIONS
+from src.llm.prompts.refinement import REFINEMENT_INPUTS, REFINEMENT_INSTRUCTIONS
+from src.llm.prompts.testing import TESTING_STRATEGY_INPUTS, TESTING_STRATEGY_INSTRUCTIONS
+
+# (instrucciones fijas, datos variables) de cada paso, en el orden del flujo
+STEPS = {
+    "refinement": (REFINEMENT_INSTRUCTIONS, REFINEMENT_INPUTS),
+    "corner_cases": (CORNER_CASE_INSTRUCTIONS, CORNER_CASE_INPUTS),
+    "testing_strategy": (TESTING_STRATEGY_INSTRUCTIONS, TESTING_STRATEGY_INPUTS),
+    "finalization": (FINALIZE_INSTRUCTIONS, FINALIZE_INPUTS),
+}
+
+FEATURES = [
+    "recuperar mi contraseña por correo", "exportar mis facturas en PDF",
+    "invitar a compañeros a mi proyecto", "configurar alertas de consumo",
+    "pagar con tarjeta guardada", "filtrar pedidos por fecha",
+    "cambiar el idioma de la aplicación", "descargar mis datos personales",
+]
+
+
+def layouts(instructions: str, inputs: str) -> Dict[str, str]:
+    """Plantilla anterior (datos antes de las instrucciones) y actual (instrucciones primero)."""
+    return {"anterior": inputs + instructions, "actual": instructions + inputs}
+
+
+def step_variables(story: str) -> Dict[str, str]:
+    corner_cases = f"1. {story} sin conexión\n2. {story} con datos inválidos"
+    strategies = f"1. Test de integración de {story}"
+    return {
+        "user_story": story,
+        "refined_user_story": f"{story}, de forma segura y con confirmación.",
+        "existing_corner_cases": "No hay casos esquina previos.",
+        "corner_cases": corner_cases,
+        "existing_testing_strategies": "No hay estrategias previas.",
+        "testing_strategy": strategies,
+        "story_input": story,
+        "feedback": "Sin feedback adicional.",
+    }
+
+
+class StandInOllama:
+    """
+    Servidor simulado con ``slots`` ranuras de caché KV.
+
+    Como Ollama, cada petición reutiliza el prefijo común más largo entre las
+    ranuras y solo evalúa los tokens restantes, con un coste fijo por token.
+    Si usar esa ranura borrara parte de su caché, el prefijo se copia a la
+    ranura usada hace más tiempo.
+    """
+
+    def __init__(self, slots: int = 4, seconds_per_token: float = 0.0002):
+        self.slots: List[List[str]] = [[] for _ in range(slots)]
+        self.last_used = [0] * slots
+        self.requests = 0
+        self.seconds_per_token = seconds_per_token
+
+    @staticmethod
+    def tokenize(prompt: str) -> List[str]:
+        return re.findall(r"\w+|[^\w\s]|\s+", prompt)
+
+    @staticmethod
+    def common_prefix(a: List[str], b: List[str]) -> int:
+        n = 0
+        for x, y in zip(a, b):
+            if x != y:
+                break
+            n += 1
+        return n
+
+    async def evaluate(self, prompt: str) -> Tuple[int, float]:
+        tokens = self.tokenize(prompt)
+        prefixes = [self.common_prefix(cached, tokens) for cached in self.slots]
+        best = max(range(len(self.slots)), key=lambda i: prefixes[i])
+        slot = best
+        if prefixes[best] < len(self.slots[best]):
+            slot = min(range(len(self.slots)), key=lambda i: self.last_used[i])
+        evaluated = len(tokens) - prefixes[best]
+        self.requests += 1
+        self.slots[slot] = tokens
+        self.last_used[slot] = self.requests
+        seconds = evaluated * self.seconds_per_token
+        await asyncio.sleep(seconds)
+        return evaluated, seconds
+
+
+class OllamaPromptEval:
+    """Mide la evaluación del prompt en un Ollama real generando un único token."""
+
+    def __init__(self, client: httpx.AsyncClient, model: str, num_ctx: int, keep_alive):
+        self.client = client
+        self.model = model
+        self.num_ctx = num_ctx
+        self.keep_alive = keep_alive
+
+    async def evaluate(self, prompt: str) -> Tuple[int, float]:
+        response = await self.client.post("/api/generate", json={
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": 1, "num_ctx": self.num_ctx, "temperature": 0},
+        })
+        response.raise_for_status()
+        body = response.json()
+        return body.get("prompt_eval_count", 0), body.get("prompt_eval_duration", 0) / 1e9
+
+
+async def run_layout(server, layout: str, stories: List[str]) -> Dict[str, List[Tuple[int, float]]]:
+    """Ejecuta el flujo completo por historia y devuelve (tokens evaluados, segundos) por paso."""
+    results: Dict[str, List[Tuple[int, float]]] = {step: [] for step in STEPS}
+    for story in stories:
+        variables = step_variables(story)
+        for step, (instructions, inputs) in STEPS.items():
+            template = layouts(instructions, inputs)[layout]
+            prompt = template.format(**{k: v for k, v in variables.items() if "{" + k + "}" in template})
+            results[step].append(await server.evaluate(prompt))
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    stories = [f"Como usuario quiero {feature}" for feature in FEATURES[:args.stories]]
+    config = LLMConfig()
+    client = None
+    report = {}
+    try:
+        for layout in ("anterior", "actual"):
+            if args.stand_in:
+                server = StandInOllama(slots=args.slots)
+            else:
+                client = client or httpx.AsyncClient(base_url=config.OLLAMA_BASE_URL, timeout=300)
+                server = OllamaPromptEval(
+                    client, args.model or config.MODEL_NAME, config.MAX_LENGTH,
+                    parse_keep_alive(config.OLLAMA_KEEP_ALIVE)
+                )
+            # La primera historia solo calienta la caché; no se mide
+            await run_layout(server, layout, stories[:1])
+            report[layout] = await run_layout(server, layout, stories[1:])
+    finally:
+        if client is not None:
+            await client.aclose()
+
+    print(f"{len(stories) - 1} historias medidas ({'simulado' if args.stand_in else args.model or config.MODEL_NAME})")
+    print(f"{'paso':<18} {'disposición':<12} {'tokens evaluados':>17} {'eval. prompt (ms)':>18}")
+    for step in STEPS:
+        for layout in ("anterior", "actual"):
+            samples = report[layout][step]
+            tokens = sum(t for t, _ in samples) / len(samples)
+            seconds = sum(s for _, s in samples) / len(samples)
+            print(f"{step:<18} {layout:<12} {tokens:17.0f} {seconds * 1000:18.1f}")
+    for layout in ("anterior", "actual"):
+        total = sum(s for step in STEPS for _, s in report[layout][step])
+        print(f"Total evaluación del prompt ({layout}): {total * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="", help="modelo de Ollama (por defecto MODEL_NAME)")
+    parser.add_argument("--stories", type=int, default=6, help=f"historias a procesar (máx. {len(FEATURES)})")
+    parser.add_argument("--stand-in", action="store_true", help="usar un servidor simulado en lugar de Ollama")
+    parser.add_argument("--slots", type=int, default=4, help="ranuras de caché del servidor simulado")
+    asyncio.run(main(parser.parse_args()))
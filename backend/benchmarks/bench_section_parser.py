@@ -0,0 +1,133 @@
+"""
+Microbenchmark de la extracción de secciones.
+
+Compara la implementación anterior (una llamada por marcador a
+``extract_section``, el antiguo ``LLMService._extract_section``) con
+``SectionParser`` sobre una respuesta completa y sobre la misma respuesta
+recibida en fragmentos.
+
+Uso:
+    poetry run python -m benchmarks.bench_section_parser
+"""
+
+import logging
+import timeit
+from typing import Dict, List, Optional
+
+from src.llm.parsing import SectionParser
+from src.observability.log import Payload, log_event
+
+logger = logging.getLogger("bench_section_parser")
+
+MARKERS = ["**Historia Finalizada:**", "#### Tests Funcionales"]
+
+
+def build_response(tests: int = 40) -> str:
+    body = "\n".join(
+        f"#### Test {i} - Escenario {i}\n**Dado** un usuario {i}\n"
+        f"**Cuando** realiza la acción {i}\n**Entonces** ve el mensaje {i}\n"
+        for i in range(tests)
+    )
+    return (
+        "**Historia Finalizada:**\nComo usuario registrado quiero iniciar sesión.\n\n"
+        "#### Criterios de Aceptación Funcionales\n" + body +
+        "\n#### Tests Funcionales\n" + body + "\n#### Conclusiones\nTodo correcto."
+    )
+
+
+def extract_section(text: str, start_marker: str, end_marker: Optional[str] = None) -> str:
+    """Implementación anterior: extrae una sección de texto entre dos marcadores."""
+    try:
+        if not isinstance(text, str):
+            logger.warning(f"Texto no es string: {type(text)}")
+            return str(text)
+
+        # Normalizar el texto y los marcadores
+        text = text.strip()
+        start_marker = start_marker.strip()
+        if end_marker:
+            end_marker = end_marker.strip()
+
+        log_event(logger, logging.DEBUG, "llm.extract_section", start_marker=start_marker, end_marker=end_marker, text=Payload(text))
+
+        start_idx = text.find(start_marker)
+        if start_idx == -1:
+            logger.warning(f"No se encontró el marcador inicial: '{start_marker}' en el texto")
+            # Buscar marcadores similares para ayudar en el diagnóstico
+            possible_markers = [line for line in text.split('\n') if '**' in line]
+            if possible_markers:
+                logger.warning(f"Marcadores similares encontrados: {possible_markers}")
+            return ""
+
+        start_idx += len(start_marker)
+        if end_marker:
+            end_idx = text.find(end_marker, start_idx)
+            if end_idx == -1:
+                result = text[start_idx:].strip()
+                log_event(logger, logging.DEBUG, "llm.section_without_end", end_marker=end_marker, section=Payload(result))
+                return result
+            result = text[start_idx:end_idx].strip()
+            log_event(logger, logging.DEBUG, "llm.section", section=Payload(result))
+            return result
+
+        result = text[start_idx:].strip()
+        log_event(logger, logging.DEBUG, "llm.section", section=Payload(result))
+        return result
+
+    except Exception as e:
+        logger.error(f"Error al extraer sección: {str(e)}")
+        logger.error(f"Texto problemático: {text[:200]}...")  # Log texto problemático
+        return ""
+
+
+def legacy_extract(text: str, markers: List[str]) -> Dict[str, str]:
+    sections = {}
+    for i, marker in enumerate(markers):
+        next_marker = markers[i + 1] if i + 1 < len(markers) else None
+        sections[marker] = extract_section(text, marker, next_marker)
+    return sections
+
+
+def legacy_stream(chunks: List[str], markers: List[str]) -> Dict[str, str]:
+    # Sin parser incremental, detectar secciones cerradas exige reextraer el acumulado
+    text = ''
+    for chunk in chunks:
+        text += chunk
+        sections = legacy_extract(text, markers)
+    return sections
+
+
+def parser_extract(text: str, markers: List[str]) -> Dict[str, str]:
+    return SectionParser(markers).parse(text)
+
+
+def parser_stream(chunks: List[str], markers: List[str]) -> Dict[str, str]:
+    parser = SectionParser(markers)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    return parser.sections
+
+
+def main(number: int = 500) -> None:
+    # Los avisos de marcadores ausentes de las extracciones parciales no interesan aquí
+    logging.disable(logging.WARNING)
+    text = build_response()
+    chunks = [text[i:i + 8] for i in range(0, len(text), 8)]
+    assert legacy_extract(text, MARKERS) == parser_extract(text, MARKERS) == parser_stream(chunks, MARKERS)
+
+    cases = {
+        "legacy extract_section x marcador": lambda: legacy_extract(text, MARKERS),
+        "SectionParser.parse": lambda: parser_extract(text, MARKERS),
+        f"legacy reextracción ({len(chunks)} fragmentos)": lambda: legacy_stream(chunks, MARKERS),
+        f"SectionParser.feed ({len(chunks)} fragmentos)": lambda: parser_stream(chunks, MARKERS),
+    }
+    print(f"Respuesta de {len(text)} caracteres, {number} iteraciones")
+    for name, func in cases.items():
+        iterations = max(1, number // 50) if name.startswith("legacy reextracción") else number
+        best = min(timeit.repeat(func, number=iterations, repeat=5)) / iterations
+        print(f"{name:<45} {best * 1e6:10.2f} µs/respuesta")
+
+
+if __name__ == "__main__":
+    main()
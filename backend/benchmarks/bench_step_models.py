@@ -0,0 +1,185 @@
+"""
+Comparativa de modelos candidatos para cada paso del flujo.
+
+Ejecuta los cuatro pasos (refinamiento, casos esquina, estrategia de testing
+y finalización) con cada modelo sobre las mismas entradas de ejemplo y mide
+la latencia de la generación y si la respuesta respeta el formato esperado,
+es decir, si contiene con contenido todas las secciones que el servicio
+extrae. Al final sugiere, para cada paso, el modelo más rápido entre los que
+cumplen siempre el formato.
+
+Contra Ollama (usa OLLAMA_BASE_URL de la configuración):
+    poetry run python -m benchmarks.bench_step_models --models llama3.2:1b,llama3.1:8b --runs 3
+
+Sin Ollama, con LLM simulados que imitan modelos de distinta velocidad:
+    poetry run python -m benchmarks.bench_step_models --stand-in
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+from uuid import uuid4
+
+from src.llm.backends import create_llm
+from src.llm.config import LLMConfig
+from src.llm.models import ProcessState
+from src.llm.parsing import SectionParser
+from src.llm.service import LLMService
+from src.llm.step_models import STEP_PREFIXES, StepModelConfig, default_step_model
+
+USER_STORY = (
+    "Como usuario registrado quiero recuperar mi contraseña por correo "
+    "para poder acceder de nuevo a mi cuenta."
+)
+REFINED_STORY = (
+    "Como usuario registrado quiero solicitar un enlace de recuperación de "
+    "contraseña a mi correo, válido durante 30 minutos, para restablecer el "
+    "acceso a mi cuenta sin contactar con soporte."
+)
+CORNER_CASES = [
+    "El correo no está registrado",
+    "El enlace ha caducado",
+    "Se solicitan varios enlaces seguidos",
+]
+TESTING_STRATEGIES = [
+    "Test unitario de la caducidad del enlace",
+    "Test de integración del envío de correo",
+]
+
+STAND_IN_RESPONSES = {
+    ProcessState.REFINEMENT: (
+        "**Historia Refinada:**\n" + REFINED_STORY + "\n\n"
+        "**Cambios Realizados:**\n- Se añade la caducidad del enlace"
+    ),
+    ProcessState.CORNER_CASES: (
+        "**Casos Esquina Actualizados:**\n" + "\n".join(f"- {c}" for c in CORNER_CASES) + "\n\n"
+        "**Análisis de Cambios:**\n- Se cubren los errores de entrada"
+    ),
+    ProcessState.TESTING_STRATEGY: (
+        "**Estrategias de Testing Actualizadas:**\n" + "\n".join(f"- {t}" for t in TESTING_STRATEGIES) + "\n\n"
+        "**Análisis de Cambios:**\n- Se cubren los casos esquina"
+    ),
+    ProcessState.FINALIZATION: (
+        "**Historia Finalizada:**\n" + REFINED_STORY + "\n\n"
+        "#### Tests Funcionales\n#### Test 1 - Enlace caducado\n**Dado** un enlace de hace una hora"
+    ),
+}
+
+
+# Marcador de cada paso presente en su plantilla, para que el LLM simulado sepa qué paso atiende
+STEP_MARKERS = {
+    ProcessState.REFINEMENT: "Historia Refinada:",
+    ProcessState.CORNER_CASES: "Casos Esquina Actualizados:",
+    ProcessState.TESTING_STRATEGY: "Estrategias de Testing Actualizadas:",
+    ProcessState.FINALIZATION: "Historia Finalizada:",
+}
+
+
+class StandInLLM:
+    """LLM simulado: tarda en proporción al prompt y omite el formato cada ``sloppy_every`` llamadas."""
+
+    def __init__(self, model: str, seconds_per_kchar: float, sloppy_every: int = 0):
+        self.model = model
+        self.temperature = 0.0
+        self.seconds_per_kchar = seconds_per_kchar
+        self.sloppy_every = sloppy_every
+        self.calls = 0
+
+    async def ainvoke(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.seconds_per_kchar * len(prompt) / 1000)
+        state = next(s for s, marker in STEP_MARKERS.items() if marker in prompt)
+        response = STAND_IN_RESPONSES[state]
+        if self.sloppy_every and self.calls % self.sloppy_every == 0:
+            # Responde sin la primera sección, como hacen a veces los modelos pequeños
+            return response.split("\n\n", 1)[1]
+        return response
+
+
+def build_steps(service: LLMService) -> Dict[ProcessState, Dict[str, Any]]:
+    """Parámetros de cada paso con las entradas de ejemplo, tal y como los construye el servicio."""
+    session_id = uuid4()
+    return {
+        ProcessState.REFINEMENT: service._refinement_step(session_id, USER_STORY),
+        ProcessState.CORNER_CASES: service._corner_cases_step(session_id, REFINED_STORY),
+        ProcessState.TESTING_STRATEGY: service._testing_strategy_step(session_id, REFINED_STORY, CORNER_CASES),
+        ProcessState.FINALIZATION: service._finalization_step(
+            session_id, REFINED_STORY, CORNER_CASES, TESTING_STRATEGIES
+        ),
+    }
+
+
+def is_compliant(response: str, markers: List[str]) -> bool:
+    """La respuesta cumple el formato si todas las secciones aparecen con contenido."""
+    sections = SectionParser(markers).parse(response)
+    return all(sections.get(marker, '').strip() for marker in markers)
+
+
+async def run_model(llm: Any, runs: int) -> Dict[ProcessState, Dict[str, Any]]:
+    service = LLMService(config=LLMConfig(CACHE_BACKEND="none", LLM_MAX_IN_FLIGHT=0), llm=llm)
+    results = {}
+    for state, step in build_steps(service).items():
+        prompt = step['prompt_template'].format(**step['input_variables'])
+        latencies, compliant = [], 0
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = await llm.ainvoke(prompt)
+            latencies.append(time.perf_counter() - started)
+            compliant += is_compliant(response, step['extract_markers'])
+        results[state] = {
+            "p50": statistics.median(latencies),
+            "max": max(latencies),
+            "compliance": compliant / runs,
+        }
+    return results
+
+
+def build_candidates(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.stand_in:
+        return {
+            "simulado-rapido": StandInLLM("simulado-rapido", 0.001, sloppy_every=2),
+            "simulado-medio": StandInLLM("simulado-medio", 0.003),
+            "simulado-lento": StandInLLM("simulado-lento", 0.008),
+        }
+    config = LLMConfig()
+    default = default_step_model(config)
+    return {
+        model: create_llm(config, StepModelConfig(
+            model_name=model,
+            temperature=args.temperature if args.temperature is not None else default.temperature,
+            context_window=args.context_window or default.context_window
+        ))
+        for model in args.models.split(',') if model.strip()
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    candidates = build_candidates(args)
+    report = {model: await run_model(llm, args.runs) for model, llm in candidates.items()}
+
+    print(f"{args.runs} ejecuciones por paso y modelo")
+    print(f"{'paso':<18} {'modelo':<24} {'p50 (s)':>9} {'máx (s)':>9} {'formato':>8}")
+    for state in STEP_PREFIXES:
+        for model, steps in report.items():
+            r = steps[state]
+            print(f"{state.value:<18} {model:<24} {r['p50']:9.3f} {r['max']:9.3f} {r['compliance']:8.0%}")
+
+    print("\nModelo sugerido por paso (el más rápido que siempre respeta el formato):")
+    for state, prefix in STEP_PREFIXES.items():
+        valid = [(steps[state]['p50'], model) for model, steps in report.items() if steps[state]['compliance'] == 1]
+        print(f"{prefix}_MODEL_NAME={min(valid)[1]}" if valid else f"# {prefix}: ningún candidato cumple el formato")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default="", help="modelos candidatos separados por comas")
+    parser.add_argument("--runs", type=int, default=3, help="ejecuciones por paso y modelo")
+    parser.add_argument("--temperature", type=float, default=None)
+    parser.add_argument("--context-window", type=int, default=None)
+    parser.add_argument("--stand-in", action="store_true", help="usar LLM simulados en lugar de Ollama")
+    args = parser.parse_args()
+    if not args.stand_in and not args.models:
+        parser.error("indique --models o --stand-in")
+    asyncio.run(main(args))
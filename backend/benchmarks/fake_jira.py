@@ -0,0 +1,77 @@
+"""Servidor HTTP local que imita la API REST de Jira con una latencia configurable."""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeJiraServer:
+    """Responde a las rutas de issues de Jira tras esperar ``delay`` segundos."""
+
+    def __init__(self, delay: float = 0.5):
+        self.delay = delay
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.delay)
+                match = re.search(r"/issue/([A-Z]+-\d+)", self.path)
+                if not match:
+                    return self._reply(404, {"errorMessages": ["Issue Does Not Exist"]})
+                key = match.group(1)
+                self._reply(200, {
+                    "key": key,
+                    "fields": {
+                        "summary": f"Historia {key}",
+                        "description": "Como usuario quiero iniciar sesión",
+                        "updated": "2024-01-01T00:00:00.000+0000",
+                    },
+                })
+
+            def do_POST(self):
+                server.requests += 1
+                time.sleep(server.delay)
+                self._read_body()
+                self._reply(201, {"key": "TEST-1", "id": "10001"})
+
+            def do_PUT(self):
+                server.requests += 1
+                time.sleep(server.delay)
+                self._read_body()
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
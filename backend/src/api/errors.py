@@ -0,0 +1,20 @@
+"""Conversión de errores del servicio LLM en respuestas HTTP."""
+
+from fastapi import HTTPException
+
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError
+
+
+def queue_full_error(error: LLMQueueFullError) -> HTTPException:
+    """Devuelve un 429 con la cabecera Retry-After para una cola del LLM llena."""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def prompt_too_long_error(error: PromptTooLongError) -> HTTPException:
+    """Devuelve un 413 para una petición que no cabe en la ventana de contexto del modelo."""
+    return HTTPException(status_code=413, detail=str(error))
@@ -3,8 +3,14 @@ from pydantic import BaseModel, Field, ConfigDict, ValidationInfo, field_validat
 from typing import Optional, List
 from src.dependencies import get_llm_service
 from src.llm.service import LLMService
+from src.api.sse import sse_response
+from src.api.errors import prompt_too_long_error, queue_full_error
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError, TokenUsage
 from uuid import UUID
+from src.observability.log import Payload, log_event
 import logging
+import re
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -107,6 +113,10 @@ Criterios de Aceptación de Testing:
             }
         }
     )
+    bypass_cache: bool = Field(
+        False,
+        description="Si es true, ignora la caché de respuestas y fuerza una nueva generación del LLM"
+    )
 
     @model_validator(mode='after')
     def validate_input_combination(self) -> 'FinalizeStoryRequest':
@@ -170,6 +180,57 @@ Criterios de Aceptación de Testing:
     session_id: UUID = Field(..., description="ID de la sesión")
     finalized_story: str = Field(..., description="Historia de usuario finalizada")
     feedback: str = Field(..., description="Feedback sobre los cambios y decisiones tomadas")
+    token_usage: Optional[TokenUsage] = Field(
+        None,
+        description="Tokens del prompt y de la respuesta, y entradas recortadas para ajustarse a la ventana de contexto"
+    )
+
+TEST_PATTERN = re.compile(r"#### Test \d+ - .*", re.MULTILINE)
+
+def _log_finalize_request(request: FinalizeStoryRequest) -> None:
+    """Registra los datos de la petición: tamaños en INFO y textos (recortados) en DEBUG."""
+    log_event(
+        logger, logging.INFO, "finalize_story.request",
+        session_id=request.session_id,
+        story_chars=len(request.refined_story or request.finalized_story or ''),
+        corner_cases=len(request.corner_cases or []),
+        testing_strategies=len(request.testing_strategy or []),
+        feedback=request.feedback is not None
+    )
+    log_event(
+        logger, logging.DEBUG, "finalize_story.request_payload",
+        session_id=request.session_id,
+        story=Payload(request.refined_story or request.finalized_story),
+        corner_cases=Payload(request.corner_cases),
+        testing_strategy=Payload(request.testing_strategy),
+        feedback=Payload(request.feedback)
+    )
+
+def _check_functional_tests(session_id: UUID, finalized_story: str) -> None:
+    """Comprueba que la historia finalizada tiene tests funcionales y lo registra."""
+    tests_section_start = finalized_story.find("#### Tests Funcionales")
+    if tests_section_start == -1:
+        logger.warning("NO 'Tests Funcionales' SECTION FOUND IN THE RESPONSE!")
+        tests = 0
+    else:
+        tests_section_end = finalized_story.find("#### Conclusiones", tests_section_start)
+        if tests_section_end == -1:
+            tests_section_end = len(finalized_story)
+        tests = len(TEST_PATTERN.findall(finalized_story, tests_section_start, tests_section_end))
+        # Log if no tests are found, but don't raise an exception
+        if tests == 0:
+            logger.warning("No functional tests found in the Tests Funcionales section.")
+    log_event(
+        logger, logging.INFO, "finalize_story.result",
+        session_id=session_id,
+        story_chars=len(finalized_story),
+        functional_tests=tests
+    )
+    log_event(
+        logger, logging.DEBUG, "finalize_story.result_payload",
+        session_id=session_id,
+        finalized_story=Payload(finalized_story)
+    )
 
 @router.post(
     "/finalize_story",
@@ -196,13 +257,7 @@ async def finalize_story(
     - Tests Funcionales (formato configurable, Gherkin por defecto)
     - Criterios de Aceptación de Testing
     """
-    # Log the input details with more verbosity
-    logger.info("Finalize Story Request Details:")
-    logger.info(f"Session ID: {request.session_id}")
-    logger.info(f"Refined Story: {request.refined_story}")
-    logger.info(f"Corner Cases: {request.corner_cases}")
-    logger.info(f"Testing Strategy: {request.testing_strategy}")
-    logger.info(f"Feedback: {request.feedback}")
+    _log_finalize_request(request)
 
     try:
         # Convert session_id to UUID, creating a new one if not provided
@@ -221,65 +276,71 @@ async def finalize_story(
             story_input=request.refined_story or request.finalized_story,
             corner_cases=request.corner_cases,
             testing_strategy=request.testing_strategy,
-            feedback=request.feedback
+            feedback=request.feedback,
+            bypass_cache=request.bypass_cache
         )
 
-        # Log the full LLM response for debugging
-        logger.info("Full LLM Response:")
-        logger.info(str(response))
-
         # Extract the finalized story from the response dictionary
         finalized_story = response.get('finalized_story', '')
         feedback = response.get('feedback', '')
 
-        # Detailed logging for functional tests section
-        logger.info("Searching for Functional Tests Section:")
-        
-        # Explicitly log the entire finalized story for inspection
-        logger.info("Full Finalized Story:")
-        logger.info(finalized_story)
-
-        # Check for Functional Tests section
-        tests_section_start = finalized_story.find("#### Tests Funcionales")
-        logger.info(f"Tests Section Start Index: {tests_section_start}")
-
-        # If Tests Funcionales section exists
-        if tests_section_start != -1:
-            # Try to extract the tests section
-            tests_section_end = finalized_story.find("#### Conclusiones", tests_section_start)
-            if tests_section_end == -1:
-                tests_section_end = len(finalized_story)
-            
-            tests_section = finalized_story[tests_section_start:tests_section_end]
-            logger.info("Functional Tests Section Found:")
-            logger.info(tests_section)
-            
-            # Detailed test extraction
-            test_pattern = r"#### Test \d+ - .*"
-            import re
-            test_matches = re.findall(test_pattern, tests_section, re.MULTILINE)
-            
-            logger.info("Detailed Test Extraction:")
-            logger.info(f"Number of Tests Found: {len(test_matches)}")
-            for test in test_matches:
-                logger.info(test)
-            
-            # Log if no tests are found, but don't raise an exception
-            if len(test_matches) == 0:
-                logger.warning("No functional tests found in the Tests Funcionales section.")
-        else:
-            # No Tests Funcionales section found
-            logger.warning("NO 'Tests Funcionales' SECTION FOUND IN THE RESPONSE!")
+        _check_functional_tests(session_id, finalized_story)
 
         # Create and return the response
         finalized_story_response = FinalizeStoryResponse(
             session_id=session_id,
             finalized_story=finalized_story,
-            feedback=feedback
+            feedback=feedback,
+            token_usage=response.get('token_usage')
         )
 
         return finalized_story_response
 
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
     except Exception as e:
         logger.error(f"Error in finalize_story: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/finalize_story/stream",
+    summary="Finaliza una historia de usuario en streaming",
+    tags=["Finalization"]
+)
+async def finalize_story_stream(
+    request: FinalizeStoryRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    Versión en streaming de `/finalize_story` mediante Server-Sent Events.
+
+    Emite un evento `session` con el ID de sesión, eventos `token` con cada fragmento
+    generado, un evento `section` en cuanto se cierra cada sección marcada de la
+    respuesta y un evento final `result` con el mismo contenido que el endpoint
+    no streaming.
+    """
+    try:
+        session_id = request.session_id or await llm_service.create_session()
+
+        events = await llm_service.finalize_story_stream(
+            session_id=session_id,
+            story_input=request.refined_story or request.finalized_story,
+            corner_cases=request.corner_cases,
+            testing_strategy=request.testing_strategy,
+            feedback=request.feedback,
+            bypass_cache=request.bypass_cache
+        )
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(
+        session_id,
+        events,
+        lambda result: FinalizeStoryResponse(session_id=session_id, **result).model_dump(mode="json")
+    )
@@ -3,6 +3,10 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 from src.dependencies import get_llm_service
 from src.llm.service import LLMService
+from src.api.sse import sse_response
+from src.api.errors import prompt_too_long_error, queue_full_error
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError, TokenUsage
 from uuid import UUID
 import logging
 
@@ -39,6 +43,18 @@ class IdentifyCornerCasesRequest(BaseModel):
             "description": "Lista de casos esquina existentes de iteraciones previas."
         }
     )
+    bypass_cache: bool = Field(
+        False,
+        json_schema_extra={
+            "description": "Si es true, ignora la caché de respuestas y fuerza una nueva generación del LLM."
+        }
+    )
+    fan_out: Optional[bool] = Field(
+        None,
+        json_schema_extra={
+            "description": "Si es true, divide la historia en áreas de aceptación y genera los casos esquina de cada área en paralelo; si es false, nunca la divide. Por defecto solo se dividen las historias grandes. Requiere FANOUT_MAX_SECTIONS de 2 o más. No aplica a la versión en streaming."
+        }
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -75,6 +91,12 @@ class IdentifyCornerCasesResponse(BaseModel):
             "description": "Resumen de los cambios realizados por el LLM."
         }
     )
+    token_usage: Optional[TokenUsage] = Field(
+        None,
+        json_schema_extra={
+            "description": "Tokens del prompt y de la respuesta, y entradas recortadas para ajustarse a la ventana de contexto."
+        }
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -108,20 +130,67 @@ async def identify_corner_cases(
     - **existing_corner_cases**: Lista opcional de casos esquina existentes.
     """
     try:
-        session_id = request.session_id or llm_service.create_session()
+        session_id = request.session_id or await llm_service.create_session()
 
         result = await llm_service.identify_corner_cases(
             session_id=session_id,
             refined_story=request.story,
             feedback=request.feedback,
-            existing_corner_cases=request.existing_corner_cases
+            existing_corner_cases=request.existing_corner_cases,
+            bypass_cache=request.bypass_cache,
+            fan_out=request.fan_out
         )
 
         return {
             "session_id": session_id,
             "corner_cases": result['corner_cases'],
-            "corner_cases_feedback": result['corner_cases_feedback']
+            "corner_cases_feedback": result['corner_cases_feedback'],
+            "token_usage": result.get('token_usage')
         }
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
     except Exception as e:
         logger.error(f"Error al identificar casos esquina: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/identify_corner_cases/stream",
+    summary="Identifica casos esquina en streaming",
+    tags=["Corner Cases"]
+)
+async def identify_corner_cases_stream(
+    request: IdentifyCornerCasesRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    Versión en streaming de `/identify_corner_cases` mediante Server-Sent Events.
+
+    Emite un evento `session` con el ID de sesión, eventos `token` con cada fragmento
+    generado, un evento `section` en cuanto se cierra cada sección marcada de la
+    respuesta y un evento final `result` con el mismo contenido que el endpoint
+    no streaming.
+    """
+    try:
+        session_id = request.session_id or await llm_service.create_session()
+
+        events = await llm_service.identify_corner_cases_stream(
+            session_id=session_id,
+            refined_story=request.story,
+            feedback=request.feedback,
+            existing_corner_cases=request.existing_corner_cases,
+            bypass_cache=request.bypass_cache
+        )
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(
+        session_id,
+        events,
+        lambda result: IdentifyCornerCasesResponse(session_id=session_id, **result).model_dump(mode="json")
+    )
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, model_validator, ValidationError
-from atlassian import Jira
+from src.integrations.jira_client import AsyncJira
+from src.integrations.jira_cache import JiraStoryCache
+from src.dependencies import get_jira_client, get_jira_story_cache, get_llm_service
+from src.llm.service import LLMService
+from src.observability.log import Payload, log_event
+import asyncio
+import json
 import os
 import re
 import logging
-from typing import Optional, Literal
+from typing import Any, AsyncIterator, Dict, List, Optional, Literal
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -38,9 +45,22 @@ class JiraStoryUpdateResponse(BaseModel):
     action: Literal["created", "updated"]
     message: str
 
+def _story_fields(story_request: JiraStoryUpdateRequest, project_key: Optional[str] = None) -> Dict[str, Any]:
+    """Campos de Jira para crear (con proyecto) o actualizar una historia."""
+    fields: Dict[str, Any] = {
+        'summary': story_request.title,
+        'description': story_request.description or ''
+    }
+    if project_key:
+        fields['project'] = {'key': project_key}
+        fields['issuetype'] = {'name': 'Story'}
+    return fields
+
 @router.post("/jira/story", response_model=JiraStoryUpdateResponse)
 async def update_or_create_jira_story(
     story_request: JiraStoryUpdateRequest,
+    jira: Optional[AsyncJira] = Depends(get_jira_client),
+    story_cache: Optional[JiraStoryCache] = Depends(get_jira_story_cache)
 ):
     """
     Actualizar una historia de usuario en Jira o crear una nueva si no existe.
@@ -48,20 +68,14 @@ async def update_or_create_jira_story(
     - Si se proporciona `story_id`, intenta actualizar la historia existente.
     - Si no se proporciona `story_id`, intenta crear una nueva historia.
     """
-    # Verificar variables de entorno
-    if not os.getenv('JIRA_URL') or not os.getenv('JIRA_TOKEN') or not os.getenv('JIRA_PROJECT_KEY'):
+    # Verificar configuración
+    if jira is None or not os.getenv('JIRA_PROJECT_KEY'):
         raise HTTPException(
             status_code=500,
             detail="Error al conectar con Jira: Configuración incompleta. Asegúrese de definir JIRA_URL, JIRA_TOKEN y JIRA_PROJECT_KEY"
         )
 
     try:
-        # Inicializar cliente de Jira
-        jira = Jira(
-            url=os.getenv('JIRA_URL'),
-            token=os.getenv('JIRA_TOKEN')
-        )
-
         # Intentar actualizar o crear la historia
         try:
             if story_request.story_id:
@@ -69,12 +83,9 @@ async def update_or_create_jira_story(
                 # Usar fields para actualizar título y descripción
                 logger.info(f"Intentando actualizar historia: {story_request.story_id}")
                 try:
-                    jira.update_issue_field(
-                        story_request.story_id, 
-                        fields={
-                            'summary': story_request.title,
-                            'description': story_request.description or ''
-                        }
+                    await jira.update_issue_field(
+                        story_request.story_id,
+                        fields=_story_fields(story_request)
                     )
                 except Exception as update_error:
                     logger.error(f"Error al actualizar historia: {update_error}")
@@ -82,6 +93,10 @@ async def update_or_create_jira_story(
                         status_code=500,
                         detail=f"Error al actualizar historia: {str(update_error)}"
                     )
+                finally:
+                    # La copia en caché deja de ser válida aunque la escritura falle
+                    if story_cache is not None:
+                        story_cache.invalidate(story_request.story_id)
 
                 return JiraStoryUpdateResponse(
                     story_id=story_request.story_id,
@@ -92,32 +107,13 @@ async def update_or_create_jira_story(
                 # Crear nueva historia
                 logger.info(f"Intentando crear nueva historia en proyecto: {os.getenv('JIRA_PROJECT_KEY')}")
                 try:
-                    logger.info(f"Datos de la solicitud: {story_request}")
-                    
-                    # Inspeccionar métodos disponibles
-                    logger.info(f"Métodos disponibles en Jira: {dir(jira)}")
-                    
+                    log_event(logger, logging.DEBUG, "jira.create_story", request=Payload(story_request))
                     try:
-                        # Intentar método de la biblioteca Atlassian
-                        # Imprimir todos los argumentos posibles
-                        logger.info("Argumentos disponibles:")
-                        for method in dir(jira):
-                            if 'issue' in method.lower():
-                                logger.info(f"Método relacionado: {method}")
-                        
-                        # Intentar con diferentes formatos
-                        new_issue = jira.create_issue(
-                            fields={
-                                'project': {'key': os.getenv('JIRA_PROJECT_KEY')},
-                                'summary': story_request.title,
-                                'description': story_request.description or '',
-                                'issuetype': {'name': 'Story'}
-                            }
+                        new_issue = await jira.create_issue(
+                            fields=_story_fields(story_request, os.getenv('JIRA_PROJECT_KEY'))
                         )
                     except Exception as create_error:
                         logger.error(f"Error detallado al crear historia: {create_error}")
-                        logger.error(f"Tipo de error: {type(create_error)}")
-                        logger.error(f"Argumentos del error: {create_error.args}")
                         raise
 
                     return JiraStoryUpdateResponse(
@@ -151,6 +147,8 @@ async def update_or_create_jira_story(
 @router.get("/jira/story/{story_id}", response_model=JiraStoryResponse)
 async def get_jira_story(
     story_id: str,
+    jira: Optional[AsyncJira] = Depends(get_jira_client),
+    story_cache: Optional[JiraStoryCache] = Depends(get_jira_story_cache)
 ):
     """
     Obtener una historia de usuario desde Jira.
@@ -161,23 +159,20 @@ async def get_jira_story(
     if not re.match(r'^[A-Z]+-\d+$', story_id):
         raise HTTPException(status_code=404, detail="ID de historia inválido")
 
-    # Verificar variables de entorno
-    if not os.getenv('JIRA_URL') or not os.getenv('JIRA_TOKEN'):
+    # Verificar configuración
+    if jira is None:
         raise HTTPException(
             status_code=500,
             detail="Error al conectar con Jira: Configuración incompleta"
         )
 
     try:
-        # Inicializar cliente de Jira
-        jira = Jira(
-            url=os.getenv('JIRA_URL'),
-            token=os.getenv('JIRA_TOKEN')
-        )
-
-        # Obtener la historia
+        # Obtener la historia (desde la caché si está activa)
         try:
-            issue = jira.issue(story_id)
+            if story_cache is not None:
+                issue = await story_cache.get(story_id, jira)
+            else:
+                issue = await jira.issue(story_id)
         except Exception as e:
             if "Issue Does Not Exist" in str(e):
                 raise HTTPException(status_code=404, detail="Historia no encontrada")
@@ -210,3 +205,318 @@ async def get_jira_story(
             status_code=500,
             detail=f"Error al obtener la historia: {str(e)}"
         )
+
+
+# Campos que se pueden proyectar al importar historias
+IMPORTABLE_FIELDS = ('summary', 'description')
+
+class JiraImportRequest(BaseModel):
+    """Modelo para importar historias de Jira en bloque"""
+    jql: Optional[str] = Field(None, min_length=1, description="Consulta JQL con las historias a importar")
+    story_ids: Optional[List[str]] = Field(None, min_length=1, description="IDs de las historias a importar")
+    fields: List[str] = Field(
+        default_factory=lambda: list(IMPORTABLE_FIELDS),
+        description="Campos a recuperar de Jira (summary y/o description)"
+    )
+    page_size: int = Field(50, ge=1, le=100, description="Historias por página de búsqueda")
+    max_results: Optional[int] = Field(None, ge=1, description="Número máximo de historias a importar")
+
+    @model_validator(mode='after')
+    def validate_source(self) -> 'JiraImportRequest':
+        if (self.jql is None) == (self.story_ids is None):
+            raise HTTPException(status_code=400, detail="Indique una consulta JQL o una lista de IDs, pero no ambas")
+        if self.story_ids is not None:
+            invalid = [story_id for story_id in self.story_ids if not re.match(r'^[A-Z]+-\d+$', story_id)]
+            if invalid:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"ID de historia inválido: {', '.join(invalid)}. Debe tener el formato PROYECTO-123"
+                )
+        unknown = [field for field in self.fields if field not in IMPORTABLE_FIELDS]
+        if unknown or 'summary' not in self.fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos no soportados: {', '.join(unknown) or 'falta summary'}. Use {', '.join(IMPORTABLE_FIELDS)}"
+            )
+        return self
+
+async def _search_pages(
+    jira: AsyncJira,
+    jql: str,
+    fields: str,
+    page_size: int,
+    max_results: Optional[int]
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Recorre las páginas de una búsqueda JQL pidiendo la siguiente mientras se emite la actual."""
+    start = 0
+    next_page = asyncio.ensure_future(jira.jql(jql, fields=fields, start=start, limit=page_size))
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+            issues = page.get('issues', []) if page else []
+            start += len(issues)
+            total = page.get('total', 0) if page else 0
+            if issues and start < total and (max_results is None or start < max_results):
+                next_page = asyncio.ensure_future(jira.jql(jql, fields=fields, start=start, limit=page_size))
+            yield issues
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+async def _key_pages(
+    jira: AsyncJira,
+    story_ids: List[str],
+    fields: str,
+    page_size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Recupera una lista de IDs en bloques de una búsqueda JQL cada uno."""
+    for offset in range(0, len(story_ids), page_size):
+        chunk = story_ids[offset:offset + page_size]
+        try:
+            page = await jira.jql(f"key in ({', '.join(chunk)})", fields=fields, limit=len(chunk))
+            issues = page.get('issues', []) if page else []
+        except Exception as e:
+            # Jira rechaza la consulta entera si alguna clave no existe: se piden una a una
+            logger.warning(f"Búsqueda por IDs fallida ({e}); se recuperan individualmente")
+            issues = []
+            for story_id in chunk:
+                try:
+                    issues.append(await jira.issue(story_id, fields=fields))
+                except Exception as issue_error:
+                    issues.append({'key': story_id, 'error': str(issue_error)})
+        found = {issue.get('key') for issue in issues}
+        issues.extend({'key': story_id, 'error': "Historia no encontrada"} for story_id in chunk if story_id not in found)
+        yield issues
+
+def _ndjson(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+@router.post("/jira/stories/import")
+async def import_jira_stories(
+    import_request: JiraImportRequest,
+    jira: Optional[AsyncJira] = Depends(get_jira_client),
+    story_cache: Optional[JiraStoryCache] = Depends(get_jira_story_cache),
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    Importar historias de Jira en bloque como NDJSON.
+
+    - Acepta una consulta `jql` o una lista de `story_ids` y pagina la búsqueda de Jira
+      pidiendo solo los campos indicados.
+    - Emite una línea por historia (`type: story`) con su sesión del asistente ya creada,
+      una línea `type: error` por cada historia que no se pudo recuperar y una línea final
+      `type: done` con el resumen.
+    """
+    if jira is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Error al conectar con Jira: Configuración incompleta"
+        )
+
+    # 'updated' permite reutilizar los resultados en la caché de historias
+    fields = ','.join(import_request.fields + ['updated'])
+    if import_request.story_ids is not None:
+        story_ids = list(dict.fromkeys(import_request.story_ids))[:import_request.max_results]
+        pages = _key_pages(jira, story_ids, fields, import_request.page_size)
+    else:
+        pages = _search_pages(jira, import_request.jql, fields, import_request.page_size, import_request.max_results)
+
+    # La primera página se pide antes de responder para devolver los errores de Jira como HTTP
+    try:
+        first_page = await pages.__anext__()
+    except StopAsyncIteration:
+        first_page = []
+    except Exception as e:
+        logger.error(f"Error al buscar historias en Jira: {e}")
+        raise HTTPException(status_code=500, detail=f"Error al conectar con Jira: {str(e)}")
+
+    async def lines() -> AsyncIterator[str]:
+        imported = failed = 0
+        page = first_page
+        max_results = import_request.max_results
+        try:
+            while True:
+                for issue in page:
+                    if max_results is not None and imported >= max_results:
+                        break
+                    issue_fields = issue.get('fields') or {}
+                    if 'error' in issue or not issue_fields.get('summary'):
+                        failed += 1
+                        yield _ndjson({
+                            "type": "error",
+                            "story_id": issue.get('key'),
+                            "detail": issue.get('error', "Error: La historia no tiene título")
+                        })
+                        continue
+                    if story_cache is not None and 'description' in import_request.fields:
+                        story_cache.put(issue['key'], issue_fields)
+                    imported += 1
+                    yield _ndjson({
+                        "type": "story",
+                        "story_id": issue['key'],
+                        "session_id": str(await llm_service.create_session()),
+                        "title": issue_fields['summary'],
+                        "description": issue_fields.get('description', '')
+                    })
+                if max_results is not None and imported >= max_results:
+                    break
+                page = await pages.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            # Las cabeceras ya se han enviado: el error se comunica como línea
+            logger.error(f"Error durante la importación de historias: {e}")
+            failed += 1
+            yield _ndjson({"type": "error", "detail": str(e)})
+        finally:
+            await pages.aclose()
+        yield _ndjson({"type": "done", "imported": imported, "failed": failed})
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# Máximo de issues por llamada a la API de creación en bloque de Jira
+BULK_CREATE_BATCH_SIZE = 50
+
+class JiraBulkWriteRequest(BaseModel):
+    """Modelo para escribir en Jira varias historias de una vez"""
+    stories: List[JiraStoryUpdateRequest] = Field(..., min_length=1, max_length=500, description="Historias a crear o actualizar")
+
+class JiraBulkItemResult(BaseModel):
+    """Resultado de la escritura de una historia"""
+    index: int
+    story_id: Optional[str] = None
+    action: Literal["created", "updated"]
+    success: bool
+    message: str
+
+class JiraBulkWriteResponse(BaseModel):
+    """Modelo de respuesta para la escritura en bloque"""
+    results: List[JiraBulkItemResult]
+    created: int
+    updated: int
+    failed: int
+
+def _bulk_error_message(error: Dict[str, Any]) -> str:
+    element_errors = error.get('elementErrors') or {}
+    messages = list(element_errors.get('errorMessages') or [])
+    messages += [f"{field}: {message}" for field, message in (element_errors.get('errors') or {}).items()]
+    return '; '.join(messages) or f"Error {error.get('status', 'desconocido')}"
+
+async def _create_batch(
+    jira: AsyncJira,
+    batch: List[tuple],
+    project_key: str,
+    semaphore: asyncio.Semaphore
+) -> List[JiraBulkItemResult]:
+    """Crea un lote de historias con la API de creación en bloque."""
+    async with semaphore:
+        try:
+            response = await jira.create_issues([
+                {'fields': _story_fields(story, project_key)} for _, story in batch
+            ]) or {}
+        except Exception as e:
+            logger.error(f"Error al crear historias en bloque: {e}")
+            return [
+                JiraBulkItemResult(index=index, action="created", success=False, message=f"Error al crear historia: {str(e)}")
+                for index, _ in batch
+            ]
+
+    # Jira devuelve las issues creadas en orden y los fallos con su posición en el lote
+    failures = {
+        error.get('failedElementNumber'): _bulk_error_message(error)
+        for error in response.get('errors') or []
+    }
+    created = iter(response.get('issues') or [])
+    results = []
+    for position, (index, _) in enumerate(batch):
+        if position in failures:
+            results.append(JiraBulkItemResult(
+                index=index, action="created", success=False,
+                message=f"Error al crear historia: {failures[position]}"
+            ))
+            continue
+        issue = next(created, None)
+        if issue is None:
+            results.append(JiraBulkItemResult(
+                index=index, action="created", success=False,
+                message="Error al crear historia: Jira no devolvió la historia creada"
+            ))
+        else:
+            results.append(JiraBulkItemResult(
+                index=index, story_id=issue['key'], action="created", success=True,
+                message="Historia creada exitosamente"
+            ))
+    return results
+
+async def _update_story(
+    jira: AsyncJira,
+    index: int,
+    story: JiraStoryUpdateRequest,
+    story_cache: Optional[JiraStoryCache],
+    semaphore: asyncio.Semaphore
+) -> JiraBulkItemResult:
+    """Actualiza una historia respetando el límite de escrituras simultáneas."""
+    async with semaphore:
+        try:
+            await jira.update_issue_field(story.story_id, fields=_story_fields(story))
+        except Exception as e:
+            logger.error(f"Error al actualizar historia {story.story_id}: {e}")
+            return JiraBulkItemResult(
+                index=index, story_id=story.story_id, action="updated", success=False,
+                message=f"Error al actualizar historia: {str(e)}"
+            )
+        finally:
+            if story_cache is not None:
+                story_cache.invalidate(story.story_id)
+    return JiraBulkItemResult(
+        index=index, story_id=story.story_id, action="updated", success=True,
+        message="Historia actualizada exitosamente"
+    )
+
+@router.post("/jira/stories/bulk", response_model=JiraBulkWriteResponse)
+async def bulk_write_jira_stories(
+    bulk_request: JiraBulkWriteRequest,
+    jira: Optional[AsyncJira] = Depends(get_jira_client),
+    story_cache: Optional[JiraStoryCache] = Depends(get_jira_story_cache)
+):
+    """
+    Crear y actualizar varias historias de Jira en una sola petición.
+
+    - Las historias sin `story_id` se crean en lotes con la API de creación en bloque.
+    - Las historias con `story_id` se actualizan en paralelo, con un máximo de
+      JIRA_BULK_CONCURRENCY escrituras simultáneas.
+    - Devuelve el resultado de cada historia en el orden de la petición.
+    """
+    project_key = os.getenv('JIRA_PROJECT_KEY')
+    if jira is None or not project_key:
+        raise HTTPException(
+            status_code=500,
+            detail="Error al conectar con Jira: Configuración incompleta. Asegúrese de definir JIRA_URL, JIRA_TOKEN y JIRA_PROJECT_KEY"
+        )
+
+    semaphore = asyncio.Semaphore(int(os.getenv('JIRA_BULK_CONCURRENCY', '4')))
+    to_create = [(index, story) for index, story in enumerate(bulk_request.stories) if not story.story_id]
+    to_update = [(index, story) for index, story in enumerate(bulk_request.stories) if story.story_id]
+    logger.info(f"Escritura en bloque: {len(to_create)} historias nuevas y {len(to_update)} actualizaciones")
+
+    create_batches, updates = await asyncio.gather(
+        asyncio.gather(*(
+            _create_batch(jira, to_create[offset:offset + BULK_CREATE_BATCH_SIZE], project_key, semaphore)
+            for offset in range(0, len(to_create), BULK_CREATE_BATCH_SIZE)
+        )),
+        asyncio.gather(*(
+            _update_story(jira, index, story, story_cache, semaphore)
+            for index, story in to_update
+        ))
+    )
+    results = [result for batch in create_batches for result in batch] + list(updates)
+    results.sort(key=lambda result: result.index)
+
+    return JiraBulkWriteResponse(
+        results=results,
+        created=sum(1 for r in results if r.success and r.action == "created"),
+        updated=sum(1 for r in results if r.success and r.action == "updated"),
+        failed=sum(1 for r in results if not r.success)
+    )
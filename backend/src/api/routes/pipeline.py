@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional, List
+from src.dependencies import get_llm_service
+from src.llm.service import LLMService
+from src.api.sse import sse_response
+from src.api.errors import prompt_too_long_error, queue_full_error
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError
+from uuid import UUID
+
+router = APIRouter()
+
+class PipelineRequest(BaseModel):
+    session_id: Optional[UUID] = Field(
+        None,
+        json_schema_extra={
+            "description": "ID de sesión para mantener el contexto de la conversación. Si no se proporciona, se creará una nueva sesión."
+        }
+    )
+    story: str = Field(
+        ...,
+        json_schema_extra={
+            "example": "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal.",
+            "description": "Historia de usuario original que se refinará y completará."
+        }
+    )
+    feedback: Optional[str] = Field(
+        None,
+        json_schema_extra={
+            "example": "Por favor, especificar el método de autenticación.",
+            "description": "Feedback opcional del usuario para el refinamiento de la historia."
+        }
+    )
+    bypass_cache: bool = Field(
+        False,
+        json_schema_extra={
+            "description": "Si es true, ignora la caché de respuestas y fuerza una nueva generación del LLM en todos los pasos."
+        }
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "story": "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal.",
+                "feedback": "Por favor, especificar el método de autenticación."
+            }
+        }
+    )
+
+class PipelineResponse(BaseModel):
+    session_id: UUID = Field(..., description="ID de sesión para usar en futuras peticiones")
+    refined_story: str = Field(..., description="Historia de usuario refinada")
+    refinement_feedback: str = Field(..., description="Resumen de los cambios del refinamiento")
+    corner_cases: List[str] = Field(..., description="Casos esquina identificados")
+    corner_cases_feedback: str = Field(..., description="Análisis de los casos esquina")
+    testing_strategies: List[str] = Field(..., description="Estrategias de testing propuestas")
+    testing_feedback: str = Field(..., description="Análisis de las estrategias de testing")
+    finalized_story: str = Field(..., description="Historia de usuario finalizada")
+    functional_tests: str = Field("", description="Sección de tests funcionales de la historia finalizada")
+
+@router.post(
+    "/pipeline/stream",
+    summary="Ejecuta el flujo completo en streaming",
+    tags=["Pipeline"]
+)
+async def pipeline_stream(
+    request: PipelineRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    Refina la historia, identifica casos esquina, propone la estrategia de testing
+    y finaliza la historia en una sola petición, mediante Server-Sent Events.
+
+    Cada paso empieza en cuanto el anterior cierra la sección que necesita, sin
+    esperar a que termine toda su generación. Emite un evento `session` con el ID
+    de sesión, eventos `section` (`step`, `marker`, `content`) a medida que se
+    cierran las secciones de cada paso, un evento `stage` (`step`, `result`) al
+    terminar cada paso y un evento final `result` con el resultado combinado.
+    """
+    try:
+        session_id = request.session_id or await llm_service.create_session()
+
+        events = await llm_service.pipeline_stream(
+            session_id=session_id,
+            user_story=request.story,
+            feedback=request.feedback,
+            bypass_cache=request.bypass_cache
+        )
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(
+        session_id,
+        events,
+        lambda result: PipelineResponse(session_id=session_id, **result).model_dump(mode="json")
+    )
@@ -3,6 +3,10 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 from src.dependencies import get_llm_service
 from src.llm.service import LLMService
+from src.api.sse import sse_response
+from src.api.errors import prompt_too_long_error, queue_full_error
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError, TokenUsage
 from uuid import UUID
 
 router = APIRouter()
@@ -48,6 +52,18 @@ class ProposeTestingStrategyRequest(BaseModel):
             "description": "Lista de estrategias de testing existentes de iteraciones previas."
         }
     )
+    bypass_cache: bool = Field(
+        False,
+        json_schema_extra={
+            "description": "Si es true, ignora la caché de respuestas y fuerza una nueva generación del LLM."
+        }
+    )
+    fan_out: Optional[bool] = Field(
+        None,
+        json_schema_extra={
+            "description": "Si es true, divide la historia en áreas de aceptación y genera las estrategias de testing de cada área en paralelo; si es false, nunca la divide. Por defecto solo se dividen las historias grandes. Requiere FANOUT_MAX_SECTIONS de 2 o más. No aplica a la versión en streaming."
+        }
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -89,6 +105,12 @@ class ProposeTestingStrategyResponse(BaseModel):
             "description": "Resumen de los cambios realizados por el LLM."
         }
     )
+    token_usage: Optional[TokenUsage] = Field(
+        None,
+        json_schema_extra={
+            "description": "Tokens del prompt y de la respuesta, y entradas recortadas para ajustarse a la ventana de contexto."
+        }
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -124,20 +146,68 @@ async def propose_testing_strategy(
     - **existing_testing_strategies**: Lista opcional de estrategias de testing existentes.
     """
     try:
-        session_id = request.session_id or llm_service.create_session()
+        session_id = request.session_id or await llm_service.create_session()
 
         result = await llm_service.propose_testing_strategy(
             session_id=session_id,
             refined_story=request.story,
             corner_cases=request.corner_cases,
             feedback=request.feedback,
-            existing_testing_strategies=request.existing_testing_strategies
+            existing_testing_strategies=request.existing_testing_strategies,
+            bypass_cache=request.bypass_cache,
+            fan_out=request.fan_out
         )
 
         return {
             "session_id": session_id,
             "testing_strategies": result['testing_strategies'],
-            "testing_feedback": result['testing_feedback']
+            "testing_feedback": result['testing_feedback'],
+            "token_usage": result.get('token_usage')
         }
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/propose_testing_strategy/stream",
+    summary="Propone estrategias de testing en streaming",
+    tags=["Testing"]
+)
+async def propose_testing_strategy_stream(
+    request: ProposeTestingStrategyRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    Versión en streaming de `/propose_testing_strategy` mediante Server-Sent Events.
+
+    Emite un evento `session` con el ID de sesión, eventos `token` con cada fragmento
+    generado, un evento `section` en cuanto se cierra cada sección marcada de la
+    respuesta y un evento final `result` con el mismo contenido que el endpoint
+    no streaming.
+    """
+    try:
+        session_id = request.session_id or await llm_service.create_session()
+
+        events = await llm_service.propose_testing_strategy_stream(
+            session_id=session_id,
+            refined_story=request.story,
+            corner_cases=request.corner_cases,
+            feedback=request.feedback,
+            existing_testing_strategies=request.existing_testing_strategies,
+            bypass_cache=request.bypass_cache
+        )
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(
+        session_id,
+        events,
+        lambda result: ProposeTestingStrategyResponse(session_id=session_id, **result).model_dump(mode="json")
+    )
@@ -3,6 +3,10 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
 from src.dependencies import get_llm_service
 from src.llm.service import LLMService
+from src.api.sse import sse_response
+from src.api.errors import prompt_too_long_error, queue_full_error
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError, TokenUsage
 from uuid import UUID
 
 router = APIRouter()
@@ -28,6 +32,12 @@ class RefineStoryRequest(BaseModel):
             "description": "Feedback opcional del usuario sobre la historia refinada anterior."
         }
     )
+    bypass_cache: bool = Field(
+        False,
+        json_schema_extra={
+            "description": "Si es true, ignora la caché de respuestas y fuerza una nueva generación del LLM."
+        }
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -60,6 +70,12 @@ class RefineStoryResponse(BaseModel):
             "description": "Resumen de los cambios realizados por el LLM en la historia de usuario."
         }
     )
+    token_usage: Optional[TokenUsage] = Field(
+        None,
+        json_schema_extra={
+            "description": "Tokens del prompt y de la respuesta, y entradas recortadas para ajustarse a la ventana de contexto."
+        }
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -89,18 +105,63 @@ async def refine_story(
     - **feedback**: Feedback opcional del usuario sobre la historia refinada anterior.
     """
     try:
-        session_id = request.session_id or llm_service.create_session()
+        session_id = request.session_id or await llm_service.create_session()
 
         result = await llm_service.refine_story(
             session_id=session_id,
             user_story=request.story,
-            feedback=request.feedback
+            feedback=request.feedback,
+            bypass_cache=request.bypass_cache
         )
 
         return {
             "session_id": session_id,
             "refined_story": result['refined_story'],
-            "refinement_feedback": result['refinement_feedback']
+            "refinement_feedback": result['refinement_feedback'],
+            "token_usage": result.get('token_usage')
         }
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/refine_story/stream",
+    summary="Refina una historia de usuario en streaming",
+    tags=["Refinement"]
+)
+async def refine_story_stream(
+    request: RefineStoryRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    Versión en streaming de `/refine_story` mediante Server-Sent Events.
+
+    Emite un evento `session` con el ID de sesión, eventos `token` con cada fragmento
+    generado, un evento `section` en cuanto se cierra cada sección marcada de la
+    respuesta y un evento final `result` con el mismo contenido que el endpoint
+    no streaming.
+    """
+    try:
+        session_id = request.session_id or await llm_service.create_session()
+
+        events = await llm_service.refine_story_stream(
+            session_id=session_id,
+            user_story=request.story,
+            feedback=request.feedback,
+            bypass_cache=request.bypass_cache
+        )
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    except PromptTooLongError as e:
+        raise prompt_too_long_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(
+        session_id,
+        events,
+        lambda result: RefineStoryResponse(session_id=session_id, **result).model_dump(mode="json")
+    )
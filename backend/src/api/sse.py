@@ -0,0 +1,62 @@
+"""Utilidades para servir eventos del LLM como Server-Sent Events."""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from uuid import UUID
+
+from fastapi.responses import StreamingResponse
+
+from src.llm.scheduler import LLMQueueFullError
+from src.llm.tokens import PromptTooLongError
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Serializa un evento en el formato de texto de Server-Sent Events."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def _encode_events(
+    session_id: UUID,
+    events: AsyncIterator[Dict[str, Any]],
+    format_result: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> AsyncIterator[str]:
+    yield format_sse("session", {"session_id": str(session_id)})
+    try:
+        async for event in events:
+            data = event['data']
+            if event['event'] == 'result' and format_result:
+                data = format_result(data)
+            yield format_sse(event['event'], data)
+    except LLMQueueFullError as e:
+        yield format_sse("error", {"detail": str(e), "retry_after": e.retry_after})
+    except PromptTooLongError as e:
+        yield format_sse("error", {"detail": str(e), "prompt_tokens": e.prompt_tokens, "prompt_budget": e.prompt_budget})
+    except Exception as e:
+        # Las cabeceras ya se han enviado: el error se comunica como evento
+        logger.error(f"Error durante el streaming: {str(e)}")
+        yield format_sse("error", {"detail": str(e)})
+
+
+def sse_response(
+    session_id: UUID,
+    events: AsyncIterator[Dict[str, Any]],
+    format_result: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> StreamingResponse:
+    """
+    Crea una respuesta ``text/event-stream`` a partir de los eventos del servicio LLM.
+
+    El primer evento ('session') anuncia el ID de sesión; después se reenvían los
+    eventos 'token', 'section' y 'result' del servicio, y 'error' si la generación falla.
+    """
+    return StreamingResponse(
+        _encode_events(session_id, events, format_result),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -0,0 +1,36 @@
+"""Span por petición HTTP, padre de los spans del servicio LLM y de Jira."""
+
+from typing import Any, Dict
+
+from src.observability import tracing
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre un span por cada petición HTTP.
+
+    El span dura hasta que se envía el último fragmento de la respuesta, así
+    que en los endpoints de streaming incluye toda la generación. Con las
+    trazas desactivadas pasa la petición sin hacer nada más.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope['type'] != 'http' or not tracing.tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        with tracing.span(
+            f"{scope['method']} {scope['path']}",
+            **{'http.method': scope['method'], 'http.target': scope['path']}
+        ) as span:
+            async def send_with_status(message: Dict[str, Any]) -> None:
+                if message['type'] == 'http.response.start':
+                    span.set_attribute('http.status_code', message['status'])
+                    if message['status'] >= 500:
+                        span.status = 'ERROR'
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
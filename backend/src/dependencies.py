@@ -1,15 +1,25 @@
+from typing import Optional
 from fastapi import Depends
+import os
 from src.llm.service import LLMService
-from src.llm.instance import llm_service
+from src.integrations.jira_client import AsyncJira, create_jira_client, shutdown_jira_executor
+from src.integrations.jira_cache import JiraStoryCache, create_jira_story_cache
 
 _llm_service_instance = None
+_jira_client_instance: Optional[AsyncJira] = None
+_jira_story_cache_instance: Optional[JiraStoryCache] = None
+_jira_story_cache_created = False
 
 def get_llm_service() -> LLMService:
     """
     Dependency provider for LLM service.
+
+    The service (and the Ollama client) is built on first use, normally from
+    the application lifespan, so importing the app stays cheap.
     """
     global _llm_service_instance
     if _llm_service_instance is None:
+        from src.llm.instance import llm_service
         _llm_service_instance = llm_service
     return _llm_service_instance
 
@@ -19,3 +29,62 @@ def override_llm_service(service: LLMService):
     """
     global _llm_service_instance
     _llm_service_instance = service
+
+def get_jira_client() -> Optional[AsyncJira]:
+    """
+    Dependency provider for the application-scoped Jira client.
+
+    The client is created on first use and reused by every request, so its
+    keep-alive connection pool survives between calls. Returns None while
+    JIRA_URL or JIRA_TOKEN are not configured.
+    """
+    global _jira_client_instance
+    if _jira_client_instance is None:
+        if not os.getenv('JIRA_URL') or not os.getenv('JIRA_TOKEN'):
+            return None
+        _jira_client_instance = create_jira_client()
+    return _jira_client_instance
+
+def override_jira_client(client: Optional[AsyncJira]):
+    """
+    Override the Jira client instance for testing.
+    """
+    global _jira_client_instance
+    _jira_client_instance = client
+
+def close_jira_client():
+    """
+    Close the Jira client connections and its thread pool.
+    """
+    global _jira_client_instance
+    if _jira_client_instance is not None:
+        _jira_client_instance.close()
+        _jira_client_instance = None
+    shutdown_jira_executor()
+
+def get_jira_story_cache() -> Optional[JiraStoryCache]:
+    """
+    Dependency provider for the Jira story read-through cache.
+
+    Returns None when the cache is disabled (JIRA_CACHE_MAX_ENTRIES=0).
+    """
+    global _jira_story_cache_instance, _jira_story_cache_created
+    if not _jira_story_cache_created:
+        _jira_story_cache_instance = create_jira_story_cache()
+        _jira_story_cache_created = True
+    return _jira_story_cache_instance
+
+def override_jira_story_cache(cache: Optional[JiraStoryCache]):
+    """
+    Override the Jira story cache instance for testing.
+    """
+    global _jira_story_cache_instance, _jira_story_cache_created
+    _jira_story_cache_instance = cache
+    _jira_story_cache_created = True
+
+async def close_jira_story_cache():
+    """
+    Cancel the pending background revalidations of the Jira story cache.
+    """
+    if _jira_story_cache_instance is not None:
+        await _jira_story_cache_instance.close()
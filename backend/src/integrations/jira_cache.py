@@ -0,0 +1,236 @@
+"""Caché de lectura de historias de Jira con revalidación por fecha de actualización."""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from .jira_client import AsyncJira
+
+logger = logging.getLogger(__name__)
+
+MISSING_ISSUE_ERROR = "Issue Does Not Exist"
+# Campos que se guardan en caché; no se piden los demás
+STORY_FIELDS = "summary,description,updated"
+
+
+@dataclass
+class CachedStory:
+    """Campos de una historia de Jira guardados en caché."""
+    summary: Optional[str]
+    description: Optional[str]
+    updated: Optional[str]
+    fetched_at: float
+
+    def as_issue(self, key: str) -> Dict[str, Any]:
+        return {
+            'key': key,
+            'fields': {
+                'summary': self.summary,
+                'description': self.description,
+                'updated': self.updated,
+            }
+        }
+
+
+class JiraStoryCache:
+    """
+    Caché de lectura de historias de Jira indexada por clave de issue.
+
+    Dentro de ``ttl_seconds`` se sirve la copia sin consultar Jira. Pasado ese
+    tiempo se revalida pidiendo solo el campo ``updated``: si no ha cambiado se
+    reutiliza la copia y, si ha cambiado, se descargan de nuevo los campos que
+    se guardan (``STORY_FIELDS``). Si
+    la revalidación tarda más de ``revalidate_timeout`` o falla, se sirve la
+    copia (hasta ``stale_seconds`` de antigüedad adicional) mientras la
+    revalidación continúa en segundo plano.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 30,
+        stale_seconds: float = 600,
+        revalidate_timeout: float = 2.0,
+        max_entries: int = 512,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.revalidate_timeout = revalidate_timeout
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, CachedStory]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        # Versión por clave: una escritura invalida las descargas en curso
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale_served = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str, jira: AsyncJira) -> Dict[str, Any]:
+        """Devuelve la issue desde la caché o desde Jira."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return await self._await(key, jira, self._start(key, jira, None))
+
+        age = self._clock() - entry.fetched_at
+        if age <= self.ttl_seconds:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.as_issue(key)
+
+        task = self._start(key, jira, entry)
+        if age > self.ttl_seconds + self.stale_seconds:
+            # Demasiado antigua para servirla: se espera a Jira
+            return await self._await(key, jira, task)
+
+        try:
+            return await self._await(
+                key, jira, asyncio.wait_for(asyncio.shield(task), self.revalidate_timeout)
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Jira tarda en responder: se sirve {key} desde la caché")
+        except Exception as e:
+            if MISSING_ISSUE_ERROR in str(e):
+                raise
+            logger.warning(f"Error al revalidar {key}: {str(e)}. Se sirve desde la caché")
+        self.stale_served += 1
+        return entry.as_issue(key)
+
+    def put(self, key: str, fields: Dict[str, Any]) -> None:
+        """Guarda una historia obtenida por otra vía (p. ej. una búsqueda JQL)."""
+        if fields.get('updated') is not None:
+            self._store(key, fields)
+
+    def invalidate(self, key: str) -> None:
+        """Descarta la copia de una historia y cancela su descarga en curso."""
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._entries.pop(key, None)
+        task = self._pending.pop(key, None)
+        if task is not None and not task.done():
+            # Quien la esperaba vuelve a pedir la historia (ver ``_await``)
+            task.cancel()
+        else:
+            self._prune(key)
+
+    def clear(self) -> None:
+        """Vacía la caché."""
+        for key in list(self._entries):
+            self.invalidate(key)
+
+    async def close(self) -> None:
+        """Cancela las revalidaciones pendientes."""
+        tasks = list(self._pending.values())
+        self._pending.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve los contadores de la caché."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "stale_served": self.stale_served,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    async def _await(self, key: str, jira: AsyncJira, awaitable) -> Dict[str, Any]:
+        try:
+            return await awaitable
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            # La descarga se canceló al invalidar la clave: se pide de nuevo
+            return await self.get(key, jira)
+        except Exception as e:
+            if MISSING_ISSUE_ERROR in str(e):
+                self.invalidate(key)
+            raise
+
+    def _start(self, key: str, jira: AsyncJira, entry: Optional[CachedStory]) -> asyncio.Task:
+        """Lanza (o reutiliza) la consulta a Jira de una clave."""
+        loop = asyncio.get_running_loop()
+        task = self._pending.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return task
+
+        task = loop.create_task(self._refresh(key, jira, entry, self._versions.get(key, 0)))
+        self._pending[key] = task
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return task
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Consulta a Jira de {key} fallida: {task.exception()}")
+        self._prune(key)
+
+    def _prune(self, key: str) -> None:
+        """Olvida la versión de una clave que ya no está en caché ni se está descargando."""
+        if key not in self._entries and key not in self._pending:
+            self._versions.pop(key, None)
+
+    async def _refresh(
+        self,
+        key: str,
+        jira: AsyncJira,
+        entry: Optional[CachedStory],
+        version: int
+    ) -> Dict[str, Any]:
+        if entry is not None and entry.updated is not None:
+            self.revalidations += 1
+            probe = await jira.issue(key, fields='updated')
+            updated = (probe or {}).get('fields', {}).get('updated')
+            if updated == entry.updated and self._versions.get(key, 0) == version:
+                entry.fetched_at = self._clock()
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                return entry.as_issue(key)
+
+        issue = await jira.issue(key, fields=STORY_FIELDS)
+        if issue and 'fields' in issue and self._versions.get(key, 0) == version:
+            self._store(key, issue['fields'])
+        return issue
+
+    def _store(self, key: str, fields: Dict[str, Any]) -> None:
+        self._entries[key] = CachedStory(
+            summary=fields.get('summary'),
+            description=fields.get('description', ''),
+            updated=fields.get('updated'),
+            fetched_at=self._clock()
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._prune(evicted)
+
+
+def create_jira_story_cache() -> Optional[JiraStoryCache]:
+    """
+    Crea la caché de historias a partir de las variables de entorno.
+
+    JIRA_CACHE_MAX_ENTRIES=0 desactiva la caché.
+    """
+    max_entries = int(os.getenv('JIRA_CACHE_MAX_ENTRIES', '512'))
+    if max_entries <= 0:
+        return None
+    return JiraStoryCache(
+        ttl_seconds=float(os.getenv('JIRA_CACHE_TTL_SECONDS', '30')),
+        stale_seconds=float(os.getenv('JIRA_CACHE_STALE_SECONDS', '600')),
+        revalidate_timeout=float(os.getenv('JIRA_CACHE_REVALIDATE_TIMEOUT', '2')),
+        max_entries=max_entries
+    )
@@ -0,0 +1,149 @@
+"""Adaptador asíncrono para el cliente de Jira."""
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from src.observability import metrics, tracing
+
+
+logger = logging.getLogger(__name__)
+
+
+def __getattr__(name: str) -> Any:
+    # atlassian tarda en importarse: se carga la primera vez que se pide ``Jira``
+    if name == 'Jira':
+        from atlassian import Jira
+        globals()['Jira'] = Jira
+        return Jira
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _jira_class() -> Any:
+    """Devuelve la clase ``Jira`` del módulo (la real o la sustituida en los tests)."""
+    return getattr(sys.modules[__name__], 'Jira')
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_jira_executor() -> Executor:
+    """
+    Devuelve el pool de hilos compartido para las llamadas a Jira.
+
+    Su tamaño (JIRA_MAX_CONCURRENCY) es el número máximo de llamadas
+    simultáneas; el resto espera en cola sin bloquear el bucle de eventos.
+    """
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv('JIRA_MAX_CONCURRENCY', '8'))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jira')
+    return _executor
+
+
+def shutdown_jira_executor() -> None:
+    """Detiene el pool de hilos de Jira."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class AsyncJira:
+    """
+    Adaptador asíncrono sobre el cliente síncrono ``atlassian.Jira``.
+
+    Cada llamada se ejecuta en el pool de hilos acotado, de forma que una
+    petición lenta a Jira no bloquea el bucle de eventos.
+    """
+
+    def __init__(self, client: Any, executor: Optional[Executor] = None):
+        self.client = client
+        self._executor = executor
+
+    def close(self) -> None:
+        """Cierra las conexiones abiertas del cliente."""
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+    async def _call(self, method_name: str, *args, **kwargs) -> Any:
+        method = getattr(self.client, method_name)
+        executor = self._executor or get_jira_executor()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            with tracing.span(f'jira.{method_name}', operation=method_name):
+                result = await loop.run_in_executor(executor, functools.partial(method, *args, **kwargs))
+            outcome = 'success'
+            return result
+        finally:
+            metrics.JIRA_LATENCY.observe(time.perf_counter() - started, operation=method_name)
+            metrics.JIRA_REQUESTS.inc(operation=method_name, outcome=outcome)
+
+    async def issue(self, key: str, **kwargs) -> Dict[str, Any]:
+        """Obtiene una issue de Jira."""
+        return await self._call('issue', key, **kwargs)
+
+    async def create_issue(self, fields: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Crea una issue en Jira."""
+        return await self._call('create_issue', fields=fields, **kwargs)
+
+    async def create_issues(self, issues: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Crea varias issues en una sola llamada a la API de creación en bloque."""
+        return await self._call('create_issues', issues)
+
+    async def update_issue_field(self, key: str, fields: Dict[str, Any], **kwargs) -> Any:
+        """Actualiza campos de una issue de Jira."""
+        return await self._call('update_issue_field', key, fields=fields, **kwargs)
+
+    async def jql(self, jql: str, fields: str = '*all', start: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Ejecuta una búsqueda JQL y devuelve una página de resultados."""
+        return await self._call('jql', jql, fields=fields, start=start, limit=limit)
+
+
+def create_jira_client(
+    url: Optional[str] = None,
+    token: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None
+) -> AsyncJira:
+    """
+    Crea un cliente de Jira con un pool de conexiones keep-alive reutilizable.
+
+    Los valores no indicados se leen de JIRA_URL, JIRA_TOKEN, JIRA_POOL_SIZE,
+    JIRA_CONNECT_TIMEOUT y JIRA_READ_TIMEOUT. El pool tiene, por defecto, tantas
+    conexiones como hilos tiene el pool de llamadas (JIRA_MAX_CONCURRENCY).
+    """
+    if pool_size is None:
+        pool_size = int(os.getenv('JIRA_POOL_SIZE', os.getenv('JIRA_MAX_CONCURRENCY', '8')))
+    if connect_timeout is None:
+        connect_timeout = float(os.getenv('JIRA_CONNECT_TIMEOUT', '5'))
+    if read_timeout is None:
+        read_timeout = float(os.getenv('JIRA_READ_TIMEOUT', '30'))
+
+    # atlassian y requests se importan al crear el primer cliente para no ralentizar el arranque
+    import requests
+    from requests.adapters import HTTPAdapter
+    Jira = _jira_class()
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    client = Jira(
+        url=url or os.getenv('JIRA_URL'),
+        token=token or os.getenv('JIRA_TOKEN'),
+        session=session
+    )
+    # El constructor solo admite un timeout entero; requests acepta (conexión, lectura)
+    client.timeout = (connect_timeout, read_timeout)
+    logger.info(f"Cliente de Jira creado (pool de {pool_size} conexiones)")
+    return AsyncJira(client)
@@ -1 +1,6 @@
-from langchain_ollama import OllamaLLM as Ollama
+def __getattr__(name):
+    # langchain_ollama es una importación pesada: solo se carga si se usa el alias
+    if name == 'Ollama':
+        from langchain_ollama import OllamaLLM
+        return OllamaLLM
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
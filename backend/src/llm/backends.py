@@ -0,0 +1,307 @@
+"""Reparto de las llamadas al LLM entre varias instancias de Ollama."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+import httpx
+
+from .models import ProcessState
+from .step_models import StepModelConfig, default_step_model, resolve_step_models
+
+logger = logging.getLogger(__name__)
+
+
+def parse_base_urls(config: Any) -> List[str]:
+    """Lee OLLAMA_BASE_URLS (separadas por comas) o, en su defecto, OLLAMA_BASE_URL."""
+    urls = str(getattr(config, 'OLLAMA_BASE_URLS', '') or '')
+    parsed = [url.strip().rstrip('/') for url in urls.split(',') if url.strip()]
+    if not parsed:
+        parsed = [str(getattr(config, 'OLLAMA_BASE_URL', 'http://localhost:11434')).rstrip('/')]
+    return list(dict.fromkeys(parsed))
+
+
+class OllamaBackend:
+    """Una instancia de Ollama y su estado de salud y carga."""
+
+    def __init__(self, url: str, llm: Any):
+        self.url = url
+        self.llm = llm
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "available": self.is_available(now),
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class BalancedLLM:
+    """
+    LLM que reparte las llamadas entre varias instancias de Ollama.
+
+    Elige la instancia disponible con menos peticiones en curso, salvo que
+    la misma clave de afinidad se atendiera antes en otra instancia que no
+    tenga más de ``affinity_slack`` peticiones por encima de la menos cargada;
+    así se reutiliza la caché de prompt/KV del modelo. Una instancia que falla
+    ``max_failures`` veces seguidas (o no supera la comprobación de salud)
+    se expulsa durante ``eject_seconds``.
+    """
+
+    def __init__(
+        self,
+        backends: List[OllamaBackend],
+        max_failures: int = 3,
+        eject_seconds: float = 30.0,
+        affinity_slack: int = 1,
+        max_affinity_entries: int = 4096,
+        health_interval: float = 15.0,
+        health_timeout: float = 2.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not backends:
+            raise ValueError("Se necesita al menos una instancia de Ollama")
+        self.backends = backends
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.affinity_slack = affinity_slack
+        self.max_affinity_entries = max_affinity_entries
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._clock = clock
+        self._affinity: "OrderedDict[Hashable, OllamaBackend]" = OrderedDict()
+        self._health_task: Optional[asyncio.Task] = None
+        self.model = getattr(backends[0].llm, 'model', None)
+        self.temperature = getattr(backends[0].llm, 'temperature', None)
+        self.num_ctx = getattr(backends[0].llm, 'num_ctx', None)
+
+    def choose(self, key: Optional[Hashable] = None, exclude: Optional[List[OllamaBackend]] = None) -> OllamaBackend:
+        """Elige la instancia que debe atender la siguiente llamada."""
+        now = self._clock()
+        candidates = [b for b in self.backends if b not in (exclude or [])] or list(self.backends)
+        available = [b for b in candidates if b.is_available(now)]
+        if not available:
+            # Todas expulsadas: se prueba la que antes vuelve a estar disponible
+            return min(candidates, key=lambda b: b.ejected_until)
+
+        least = min(available, key=lambda b: b.outstanding)
+        preferred = self._affinity.get(key) if key is not None else None
+        if (
+            preferred is not None
+            and preferred in available
+            and preferred.outstanding <= least.outstanding + self.affinity_slack
+        ):
+            return preferred
+        return least
+
+    def _remember(self, key: Optional[Hashable], backend: OllamaBackend) -> None:
+        if key is None:
+            return
+        self._affinity[key] = backend
+        self._affinity.move_to_end(key)
+        while len(self._affinity) > self.max_affinity_entries:
+            self._affinity.popitem(last=False)
+
+    def _record_success(self, backend: OllamaBackend) -> None:
+        backend.served += 1
+        backend.consecutive_failures = 0
+        backend.ejected_until = 0.0
+
+    def _record_failure(self, backend: OllamaBackend, error: Exception) -> None:
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        logger.warning(f"Fallo en la instancia de Ollama {backend.url}: {str(error)}")
+        if backend.consecutive_failures >= self.max_failures:
+            self._eject(backend)
+
+    def _eject(self, backend: OllamaBackend) -> None:
+        backend.ejected_until = self._clock() + self.eject_seconds
+        logger.warning(f"Instancia de Ollama {backend.url} expulsada durante {self.eject_seconds}s")
+
+    async def ainvoke(self, prompt: str, affinity_key: Optional[Hashable] = None, **kwargs) -> str:
+        """
+        Genera la respuesta completa, reintentando en otra instancia si la elegida falla.
+
+        ``affinity_key`` (normalmente el ID de sesión) identifica las llamadas
+        que conviene atender en la misma instancia.
+        """
+        tried: List[OllamaBackend] = []
+        while True:
+            backend = self.choose(affinity_key, exclude=tried)
+            tried.append(backend)
+            backend.outstanding += 1
+            try:
+                response = await backend.llm.ainvoke(prompt, **kwargs)
+            except Exception as e:
+                self._record_failure(backend, e)
+                if len(tried) >= len(self.backends):
+                    raise
+                continue
+            finally:
+                backend.outstanding -= 1
+            self._record_success(backend)
+            self._remember(affinity_key, backend)
+            return response
+
+    async def astream(self, prompt: str, affinity_key: Optional[Hashable] = None, **kwargs) -> AsyncIterator[str]:
+        """Genera la respuesta por fragmentos; solo reintenta si aún no se ha emitido nada."""
+        tried: List[OllamaBackend] = []
+        while True:
+            backend = self.choose(affinity_key, exclude=tried)
+            tried.append(backend)
+            backend.outstanding += 1
+            emitted = False
+            try:
+                async for chunk in backend.llm.astream(prompt, **kwargs):
+                    emitted = True
+                    yield chunk
+            except Exception as e:
+                self._record_failure(backend, e)
+                if emitted or len(tried) >= len(self.backends):
+                    raise
+                continue
+            finally:
+                backend.outstanding -= 1
+            self._record_success(backend)
+            self._remember(affinity_key, backend)
+            return
+
+    async def check_health(self) -> None:
+        """Comprueba cada instancia con ``GET /api/tags`` y actualiza su disponibilidad."""
+        async with httpx.AsyncClient(timeout=self.health_timeout) as client:
+            results = await asyncio.gather(
+                *(client.get(f"{backend.url}/api/tags") for backend in self.backends),
+                return_exceptions=True
+            )
+        for backend, result in zip(self.backends, results):
+            healthy = not isinstance(result, BaseException) and result.status_code == 200
+            if healthy:
+                if not backend.is_available(self._clock()):
+                    logger.info(f"Instancia de Ollama {backend.url} readmitida")
+                backend.consecutive_failures = 0
+                backend.ejected_until = 0.0
+            elif backend.is_available(self._clock()):
+                logger.warning(f"Instancia de Ollama {backend.url} no supera la comprobación de salud")
+                self._eject(backend)
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Error en la comprobación de salud de Ollama: {str(e)}")
+            await asyncio.sleep(self.health_interval)
+
+    def start_health_checks(self) -> None:
+        """Arranca la comprobación periódica de salud en el bucle de eventos actual."""
+        if self.health_interval > 0 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop_health_checks(self) -> None:
+        """Detiene la comprobación periódica de salud."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve el estado de cada instancia."""
+        now = self._clock()
+        return {
+            "backends": [backend.stats(now) for backend in self.backends],
+            "affinity_entries": len(self._affinity),
+        }
+
+
+def parse_keep_alive(value: Any) -> Any:
+    """Convierte OLLAMA_KEEP_ALIVE al formato de Ollama: segundos si es numérico o una duración ("30m")."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def create_llm(config: Any, step: Optional[StepModelConfig] = None) -> Any:
+    """
+    Crea el LLM de Ollama; con varias URLs, un ``BalancedLLM`` que reparte entre ellas.
+
+    ``step`` indica el modelo, la temperatura y la ventana de contexto; por
+    defecto se usan MODEL_NAME, TEMPERATURE y MAX_LENGTH.
+    """
+    step = step or default_step_model(config)
+    keep_alive = parse_keep_alive(getattr(config, 'OLLAMA_KEEP_ALIVE', None))
+
+    from langchain_ollama import OllamaLLM
+
+    def ollama(url: str) -> OllamaLLM:
+        return OllamaLLM(
+            model=step.model_name,
+            base_url=url,
+            temperature=step.temperature,
+            num_ctx=step.context_window,
+            keep_alive=keep_alive
+        )
+
+    urls = parse_base_urls(config)
+    if len(urls) == 1:
+        return ollama(urls[0])
+    logger.info(f"Repartiendo las llamadas al LLM ({step.model_name}) entre {len(urls)} instancias de Ollama")
+    return BalancedLLM(
+        [OllamaBackend(url, ollama(url)) for url in urls],
+        max_failures=int(getattr(config, 'OLLAMA_MAX_FAILURES', 3)),
+        eject_seconds=float(getattr(config, 'OLLAMA_EJECT_SECONDS', 30)),
+        health_interval=float(getattr(config, 'OLLAMA_HEALTH_INTERVAL', 15))
+    )
+
+
+def create_step_llms(config: Any) -> Dict[ProcessState, Any]:
+    """
+    Crea los LLM de los pasos cuya configuración difiere de la global.
+
+    Los pasos con la misma configuración comparten instancia; los que no
+    aparecen en el resultado usan el LLM por defecto del servicio.
+    """
+    default = default_step_model(config)
+    steps = resolve_step_models(config)
+    windows: Dict[str, set] = {}
+    for step in steps.values():
+        windows.setdefault(step.model_name, set()).add(step.context_window)
+    for model_name, sizes in windows.items():
+        if len(sizes) > 1:
+            # Ollama recarga el modelo (y pierde la caché KV) al cambiar num_ctx
+            logger.warning(
+                f"El modelo {model_name} se usa con distintas ventanas de contexto {sorted(sizes)}; "
+                "Ollama lo recargará al alternar entre pasos"
+            )
+
+    built: Dict[StepModelConfig, Any] = {}
+    llms: Dict[ProcessState, Any] = {}
+    for state, step in steps.items():
+        if step == default:
+            continue
+        if step not in built:
+            logger.info(
+                f"Paso {state.value}: modelo {step.model_name}, temperatura {step.temperature}, "
+                f"contexto {step.context_window}"
+            )
+            built[step] = create_llm(config, step)
+        llms[state] = built[step]
+    return llms
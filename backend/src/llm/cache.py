@@ -0,0 +1,194 @@
+"""Caché de respuestas del LLM direccionada por contenido."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def build_cache_key(model_name: Any, temperature: Any, prompt_template: Any, prompt: str) -> str:
+    """Construye la clave de caché a partir del modelo, la plantilla y el prompt renderizado."""
+    template_text = getattr(prompt_template, 'template', prompt_template)
+    template_id = hashlib.sha256(str(template_text).encode('utf-8')).hexdigest()
+    payload = json.dumps(
+        [str(model_name), str(temperature), template_id, prompt],
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Interfaz base para los backends de caché de respuestas."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Libera los recursos del backend."""
+
+    def _record(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def stats(self) -> dict:
+        """Devuelve contadores de aciertos y fallos."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Caché en memoria con expulsión LRU y caducidad por TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        super().__init__(max_entries, ttl_seconds)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._record(None)
+
+        created_at, value = entry
+        if self._is_expired(created_at, time.monotonic()):
+            del self._entries[key]
+            return self._record(None)
+
+        self._entries.move_to_end(key)
+        return self._record(value)
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while self.max_entries and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Caché persistente en disco sobre SQLite con expulsión LRU y TTL."""
+
+    def __init__(self, path: str, max_entries: int = 256, ttl_seconds: float = 3600):
+        super().__init__(max_entries, ttl_seconds)
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)"
+            )
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self._is_expired(created_at, now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+                )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def _clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._record(await asyncio.to_thread(self._get, key))
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def create_response_cache(config: Any) -> Optional[ResponseCache]:
+    """Crea el backend de caché indicado en la configuración."""
+    backend = str(getattr(config, 'CACHE_BACKEND', 'memory')).lower()
+    max_entries = int(getattr(config, 'CACHE_MAX_ENTRIES', 256))
+    ttl_seconds = float(getattr(config, 'CACHE_TTL_SECONDS', 3600))
+
+    if backend == 'memory':
+        return InMemoryResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == 'sqlite':
+        path = getattr(config, 'CACHE_PATH', './data/response_cache.sqlite3')
+        return SQLiteResponseCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend in ('none', 'off', ''):
+        return None
+
+    raise ValueError(f"Backend de caché desconocido: {backend}")
@@ -10,8 +10,25 @@ class LLMConfig(BaseModel):
     MODEL_NAME: str = Field(default_factory=lambda: os.getenv('MODEL_NAME', 'llama3.2-vision'))
     MODEL_TYPE: str = Field(default_factory=lambda: os.getenv('MODEL_TYPE', 'ollama'))
     OLLAMA_BASE_URL: str = Field(default_factory=lambda: os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434'))
+    OLLAMA_BASE_URLS: str = Field(default_factory=lambda: os.getenv('OLLAMA_BASE_URLS', ''))
+    OLLAMA_MAX_FAILURES: int = Field(default_factory=lambda: int(os.getenv('OLLAMA_MAX_FAILURES', '3')))
+    OLLAMA_EJECT_SECONDS: float = Field(default_factory=lambda: float(os.getenv('OLLAMA_EJECT_SECONDS', '30')))
+    OLLAMA_HEALTH_INTERVAL: float = Field(default_factory=lambda: float(os.getenv('OLLAMA_HEALTH_INTERVAL', '15')))
+    OLLAMA_KEEP_ALIVE: str = Field(default_factory=lambda: os.getenv('OLLAMA_KEEP_ALIVE', '30m'))
     MAX_LENGTH: int = Field(default_factory=lambda: int(os.getenv('MAX_LENGTH', '2048')))
     TEMPERATURE: float = Field(default_factory=lambda: float(os.getenv('TEMPERATURE', '0.7')))
+    REFINEMENT_MODEL_NAME: Optional[str] = Field(default_factory=lambda: os.getenv('REFINEMENT_MODEL_NAME') or None)
+    REFINEMENT_TEMPERATURE: Optional[float] = Field(default_factory=lambda: float(os.getenv('REFINEMENT_TEMPERATURE')) if os.getenv('REFINEMENT_TEMPERATURE') else None)
+    REFINEMENT_MAX_LENGTH: Optional[int] = Field(default_factory=lambda: int(os.getenv('REFINEMENT_MAX_LENGTH')) if os.getenv('REFINEMENT_MAX_LENGTH') else None)
+    CORNER_CASES_MODEL_NAME: Optional[str] = Field(default_factory=lambda: os.getenv('CORNER_CASES_MODEL_NAME') or None)
+    CORNER_CASES_TEMPERATURE: Optional[float] = Field(default_factory=lambda: float(os.getenv('CORNER_CASES_TEMPERATURE')) if os.getenv('CORNER_CASES_TEMPERATURE') else None)
+    CORNER_CASES_MAX_LENGTH: Optional[int] = Field(default_factory=lambda: int(os.getenv('CORNER_CASES_MAX_LENGTH')) if os.getenv('CORNER_CASES_MAX_LENGTH') else None)
+    TESTING_STRATEGY_MODEL_NAME: Optional[str] = Field(default_factory=lambda: os.getenv('TESTING_STRATEGY_MODEL_NAME') or None)
+    TESTING_STRATEGY_TEMPERATURE: Optional[float] = Field(default_factory=lambda: float(os.getenv('TESTING_STRATEGY_TEMPERATURE')) if os.getenv('TESTING_STRATEGY_TEMPERATURE') else None)
+    TESTING_STRATEGY_MAX_LENGTH: Optional[int] = Field(default_factory=lambda: int(os.getenv('TESTING_STRATEGY_MAX_LENGTH')) if os.getenv('TESTING_STRATEGY_MAX_LENGTH') else None)
+    FINALIZATION_MODEL_NAME: Optional[str] = Field(default_factory=lambda: os.getenv('FINALIZATION_MODEL_NAME') or None)
+    FINALIZATION_TEMPERATURE: Optional[float] = Field(default_factory=lambda: float(os.getenv('FINALIZATION_TEMPERATURE')) if os.getenv('FINALIZATION_TEMPERATURE') else None)
+    FINALIZATION_MAX_LENGTH: Optional[int] = Field(default_factory=lambda: int(os.getenv('FINALIZATION_MAX_LENGTH')) if os.getenv('FINALIZATION_MAX_LENGTH') else None)
     API_HOST: str = Field(default_factory=lambda: os.getenv('API_HOST', '0.0.0.0'))
     API_PORT: int = Field(default_factory=lambda: int(os.getenv('API_PORT', '8000')))
     ENVIRONMENT: str = Field(default_factory=lambda: os.getenv('ENVIRONMENT', 'development'))
@@ -19,6 +36,29 @@ class LLMConfig(BaseModel):
     DEBUG: bool = Field(default_factory=lambda: os.getenv('DEBUG', 'False').lower() == 'true')
     VECTOR_STORE_PATH: str = Field(default_factory=lambda: os.getenv('VECTOR_STORE_PATH', './data/vector_store'))
     MAX_LENGTH: int = Field(default_factory=lambda: int(os.getenv('MAX_LENGTH', '2048')))
+    CACHE_BACKEND: str = Field(default_factory=lambda: os.getenv('CACHE_BACKEND', 'memory'))
+    CACHE_MAX_ENTRIES: int = Field(default_factory=lambda: int(os.getenv('CACHE_MAX_ENTRIES', '256')))
+    CACHE_TTL_SECONDS: float = Field(default_factory=lambda: float(os.getenv('CACHE_TTL_SECONDS', '3600')))
+    CACHE_PATH: str = Field(default_factory=lambda: os.getenv('CACHE_PATH', './data/response_cache.sqlite3'))
+    SESSION_BACKEND: str = Field(default_factory=lambda: os.getenv('SESSION_BACKEND', 'memory'))
+    SESSION_DB_PATH: str = Field(default_factory=lambda: os.getenv('SESSION_DB_PATH', './data/sessions.sqlite3'))
+    SESSION_REDIS_URL: str = Field(default_factory=lambda: os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0'))
+    SESSION_TTL_SECONDS: float = Field(default_factory=lambda: float(os.getenv('SESSION_TTL_SECONDS', '0')))
+    SESSION_MAX_ENTRIES: int = Field(default_factory=lambda: int(os.getenv('SESSION_MAX_ENTRIES', '0')))
+    SESSION_MAX_BYTES: int = Field(default_factory=lambda: int(os.getenv('SESSION_MAX_BYTES', '0')))
+    SESSION_MAX_INTERACTIONS: int = Field(default_factory=lambda: int(os.getenv('SESSION_MAX_INTERACTIONS', '0')))
+    SESSION_SWEEP_INTERVAL: float = Field(default_factory=lambda: float(os.getenv('SESSION_SWEEP_INTERVAL', '60')))
+    LLM_MAX_IN_FLIGHT: int = Field(default_factory=lambda: int(os.getenv('LLM_MAX_IN_FLIGHT', '0')))
+    LLM_MAX_QUEUE: int = Field(default_factory=lambda: int(os.getenv('LLM_MAX_QUEUE', '0')))
+    LLM_OUTPUT_RESERVE_TOKENS: Optional[int] = Field(default_factory=lambda: int(os.getenv('LLM_OUTPUT_RESERVE_TOKENS')) if os.getenv('LLM_OUTPUT_RESERVE_TOKENS') else None)
+    TOKENIZER_NAME: str = Field(default_factory=lambda: os.getenv('TOKENIZER_NAME', ''))
+    DEDUP_THRESHOLD: float = Field(default_factory=lambda: float(os.getenv('DEDUP_THRESHOLD', '0')))
+    FANOUT_MAX_SECTIONS: int = Field(default_factory=lambda: int(os.getenv('FANOUT_MAX_SECTIONS', '0')))
+    FANOUT_MIN_TOKENS: int = Field(default_factory=lambda: int(os.getenv('FANOUT_MIN_TOKENS', '1500')))
+    WARMUP_ENABLED: bool = Field(default_factory=lambda: os.getenv('WARMUP_ENABLED', 'False').lower() == 'true')
+    WARMUP_RETRY_SECONDS: float = Field(default_factory=lambda: float(os.getenv('WARMUP_RETRY_SECONDS', '10')))
+    SPECULATIVE_PREFETCH: bool = Field(default_factory=lambda: os.getenv('SPECULATIVE_PREFETCH', 'False').lower() == 'true')
+    SPECULATIVE_MAX_IN_FLIGHT: int = Field(default_factory=lambda: int(os.getenv('SPECULATIVE_MAX_IN_FLIGHT', '1')))
     model_config = {
         "populate_by_name": True,
         "alias_generator": lambda x: x.lower()
@@ -0,0 +1,173 @@
+"""Eliminación de elementos casi duplicados (MinHash + LSH) en listas generadas por el LLM."""
+
+import hashlib
+import random
+import re
+import unicodedata
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+_ITEM_PREFIX = re.compile(r'^\s*(\d+[.)]|[-*•])\s*')
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def renumber(items: Iterable[str]) -> List[str]:
+    """Renumera de forma consecutiva los elementos numerados ("1. ...")."""
+    number = 0
+    renumbered = []
+    for item in items:
+        match = _ITEM_PREFIX.match(item)
+        if match and match.group(1)[0].isdigit():
+            number += 1
+            item = f"{number}. {item[match.end():]}"
+        renumbered.append(item)
+    return renumbered
+
+
+def normalize(item: str) -> str:
+    """Texto comparable de un elemento: sin numeración, formato, tildes ni puntuación."""
+    text = _ITEM_PREFIX.sub('', item, count=1).replace('**', '')
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w]+', ' ', text).split())
+
+
+def shingles(text: str, size: int = 4) -> FrozenSet[str]:
+    """Conjunto de n-gramas de caracteres del texto normalizado."""
+    text = normalize(text)
+    if len(text) <= size:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """Firma MinHash de conjuntos de shingles con ``num_perm`` permutaciones."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: FrozenSet[str]) -> List[int]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+            for item in items
+        ] or [0]
+        return [
+            min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+            for a, b in self._permutations
+        ]
+
+
+class LSHIndex:
+    """Índice LSH en memoria: agrupa firmas MinHash por bandas para encontrar candidatos."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[tuple, List[int]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def candidates(self, signature: List[int]) -> List[int]:
+        """Devuelve los elementos indexados que comparten alguna banda con la firma."""
+        found = set()
+        for band, key in self._band_keys(signature):
+            found.update(self._buckets[band].get(key, ()))
+        return sorted(found)
+
+    def add(self, item_id: int, signature: List[int]) -> None:
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(item_id)
+
+
+class NearDuplicateFilter:
+    """
+    Elimina de una lista los elementos casi duplicados de otros anteriores.
+
+    Dos elementos son casi duplicados si la similitud de Jaccard de sus
+    n-gramas de caracteres alcanza ``threshold`` y contienen los mismos
+    números ("0 artículos" y "1000 artículos" son casos distintos). El
+    índice LSH limita las comparaciones a los candidatos que comparten
+    alguna banda de su firma MinHash, y la similitud se confirma de forma
+    exacta.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16, shingle_size: int = 4):
+        self.threshold = threshold
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self._hasher = MinHasher(num_perm)
+        self.removed = 0
+
+    def dedupe(self, items: Iterable[str], existing: Iterable[str] = ()) -> List[str]:
+        """
+        Conserva la primera aparición de cada elemento nuevo.
+
+        ``existing`` son los elementos que ya tenía el usuario: los que se
+        repiten tal cual en ``items`` se conservan sin cambios aunque se
+        parezcan entre sí, y los elementos nuevos se comparan también con
+        ellos. Si se elimina algún elemento, los que quedan se renumeran.
+        """
+        index = LSHIndex(self._hasher.num_perm, self.bands)
+        indexed_shingles: List[FrozenSet[str]] = []
+        indexed_numbers: List[FrozenSet[str]] = []
+
+        def add(item_shingles: FrozenSet[str], numbers: FrozenSet[str], signature: List[int]) -> None:
+            index.add(len(indexed_shingles), signature)
+            indexed_shingles.append(item_shingles)
+            indexed_numbers.append(numbers)
+
+        existing_keys = set()
+        for item in existing:
+            item_shingles = shingles(item, self.shingle_size)
+            if item_shingles:
+                existing_keys.add(normalize(item))
+                add(item_shingles, frozenset(re.findall(r'\d+', normalize(item))), self._hasher.signature(item_shingles))
+
+        kept: List[str] = []
+        removed = 0
+        for item in items:
+            item = item.strip()
+            item_shingles = shingles(item, self.shingle_size)
+            if not item_shingles:
+                continue
+            if normalize(item) in existing_keys:
+                kept.append(item)
+                continue
+            numbers = frozenset(re.findall(r'\d+', normalize(item)))
+            signature = self._hasher.signature(item_shingles)
+            if any(
+                indexed_numbers[candidate] == numbers
+                and jaccard(item_shingles, indexed_shingles[candidate]) >= self.threshold
+                for candidate in index.candidates(signature)
+            ):
+                removed += 1
+                continue
+            add(item_shingles, numbers, signature)
+            kept.append(item)
+        self.removed += removed
+        return renumber(kept) if removed else kept
+
+    def stats(self) -> Dict[str, Any]:
+        return {"threshold": self.threshold, "removed": self.removed}
+
+
+def create_deduplicator(config: Any) -> Optional[NearDuplicateFilter]:
+    """Crea el filtro de casi duplicados (None si DEDUP_THRESHOLD es 0, el valor por defecto)."""
+    threshold = float(getattr(config, 'DEDUP_THRESHOLD', 0) or 0)
+    if threshold <= 0:
+        return None
+    return NearDuplicateFilter(threshold=threshold)
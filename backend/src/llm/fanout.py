@@ -0,0 +1,102 @@
+"""División de historias grandes en áreas independientes y combinación de los resultados."""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from .dedup import normalize, renumber
+
+# Encabezados markdown, líneas en negrita o líneas cortas terminadas en dos puntos
+_HEADING = re.compile(r'^\s{0,3}(#{1,6}\s+\S.*|\*\*[^*\n]+\*\*:?|[^\n]{1,60}:)\s*$')
+# Elementos de lista de primer nivel: "1. ...", "2) ...", "- ...", "* ...", "• ..."
+_ITEM = re.compile(r'^\s{0,3}(\d+[.)]|[-*•])\s+\S')
+
+
+def _split_at(lines: List[str], is_start) -> List[str]:
+    """Agrupa las líneas en bloques que empiezan en las líneas que cumplen ``is_start``."""
+    blocks: List[List[str]] = [[]]
+    for line in lines:
+        if is_start(line) and any(previous.strip() for previous in blocks[-1]):
+            blocks.append([])
+        blocks[-1].append(line)
+    return [text for text in ('\n'.join(block).strip() for block in blocks) if text]
+
+
+def _group(areas: List[str], max_sections: int) -> List[str]:
+    """Une áreas consecutivas en como mucho ``max_sections`` grupos de tamaño parecido."""
+    if len(areas) <= max_sections:
+        return areas
+    target = sum(len(area) for area in areas) / max_sections
+    groups: List[List[str]] = [[]]
+    size = 0
+    for index, area in enumerate(areas):
+        remaining = len(areas) - index
+        if groups[-1] and len(groups) < max_sections and (size >= target or remaining <= max_sections - len(groups)):
+            groups.append([])
+            size = 0
+        groups[-1].append(area)
+        size += len(area)
+    return ['\n\n'.join(group) for group in groups]
+
+
+def split_story(story: str, max_sections: int) -> List[str]:
+    """
+    Divide una historia en como mucho ``max_sections`` áreas de aceptación.
+
+    Las áreas se delimitan por encabezados y, si no los hay, por los
+    elementos de lista de primer nivel (p. ej. los criterios de aceptación).
+    El texto anterior a la primera área (el enunciado "Como... quiero...")
+    se repite al principio de cada sección como contexto. Si la historia no
+    tiene al menos dos áreas se devuelve entera.
+    """
+    if max_sections < 2:
+        return [story]
+    lines = story.strip().splitlines()
+    for is_start in (lambda line: bool(_HEADING.match(line)), lambda line: bool(_ITEM.match(line))):
+        blocks = _split_at(lines, is_start)
+        preamble = ''
+        if blocks and not is_start(blocks[0].splitlines()[0]):
+            preamble, blocks = blocks[0], blocks[1:]
+        if len(blocks) >= 2:
+            break
+    else:
+        return [story]
+
+    return [
+        f"{preamble}\n\n{area}" if preamble else area
+        for area in _group(blocks, max_sections)
+    ]
+
+
+def merge_items(lists: Iterable[Iterable[str]]) -> List[str]:
+    """
+    Combina las listas de varias secciones eliminando los elementos repetidos.
+
+    Se conserva la primera aparición de cada elemento y se renumeran los
+    elementos numerados ("1. ...") de forma consecutiva.
+    """
+    merged: List[str] = []
+    seen = set()
+    for items in lists:
+        for item in items:
+            item = item.strip()
+            key = normalize(item)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return renumber(merged)
+
+
+def combine_token_usage(usages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Suma los tokens de los prompts de varias secciones y une las entradas recortadas."""
+    if not usages:
+        return None
+    trimmed: List[str] = []
+    for usage in usages:
+        trimmed.extend(name for name in usage['trimmed_inputs'] if name not in trimmed)
+    return {
+        **usages[0],
+        'prompt_tokens': sum(usage['prompt_tokens'] for usage in usages),
+        'trimmed': bool(trimmed),
+        'trimmed_inputs': trimmed,
+    }
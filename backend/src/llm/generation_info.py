@@ -0,0 +1,61 @@
+"""
+Datos que Ollama devuelve con cada generación (``generation_info``).
+
+``ainvoke`` solo devuelve el texto; los tiempos que mide Ollama
+(``prompt_eval_duration``, ``eval_duration``... en nanosegundos) se recogen
+con un callback de langchain que se activa mediante una variable de contexto,
+sin cambiar la llamada al LLM. Con LLMs que no son de langchain (dobles de
+prueba) el diccionario queda vacío.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+_current: ContextVar[Optional[Any]] = ContextVar('llm_generation_info', default=None)
+_handler_class: Optional[type] = None
+
+
+def _get_handler_class() -> type:
+    """Crea el callback y registra la variable de contexto la primera vez que se usa."""
+    global _handler_class
+    if _handler_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+        from langchain_core.tracers.context import register_configure_hook
+
+        class GenerationInfoHandler(BaseCallbackHandler):
+            """Guarda el ``generation_info`` de las generaciones terminadas."""
+
+            # Se ejecuta en el bucle, sin pasar por un hilo del executor
+            run_inline = True
+
+            def __init__(self):
+                self.info: Dict[str, Any] = {}
+
+            def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+                for generations in response.generations:
+                    for generation in generations:
+                        self.info.update(generation.generation_info or {})
+
+        register_configure_hook(_current, inheritable=True)
+        _handler_class = GenerationInfoHandler
+    return _handler_class
+
+
+@contextmanager
+def capture_generation_info() -> Iterator[Dict[str, Any]]:
+    """Devuelve un diccionario que se rellena con el ``generation_info`` de las llamadas del bloque."""
+    handler = _get_handler_class()()
+    token = _current.set(handler)
+    try:
+        yield handler.info
+    finally:
+        _current.reset(token)
+
+
+def prompt_eval_seconds(info: Dict[str, Any]) -> Optional[float]:
+    """Tiempo de evaluación del prompt en segundos, si Ollama lo ha indicado."""
+    duration = info.get('prompt_eval_duration')
+    if not duration:
+        return None
+    return duration / 1e9
@@ -30,6 +30,7 @@ class Session:
     testing_strategy_feedback: Optional[str] = None
     finalized_story: Optional[str] = None
     finalization_feedback: Optional[str] = None
+    functional_tests: Optional[str] = None
     interactions: List[Interaction] = field(default_factory=list)
 
     def add_interaction(self, human_message: str, ai_message: str, process_state: ProcessState):
@@ -40,4 +41,19 @@ class Session:
                 ai_message=ai_message,
                 process_state=process_state
             )
-        )
\ No newline at end of file
+        )
+
+    def approximate_size(self) -> int:
+        """Estima el número de caracteres de texto retenidos por la sesión."""
+        size = 0
+        for value in (
+            self.refined_story, self.refinement_feedback, self.corner_cases_feedback,
+            self.testing_strategy_feedback, self.finalized_story, self.finalization_feedback,
+            self.functional_tests
+        ):
+            size += len(value) if value else 0
+        for items in (self.corner_cases, self.testing_strategy):
+            size += sum(len(item) for item in items) if items else 0
+        for interaction in self.interactions:
+            size += len(interaction.human_message) + len(interaction.ai_message)
+        return size
@@ -0,0 +1,105 @@
+"""Extracción incremental de secciones delimitadas por marcadores."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SectionParser:
+    """
+    Divide la respuesta del LLM en secciones en una única pasada.
+
+    Los marcadores se esperan en orden; cada sección se cierra al aparecer
+    cualquiera de los marcadores posteriores y los que se saltan quedan vacíos.
+    Acepta el texto por fragmentos (streaming) o completo (``parse``); solo se
+    retiene el texto de la sección abierta y una cola del tamaño del marcador
+    más largo para detectar marcadores partidos entre fragmentos.
+    """
+
+    def __init__(self, markers: Iterable[str]):
+        self.markers: List[str] = [marker.strip() for marker in markers if marker is not None]
+        self._sections: Dict[str, str] = {}
+        self._current = -1
+        self._parts: List[str] = []
+        self._length = 0
+        self._tail = ''
+        self._tail_size = max((len(marker) for marker in self.markers), default=1) - 1
+        self._closed = False
+
+    @property
+    def sections(self) -> Dict[str, str]:
+        """Secciones extraídas hasta el momento, en el orden de los marcadores."""
+        return {marker: self._sections.get(marker, '') for marker in self.markers}
+
+    @property
+    def missing_markers(self) -> List[str]:
+        """Marcadores que no han aparecido en el texto."""
+        return [marker for marker in self.markers if marker not in self._sections]
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume un fragmento y devuelve las secciones que quedan cerradas."""
+        completed: List[Tuple[str, str]] = []
+        if not chunk or self._closed:
+            return completed
+
+        window = self._tail + chunk
+        base = self._length - len(self._tail)
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+        while True:
+            found = self._find_next(window)
+            if found is None:
+                break
+            index, position = found
+            region = ''.join(self._parts)
+            end = base + position
+            self._close_current(region[:end], completed)
+            self._current = index
+
+            rest = region[end + len(self.markers[index]):]
+            self._parts = [rest] if rest else []
+            self._length = len(rest)
+            window = rest
+            base = 0
+
+        self._tail = window[-self._tail_size:] if self._tail_size else ''
+        if self._current < 0:
+            # El texto previo al primer marcador no forma parte de ninguna sección
+            self._parts = [self._tail] if self._tail else []
+            self._length = len(self._tail)
+        return completed
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Cierra la última sección abierta y devuelve las secciones pendientes."""
+        completed: List[Tuple[str, str]] = []
+        if not self._closed:
+            self._close_current(''.join(self._parts), completed)
+            self._parts = []
+            self._tail = ''
+            self._closed = True
+        return completed
+
+    def parse(self, text: str) -> Dict[str, str]:
+        """Extrae todas las secciones de un texto completo."""
+        self.feed(text)
+        self.close()
+        return self.sections
+
+    def _find_next(self, window: str) -> Optional[Tuple[int, int]]:
+        best: Optional[Tuple[int, int]] = None
+        for index in range(self._current + 1, len(self.markers)):
+            marker = self.markers[index]
+            if not marker:
+                continue
+            position = window.find(marker, 0, best[1] + len(marker) if best else len(window))
+            if position != -1 and (best is None or position < best[1]):
+                best = (index, position)
+        return best
+
+    def _close_current(self, content: str, completed: List[Tuple[str, str]]) -> None:
+        if self._current < 0:
+            return
+        marker = self.markers[self._current]
+        section = content.strip()
+        self._sections[marker] = section
+        completed.append((marker, section))
+
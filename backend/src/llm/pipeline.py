@@ -0,0 +1,108 @@
+"""Ejecución del flujo completo (refinamiento, casos esquina, testing y finalización) en una sola petición."""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID
+
+from .models import ProcessState
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_STEPS: List[ProcessState] = [
+    ProcessState.REFINEMENT,
+    ProcessState.CORNER_CASES,
+    ProcessState.TESTING_STRATEGY,
+    ProcessState.FINALIZATION,
+]
+
+# Sección de cada paso que necesitan los siguientes y clave del resultado que aporta
+HANDOFFS: Dict[ProcessState, tuple] = {
+    ProcessState.REFINEMENT: ('**Historia Refinada:**', 'refined_story'),
+    ProcessState.CORNER_CASES: ('**Casos Esquina Actualizados:**', 'corner_cases'),
+    ProcessState.TESTING_STRATEGY: ('**Estrategias de Testing Actualizadas:**', 'testing_strategies'),
+}
+
+
+async def stream_pipeline(
+    service,
+    session_id: UUID,
+    user_story: str,
+    feedback: Optional[str] = None,
+    bypass_cache: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Ejecuta los cuatro pasos del flujo sobre una sesión emitiendo eventos.
+
+    Cada paso arranca en cuanto se cierra en el paso anterior la sección que
+    necesita (p. ej. los casos esquina empiezan cuando termina la sección
+    ``**Historia Refinada:**``, sin esperar al resumen de cambios), así que
+    las generaciones se solapan dentro de los límites del planificador.
+
+    Emite eventos ``section`` (``step``, ``marker``, ``content``), un evento
+    ``stage`` (``step``, ``result``) al terminar cada paso y un evento final
+    ``result`` con el resultado combinado. Si un paso falla se cancelan los
+    demás y se propaga el error.
+    """
+    loop = asyncio.get_running_loop()
+    handoffs = {state: loop.create_future() for state in HANDOFFS}
+    queue: asyncio.Queue = asyncio.Queue()
+    results: Dict[ProcessState, Dict[str, Any]] = {}
+
+    async def build_step(state: ProcessState) -> Dict[str, Any]:
+        if state is ProcessState.REFINEMENT:
+            return service._refinement_step(session_id, user_story, feedback)
+        refined_story = await handoffs[ProcessState.REFINEMENT]
+        if state is ProcessState.CORNER_CASES:
+            return service._corner_cases_step(session_id, refined_story)
+        corner_cases = await handoffs[ProcessState.CORNER_CASES]
+        if state is ProcessState.TESTING_STRATEGY:
+            return service._testing_strategy_step(session_id, refined_story, corner_cases)
+        testing_strategies = await handoffs[ProcessState.TESTING_STRATEGY]
+        return service._finalization_step(session_id, refined_story, corner_cases, testing_strategies)
+
+    def hand_off(state: ProcessState, value: Any) -> None:
+        future = handoffs.get(state)
+        if future is not None and not future.done():
+            logger.debug(f"Paso {state.value}: sección disponible para los pasos siguientes")
+            future.set_result(value)
+
+    async def run(state: ProcessState) -> None:
+        step = await build_step(state)
+        marker, key = HANDOFFS.get(state, (None, None))
+        async for event in await service._stream_step(**step, use_cache=not bypass_cache, speculate=False):
+            if event['event'] == 'section':
+                await queue.put({'event': 'section', 'data': {'step': state.value, **event['data']}})
+                if event['data']['marker'] == marker:
+                    partial = step['post_process_response']({marker: event['data']['content']})
+                    hand_off(state, partial[key])
+            elif event['event'] == 'result':
+                results[state] = event['data']
+                if key is not None:
+                    hand_off(state, event['data'][key])
+                await queue.put({'event': 'stage', 'data': {'step': state.value, 'result': event['data']}})
+
+    tasks = [asyncio.create_task(run(state)) for state in PIPELINE_STEPS]
+    for task in tasks:
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+
+    pending = len(tasks)
+    try:
+        while pending:
+            item = await queue.get()
+            if item is not None:
+                yield item
+                continue
+            pending -= 1
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    combined: Dict[str, Any] = {}
+    for state in PIPELINE_STEPS:
+        combined.update({k: v for k, v in results[state].items() if k != 'token_usage'})
+    yield {'event': 'result', 'data': combined}
@@ -0,0 +1,9 @@
+"""
+Plantillas de los prompts de cada paso del flujo.
+
+Cada plantilla es ``<PASO>_INSTRUCTIONS + <PASO>_INPUTS``: las instrucciones
+fijas van primero y los datos de la petición al final, de modo que el prefijo
+del prompt es idéntico en todas las peticiones de un paso y Ollama reutiliza
+su caché KV mientras el modelo siga cargado (``OLLAMA_KEEP_ALIVE``). Las
+instrucciones no deben incluir variables.
+"""
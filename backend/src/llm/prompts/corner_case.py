@@ -1,19 +1,9 @@
 from langchain.prompts import PromptTemplate
 
-corner_case_prompt = PromptTemplate(
-    template="""
+CORNER_CASE_INSTRUCTIONS = """
     Eres un analista de calidad que identifica posibles casos esquina en historias de usuario.
 
-    Historia de Usuario Refinada:
-    {refined_user_story}
-
-    Casos Esquina Anteriores (si existen):
-    {existing_corner_cases}
-
-    Feedback del Usuario (si existe):
-    {feedback}
-
-    Teniendo en cuenta la historia de usuario refinada, los casos esquina anteriores (si existen) y el feedback proporcionado (si existe), por favor:
+    Teniendo en cuenta la historia de usuario refinada, los casos esquina anteriores (si existen) y el feedback proporcionado (si existe), que se indican al final, por favor:
 
     1. **Actualiza y mejora la lista de casos esquina**, asegurándote de incorporar el feedback del usuario.
     2. **Considera los casos esquina existentes** y realiza modificaciones o añadidos según sea necesario.
@@ -38,6 +28,20 @@ corner_case_prompt = PromptTemplate(
     **Análisis de Cambios:**
     - Se añadieron casos relacionados con autenticación de dos factores y bloqueo por inactividad según el feedback proporcionado.
     - Se actualizó el caso de acceso desde ubicaciones no reconocidas para enfatizar la seguridad.
-    """,
+"""
+
+CORNER_CASE_INPUTS = """
+    Historia de Usuario Refinada:
+    {refined_user_story}
+
+    Casos Esquina Anteriores (si existen):
+    {existing_corner_cases}
+
+    Feedback del Usuario (si existe):
+    {feedback}
+    """
+
+corner_case_prompt = PromptTemplate(
+    template=CORNER_CASE_INSTRUCTIONS + CORNER_CASE_INPUTS,
     input_variables=["refined_user_story", "existing_corner_cases", "feedback"]
 )
@@ -1,4 +1,4 @@
-finalize_story_prompt = """Eres un experto en historias de usuario y testing. DEBES seguir ESTRICTAMENTE el siguiente formato para tu respuesta:
+FINALIZE_INSTRUCTIONS = """Eres un experto en historias de usuario y testing. DEBES seguir ESTRICTAMENTE el siguiente formato para tu respuesta:
 
 **Historia Finalizada:**
 [Historia breve y concisa]
@@ -35,7 +35,9 @@ REGLAS ABSOLUTAMENTE OBLIGATORIAS:
 5. NO usar viñetas o numeración
 6. NINGUNA SECCIÓN PUEDE OMITIRSE
 
-Historia Original:
+"""
+
+FINALIZE_INPUTS = """Historia Original:
 {story_input}
 
 Casos Esquina:
@@ -47,3 +49,5 @@ Estrategia de Testing:
 Feedback:
 {feedback}
 """
+
+finalize_story_prompt = FINALIZE_INSTRUCTIONS + FINALIZE_INPUTS
@@ -1,16 +1,9 @@
 from langchain.prompts import PromptTemplate
 
-refinement_prompt = PromptTemplate(
-    template="""
+REFINEMENT_INSTRUCTIONS = """
 Eres un asistente inteligente que ayuda a refinar historias de usuario para mejorar su claridad y completitud.
 
-Historia de Usuario Original:
-{user_story}
-
-Feedback del Usuario (si existe):
-{feedback}
-
-Teniendo en cuenta la historia de usuario y el feedback proporcionado (si existe), por favor, refina la historia para mejorar su claridad y completitud, y proporciona un resumen de los cambios realizados. Responde únicamente con las siguientes secciones claramente delimitadas:
+Teniendo en cuenta la historia de usuario y el feedback proporcionado (si existe), que se indican al final, por favor, refina la historia para mejorar su claridad y completitud, y proporciona un resumen de los cambios realizados. Responde únicamente con las siguientes secciones claramente delimitadas:
 
 **Historia Refinada:**
 Aquí va la historia refinada.
@@ -25,6 +18,17 @@ Como usuario registrado, quiero poder iniciar sesión en mi cuenta utilizando mi
 **Cambios Realizados:**
 - Se especificó el método de autenticación (correo electrónico y contraseña).
 - Se añadió el énfasis en la seguridad al acceder a datos personales.
-""",
+"""
+
+REFINEMENT_INPUTS = """
+Historia de Usuario Original:
+{user_story}
+
+Feedback del Usuario (si existe):
+{feedback}
+"""
+
+refinement_prompt = PromptTemplate(
+    template=REFINEMENT_INSTRUCTIONS + REFINEMENT_INPUTS,
     input_variables=["user_story", "feedback"]
 )
@@ -1,22 +1,9 @@
 from langchain.prompts import PromptTemplate
 
-testing_strategy_prompt = PromptTemplate(
-    template="""
+TESTING_STRATEGY_INSTRUCTIONS = """
 Eres un ingeniero de pruebas que diseña estrategias de testing para historias de usuario.
 
-Historia de Usuario Refinada:
-{refined_user_story}
-
-Casos Esquina Identificados:
-{corner_cases}
-
-Estrategias de Testing Anteriores (si existen):
-{existing_testing_strategies}
-
-Feedback del Usuario (si existe):
-{feedback}
-
-Teniendo en cuenta la historia refinada, los casos esquina, las estrategias de testing anteriores (si existen) y el feedback proporcionado (si existe), por favor:
+Teniendo en cuenta la historia refinada, los casos esquina, las estrategias de testing anteriores (si existen) y el feedback proporcionado (si existe), que se indican al final, por favor:
 
 1. **Actualiza y mejora la lista de estrategias de testing**, asegurándote de incorporar el feedback del usuario.
 2. **Considera las estrategias de testing existentes** y realiza modificaciones o añadidos según sea necesario.
@@ -41,6 +28,23 @@ Aquí va un resumen de los cambios realizados o consideraciones adicionales.
 
 **Análisis de Cambios:**
 - Se añadieron pruebas de rendimiento y seguridad avanzada según el feedback proporcionado.
-""",
+"""
+
+TESTING_STRATEGY_INPUTS = """
+Historia de Usuario Refinada:
+{refined_user_story}
+
+Casos Esquina Identificados:
+{corner_cases}
+
+Estrategias de Testing Anteriores (si existen):
+{existing_testing_strategies}
+
+Feedback del Usuario (si existe):
+{feedback}
+"""
+
+testing_strategy_prompt = PromptTemplate(
+    template=TESTING_STRATEGY_INSTRUCTIONS + TESTING_STRATEGY_INPUTS,
     input_variables=["refined_user_story", "corner_cases", "existing_testing_strategies", "feedback"]
 )
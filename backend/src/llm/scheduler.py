@@ -0,0 +1,183 @@
+"""Control de admisión y cola con prioridades para las llamadas al LLM."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .models import ProcessState
+from src.observability import metrics
+
+logger = logging.getLogger(__name__)
+
+# Prioridad de cada paso: cuanto menor, antes se atiende. Los pasos con
+# respuestas cortas pasan por delante de la finalización, que es la más larga.
+STEP_PRIORITIES: Dict[ProcessState, int] = {
+    ProcessState.REFINEMENT: 0,
+    ProcessState.CORNER_CASES: 1,
+    ProcessState.TESTING_STRATEGY: 1,
+    ProcessState.FINALIZATION: 2,
+}
+DEFAULT_PRIORITY = 1
+
+
+def priority_for(process_state: Optional[ProcessState]) -> int:
+    """Devuelve la prioridad de un paso del flujo."""
+    return STEP_PRIORITIES.get(process_state, DEFAULT_PRIORITY)
+
+
+class LLMQueueFullError(Exception):
+    """La cola de espera del LLM está llena y la petición se rechaza."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            f"El LLM está saturado. Vuelva a intentarlo en {retry_after} segundos"
+        )
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Limita las llamadas simultáneas al LLM y ordena las que esperan.
+
+    Admite hasta ``max_in_flight`` llamadas a la vez; las demás esperan en una
+    cola de como mucho ``max_queue`` peticiones (sin límite si es 0) ordenada
+    por prioridad y, a igual prioridad, por orden de llegada. Con la cola
+    llena se lanza ``LLMQueueFullError`` con una estimación del tiempo de
+    espera.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 2,
+        max_queue: int = 16,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._clock = clock
+        self._in_flight = 0
+        self._queue: List[list] = []
+        self._queued = 0
+        self._sequence = itertools.count()
+        # Media móvil de la duración de las llamadas, para estimar Retry-After
+        self._service_time = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self._wait_count: Dict[int, int] = {}
+        self._wait_total: Dict[int, float] = {}
+        self._wait_max: Dict[int, float] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def has_capacity(self) -> bool:
+        """Indica si una llamada obtendría hueco ahora mismo, sin esperar en la cola."""
+        return self._in_flight < self.max_in_flight and not self._queued
+
+    def retry_after(self) -> int:
+        """Estima en segundos cuándo habrá hueco en la cola."""
+        service_time = self._service_time or 1.0
+        waves = (self._queued + self._in_flight) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(service_time * waves))
+
+    def check_admission(self) -> None:
+        """Lanza ``LLMQueueFullError`` si una nueva petición tuviera que esperar con la cola llena."""
+        if self._in_flight >= self.max_in_flight and 0 < self.max_queue <= self._queued:
+            self.rejected += 1
+            retry_after = self.retry_after()
+            logger.warning(f"Cola del LLM llena ({self._queued} en espera); Retry-After {retry_after}s")
+            raise LLMQueueFullError(retry_after)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = DEFAULT_PRIORITY) -> AsyncIterator[None]:
+        """Reserva un hueco para llamar al LLM durante el bloque ``async with``."""
+        await self._acquire(priority)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            elapsed = self._clock() - started
+            self._service_time = elapsed if not self._service_time else 0.8 * self._service_time + 0.2 * elapsed
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        enqueued = self._clock()
+        if self._in_flight < self.max_in_flight and not self._queued:
+            self._in_flight += 1
+            self._record_wait(priority, 0.0)
+            return
+
+        self.check_admission()
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._queue, entry)
+        self._queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # El hueco ya se había concedido: se cede al siguiente
+                self._release()
+            else:
+                self._queued -= 1
+                future.cancel()
+            raise
+        self._record_wait(priority, self._clock() - enqueued)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self._queued -= 1
+            self._in_flight += 1
+            future.set_result(None)
+            return
+
+    def _record_wait(self, priority: int, waited: float) -> None:
+        metrics.QUEUE_WAIT.observe(waited, priority=str(priority))
+        self.admitted += 1
+        self._wait_count[priority] = self._wait_count.get(priority, 0) + 1
+        self._wait_total[priority] = self._wait_total.get(priority, 0.0) + waited
+        self._wait_max[priority] = max(self._wait_max.get(priority, 0.0), waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve la ocupación de la cola y los tiempos de espera por prioridad."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds": {
+                priority: {
+                    "count": count,
+                    "avg": self._wait_total[priority] / count,
+                    "max": self._wait_max[priority],
+                }
+                for priority, count in sorted(self._wait_count.items())
+            },
+        }
+
+
+def create_llm_scheduler(config: Any) -> Optional[LLMScheduler]:
+    """Crea el planificador indicado en la configuración (None si LLM_MAX_IN_FLIGHT es 0, el valor por defecto)."""
+    max_in_flight = int(getattr(config, 'LLM_MAX_IN_FLIGHT', 0) or 0)
+    if max_in_flight <= 0:
+        return None
+    return LLMScheduler(
+        max_in_flight=max_in_flight,
+        max_queue=int(getattr(config, 'LLM_MAX_QUEUE', 0) or 0)
+    )
@@ -1,24 +1,40 @@
+import asyncio
 import logging
-from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import HumanMessage, AIMessage, ChatMessage
-from langchain.schema.runnable import RunnablePassthrough
-from src.config.llm_config import LLMConfig
-from langchain_ollama import OllamaLLM
+import time
+import weakref
+from contextlib import nullcontext
+from langchain_core.messages import HumanMessage, AIMessage
+from .config import LLMConfig
 from .models import Session, ProcessState
-from langchain.chains import LLMChain
-from typing import List, Dict, Any, Callable, Tuple, Optional
+from .cache import ResponseCache, build_cache_key, create_response_cache
+from .parsing import SectionParser
+from .singleflight import SingleFlight
+from .speculation import SpeculativePrefetcher, create_speculative_prefetcher
+from .scheduler import LLMScheduler, create_llm_scheduler, priority_for
+from .backends import BalancedLLM, create_llm, create_step_llms
+from .step_models import resolve_step_models
+from .tokens import PromptTooLongError, TokenBudget, TokenCounter, default_output_reserve, fit_prompt
+from .fanout import combine_token_usage, merge_items, split_story
+from .dedup import create_deduplicator
+from .warmup import create_warm_up
+from .generation_info import capture_generation_info, prompt_eval_seconds
+from src.observability import metrics, tracing
+from src.observability.log import Payload, log_event
+from .pipeline import stream_pipeline
+from .session_store import SessionStore, create_session_store
+from typing import List, Dict, Any, AsyncIterator, Callable, Tuple, Optional
 from uuid import uuid4, UUID
 
-# Importar las plantillas de prompts
-from .prompts.refinement import refinement_prompt
-from .prompts.corner_case import corner_case_prompt
-from .prompts.testing import testing_strategy_prompt
-from .prompts.finalize import finalize_story_prompt
-
 logger = logging.getLogger(__name__)
 
-class ChatMessageHistory(BaseChatMessageHistory):
-    """Implementación personalizada de historial de chat."""
+class ChatMessageHistory:
+    """
+    Implementación personalizada de historial de chat.
+
+    Tiene la misma interfaz que ``BaseChatMessageHistory`` de langchain que se
+    usa (``messages``, ``add_message`` y ``clear``) sin importar
+    ``langchain_core.chat_history``, que arrastra los runnables y langsmith.
+    """
     
     def __init__(self):
         self.messages = []
@@ -30,33 +46,105 @@ class ChatMessageHistory(BaseChatMessageHistory):
         self.messages = []
 
 class LLMService:
-    def __init__(self, config: LLMConfig, llm=None):
-        """Inicializa el servicio LLM con la configuración proporcionada."""
-        self.llm = llm if llm is not None else OllamaLLM(
-            model=config.MODEL_NAME,
-            base_url=config.OLLAMA_BASE_URL,
-            temperature=config.TEMPERATURE,
-            context_window=config.MAX_LENGTH
-        )
+    def __init__(
+        self,
+        config: LLMConfig,
+        llm=None,
+        cache: Optional[ResponseCache] = None,
+        session_store: Optional[SessionStore] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        step_llms: Optional[Dict[ProcessState, Any]] = None,
+        speculation: Optional[SpeculativePrefetcher] = None
+    ):
+        """
+        Inicializa el servicio LLM con la configuración proporcionada.
 
-        # Inicializar diccionarios de sesiones y memorias
-        self._sessions: Dict[UUID, Session] = {}
-        self._memories: Dict[UUID, ChatMessageHistory] = {}
+        ``step_llms`` asigna un LLM propio a algunos pasos; los demás usan
+        ``llm``. Si no se indica ninguno de los dos, se crean a partir de la
+        configuración global y de la de cada paso (``<PASO>_MODEL_NAME``...).
+        """
+        self.llm = llm if llm is not None else create_llm(config)
+        if step_llms is None:
+            step_llms = create_step_llms(config) if llm is None else {}
+        self._step_llms: Dict[ProcessState, Any] = dict(step_llms)
+        # Presupuesto de tokens de cada paso: ventana de contexto menos la reserva para la respuesta
+        self.token_counter = TokenCounter(getattr(config, 'TOKENIZER_NAME', None) or None)
+        # Sin LLM_OUTPUT_RESERVE_TOKENS la reserva es proporcional a la ventana de cada paso
+        output_reserve = getattr(config, 'LLM_OUTPUT_RESERVE_TOKENS', None)
+        self.output_reserve = int(output_reserve) if output_reserve is not None else None
+        self._context_windows = {
+            state: step.context_window for state, step in resolve_step_models(config).items()
+        }
+        # Eliminación de casos esquina y estrategias casi duplicados
+        self.deduplicator = create_deduplicator(config)
+        # División opcional de historias grandes en áreas que se generan en paralelo
+        self.fanout_max_sections = int(getattr(config, 'FANOUT_MAX_SECTIONS', 0) or 0)
+        self.fanout_min_tokens = int(getattr(config, 'FANOUT_MIN_TOKENS', 1500) or 0)
+
+        # Caché de respuestas direccionada por contenido
+        self.cache = cache if cache is not None else create_response_cache(config)
+        # Generaciones en curso compartidas por peticiones con el mismo prompt
+        self._in_flight = SingleFlight()
+        # Límite de llamadas simultáneas al LLM y cola con prioridades
+        self.scheduler = scheduler if scheduler is not None else create_llm_scheduler(config)
+        # Generación especulativa del siguiente paso de cada sesión
+        self.speculation = speculation if speculation is not None else create_speculative_prefetcher(config)
+
+        # Inicializar el almacén de sesiones; la memoria de cada sesión se
+        # reconstruye a partir de sus interacciones cuando se pide
+        self._sessions: SessionStore = (
+            session_store if session_store is not None
+            else create_session_store(config, sizeof=self._session_size)
+        )
+        self._sessions.add_eviction_listener(self._on_session_evicted)
+        # Un cerrojo por sesión en uso para que dos pasos de la misma sesión no
+        # se pisen al releerla y guardarla
+        self._session_locks: "weakref.WeakValueDictionary[UUID, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.max_interactions = int(getattr(config, 'SESSION_MAX_INTERACTIONS', 0) or 0)
+        self.session_sweep_interval = float(getattr(config, 'SESSION_SWEEP_INTERVAL', 60) or 0)
         
-        # Usar los prompts importados directamente
+        # Importar las plantillas de prompts al crear el servicio: PromptTemplate
+        # arrastra langchain y ralentizaría la importación de la aplicación
+        from .prompts.refinement import refinement_prompt
+        from .prompts.corner_case import corner_case_prompt
+        from .prompts.testing import testing_strategy_prompt
+        from .prompts.finalize import finalize_story_prompt
         self.refinement_prompt = refinement_prompt
         self.corner_case_prompt = corner_case_prompt
         self.testing_strategy_prompt = testing_strategy_prompt
         self.finalize_story_prompt = finalize_story_prompt
 
-    def create_session(self) -> UUID:
+        # Precalentamiento opcional de los modelos al arrancar
+        self.warmup = create_warm_up(config, self)
+
+    async def create_session(self) -> UUID:
         """Crea una nueva sesión y devuelve su ID."""
         session_id = uuid4()
-        self._sessions[session_id] = Session(session_id=session_id)
-        self._memories[session_id] = ChatMessageHistory()
+        await self._sessions.save(session_id, Session(session_id=session_id))
         return session_id
 
-    def _get_session(self, session_id: UUID) -> Session:
+    def _on_session_evicted(self, session_id: UUID, session: Session, reason: str):
+        """Cancela la generación especulativa de una sesión expulsada del almacén."""
+        if self.speculation is not None:
+            self.speculation.cancel(session_id)
+
+    def _session_size(self, session_id: UUID, session: Session) -> int:
+        """Estima el tamaño en bytes del texto retenido por una sesión."""
+        return session.approximate_size()
+
+    def _trim_history(self, session: Session):
+        """Limita las interacciones retenidas por sesión."""
+        if self.max_interactions:
+            del session.interactions[:-self.max_interactions]
+
+    def _session_lock(self, session_id: UUID) -> asyncio.Lock:
+        """Devuelve el cerrojo de una sesión; se descarta cuando nadie lo usa."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def _get_session(self, session_id: UUID) -> Session:
         """Obtiene una sesión existente."""
         if not isinstance(session_id, UUID):
             try:
@@ -64,10 +152,10 @@ class LLMService:
             except ValueError:
                 raise ValueError(f"ID de sesión inválido: {session_id}")
 
-        if session_id not in self._sessions:
+        session = await self._sessions.load(session_id)
+        if session is None:
             raise ValueError("Sesión no encontrada")
-        
-        return self._sessions[session_id]
+        return session
 
     async def _process_step(
             self,
@@ -78,178 +166,744 @@ class LLMService:
             extract_markers: List[str],
             update_session_callback: Callable[[Session, Any], None],
             format_interaction: Callable[[Any], Tuple[str, str]],
-            post_process_response: Callable[[Dict[str, str]], Any] = None
+            post_process_response: Callable[[Dict[str, str]], Any] = None,
+            use_cache: bool = True,
+            trimmable_inputs: Optional[List[str]] = None
         ) -> Dict[str, Any]:
         """Procesa un paso del flujo de refinamiento."""
-        try:
-            session = self._get_session(session_id)
-            session.state = process_state
+        started = time.perf_counter()
+        with tracing.span('llm.process_step', session_id=session_id, step=process_state.value):
+            try:
+                session = await self._get_session(session_id)
+                session.state = process_state
 
-            # Formatear el prompt y obtener la respuesta
-            prompt = prompt_template.format(**input_variables)
-            logger.debug(f"Prompt formateado: {prompt}")
+                # Formatear el prompt ajustándolo a la ventana de contexto y obtener la respuesta
+                prompt, token_usage = self._fit_prompt(prompt_template, input_variables, process_state, trimmable_inputs)
+                log_event(logger, logging.DEBUG, "llm.prompt", session_id=session_id, step=process_state.value, prompt=Payload(prompt))
+                self._claim_speculation(session_id, prompt_template, prompt, process_state)
+            
+                response = await self._invoke_llm(prompt_template, prompt, use_cache, process_state, session_id)
+                result = await self._complete_step(
+                    session_id,
+                    response,
+                    process_state,
+                    extract_markers,
+                    update_session_callback,
+                    format_interaction,
+                    post_process_response,
+                    token_usage=token_usage
+                )
+                if use_cache:
+                    self._schedule_speculation(session_id, process_state, input_variables, result)
+                metrics.STEP_LATENCY.observe(time.perf_counter() - started, step=process_state.value)
+                return result
             
-            try:
-                response = await self.llm.ainvoke(prompt)
-                logger.debug(f"Respuesta del LLM: {response}")
             except Exception as e:
-                logger.error(f"Error al invocar LLM: {str(e)}")
+                logger.error(f"Error en _process_step: {str(e)}")
                 raise
-            
-            # Extraer secciones si hay marcadores
-            if extract_markers:
-                extracted_sections = self._extract_sections(response, extract_markers)
-                logger.debug(f"Secciones extraídas: {extracted_sections}")
-                if post_process_response:
-                    result = post_process_response(extracted_sections)
-                    logger.debug(f"Resultado post-procesado: {result}")
-                else:
-                    result = {'text': response}
+
+    def _dedupe(self, items: List[str], existing: Optional[List[str]] = None) -> List[str]:
+        """
+        Elimina los casi duplicados de una lista generada de casos esquina o estrategias.
+
+        Solo se descartan elementos nuevos; los que ya envió el usuario
+        (``existing``) no se modifican.
+        """
+        if self.deduplicator is None or not items:
+            return items
+        return self.deduplicator.dedupe(items, existing or ())
+
+    def _fan_out_sections(self, story: str, fan_out: Optional[bool] = None) -> List[str]:
+        """
+        Divide la historia en las áreas que se generarán en paralelo.
+
+        Solo se divide con FANOUT_MAX_SECTIONS de 2 o más (por defecto está
+        desactivado). Con ``fan_out`` a None se divide si la historia alcanza
+        FANOUT_MIN_TOKENS; con False nunca se divide.
+        """
+        max_sections = self.fanout_max_sections
+        if fan_out is False or max_sections < 2:
+            return [story]
+        if fan_out is None and self.token_counter.count(story) < self.fanout_min_tokens:
+            return [story]
+        return split_story(story, max_sections)
+
+    async def _process_fan_out(
+            self,
+            step: Dict[str, Any],
+            sections: List[str],
+            use_cache: bool = True
+        ) -> Dict[str, Any]:
+        """
+        Genera un paso de lista (casos esquina o estrategias) por secciones de la historia.
+
+        Cada sección se genera en paralelo dentro de los límites del
+        planificador; las listas se combinan sin repetidos y los análisis se
+        concatenan. La sesión y la memoria se actualizan una sola vez con la
+        historia completa.
+        """
+        started = time.perf_counter()
+        session_id = step['session_id']
+        process_state = step['process_state']
+        with tracing.span('llm.process_fan_out', session_id=session_id, step=process_state.value, sections=len(sections)):
+            list_marker, analysis_marker = step['extract_markers']
+            session = await self._get_session(session_id)
+            session.state = process_state
+            logger.info(f"Generando {process_state.value} en {len(sections)} secciones en paralelo")
+
+            prompts = [
+                self._fit_prompt(
+                    step['prompt_template'],
+                    {**step['input_variables'], 'refined_user_story': section},
+                    process_state,
+                    step['trimmable_inputs']
+                )
+                for section in sections
+            ]
+            # La especulación se lanza con el paso sin dividir y no coincide con
+            # ninguna sección: se cancela para que libere su hueco
+            self._claim_speculation(session_id, step['prompt_template'], prompts[0][0], process_state)
+
+            async def generate(prompt: str, token_usage: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+                response = await self._invoke_llm(step['prompt_template'], prompt, use_cache, process_state, session_id)
+                return response, token_usage
+
+            tasks = [asyncio.ensure_future(generate(prompt, token_usage)) for prompt, token_usage in prompts]
+            try:
+                outputs = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+            extracted = [self._extract_sections(response, step['extract_markers'], process_state) for response, _ in outputs]
+            merged_sections = {
+                list_marker: '\n'.join(merge_items(
+                    parts.get(list_marker, '').split('\n') for parts in extracted
+                )),
+                analysis_marker: '\n\n'.join(
+                    analysis for analysis in (parts.get(analysis_marker, '').strip() for parts in extracted) if analysis
+                ),
+            }
+            result = await self._complete_step(
+                session_id,
+                '\n\n'.join(response for response, _ in outputs),
+                process_state,
+                step['extract_markers'],
+                step['update_session_callback'],
+                step['format_interaction'],
+                step['post_process_response'],
+                extracted_sections=merged_sections,
+                token_usage=combine_token_usage([token_usage for _, token_usage in outputs])
+            )
+            if use_cache:
+                self._schedule_speculation(session_id, process_state, step['input_variables'], result)
+            metrics.STEP_LATENCY.observe(time.perf_counter() - started, step=process_state.value)
+            return result
+
+    async def _complete_step(
+            self,
+            session_id: UUID,
+            response: str,
+            process_state: ProcessState,
+            extract_markers: List[str],
+            update_session_callback: Callable[[Session, Any], None],
+            format_interaction: Callable[[Any], Tuple[str, str]],
+            post_process_response: Callable[[Dict[str, str]], Any] = None,
+            extracted_sections: Optional[Dict[str, str]] = None,
+            token_usage: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+        """
+        Extrae las secciones de la respuesta y actualiza la sesión y la memoria.
+
+        La sesión se relee al terminar la generación: si ha caducado o se ha
+        eliminado mientras tanto se lanza el mismo error que en
+        ``_get_session`` en lugar de volver a crearla. La relectura y el
+        guardado se hacen bajo el cerrojo de la sesión, de modo que los pasos
+        concurrentes de una sesión no se pisan dentro de un proceso; entre
+        varios workers con un almacén compartido gana la última escritura.
+        """
+        # Extraer secciones si hay marcadores
+        if extract_markers:
+            if extracted_sections is None:
+                extracted_sections = self._extract_sections(response, extract_markers, process_state)
+            log_event(logger, logging.DEBUG, "llm.sections", step=process_state.value, sections=Payload(extracted_sections))
+            if post_process_response:
+                result = post_process_response(extracted_sections)
+                log_event(logger, logging.DEBUG, "llm.result", step=process_state.value, result=Payload(result))
             else:
                 result = {'text': response}
-            
+        else:
+            result = {'text': response}
+        if token_usage is not None:
+            result['token_usage'] = {
+                **token_usage,
+                'completion_tokens': self.token_counter.count(response) if isinstance(response, str) else None
+            }
+            metrics.PROMPT_TOKENS.inc(token_usage['prompt_tokens'], step=process_state.value)
+            if result['token_usage']['completion_tokens'] is not None:
+                metrics.COMPLETION_TOKENS.inc(result['token_usage']['completion_tokens'], step=process_state.value)
+
+        async with self._session_lock(session_id):
+            session = await self._get_session(session_id)
+            session.state = process_state
+
             # Actualizar la sesión con el resultado
             if update_session_callback:
                 update_session_callback(session, result)
-            
-            # Formatear la interacción para la memoria y la sesión
+
+            # Registrar la interacción en la sesión (de ella se reconstruye la memoria)
             if format_interaction:
                 human_message, ai_message = format_interaction(result)
-                await self._add_to_memory(session_id, human_message, ai_message)
                 session.add_interaction(human_message, ai_message, process_state)
-            
-            return result
-            
+                self._trim_history(session)
+
+            # Guardar de nuevo la sesión para que el almacén recalcule su tamaño
+            with tracing.span('llm.save_session', session_id=session_id):
+                await self._sessions.save(session_id, session)
+
+        return result
+
+    async def _stream_step(
+            self,
+            session_id: UUID,
+            prompt_template,
+            input_variables: Dict[str, Any],
+            process_state: ProcessState,
+            extract_markers: List[str],
+            update_session_callback: Callable[[Session, Any], None],
+            format_interaction: Callable[[Any], Tuple[str, str]],
+            post_process_response: Callable[[Dict[str, str]], Any] = None,
+            use_cache: bool = True,
+            trimmable_inputs: Optional[List[str]] = None,
+            speculate: bool = True
+        ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Procesa un paso del flujo emitiendo eventos a medida que el LLM genera.
+
+        La sesión se valida antes de devolver el iterador. Los eventos son
+        diccionarios con las claves ``event`` ('token', 'section' o 'result')
+        y ``data``. Con ``speculate`` se lanza después la generación
+        especulativa del paso siguiente.
+        """
+        started = time.perf_counter()
+        session = await self._get_session(session_id)
+        if self.scheduler is not None:
+            self.scheduler.check_admission()
+        session.state = process_state
+        prompt, token_usage = self._fit_prompt(prompt_template, input_variables, process_state, trimmable_inputs)
+        log_event(logger, logging.DEBUG, "llm.prompt", session_id=session_id, step=process_state.value, prompt=Payload(prompt))
+        self._claim_speculation(session_id, prompt_template, prompt, process_state)
+
+        async def events() -> AsyncIterator[Dict[str, Any]]:
+            with tracing.span('llm.stream_step', session_id=session_id, step=process_state.value):
+                # Como en _invoke_llm: sin caché se genera de nuevo, pero uniéndose
+                # a la generación en curso del mismo prompt y refrescando la caché
+                cache_key = self._cache_key(prompt_template, prompt, process_state)
+                flight_key = self._prompt_key(prompt_template, prompt, process_state)
+                cached = await self.cache.get(cache_key) if use_cache and cache_key is not None else None
+                if use_cache and cache_key is not None:
+                    metrics.CACHE_REQUESTS.inc(step=process_state.value, result='hit' if cached is not None else 'miss')
+                if cached is None and flight_key in self._in_flight:
+                    # Otra petición o la generación especulativa ya está generando este prompt
+                    logger.debug("Esperando a la generación en curso del mismo prompt")
+                    cached = await self._in_flight.do(
+                        flight_key,
+                        lambda: self._generate(prompt_template, prompt, process_state, session_id)
+                    )
+                if cached is not None:
+                    logger.debug("Respuesta obtenida de la caché")
+                    chunks = self._single_chunk(cached)
+                else:
+                    chunks = self._share_stream(flight_key, self._llm_astream(prompt, session_id, process_state))
+
+                parser = SectionParser(extract_markers)
+                parts: List[str] = []
+                generation_span = (
+                    tracing.span('llm.astream', session_id=session_id, step=process_state.value)
+                    if cached is None else tracing.NOOP_SPAN
+                )
+                with generation_span:
+                    queued = time.perf_counter()
+                    async with (self._llm_slot(process_state) if cached is None else nullcontext()):
+                        generation_started = time.perf_counter()
+                        generation_span.set_attribute('queue_seconds', generation_started - queued)
+                        async for chunk in chunks:
+                            if not chunk:
+                                continue
+                            if not parts and cached is None:
+                                # Ollama evalúa todo el prompt antes de emitir el primer token
+                                first_token = time.perf_counter()
+                                metrics.PROMPT_EVAL_TIME.observe(first_token - generation_started, step=process_state.value)
+                                metrics.TIME_TO_FIRST_TOKEN.observe(first_token - started, step=process_state.value)
+                                generation_span.set_attribute('prompt_eval_seconds', first_token - generation_started)
+                            parts.append(chunk)
+                            yield {'event': 'token', 'data': chunk}
+                            for marker, content in parser.feed(chunk):
+                                yield {'event': 'section', 'data': {'marker': marker, 'content': content}}
+
+                for marker, content in parser.close():
+                    yield {'event': 'section', 'data': {'marker': marker, 'content': content}}
+
+                response = ''.join(parts)
+                if cached is None:
+                    metrics.GENERATION_TIME.observe(time.perf_counter() - generation_started, step=process_state.value)
+                if cache_key is not None and cached is None:
+                    await self.cache.set(cache_key, response)
+                self._log_missing_markers(parser, response, process_state)
+
+                result = await self._complete_step(
+                    session_id,
+                    response,
+                    process_state,
+                    extract_markers,
+                    update_session_callback,
+                    format_interaction,
+                    post_process_response,
+                    extracted_sections=parser.sections,
+                    token_usage=token_usage
+                )
+                if use_cache and speculate:
+                    self._schedule_speculation(session_id, process_state, input_variables, result)
+                metrics.STEP_LATENCY.observe(time.perf_counter() - started, step=process_state.value)
+                yield {'event': 'result', 'data': result}
+
+        return events()
+
+    def _token_budget(self, process_state: Optional[ProcessState]) -> TokenBudget:
+        """Presupuesto de tokens del paso según la ventana de contexto de su LLM."""
+        context_window = getattr(self._llm_for(process_state), 'num_ctx', None)
+        if not isinstance(context_window, int) or context_window <= 0:
+            context_window = self._context_windows.get(process_state) or 2048
+        output_reserve = self.output_reserve
+        if output_reserve is None:
+            output_reserve = default_output_reserve(context_window)
+        return TokenBudget(context_window, output_reserve)
+
+    def _fit_prompt(
+        self,
+        prompt_template,
+        input_variables: Dict[str, Any],
+        process_state: Optional[ProcessState],
+        trimmable_inputs: Optional[List[str]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Renderiza el prompt recortando las entradas menos prioritarias si no cabe en la ventana de contexto."""
+        with tracing.span('llm.render_prompt', step=process_state.value if process_state else None) as span:
+            prompt, token_usage = fit_prompt(
+                prompt_template,
+                input_variables,
+                self._token_budget(process_state),
+                self.token_counter,
+                trimmable_inputs
+            )
+            span.set_attribute('prompt_tokens', token_usage.get('prompt_tokens'))
+            return prompt, token_usage
+
+    async def _share_stream(self, key: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Emite los fragmentos de una generación registrada en el grupo single-flight.
+
+        Las peticiones con el mismo prompt que lleguen mientras tanto (en
+        streaming o no) esperan el texto completo en lugar de volver a generar.
+        Si el cliente se desconecta, la generación sigue mientras alguien más
+        la espere.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> str:
+            parts: List[str] = []
+            try:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    queue.put_nowait(chunk)
+            finally:
+                queue.put_nowait(None)
+            return ''.join(parts)
+
+        generation = asyncio.ensure_future(self._in_flight.do(key, produce))
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+            # Propaga el error de la generación, si lo hubo
+            await generation
+        finally:
+            if not generation.done():
+                generation.cancel()
+
+    @staticmethod
+    async def _single_chunk(text: str) -> AsyncIterator[str]:
+        """Emite un texto completo como un único fragmento."""
+        yield text
+
+    def _llm_for(self, process_state: Optional[ProcessState]):
+        """Devuelve el LLM configurado para un paso del flujo."""
+        return self._step_llms.get(process_state, self.llm)
+
+    def _prompt_key(self, prompt_template, prompt: str, process_state: Optional[ProcessState] = None) -> str:
+        """Identifica una generación por el modelo, sus parámetros y el prompt renderizado."""
+        llm = self._llm_for(process_state)
+        return build_cache_key(
+            getattr(llm, 'model', None),
+            getattr(llm, 'temperature', None),
+            prompt_template,
+            prompt
+        )
+
+    def _cache_key(self, prompt_template, prompt: str, process_state: Optional[ProcessState] = None) -> Optional[str]:
+        """Calcula la clave de caché del prompt o None si la caché está desactivada."""
+        if self.cache is None:
+            return None
+        return self._prompt_key(prompt_template, prompt, process_state)
+
+    async def _invoke_llm(
+        self,
+        prompt_template,
+        prompt: str,
+        use_cache: bool = True,
+        process_state: Optional[ProcessState] = None,
+        affinity_key: Optional[UUID] = None,
+        speculative: bool = False
+    ) -> str:
+        """
+        Invoca el LLM consultando antes la caché de respuestas.
+
+        Las peticiones concurrentes con el mismo prompt y los mismos parámetros
+        del modelo comparten una única generación. Con ``use_cache`` a False no
+        se consulta la caché, pero se comparte la generación en curso y su
+        resultado refresca la caché.
+        """
+        cache_key = self._cache_key(prompt_template, prompt, process_state) if use_cache else None
+        if cache_key is not None:
+            cached = await self.cache.get(cache_key)
+            if not speculative:
+                metrics.CACHE_REQUESTS.inc(
+                    step=process_state.value if process_state else 'unknown',
+                    result='hit' if cached is not None else 'miss'
+                )
+            if cached is not None:
+                logger.debug("Respuesta obtenida de la caché")
+                return cached
+
+        return await self._in_flight.do(
+            self._prompt_key(prompt_template, prompt, process_state),
+            lambda: self._generate(prompt_template, prompt, process_state, affinity_key, speculative)
+        )
+
+    def _llm_astream(
+        self,
+        prompt: str,
+        affinity_key: Optional[UUID] = None,
+        process_state: Optional[ProcessState] = None
+    ) -> AsyncIterator[str]:
+        """Abre el streaming del LLM, indicando la sesión si hay varias instancias de Ollama."""
+        llm = self._llm_for(process_state)
+        if isinstance(llm, BalancedLLM):
+            return llm.astream(prompt, affinity_key=affinity_key)
+        return llm.astream(prompt)
+
+    def _llm_slot(self, process_state: Optional[ProcessState], speculative: bool = False):
+        """
+        Reserva un hueco en el planificador del LLM, si está activo.
+
+        Si no queda hueco libre, una petición real expulsa antes una
+        generación especulativa.
+        """
+        if self.scheduler is None:
+            return nullcontext()
+        if not speculative and self.speculation is not None and not self.scheduler.has_capacity():
+            self.speculation.preempt()
+        return self.scheduler.slot(priority_for(process_state))
+
+    async def _generate(
+        self,
+        prompt_template,
+        prompt: str,
+        process_state: Optional[ProcessState] = None,
+        affinity_key: Optional[UUID] = None,
+        speculative: bool = False
+    ) -> str:
+        """Genera la respuesta con el LLM y la guarda en la caché."""
+        try:
+            llm = self._llm_for(process_state)
+            step = process_state.value if process_state else 'unknown'
+            with tracing.span(
+                'llm.ainvoke',
+                session_id=affinity_key,
+                step=step,
+                model=getattr(llm, 'model', None),
+                speculative=speculative
+            ) as span:
+                queued = time.perf_counter()
+                async with self._llm_slot(process_state, speculative):
+                    generation_started = time.perf_counter()
+                    span.set_attribute('queue_seconds', generation_started - queued)
+                    with capture_generation_info() as info:
+                        if isinstance(llm, BalancedLLM):
+                            response = await llm.ainvoke(prompt, affinity_key=affinity_key)
+                        else:
+                            response = await llm.ainvoke(prompt)
+                    metrics.GENERATION_TIME.observe(time.perf_counter() - generation_started, step=step)
+                    # Sin streaming no hay primer token: se usa el tiempo que mide Ollama
+                    prompt_eval = prompt_eval_seconds(info)
+                    if prompt_eval is not None:
+                        metrics.PROMPT_EVAL_TIME.observe(prompt_eval, step=step)
+                        span.set_attribute('prompt_eval_seconds', prompt_eval)
+            log_event(logger, logging.DEBUG, "llm.response", step=step, response=Payload(response))
         except Exception as e:
-            logger.error(f"Error en _process_step: {str(e)}")
+            logger.error(f"Error al invocar LLM: {str(e)}")
             raise
 
-    async def refine_story(
+        cache_key = self._cache_key(prompt_template, prompt, process_state)
+        if cache_key is not None and isinstance(response, str):
+            await self.cache.set(cache_key, response)
+        return response
+
+    def _next_step(
+        self,
+        session_id: UUID,
+        process_state: ProcessState,
+        input_variables: Dict[str, Any],
+        result: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Predice el paso siguiente del flujo con la salida del actual y sin feedback."""
+        if process_state is ProcessState.REFINEMENT:
+            return self._corner_cases_step(session_id, result['refined_story'])
+        if process_state is ProcessState.CORNER_CASES:
+            return self._testing_strategy_step(
+                session_id, input_variables['refined_user_story'], result['corner_cases']
+            )
+        if process_state is ProcessState.TESTING_STRATEGY:
+            corner_cases = [case for case in input_variables['corner_cases'].split('\n') if case]
+            return self._finalization_step(
+                session_id, input_variables['refined_user_story'], corner_cases, result['testing_strategies']
+            )
+        return None
+
+    def _schedule_speculation(
+        self,
+        session_id: UUID,
+        process_state: ProcessState,
+        input_variables: Dict[str, Any],
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        Lanza en segundo plano la generación del paso siguiente para dejarla en la caché.
+
+        Solo se especula con la caché activa y si el planificador tiene huecos
+        libres, para no quitar capacidad a las peticiones reales.
+        """
+        if self.speculation is None or self.cache is None:
+            return
+        step = self._next_step(session_id, process_state, input_variables, result)
+        if step is None:
+            return
+        if self.scheduler is not None and not self.scheduler.has_capacity():
+            self.speculation.skipped += 1
+            return
+
+        next_state = step['process_state']
+        try:
+            prompt, _ = self._fit_prompt(step['prompt_template'], step['input_variables'], next_state, step['trimmable_inputs'])
+        except PromptTooLongError:
+            return
+        key = self._prompt_key(step['prompt_template'], prompt, next_state)
+        if key in self._in_flight:
+            return
+        logger.debug(f"Generación especulativa de {next_state.value} para la sesión {session_id}")
+        self.speculation.start(
+            session_id,
+            key,
+            lambda: self._invoke_llm(step['prompt_template'], prompt, True, next_state, session_id, speculative=True)
+        )
+
+    def _claim_speculation(self, session_id: UUID, prompt_template, prompt: str, process_state: ProcessState) -> None:
+        """Aprovecha la especulación de la sesión si coincide con el prompt, o la cancela."""
+        if self.speculation is not None:
+            self.speculation.claim(session_id, self._prompt_key(prompt_template, prompt, process_state))
+
+    def _refinement_step(
         self,
         session_id: UUID,
         user_story: str,
         feedback: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Refina una historia de usuario para mejorar su claridad y completitud."""
-        try:
-            def update_session(session, result):
-                session.refined_story = result['refined_story']
-                session.refinement_feedback = result['refinement_feedback']
-
-            def format_interaction(result):
-                human_message = (
-                    "Historia Original:\n{}\n\n"
-                    "Feedback:\n{}".format(
-                        user_story,
-                        feedback or 'Sin feedback adicional.'
-                    )
+        """Construye los parámetros del paso de refinamiento."""
+        def update_session(session, result):
+            session.refined_story = result['refined_story']
+            session.refinement_feedback = result['refinement_feedback']
+
+        def format_interaction(result):
+            human_message = (
+                "Historia Original:\n{}\n\n"
+                "Feedback:\n{}".format(
+                    user_story,
+                    feedback or 'Sin feedback adicional.'
                 )
-                ai_message = (
-                    "Historia Refinada:\n{}\n\n"
-                    "Cambios Realizados:\n{}".format(
-                        result['refined_story'],
-                        result['refinement_feedback']
-                    )
+            )
+            ai_message = (
+                "Historia Refinada:\n{}\n\n"
+                "Cambios Realizados:\n{}".format(
+                    result['refined_story'],
+                    result['refinement_feedback']
                 )
-                return human_message, ai_message
-
-            def post_process_response(extracted_sections):
-                refined_story = extracted_sections.get('**Historia Refinada:**', '').strip()
-                refinement_feedback = extracted_sections.get('**Cambios Realizados:**', '').strip()
-                return {
-                    'refined_story': refined_story,
-                    'refinement_feedback': refinement_feedback
-                }
-
-            result = await self._process_step(
-                session_id=session_id,
-                prompt_template=self.refinement_prompt,
-                input_variables={
-                    "user_story": user_story,
-                    "feedback": feedback or "Sin feedback adicional.",
-                },
-                process_state=ProcessState.REFINEMENT,
-                extract_markers=["**Historia Refinada:**", "**Cambios Realizados:**"],
-                update_session_callback=update_session,
-                format_interaction=format_interaction,
-                post_process_response=post_process_response
             )
+            return human_message, ai_message
 
-            return result
+        def post_process_response(extracted_sections):
+            refined_story = extracted_sections.get('**Historia Refinada:**', '').strip()
+            refinement_feedback = extracted_sections.get('**Cambios Realizados:**', '').strip()
+            return {
+                'refined_story': refined_story,
+                'refinement_feedback': refinement_feedback
+            }
+
+        return dict(
+            session_id=session_id,
+            prompt_template=self.refinement_prompt,
+            input_variables={
+                "user_story": user_story,
+                "feedback": feedback or "Sin feedback adicional.",
+            },
+            process_state=ProcessState.REFINEMENT,
+            extract_markers=["**Historia Refinada:**", "**Cambios Realizados:**"],
+            trimmable_inputs=["feedback", "user_story"],
+            update_session_callback=update_session,
+            format_interaction=format_interaction,
+            post_process_response=post_process_response
+        )
+
+    async def refine_story(
+        self,
+        session_id: UUID,
+        user_story: str,
+        feedback: Optional[str] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Refina una historia de usuario para mejorar su claridad y completitud."""
+        try:
+            return await self._process_step(
+                **self._refinement_step(session_id, user_story, feedback),
+                use_cache=not bypass_cache
+            )
         except Exception as e:
             logger.error(f"Error en refine_story: {str(e)}")
             raise
 
-    async def identify_corner_cases(
+    async def refine_story_stream(
+        self,
+        session_id: UUID,
+        user_story: str,
+        feedback: Optional[str] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Versión en streaming de refine_story."""
+        return await self._stream_step(
+            **self._refinement_step(session_id, user_story, feedback),
+            use_cache=not bypass_cache
+        )
+
+    def _corner_cases_step(
         self,
         session_id: UUID,
         refined_story: str,
         feedback: Optional[str] = None,
         existing_corner_cases: Optional[List[str]] = None
     ) -> Dict[str, Any]:
-        """Identifica casos esquina en una historia de usuario refinada."""
-        try:
-            session = self._get_session(session_id)
-
-            def update_session(session, result):
-                session.corner_cases = result['corner_cases']
-                session.corner_cases_feedback = result['corner_cases_feedback']
-
-            def format_interaction(result):
-                corner_cases_formatted = '\n'.join(result['corner_cases'])
-                human_message = (
-                    "Historia refinada:\n{}\n\n"
-                    "Casos Esquina Anteriores:\n{}\n\n"
-                    "Feedback:\n{}".format(
-                        refined_story,
-                        '\n'.join(existing_corner_cases) if existing_corner_cases else 'No hay casos esquina previos.',
-                        feedback or 'Sin feedback adicional.'
-                    )
+        """Construye los parámetros del paso de identificación de casos esquina."""
+        def update_session(session, result):
+            session.corner_cases = result['corner_cases']
+            session.corner_cases_feedback = result['corner_cases_feedback']
+
+        def format_interaction(result):
+            corner_cases_formatted = '\n'.join(result['corner_cases'])
+            human_message = (
+                "Historia refinada:\n{}\n\n"
+                "Casos Esquina Anteriores:\n{}\n\n"
+                "Feedback:\n{}".format(
+                    refined_story,
+                    '\n'.join(existing_corner_cases) if existing_corner_cases else 'No hay casos esquina previos.',
+                    feedback or 'Sin feedback adicional.'
                 )
+            )
 
-                ai_message = (
-                    "Casos Esquina Actualizados:\n{}\n\n"
-                    "Análisis de Cambios:\n{}".format(
-                        corner_cases_formatted,
-                        result['corner_cases_feedback']
-                    )
+            ai_message = (
+                "Casos Esquina Actualizados:\n{}\n\n"
+                "Análisis de Cambios:\n{}".format(
+                    corner_cases_formatted,
+                    result['corner_cases_feedback']
                 )
+            )
 
-                return human_message, ai_message
-
-            def post_process_response(extracted_sections):
-                logger.debug(f"Secciones extraídas en identify_corner_cases: {extracted_sections}")  # Debug log
-                corner_cases_text = extracted_sections.get('**Casos Esquina Actualizados:**', '').strip()
-                logger.debug(f"Texto de casos esquina: {corner_cases_text}")  # Debug log
-                corner_cases = [case.strip() for case in corner_cases_text.split('\n') if case.strip()]
-                logger.debug(f"Lista de casos esquina: {corner_cases}")  # Debug log
-                corner_cases_feedback = extracted_sections.get('**Análisis de Cambios:**', '').strip()
-                return {
-                    'corner_cases': corner_cases,
-                    'corner_cases_feedback': corner_cases_feedback
-                }
-
-            result = await self._process_step(
-                session_id=session_id,
-                prompt_template=self.corner_case_prompt,
-                input_variables={
-                    "refined_user_story": refined_story,
-                    "existing_corner_cases": '\n'.join(existing_corner_cases) if existing_corner_cases else "No hay casos esquina previos.",
-                    "feedback": feedback or "Sin feedback adicional.",
-                },
-                process_state=ProcessState.CORNER_CASES,
-                extract_markers=["**Casos Esquina Actualizados:**", "**Análisis de Cambios:**"],
-                update_session_callback=update_session,
-                format_interaction=format_interaction,
-                post_process_response=post_process_response
+            return human_message, ai_message
+
+        def post_process_response(extracted_sections):
+            corner_cases_text = extracted_sections.get('**Casos Esquina Actualizados:**', '').strip()
+            corner_cases = self._dedupe(
+                [case.strip() for case in corner_cases_text.split('\n') if case.strip()], existing_corner_cases
             )
+            log_event(logger, logging.DEBUG, "llm.corner_cases", corner_cases=Payload(corner_cases))
+            corner_cases_feedback = extracted_sections.get('**Análisis de Cambios:**', '').strip()
+            return {
+                'corner_cases': corner_cases,
+                'corner_cases_feedback': corner_cases_feedback
+            }
 
-            return result
+        return dict(
+            session_id=session_id,
+            prompt_template=self.corner_case_prompt,
+            input_variables={
+                "refined_user_story": refined_story,
+                "existing_corner_cases": '\n'.join(existing_corner_cases) if existing_corner_cases else "No hay casos esquina previos.",
+                "feedback": feedback or "Sin feedback adicional.",
+            },
+            process_state=ProcessState.CORNER_CASES,
+            extract_markers=["**Casos Esquina Actualizados:**", "**Análisis de Cambios:**"],
+            trimmable_inputs=["existing_corner_cases", "feedback", "refined_user_story"],
+            update_session_callback=update_session,
+            format_interaction=format_interaction,
+            post_process_response=post_process_response
+        )
+
+    async def identify_corner_cases(
+        self,
+        session_id: UUID,
+        refined_story: str,
+        feedback: Optional[str] = None,
+        existing_corner_cases: Optional[List[str]] = None,
+        bypass_cache: bool = False,
+        fan_out: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Identifica casos esquina en una historia de usuario refinada.
+
+        Las historias grandes se dividen en áreas que se analizan en paralelo
+        (ver ``_fan_out_sections``).
+        """
+        try:
+            step = self._corner_cases_step(session_id, refined_story, feedback, existing_corner_cases)
+            sections = self._fan_out_sections(refined_story, fan_out)
+            if len(sections) > 1:
+                return await self._process_fan_out(step, sections, use_cache=not bypass_cache)
+            return await self._process_step(**step, use_cache=not bypass_cache)
         except Exception as e:
             logger.error(f"Error en identify_corner_cases: {str(e)}")
             raise
 
-    async def propose_testing_strategy(
+    async def identify_corner_cases_stream(
+        self,
+        session_id: UUID,
+        refined_story: str,
+        feedback: Optional[str] = None,
+        existing_corner_cases: Optional[List[str]] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Versión en streaming de identify_corner_cases."""
+        return await self._stream_step(
+            **self._corner_cases_step(session_id, refined_story, feedback, existing_corner_cases),
+            use_cache=not bypass_cache
+        )
+
+    def _testing_strategy_step(
         self,
         session_id: UUID,
         refined_story: str,
@@ -257,67 +911,106 @@ class LLMService:
         feedback: Optional[str] = None,
         existing_testing_strategies: Optional[List[str]] = None
     ) -> Dict[str, Any]:
-        """Propone estrategias de testing para una historia de usuario."""
-        try:
-            def update_session(session, result):
-                session.testing_strategy = result['testing_strategies']
-                session.testing_strategy_feedback = result['testing_feedback']
-
-            def format_interaction(result):
-                testing_strategies_formatted = '\n'.join(result['testing_strategies'])
-                human_message = (
-                    "Historia refinada:\n{}\n\n"
-                    "Casos Esquina:\n{}\n\n"
-                    "Estrategias de Testing Anteriores:\n{}\n\n"
-                    "Feedback:\n{}".format(
-                        refined_story,
-                        '\n'.join(corner_cases),
-                        '\n'.join(existing_testing_strategies) if existing_testing_strategies else 'No hay estrategias de testing previas.',
-                        feedback or 'Sin feedback adicional.'
-                    )
+        """Construye los parámetros del paso de estrategia de testing."""
+        def update_session(session, result):
+            session.testing_strategy = result['testing_strategies']
+            session.testing_strategy_feedback = result['testing_feedback']
+
+        def format_interaction(result):
+            testing_strategies_formatted = '\n'.join(result['testing_strategies'])
+            human_message = (
+                "Historia refinada:\n{}\n\n"
+                "Casos Esquina:\n{}\n\n"
+                "Estrategias de Testing Anteriores:\n{}\n\n"
+                "Feedback:\n{}".format(
+                    refined_story,
+                    '\n'.join(corner_cases),
+                    '\n'.join(existing_testing_strategies) if existing_testing_strategies else 'No hay estrategias de testing previas.',
+                    feedback or 'Sin feedback adicional.'
                 )
+            )
 
-                ai_message = (
-                    "Estrategias de Testing Actualizadas:\n{}\n\n"
-                    "Análisis de Cambios:\n{}".format(
-                        testing_strategies_formatted,
-                        result['testing_feedback']
-                    )
+            ai_message = (
+                "Estrategias de Testing Actualizadas:\n{}\n\n"
+                "Análisis de Cambios:\n{}".format(
+                    testing_strategies_formatted,
+                    result['testing_feedback']
                 )
+            )
+
+            return human_message, ai_message
 
-                return human_message, ai_message
-
-            def post_process_response(extracted_sections):
-                testing_strategies_text = extracted_sections.get('**Estrategias de Testing Actualizadas:**', '').strip()
-                testing_strategies = [strategy.strip() for strategy in testing_strategies_text.split('\n') if strategy.strip()]
-                testing_feedback = extracted_sections.get('**Análisis de Cambios:**', '').strip()
-                return {
-                    'testing_strategies': testing_strategies,
-                    'testing_feedback': testing_feedback
-                }
-
-            result = await self._process_step(
-                session_id=session_id,
-                prompt_template=self.testing_strategy_prompt,
-                input_variables={
-                    "refined_user_story": refined_story,
-                    "corner_cases": '\n'.join(corner_cases),
-                    "existing_testing_strategies": '\n'.join(existing_testing_strategies) if existing_testing_strategies else "No hay estrategias de testing previas.",
-                    "feedback": feedback or "Sin feedback adicional.",
-                },
-                process_state=ProcessState.TESTING_STRATEGY,
-                extract_markers=["**Estrategias de Testing Actualizadas:**", "**Análisis de Cambios:**"],
-                update_session_callback=update_session,
-                format_interaction=format_interaction,
-                post_process_response=post_process_response
+        def post_process_response(extracted_sections):
+            testing_strategies_text = extracted_sections.get('**Estrategias de Testing Actualizadas:**', '').strip()
+            testing_strategies = self._dedupe(
+                [strategy.strip() for strategy in testing_strategies_text.split('\n') if strategy.strip()],
+                existing_testing_strategies
             )
+            testing_feedback = extracted_sections.get('**Análisis de Cambios:**', '').strip()
+            return {
+                'testing_strategies': testing_strategies,
+                'testing_feedback': testing_feedback
+            }
 
-            return result
+        return dict(
+            session_id=session_id,
+            prompt_template=self.testing_strategy_prompt,
+            input_variables={
+                "refined_user_story": refined_story,
+                "corner_cases": '\n'.join(corner_cases),
+                "existing_testing_strategies": '\n'.join(existing_testing_strategies) if existing_testing_strategies else "No hay estrategias de testing previas.",
+                "feedback": feedback or "Sin feedback adicional.",
+            },
+            process_state=ProcessState.TESTING_STRATEGY,
+            extract_markers=["**Estrategias de Testing Actualizadas:**", "**Análisis de Cambios:**"],
+            trimmable_inputs=["existing_testing_strategies", "corner_cases", "feedback", "refined_user_story"],
+            update_session_callback=update_session,
+            format_interaction=format_interaction,
+            post_process_response=post_process_response
+        )
+
+    async def propose_testing_strategy(
+        self,
+        session_id: UUID,
+        refined_story: str,
+        corner_cases: List[str],
+        feedback: Optional[str] = None,
+        existing_testing_strategies: Optional[List[str]] = None,
+        bypass_cache: bool = False,
+        fan_out: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Propone estrategias de testing para una historia de usuario.
+
+        Las historias grandes se dividen en áreas que se analizan en paralelo
+        (ver ``_fan_out_sections``).
+        """
+        try:
+            step = self._testing_strategy_step(session_id, refined_story, corner_cases, feedback, existing_testing_strategies)
+            sections = self._fan_out_sections(refined_story, fan_out)
+            if len(sections) > 1:
+                return await self._process_fan_out(step, sections, use_cache=not bypass_cache)
+            return await self._process_step(**step, use_cache=not bypass_cache)
         except Exception as e:
             logger.error(f"Error en propose_testing_strategy: {str(e)}")
             raise
 
-    async def finalize_story(
+    async def propose_testing_strategy_stream(
+        self,
+        session_id: UUID,
+        refined_story: str,
+        corner_cases: List[str],
+        feedback: Optional[str] = None,
+        existing_testing_strategies: Optional[List[str]] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Versión en streaming de propose_testing_strategy."""
+        return await self._stream_step(
+            **self._testing_strategy_step(session_id, refined_story, corner_cases, feedback, existing_testing_strategies),
+            use_cache=not bypass_cache
+        )
+
+    def _finalization_step(
         self,
         session_id: UUID,
         story_input: str,
@@ -326,125 +1019,250 @@ class LLMService:
         feedback: Optional[str] = None,
         format_preferences: Optional[dict] = None
     ) -> Dict[str, Any]:
-        """Finaliza una historia de usuario integrando todos los componentes."""
-        try:
-            session = self._get_session(session_id)
-
-            def update_session(session, result):
-                session.finalized_story = result.get('finalized_story', '')
-                session.functional_tests = result.get('functional_tests', '')
-
-            def format_interaction(result):
-                human_message = (
-                    "Historia de Usuario:\n{}\n\n"
-                    "Casos Esquina:\n{}\n\n"
-                    "Estrategia de Testing:\n{}\n\n"
-                    "Feedback:\n{}".format(
-                        story_input,
-                        '\n'.join(corner_cases) if corner_cases else 'Sin casos esquina',
-                        '\n'.join(testing_strategy) if testing_strategy else 'Sin estrategia de testing',
-                        feedback or 'Sin feedback adicional'
-                    )
+        """Construye los parámetros del paso de finalización."""
+        def update_session(session, result):
+            session.finalized_story = result.get('finalized_story', '')
+            session.functional_tests = result.get('functional_tests', '')
+
+        def format_interaction(result):
+            human_message = (
+                "Historia de Usuario:\n{}\n\n"
+                "Casos Esquina:\n{}\n\n"
+                "Estrategia de Testing:\n{}\n\n"
+                "Feedback:\n{}".format(
+                    story_input,
+                    '\n'.join(corner_cases) if corner_cases else 'Sin casos esquina',
+                    '\n'.join(testing_strategy) if testing_strategy else 'Sin estrategia de testing',
+                    feedback or 'Sin feedback adicional'
                 )
-                ai_message = result.get('finalized_story', '')
-                return human_message, ai_message
-
-            def post_process_response(extracted_sections):
-                finalized_story = extracted_sections.get('**Historia Finalizada:**', '').strip()
-                functional_tests = extracted_sections.get('#### Tests Funcionales', '').strip()
-                return {
-                    'finalized_story': finalized_story,
-                    'functional_tests': functional_tests,
-                    'feedback': ''  
-                }
-
-            result = await self._process_step(
-                session_id=session_id,
-                prompt_template=self.finalize_story_prompt,
-                input_variables={
-                    "story_input": story_input,
-                    "corner_cases": corner_cases or [],
-                    "testing_strategy": testing_strategy or [],
-                    "feedback": feedback or ""
-                },
-                process_state=ProcessState.FINALIZATION,
-                extract_markers=[
-                    "**Historia Finalizada:**", 
-                    "#### Tests Funcionales"  
-                ],
-                update_session_callback=update_session,
-                format_interaction=format_interaction,
-                post_process_response=post_process_response
             )
+            ai_message = result.get('finalized_story', '')
+            return human_message, ai_message
 
-            return result
+        def post_process_response(extracted_sections):
+            finalized_story = extracted_sections.get('**Historia Finalizada:**', '').strip()
+            functional_tests = extracted_sections.get('#### Tests Funcionales', '').strip()
+            return {
+                'finalized_story': finalized_story,
+                'functional_tests': functional_tests,
+                'feedback': ''  
+            }
+
+        return dict(
+            session_id=session_id,
+            prompt_template=self.finalize_story_prompt,
+            input_variables={
+                "story_input": story_input,
+                "corner_cases": corner_cases or [],
+                "testing_strategy": testing_strategy or [],
+                "feedback": feedback or ""
+            },
+            process_state=ProcessState.FINALIZATION,
+            extract_markers=[
+                "**Historia Finalizada:**", 
+                "#### Tests Funcionales"  
+            ],
+            trimmable_inputs=["testing_strategy", "corner_cases", "feedback", "story_input"],
+            update_session_callback=update_session,
+            format_interaction=format_interaction,
+            post_process_response=post_process_response
+        )
+
+    async def finalize_story(
+        self,
+        session_id: UUID,
+        story_input: str,
+        corner_cases: Optional[List[str]] = None,
+        testing_strategy: Optional[List[str]] = None,
+        feedback: Optional[str] = None,
+        format_preferences: Optional[dict] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Finaliza una historia de usuario integrando todos los componentes."""
+        try:
+            return await self._process_step(
+                **self._finalization_step(session_id, story_input, corner_cases, testing_strategy, feedback, format_preferences),
+                use_cache=not bypass_cache
+            )
         except Exception as e:
             logger.error(f"Error en finalize_story: {str(e)}")
             raise
 
-    def _extract_sections(self, text: str, markers: List[str]) -> Dict[str, str]:
+    async def finalize_story_stream(
+        self,
+        session_id: UUID,
+        story_input: str,
+        corner_cases: Optional[List[str]] = None,
+        testing_strategy: Optional[List[str]] = None,
+        feedback: Optional[str] = None,
+        format_preferences: Optional[dict] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Versión en streaming de finalize_story."""
+        return await self._stream_step(
+            **self._finalization_step(session_id, story_input, corner_cases, testing_strategy, feedback, format_preferences),
+            use_cache=not bypass_cache
+        )
+
+    async def pipeline_stream(
+        self,
+        session_id: UUID,
+        user_story: str,
+        feedback: Optional[str] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ejecuta en streaming el flujo completo: refinamiento, casos esquina,
+        estrategia de testing y finalización.
+
+        La sesión se valida antes de devolver el iterador.
+        """
+        await self._get_session(session_id)
+        if self.scheduler is not None:
+            self.scheduler.check_admission()
+        return stream_pipeline(self, session_id, user_story, feedback, bypass_cache)
+
+    def _extract_sections(
+        self,
+        text: str,
+        markers: List[str],
+        process_state: Optional[ProcessState] = None
+    ) -> Dict[str, str]:
         """Extrae secciones de texto basadas en marcadores."""
-        sections = {}
-        for i, marker in enumerate(markers):
-            next_marker = markers[i + 1] if i + 1 < len(markers) else None
-            section = self._extract_section(text, marker, next_marker)
-            sections[marker] = section
-        return sections
-
-    def _extract_section(self, text: str, start_marker: str, end_marker: Optional[str] = None) -> str:
-        """Extrae una sección de texto entre dos marcadores."""
-        try:
+        with tracing.span('llm.extract_sections', step=process_state.value if process_state else None) as span:
             if not isinstance(text, str):
                 logger.warning(f"Texto no es string: {type(text)}")
-                return str(text)
-
-            # Normalizar el texto y los marcadores
-            text = text.strip()
-            start_marker = start_marker.strip()
-            if end_marker:
-                end_marker = end_marker.strip()
-
-            logger.debug(f"Buscando sección entre marcadores. Inicio: '{start_marker}', Fin: '{end_marker}'")
-            logger.debug(f"Texto completo a procesar: {text[:200]}...")  # Log primeros 200 caracteres
-
-            start_idx = text.find(start_marker)
-            if start_idx == -1:
-                logger.warning(f"No se encontró el marcador inicial: '{start_marker}' en el texto")
-                # Buscar marcadores similares para ayudar en el diagnóstico
-                possible_markers = [line for line in text.split('\n') if '**' in line]
-                if possible_markers:
-                    logger.warning(f"Marcadores similares encontrados: {possible_markers}")
-                return ""
-
-            start_idx += len(start_marker)
-            if end_marker:
-                end_idx = text.find(end_marker, start_idx)
-                if end_idx == -1:
-                    result = text[start_idx:].strip()
-                    logger.debug(f"No se encontró el marcador final '{end_marker}'. Retornando resto del texto: {result[:100]}...")
-                    return result
-                result = text[start_idx:end_idx].strip()
-                logger.debug(f"Sección extraída con éxito: {result[:100]}...")
-                return result
-            
-            result = text[start_idx:].strip()
-            logger.debug(f"Sección extraída (sin marcador final): {result[:100]}...")
-            return result
+                text = str(text)
 
-        except Exception as e:
-            logger.error(f"Error al extraer sección: {str(e)}")
-            logger.error(f"Texto problemático: {text[:200]}...")  # Log texto problemático
-            return ""
+            parser = SectionParser(markers)
+            parser.parse(text)
+            self._log_missing_markers(parser, text, process_state)
+            span.set_attribute('missing_markers', len(parser.missing_markers))
+            return {marker: parser.sections.get(marker.strip(), '') for marker in markers}
+
+    def _log_missing_markers(
+        self,
+        parser: SectionParser,
+        text: str,
+        process_state: Optional[ProcessState] = None
+    ) -> None:
+        """Registra los marcadores no encontrados junto con posibles candidatos."""
+        missing = parser.missing_markers
+        if not missing:
+            return
+        for marker in missing:
+            metrics.SECTION_EXTRACTION_FAILURES.inc(
+                step=process_state.value if process_state else 'unknown', marker=marker
+            )
+        logger.warning(f"No se encontraron los marcadores: {missing} en el texto")
+        # Buscar marcadores similares para ayudar en el diagnóstico
+        possible_markers = [line for line in text.split('\n') if '**' in line]
+        if possible_markers:
+            logger.warning("Marcadores similares encontrados: %s", Payload(possible_markers))
+
+    async def get_memory(self, session_id: UUID) -> ChatMessageHistory:
+        """
+        Devuelve el historial de la conversación de una sesión.
+
+        Se reconstruye a partir de las interacciones de la sesión, así que no
+        se retiene nada por sesión fuera del almacén (que puede ser compartido).
+        """
+        session = await self._get_session(session_id)
+        history = ChatMessageHistory()
+        for interaction in session.interactions:
+            history.add_message(HumanMessage(content=interaction.human_message))
+            history.add_message(AIMessage(content=interaction.ai_message))
+        return history
+
+    async def start(self):
+        """Arranca las tareas en segundo plano del servicio LLM."""
+        if self.warmup is not None:
+            self.warmup.start()
+        if self.session_sweep_interval:
+            self._sessions.start_sweeper(self.session_sweep_interval)
+        for llm in self._distinct_llms():
+            if isinstance(llm, BalancedLLM):
+                llm.start_health_checks()
+
+    def prompt_templates(self) -> Dict[ProcessState, Any]:
+        """Devuelve la plantilla de prompt de cada paso del flujo."""
+        return {
+            ProcessState.REFINEMENT: self.refinement_prompt,
+            ProcessState.CORNER_CASES: self.corner_case_prompt,
+            ProcessState.TESTING_STRATEGY: self.testing_strategy_prompt,
+            ProcessState.FINALIZATION: self.finalize_story_prompt,
+        }
+
+    def readiness(self) -> Dict[str, Any]:
+        """Indica si el servicio puede atender peticiones (precalentamiento terminado)."""
+        if self.warmup is None:
+            return {"ready": True, "warmup": {"status": "disabled"}}
+        return {"ready": self.warmup.ready, "warmup": self.warmup.stats()}
+
+    def _distinct_llms(self) -> List[Any]:
+        """Devuelve el LLM por defecto y los de cada paso, sin repetir."""
+        llms = [self.llm]
+        for llm in self._step_llms.values():
+            if all(llm is not other for other in llms):
+                llms.append(llm)
+        return llms
+
+    def step_models(self) -> Dict[str, Dict[str, Any]]:
+        """Devuelve el modelo y la temperatura con los que se ejecuta cada paso."""
+        return {
+            state.value: {
+                "model": getattr(self._llm_for(state), 'model', None),
+                "temperature": getattr(self._llm_for(state), 'temperature', None),
+                "context_window": getattr(self._llm_for(state), 'num_ctx', None),
+            }
+            for state in ProcessState if state is not ProcessState.INITIAL
+        }
+
+    def backend_stats(self) -> Dict[str, Any]:
+        """Devuelve el estado de las instancias de Ollama."""
+        if isinstance(self.llm, BalancedLLM):
+            return self.llm.stats()
+        return {"backends": [{"url": getattr(self.llm, 'base_url', None)}]}
+
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """Devuelve las métricas del planificador del LLM."""
+        if self.scheduler is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.scheduler.stats()}
+
+    def speculation_stats(self) -> Dict[str, Any]:
+        """Devuelve las métricas de la generación especulativa."""
+        if self.speculation is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.speculation.stats()}
+
+    async def refresh_metrics(self) -> None:
+        """Actualiza las métricas que se leen en el momento de exponerlas."""
+        if self._sessions.countable:
+            metrics.ACTIVE_SESSIONS.set(await self._sessions.count())
+        if self.scheduler is not None:
+            metrics.LLM_IN_FLIGHT.set(self.scheduler.in_flight)
+            metrics.LLM_QUEUE_DEPTH.set(self.scheduler.queue_depth)
 
-    async def _add_to_memory(self, session_id: UUID, human_message: str, ai_message: str):
-        """Añade mensajes al historial de la conversación."""
-        history = self._memories[session_id]
-        history.add_message(HumanMessage(content=human_message))
-        history.add_message(AIMessage(content=ai_message))
+    async def session_stats(self) -> Dict[str, Any]:
+        """Devuelve las métricas del almacén de sesiones."""
+        return await self._sessions.collect_stats()
 
     async def close(self):
         """Cierra recursos y limpia el servicio LLM"""
-        # Limpiar memorias
-        self._memories.clear()
-        # Cerrar cualquier otro recurso async si es necesario
-        pass
+        # Cancelar el precalentamiento si sigue en curso
+        if self.warmup is not None:
+            await self.warmup.stop()
+        # Cancelar las generaciones especulativas en curso
+        if self.speculation is not None:
+            await self.speculation.close()
+        # Detener el barrido de sesiones y cerrar el almacén
+        await self._sessions.stop_sweeper()
+        await self._sessions.aclose()
+        # Detener la comprobación de salud de las instancias de Ollama
+        for llm in self._distinct_llms():
+            if isinstance(llm, BalancedLLM):
+                await llm.stop_health_checks()
+        # Cerrar la caché de respuestas
+        if self.cache is not None:
+            await self.cache.close()
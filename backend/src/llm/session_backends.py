@@ -0,0 +1,379 @@
+"""Almacenes de sesiones compartidos entre procesos (SQLite y protocolo Redis)."""
+
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+from uuid import UUID
+
+from .models import Interaction, ProcessState, Session
+from .session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+SERIALIZATION_VERSION = 1
+_RAW = b'J'
+_COMPRESSED = b'Z'
+_COMPRESSION_THRESHOLD = 512
+
+# Campos de texto de Session en el orden en que se serializan
+_TEXT_FIELDS = (
+    'refined_story', 'refinement_feedback', 'corner_cases_feedback',
+    'testing_strategy_feedback', 'finalized_story', 'finalization_feedback',
+    'functional_tests',
+)
+
+
+def serialize_session(session: Session) -> bytes:
+    """
+    Serializa una sesión en un formato compacto y versionado.
+
+    El resultado es un byte de cabecera ('J' JSON, 'Z' JSON comprimido con zlib)
+    seguido de una lista JSON cuyo primer elemento es la versión del formato.
+    """
+    payload = [
+        SERIALIZATION_VERSION,
+        str(session.session_id),
+        session.state.value,
+        [getattr(session, name) for name in _TEXT_FIELDS],
+        session.corner_cases,
+        session.testing_strategy,
+        [
+            [i.human_message, i.ai_message, i.process_state.value, i.timestamp.timestamp()]
+            for i in session.interactions
+        ],
+    ]
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) > _COMPRESSION_THRESHOLD:
+        return _COMPRESSED + zlib.compress(data)
+    return _RAW + data
+
+
+def deserialize_session(data: bytes) -> Session:
+    """Reconstruye una sesión serializada con ``serialize_session``."""
+    header, body = data[:1], data[1:]
+    if header == _COMPRESSED:
+        body = zlib.decompress(body)
+    elif header != _RAW:
+        raise ValueError(f"Formato de sesión desconocido: {header!r}")
+
+    payload = json.loads(body)
+    version = payload[0]
+    if version != SERIALIZATION_VERSION:
+        raise ValueError(f"Versión de sesión no soportada: {version}")
+
+    _, session_id, state, texts, corner_cases, testing_strategy, interactions = payload
+    session = Session(
+        session_id=UUID(session_id),
+        state=ProcessState(state),
+        corner_cases=corner_cases,
+        testing_strategy=testing_strategy,
+        interactions=[
+            Interaction(
+                human_message=human,
+                ai_message=ai,
+                process_state=ProcessState(process_state),
+                timestamp=datetime.fromtimestamp(timestamp)
+            )
+            for human, ai, process_state, timestamp in interactions
+        ],
+    )
+    for name, value in zip(_TEXT_FIELDS, texts):
+        setattr(session, name, value)
+    return session
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Almacén de sesiones en un fichero SQLite en modo WAL.
+
+    Todos los workers de un mismo nodo pueden abrir el mismo fichero; cada
+    proceso mantiene su propia conexión. La caducidad por inactividad se
+    aplica al acceder y en el barrido periódico.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, idle_ttl: float = 0, busy_timeout: float = 5.0):
+        super().__init__()
+        self.path = path
+        self.idle_ttl = idle_ttl
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access)"
+        )
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return bool(self.idle_ttl) and now - last_access > self.idle_ttl
+
+    def __getitem__(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_access FROM sessions WHERE id = ?", (str(key),)
+            ).fetchone()
+            if row is None:
+                raise KeyError(key)
+            data, last_access = row
+            if self._expired(last_access, now):
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (str(key),))
+            else:
+                self._conn.execute(
+                    "UPDATE sessions SET last_access = ? WHERE id = ?", (now, str(key))
+                )
+                return deserialize_session(data)
+        self._notify_eviction(key, None, "idle_ttl")
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, last_access) VALUES (?, ?, ?)",
+                (str(key), serialize_session(value), time.time())
+            )
+
+    def __delitem__(self, key):
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM sessions WHERE id = ?", (str(key),)
+            ).rowcount
+        if not deleted:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_access FROM sessions WHERE id = ?", (str(key),)
+            ).fetchone()
+        return row is not None and not self._expired(row[0], time.time())
+
+    def __iter__(self) -> Iterator:
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM sessions").fetchall()
+        return iter([UUID(row[0]) for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def sweep(self) -> int:
+        if not self.idle_ttl:
+            return 0
+        threshold = time.time() - self.idle_ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "DELETE FROM sessions WHERE last_access < ? RETURNING id", (threshold,)
+            ).fetchall()
+        for (session_id,) in rows:
+            self._notify_eviction(UUID(session_id), None, "idle_ttl")
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"path": self.path, "idle_ttl": self.idle_ttl})
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisProtocolError(Exception):
+    """Error devuelto por un servidor que habla el protocolo de Redis."""
+
+
+class RedisProtocolClient:
+    """Cliente mínimo y síncrono del protocolo RESP de Redis."""
+
+    def __init__(
+        self,
+        host: str = 'localhost',
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        timeout: float = 5.0
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 5.0) -> 'RedisProtocolClient':
+        """Crea un cliente a partir de una URL ``redis://[:password@]host:port/db``."""
+        parsed = urlparse(url)
+        db = parsed.path.lstrip('/')
+        return cls(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=parsed.password,
+            timeout=timeout
+        )
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._roundtrip(('AUTH', self.password))
+        if self.db:
+            self._roundtrip(('SELECT', self.db))
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                value = arg
+            else:
+                value = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(value), value))
+        return b''.join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Conexión cerrada por el servidor")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            raise RedisProtocolError(rest.decode('utf-8'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"Respuesta desconocida: {line!r}")
+
+    def _roundtrip(self, args) -> Any:
+        self._sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def execute(self, *args) -> Any:
+        """Envía un comando y devuelve la respuesta, reconectando una vez si falla la conexión."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(args)
+                except (ConnectionError, OSError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Almacén de sesiones sobre cualquier servidor que hable el protocolo de Redis.
+
+    La caducidad por inactividad se delega en el servidor: cada lectura o
+    escritura renueva el TTL de la clave. Contar las sesiones exige recorrer
+    todas las claves (SCAN), así que no se publica como métrica.
+    """
+
+    blocking = True
+    countable = False
+
+    def __init__(
+        self,
+        client: RedisProtocolClient,
+        idle_ttl: float = 0,
+        prefix: str = 'user-story-assistant:session:'
+    ):
+        super().__init__()
+        self.client = client
+        self.idle_ttl = int(idle_ttl)
+        self.prefix = prefix
+
+    def _key(self, session_id) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def __getitem__(self, key):
+        data = self.client.execute('GET', self._key(key))
+        if data is None:
+            raise KeyError(key)
+        if self.idle_ttl:
+            self.client.execute('EXPIRE', self._key(key), self.idle_ttl)
+        return deserialize_session(data)
+
+    def __setitem__(self, key, value):
+        args: List[Any] = ['SET', self._key(key), serialize_session(value)]
+        if self.idle_ttl:
+            args += ['EX', self.idle_ttl]
+        self.client.execute(*args)
+
+    def __delitem__(self, key):
+        if not self.client.execute('DEL', self._key(key)):
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return bool(self.client.execute('EXISTS', self._key(key)))
+
+    def __iter__(self) -> Iterator:
+        cursor = '0'
+        keys = []
+        while True:
+            cursor, batch = self.client.execute('SCAN', cursor, 'MATCH', f"{self.prefix}*", 'COUNT', 100)
+            keys.extend(UUID(key.decode('utf-8')[len(self.prefix):]) for key in batch)
+            cursor = cursor.decode('utf-8') if isinstance(cursor, bytes) else str(cursor)
+            if cursor == '0':
+                return iter(keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "server": f"{self.client.host}:{self.client.port}/{self.client.db}",
+            "idle_ttl": self.idle_ttl,
+        })
+        return stats
+
+    def close(self) -> None:
+        self.client.close()
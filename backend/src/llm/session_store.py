@@ -0,0 +1,279 @@
+"""Almacenes de sesiones del servicio LLM."""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EvictionListener = Callable[[Hashable, Any, str], None]
+
+
+class SessionStore(MutableMapping):
+    """
+    Interfaz base de los almacenes de sesiones.
+
+    Se comporta como un diccionario ``session_id -> Session`` y añade métricas,
+    avisos de expulsión y un barrido periódico opcional en segundo plano.
+
+    Desde el bucle de eventos se usan los métodos asíncronos (``load``,
+    ``save``, ``remove``, ``count``...): en los almacenes con ``blocking``
+    (disco o red) se ejecutan en un hilo para no bloquear el bucle. Si
+    ``countable`` es False, contar las sesiones es caro y no se expone como
+    métrica.
+    """
+
+    blocking = False
+    countable = True
+
+    def __init__(self):
+        self.evictions: Dict[str, int] = {}
+        self._listeners: List[EvictionListener] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+    def add_eviction_listener(self, listener: EvictionListener) -> None:
+        """Registra una función a la que se avisa con (clave, valor, motivo) al expulsar."""
+        self._listeners.append(listener)
+
+    def _notify_eviction(self, key: Hashable, value: Any, reason: str) -> None:
+        loop = self._loop
+        if loop is not None and self._loop_thread != threading.get_ident() and not loop.is_closed():
+            # Expulsión detectada en un hilo del almacén: se avisa desde el bucle
+            loop.call_soon_threadsafe(self._dispatch_eviction, key, value, reason)
+            return
+        self._dispatch_eviction(key, value, reason)
+
+    def _dispatch_eviction(self, key: Hashable, value: Any, reason: str) -> None:
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        logger.debug(f"Sesión {key} expulsada ({reason})")
+        for listener in self._listeners:
+            listener(key, value, reason)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Ejecuta una operación del almacén; en un hilo si hace E/S bloqueante."""
+        if not self.blocking:
+            return func(*args)
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        return await asyncio.to_thread(func, *args)
+
+    async def load(self, key: Hashable, default: Any = None) -> Any:
+        """Devuelve la sesión o ``default`` si no existe (o ha caducado)."""
+        return await self._run(self.get, key, default)
+
+    async def save(self, key: Hashable, value: Any) -> None:
+        await self._run(self.__setitem__, key, value)
+
+    async def remove(self, key: Hashable) -> None:
+        await self._run(self.pop, key, None)
+
+    async def count(self) -> int:
+        return await self._run(len, self)
+
+    async def collect_stats(self) -> Dict[str, Any]:
+        return await self._run(self.stats)
+
+    async def aclose(self) -> None:
+        await self._run(self.close)
+
+    def sweep(self) -> int:
+        """Expulsa las entradas caducadas y devuelve cuántas se han eliminado."""
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve las métricas del almacén."""
+        return {
+            "backend": type(self).__name__,
+            "entries": len(self),
+            "evictions": dict(self.evictions),
+        }
+
+    def start_sweeper(self, interval: float) -> None:
+        """Arranca el barrido periódico en el bucle de eventos actual."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever(interval))
+
+    def close(self) -> None:
+        """Libera los recursos del almacén."""
+
+    async def stop_sweeper(self) -> None:
+        """Detiene el barrido periódico si está en marcha."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_forever(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self._run(self.sweep)
+                if evicted:
+                    logger.info(f"Barrido de sesiones: {evicted} sesiones expulsadas")
+            except Exception as e:
+                logger.error(f"Error en el barrido de sesiones: {str(e)}")
+
+
+class InMemorySessionStore(SessionStore):
+    """Almacén en memoria sin límites, equivalente a un diccionario."""
+
+    def __init__(self):
+        super().__init__()
+        self._data: Dict[Hashable, Any] = {}
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class BoundedSessionStore(SessionStore):
+    """
+    Almacén en memoria con caducidad por inactividad y límites de tamaño.
+
+    Las entradas se ordenan por último acceso; al superar ``max_entries`` o
+    ``max_bytes`` se expulsan las menos recientes. El tamaño de cada entrada se
+    estima con ``sizeof(clave, valor)`` cada vez que se guarda.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 0,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sizeof: Optional[Callable[[Hashable, Any], int]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__()
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda key, value: 0)
+        self._clock = clock
+        # clave -> [valor, último acceso, tamaño estimado]
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._bytes = 0
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return bool(self.idle_ttl) and now - last_access > self.idle_ttl
+
+    def _evict(self, key: Hashable, reason: str) -> None:
+        value, _, size = self._entries.pop(key)
+        self._bytes -= size
+        self._notify_eviction(key, value, reason)
+
+    def __getitem__(self, key):
+        entry = self._entries[key]
+        now = self._clock()
+        if self._expired(entry[1], now):
+            self._evict(key, "idle_ttl")
+            raise KeyError(key)
+        entry[1] = now
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def __setitem__(self, key, value):
+        size = self._sizeof(key, value)
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._bytes -= previous[2]
+        self._entries[key] = [value, self._clock(), size]
+        self._entries.move_to_end(key)
+        self._bytes += size
+        self._enforce_limits(protected=key)
+
+    def __delitem__(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __iter__(self) -> Iterator:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _enforce_limits(self, protected: Hashable = None) -> None:
+        while self.max_entries and len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            if oldest == protected:
+                break
+            self._evict(oldest, "max_entries")
+        while self.max_bytes and self._bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == protected:
+                break
+            self._evict(oldest, "max_bytes")
+
+    def sweep(self) -> int:
+        if not self.idle_ttl:
+            return 0
+        now = self._clock()
+        evicted = 0
+        # Las entradas están ordenadas por último acceso: basta recorrer el principio
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._expired(entry[1], now):
+                break
+            self._evict(key, "idle_ttl")
+            evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "bytes": self._bytes,
+            "idle_ttl": self.idle_ttl,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        })
+        return stats
+
+
+def create_session_store(
+    config: Any,
+    sizeof: Optional[Callable[[Hashable, Any], int]] = None
+) -> SessionStore:
+    """Crea el almacén de sesiones indicado en la configuración."""
+    backend = str(getattr(config, 'SESSION_BACKEND', 'memory') or 'memory').lower()
+    idle_ttl = float(getattr(config, 'SESSION_TTL_SECONDS', 0) or 0)
+    max_entries = int(getattr(config, 'SESSION_MAX_ENTRIES', 0) or 0)
+    max_bytes = int(getattr(config, 'SESSION_MAX_BYTES', 0) or 0)
+
+    if backend == 'sqlite':
+        from .session_backends import SQLiteSessionStore
+        path = getattr(config, 'SESSION_DB_PATH', './data/sessions.sqlite3')
+        return SQLiteSessionStore(path, idle_ttl=idle_ttl)
+    if backend == 'redis':
+        from .session_backends import RedisProtocolClient, RedisSessionStore
+        url = getattr(config, 'SESSION_REDIS_URL', 'redis://localhost:6379/0')
+        return RedisSessionStore(RedisProtocolClient.from_url(url), idle_ttl=idle_ttl)
+    if backend != 'memory':
+        raise ValueError(f"Backend de sesiones desconocido: {backend}")
+
+    if not (idle_ttl or max_entries or max_bytes):
+        return InMemorySessionStore()
+    return BoundedSessionStore(
+        idle_ttl=idle_ttl,
+        max_entries=max_entries,
+        max_bytes=max_bytes,
+        sizeof=sizeof
+    )
@@ -0,0 +1,68 @@
+"""Agrupación de llamadas concurrentes idénticas (single-flight)."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """Ejecución en curso compartida por varios llamantes."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Ejecuta una sola vez las llamadas concurrentes con la misma clave.
+
+    El primer llamante lanza la ejecución y los siguientes esperan su
+    resultado (o su excepción). Si todos los llamantes se cancelan antes de
+    que termine, la ejecución compartida también se cancela.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        call = self._calls.get(key)
+        return call is not None and not call.task.done()
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Devuelve el resultado de ``function()``, compartiéndolo con las llamadas en curso."""
+        loop = asyncio.get_running_loop()
+        call = self._calls.get(key)
+        if call is None or call.task.done() or call.task.get_loop() is not loop:
+            call = _Call(loop.create_task(function()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nadie espera ya el resultado
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve cuántas ejecuciones se han lanzado y cuántas llamadas se han agrupado."""
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
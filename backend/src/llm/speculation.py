@@ -0,0 +1,127 @@
+"""Generación especulativa del siguiente paso del flujo."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Speculation:
+    """Generación especulativa en curso para una sesión."""
+
+    def __init__(self, key: str, task: asyncio.Task):
+        self.key = key
+        self.task = task
+        # Una petición real ya espera este resultado: no se puede expulsar
+        self.claimed = False
+
+
+class SpeculativePrefetcher:
+    """
+    Lanza en segundo plano el siguiente paso del flujo de cada sesión.
+
+    La generación se guarda en la caché de respuestas, de modo que si la
+    siguiente petición de la sesión coincide se sirve al instante (o se une
+    a la generación en curso). Hay como mucho una especulación por sesión y
+    ``max_in_flight`` en total; una petición de la sesión que no coincide
+    cancela la especulación, y ``preempt`` libera capacidad para las
+    peticiones reales.
+    """
+
+    def __init__(self, max_in_flight: int = 1):
+        self.max_in_flight = max_in_flight
+        self._speculations: Dict[Hashable, _Speculation] = {}
+        self.started = 0
+        self.skipped = 0
+        self.hits = 0
+        self.mismatches = 0
+        self.preempted = 0
+
+    def __len__(self) -> int:
+        return len(self._speculations)
+
+    def start(self, session_id: Hashable, key: str, generate: Callable[[], Awaitable[Any]]) -> bool:
+        """Lanza ``generate()`` como especulación de la sesión si no se supera el límite."""
+        self.cancel(session_id)
+        if len(self._speculations) >= self.max_in_flight:
+            self.skipped += 1
+            return False
+
+        task = asyncio.get_running_loop().create_task(generate())
+        speculation = _Speculation(key, task)
+        self._speculations[session_id] = speculation
+        task.add_done_callback(lambda t: self._finished(session_id, speculation))
+        self.started += 1
+        return True
+
+    def _finished(self, session_id: Hashable, speculation: _Speculation) -> None:
+        if self._speculations.get(session_id) is speculation:
+            del self._speculations[session_id]
+        task = speculation.task
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Falló la generación especulativa de la sesión {session_id}: {str(task.exception())}")
+
+    def claim(self, session_id: Hashable, key: str) -> bool:
+        """
+        Comprueba la especulación de la sesión frente a la petición que llega.
+
+        Si coincide la deja seguir (la petición usará su resultado); si no,
+        la cancela.
+        """
+        speculation = self._speculations.get(session_id)
+        if speculation is None:
+            return False
+        if speculation.key == key:
+            speculation.claimed = True
+            self.hits += 1
+            return True
+        self.mismatches += 1
+        self.cancel(session_id)
+        return False
+
+    def cancel(self, session_id: Hashable) -> None:
+        """Cancela la especulación de una sesión, si la hay."""
+        speculation = self._speculations.pop(session_id, None)
+        if speculation is not None:
+            speculation.task.cancel()
+
+    def preempt(self) -> bool:
+        """Cancela la especulación más antigua que ninguna petición espera."""
+        for session_id, speculation in self._speculations.items():
+            if not speculation.claimed:
+                logger.debug(f"Especulación de la sesión {session_id} expulsada por una petición real")
+                self.preempted += 1
+                self.cancel(session_id)
+                return True
+        return False
+
+    async def close(self) -> None:
+        """Cancela todas las especulaciones en curso."""
+        tasks = [speculation.task for speculation in self._speculations.values()]
+        self._speculations.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve las especulaciones en curso y cuántas se aprovecharon o descartaron."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": len(self._speculations),
+            "started": self.started,
+            "skipped": self.skipped,
+            "hits": self.hits,
+            "mismatches": self.mismatches,
+            "preempted": self.preempted,
+        }
+
+
+def create_speculative_prefetcher(config: Any) -> Optional[SpeculativePrefetcher]:
+    """Crea el prefetcher si SPECULATIVE_PREFETCH está activado (None en otro caso)."""
+    enabled = getattr(config, 'SPECULATIVE_PREFETCH', False)
+    if isinstance(enabled, str):
+        enabled = enabled.lower() == 'true'
+    if not enabled:
+        return None
+    return SpeculativePrefetcher(max_in_flight=int(getattr(config, 'SPECULATIVE_MAX_IN_FLIGHT', 1) or 1))
@@ -0,0 +1,53 @@
+"""Configuración del modelo de cada paso del flujo."""
+
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from .models import ProcessState
+
+# Prefijo de las variables de configuración de cada paso
+STEP_PREFIXES: Dict[ProcessState, str] = {
+    ProcessState.REFINEMENT: 'REFINEMENT',
+    ProcessState.CORNER_CASES: 'CORNER_CASES',
+    ProcessState.TESTING_STRATEGY: 'TESTING_STRATEGY',
+    ProcessState.FINALIZATION: 'FINALIZATION',
+}
+
+
+@dataclass(frozen=True)
+class StepModelConfig:
+    """Modelo, temperatura y ventana de contexto con los que se ejecuta un paso."""
+    model_name: str
+    temperature: float
+    context_window: int
+
+
+def default_step_model(config: Any) -> StepModelConfig:
+    """Devuelve la configuración global (MODEL_NAME, TEMPERATURE, MAX_LENGTH)."""
+    return StepModelConfig(
+        model_name=str(getattr(config, 'MODEL_NAME', 'llama3.2-vision')),
+        temperature=float(getattr(config, 'TEMPERATURE', 0.7)),
+        context_window=int(getattr(config, 'MAX_LENGTH', 2048))
+    )
+
+
+def resolve_step_models(config: Any) -> Dict[ProcessState, StepModelConfig]:
+    """
+    Resuelve el modelo de cada paso.
+
+    Cada paso puede sobrescribir la configuración global con
+    ``<PASO>_MODEL_NAME``, ``<PASO>_TEMPERATURE`` y ``<PASO>_MAX_LENGTH``
+    (p. ej. ``REFINEMENT_MODEL_NAME``); los valores no indicados se heredan.
+    """
+    default = default_step_model(config)
+    steps = {}
+    for state, prefix in STEP_PREFIXES.items():
+        model_name = getattr(config, f'{prefix}_MODEL_NAME', None)
+        temperature = getattr(config, f'{prefix}_TEMPERATURE', None)
+        context_window = getattr(config, f'{prefix}_MAX_LENGTH', None)
+        steps[state] = StepModelConfig(
+            model_name=model_name or default.model_name,
+            temperature=float(temperature) if temperature is not None else default.temperature,
+            context_window=int(context_window) if context_window else default.context_window
+        )
+    return steps
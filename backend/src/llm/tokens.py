@@ -0,0 +1,201 @@
+"""Recuento de tokens y ajuste de los prompts a la ventana de contexto."""
+
+import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Palabras, signos de puntuación y saltos de línea de un texto
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\n")
+# Caracteres por token de una palabra: los tokenizadores de los modelos de
+# Ollama guardan enteras las palabras frecuentes, también en español
+_CHARS_PER_TOKEN = 6
+# Unidades que se conservan como mínimo al recortar una entrada
+MIN_KEPT_ITEMS = 3
+MIN_KEPT_WORDS = 32
+
+TRIM_NOTE = "[... {count} {unit} para ajustarse a la ventana de contexto]"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima los tokens de un texto sin tokenizador.
+
+    Cuenta un token por signo de puntuación y salto de línea, y uno por cada
+    seis caracteres de cada palabra; con los modelos de Ollama suele quedar
+    cerca del recuento real, algo por encima con textos técnicos.
+    """
+    return sum(
+        math.ceil(len(piece) / _CHARS_PER_TOKEN) if piece[0].isalnum() or piece[0] == '_' else 1
+        for piece in _TOKEN_PATTERN.findall(text)
+    )
+
+
+class PromptTooLongError(Exception):
+    """El prompt no cabe en la ventana de contexto ni recortando sus entradas."""
+
+    def __init__(self, prompt_tokens: int, prompt_budget: int):
+        self.prompt_tokens = prompt_tokens
+        self.prompt_budget = prompt_budget
+        super().__init__(
+            f"La petición no cabe en la ventana de contexto: el prompt ocupa {prompt_tokens} tokens "
+            f"y el máximo es {prompt_budget}"
+        )
+
+
+class TokenCounter:
+    """
+    Cuenta los tokens de un texto.
+
+    Usa el tokenizador local de Hugging Face ``tokenizer_name`` si está
+    instalado ``transformers`` y el tokenizador está descargado; si no, la
+    estimación de ``estimate_tokens``.
+    """
+
+    def __init__(self, tokenizer_name: Optional[str] = None):
+        self.name = 'estimate'
+        self._tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, local_files_only=True)
+                self.name = tokenizer_name
+            except Exception as e:
+                logger.warning(f"No se pudo cargar el tokenizador {tokenizer_name}; se estimarán los tokens: {str(e)}")
+
+    def count(self, text: str) -> int:
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False))
+        return estimate_tokens(text)
+
+
+def default_output_reserve(context_window: int) -> int:
+    """Reserva para la respuesta si no se configura: un cuarto de la ventana, hasta 1024 tokens."""
+    return min(1024, context_window // 4)
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    """Ventana de contexto de un paso y tokens reservados para la respuesta."""
+    context_window: int
+    output_reserve: int
+
+    @property
+    def prompt_budget(self) -> int:
+        return max(self.context_window - self.output_reserve, 0)
+
+
+def _units(value: Any) -> Tuple[List[Any], str, int]:
+    """
+    Divide un valor en las unidades que se recortan: elementos, líneas o palabras.
+
+    Devuelve también cuántas unidades se conservan como mínimo.
+    """
+    if isinstance(value, list):
+        return list(value), 'elementos omitidos', MIN_KEPT_ITEMS
+    text = str(value)
+    lines = text.splitlines(keepends=True)
+    if len(lines) > 1:
+        return lines, 'líneas omitidas', MIN_KEPT_ITEMS
+    return re.findall(r"\s*\S+", text), 'palabras omitidas', MIN_KEPT_WORDS
+
+
+def _keep(value: Any, units: List[Any], unit: str, kept: int) -> Any:
+    """Conserva las ``kept`` primeras unidades y añade una nota con las omitidas."""
+    if kept >= len(units):
+        return value
+    note = TRIM_NOTE.format(count=len(units) - kept, unit=unit)
+    if isinstance(value, list):
+        return units[:kept] + [note]
+    head = ''.join(units[:kept]).rstrip()
+    return f"{head}\n{note}" if head else note
+
+
+def fit_prompt(
+    prompt_template,
+    input_variables: Dict[str, Any],
+    budget: TokenBudget,
+    counter: TokenCounter,
+    trimmable_inputs: Optional[List[str]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Renderiza el prompt recortando las entradas menos prioritarias si no cabe.
+
+    ``trimmable_inputs`` enumera, de menor a mayor prioridad, las variables que
+    se pueden recortar. Cada una se reduce a sus primeras unidades (elementos
+    de una lista, líneas o palabras) hasta que el prompt cabe en el
+    presupuesto; solo se pasa a la siguiente si ni dejándola en el mínimo
+    (``MIN_KEPT_ITEMS`` o ``MIN_KEPT_WORDS``) es suficiente. Ninguna entrada
+    se vacía: si el prompt sigue sin caber se lanza ``PromptTooLongError``.
+    El recorte es determinista: las mismas entradas dan el mismo prompt.
+    Devuelve el prompt y el uso de tokens.
+    """
+    variables = dict(input_variables)
+    prompt = prompt_template.format(**variables)
+    tokens = counter.count(prompt)
+    trimmed: List[str] = []
+
+    for name in trimmable_inputs or []:
+        if tokens <= budget.prompt_budget:
+            break
+        if not variables.get(name):
+            continue
+        original = variables[name]
+        units, unit, minimum = _units(original)
+        if len(units) <= minimum:
+            continue
+
+        def render(kept: int) -> Tuple[str, int]:
+            candidate = dict(variables, **{name: _keep(original, units, unit, kept)})
+            text = prompt_template.format(**candidate)
+            return text, counter.count(text)
+
+        # Búsqueda binaria del mayor número de unidades que cabe
+        low, high = minimum, len(units) - 1
+        best = minimum
+        while low <= high:
+            middle = (low + high) // 2
+            if render(middle)[1] <= budget.prompt_budget:
+                best, low = middle, middle + 1
+            else:
+                high = middle - 1
+        variables[name] = _keep(original, units, unit, best)
+        prompt, tokens = render(best)
+        trimmed.append(name)
+
+    if trimmed:
+        logger.warning(f"Prompt recortado para ajustarse a la ventana de contexto: {', '.join(trimmed)}")
+    if tokens > budget.prompt_budget:
+        logger.warning(
+            f"El prompt ({tokens} tokens) supera el presupuesto de {budget.prompt_budget} tokens "
+            f"de la ventana de contexto de {budget.context_window}"
+        )
+        raise PromptTooLongError(tokens, budget.prompt_budget)
+
+    usage = {
+        "prompt_tokens": tokens,
+        "prompt_budget": budget.prompt_budget,
+        "output_reserve": budget.output_reserve,
+        "context_window": budget.context_window,
+        "trimmed": bool(trimmed),
+        "trimmed_inputs": trimmed,
+        "tokenizer": counter.name,
+    }
+    return prompt, usage
+
+
+class TokenUsage(BaseModel):
+    """Uso de tokens de un paso, tal y como se devuelve en las respuestas de la API."""
+    prompt_tokens: int = Field(..., description="Tokens del prompt enviado al LLM")
+    completion_tokens: Optional[int] = Field(None, description="Tokens de la respuesta")
+    prompt_budget: int = Field(..., description="Tokens disponibles para el prompt")
+    output_reserve: int = Field(..., description="Tokens reservados para la respuesta")
+    context_window: int = Field(..., description="Ventana de contexto del modelo")
+    trimmed: bool = Field(False, description="Si se ha recortado alguna entrada para ajustarse a la ventana de contexto")
+    trimmed_inputs: List[str] = Field(default_factory=list, description="Entradas recortadas para ajustarse a la ventana de contexto")
+    tokenizer: str = Field(..., description="Tokenizador usado para contar ('estimate' si es una estimación)")
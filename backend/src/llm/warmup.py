@@ -0,0 +1,139 @@
+"""Precalentamiento de los modelos de Ollama al arrancar."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backends import BalancedLLM
+
+logger = logging.getLogger(__name__)
+
+WARMUP_PROMPT = "Hola"
+# Tokens de respuesta de las llamadas de precalentamiento: basta con que el
+# modelo se cargue y evalúe el prompt
+WARMUP_MAX_TOKENS = 1
+
+
+def static_prefix(prompt_template: Any) -> str:
+    """Parte fija de una plantilla: el texto anterior a la primera variable."""
+    template = getattr(prompt_template, 'template', prompt_template)
+    return template.split('{', 1)[0]
+
+
+def ollama_instances(llm: Any) -> List[Any]:
+    """LLM de cada instancia de Ollama (uno por URL si se reparte entre varias)."""
+    if isinstance(llm, BalancedLLM):
+        return [backend.llm for backend in llm.backends]
+    return [llm]
+
+
+def short_generation(llm: Any, max_tokens: int = WARMUP_MAX_TOKENS) -> Any:
+    """Copia del LLM que genera como mucho ``max_tokens`` tokens."""
+    if 'num_predict' in getattr(type(llm), 'model_fields', {}):
+        return llm.model_copy(update={'num_predict': max_tokens})
+    return llm
+
+
+class WarmUp:
+    """
+    Precalienta los modelos de Ollama en segundo plano.
+
+    Lanza una generación mínima por cada modelo e instancia de Ollama, para
+    que se cargue en memoria, y otra con la parte fija de cada plantilla de
+    prompt, para que su prefijo quede en la caché KV. Si falla (p. ej.
+    Ollama aún no ha arrancado) se reintenta cada ``retry_seconds``. El
+    estado pasa por 'pending', 'warming' y 'ready' ('failed' entre reintentos).
+    """
+
+    def __init__(self, service: Any, retry_seconds: float = 10.0):
+        self.service = service
+        self.retry_seconds = retry_seconds
+        self.status = 'pending'
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.calls = 0
+        self.duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def _plan(self) -> List[Tuple[str, Any, str]]:
+        """Llamadas de precalentamiento: (descripción, LLM, prompt)."""
+        calls = []
+        for llm in self.service._distinct_llms():
+            for instance in ollama_instances(llm):
+                calls.append((f"modelo {getattr(instance, 'model', None)}", instance, WARMUP_PROMPT))
+        for state, template in self.service.prompt_templates().items():
+            prefix = static_prefix(template)
+            for instance in ollama_instances(self.service._llm_for(state)):
+                calls.append((f"prefijo de {state.value}", instance, prefix))
+        return calls
+
+    async def run_once(self) -> None:
+        """Carga los modelos y después precarga los prefijos de las plantillas."""
+        self.attempts += 1
+        started = time.perf_counter()
+        calls = self._plan()
+        models = [call for call in calls if call[2] == WARMUP_PROMPT]
+        prefixes = [call for call in calls if call[2] != WARMUP_PROMPT]
+        for batch in (models, prefixes):
+            await asyncio.gather(*(
+                short_generation(llm).ainvoke(prompt) for _, llm, prompt in batch
+            ))
+            for description, _, _ in batch:
+                logger.debug(f"Precalentamiento: {description} listo")
+        self.calls += len(calls)
+        self.duration = time.perf_counter() - started
+
+    async def run(self) -> None:
+        """Precalienta los modelos, reintentando hasta que lo consigue."""
+        while True:
+            self.status = 'warming'
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.status = 'failed'
+                self.error = str(e)
+                logger.warning(f"Falló el precalentamiento del LLM; se reintenta en {self.retry_seconds}s: {str(e)}")
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            self.status = 'ready'
+            self.error = None
+            logger.info(f"Precalentamiento del LLM completado en {self.duration:.1f}s")
+            return
+
+    def start(self) -> None:
+        """Lanza el precalentamiento como tarea en segundo plano."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Cancela el precalentamiento si sigue en curso."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "attempts": self.attempts,
+            "calls": self.calls,
+            "duration_seconds": self.duration,
+            "error": self.error,
+        }
+
+
+def create_warm_up(config: Any, service: Any) -> Optional[WarmUp]:
+    """Crea el precalentamiento si WARMUP_ENABLED está activado (None en otro caso)."""
+    enabled = getattr(config, 'WARMUP_ENABLED', False)
+    if isinstance(enabled, str):
+        enabled = enabled.lower() == 'true'
+    if not enabled:
+        return None
+    return WarmUp(service, retry_seconds=float(getattr(config, 'WARMUP_RETRY_SECONDS', 10) or 10))
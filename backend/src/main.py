@@ -1,30 +1,95 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from src.api.routes.refine_story import router as refine_story_router
 from src.api.routes.identify_corner_cases import router as identify_corner_cases_router
 from src.api.routes.propose_testing_strategy import router as propose_testing_strategy_router
 from src.api.routes.jira_integration import router as jira_integration_router
 from src.api.routes.finalize_story import router as finalize_story_router
+from src.api.routes.pipeline import router as pipeline_router
 from src.llm.config import get_llm_config
+from src.dependencies import get_llm_service, close_jira_client, close_jira_story_cache
+from src.observability.metrics import CONTENT_TYPE, render_metrics
+from src.observability.tracing import configure_tracing, shutdown_tracing
+from src.api.tracing import TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranca y detiene las tareas en segundo plano del servicio LLM y el cliente de Jira.
+
+    El servicio LLM (y con él langchain y el cliente de Ollama) se crea aquí y
+    no al importar la aplicación, para que el arranque de cada worker sea rápido.
+    """
+    configure_tracing()
+    llm_service = get_llm_service()
+    await llm_service.start()
+    yield
+    await llm_service.close()
+    await close_jira_story_cache()
+    close_jira_client()
+    shutdown_tracing()
 
 
 app = FastAPI(
     title="User Story Assistant",
     description="API para asistir en la creación y refinamiento de historias de usuario",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(TracingMiddleware)
 
 app.include_router(refine_story_router, prefix="/api/v1")
 app.include_router(identify_corner_cases_router, prefix="/api/v1")
 app.include_router(propose_testing_strategy_router, prefix="/api/v1")
 app.include_router(jira_integration_router, prefix="/api/v1")
 app.include_router(finalize_story_router, prefix="/api/v1")
+app.include_router(pipeline_router, prefix="/api/v1")
 
 @app.get("/")
 async def read_root():
     return {"message": "Bienvenido al Asistente de Refinamiento de Historias de Usuario"}
 
+# Disponibilidad para el balanceador: 503 hasta que termina el precalentamiento del LLM
+@app.get("/ready")
+async def ready():
+    readiness = get_llm_service().readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+# Métricas en formato Prometheus: latencias por paso, tokens, caché, sesiones y Jira
+@app.get("/metrics")
+async def metrics():
+    await get_llm_service().refresh_metrics()
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 # Ruta de depuración para verificar la configuración
 @app.get("/debug/config")
 async def debug_config():
     config = get_llm_config()
     return config.model_dump()
+
+# Ruta de depuración para consultar las métricas del almacén de sesiones
+@app.get("/debug/sessions")
+async def debug_sessions():
+    return await get_llm_service().session_stats()
+
+# Ruta de depuración para consultar la cola de llamadas al LLM
+@app.get("/debug/scheduler")
+async def debug_scheduler():
+    return get_llm_service().scheduler_stats()
+
+# Ruta de depuración para consultar el estado de las instancias de Ollama
+@app.get("/debug/backends")
+async def debug_backends():
+    return get_llm_service().backend_stats()
+
+# Ruta de depuración para consultar el modelo de cada paso del flujo
+@app.get("/debug/models")
+async def debug_models():
+    return get_llm_service().step_models()
+
+# Ruta de depuración para consultar la generación especulativa del siguiente paso
+@app.get("/debug/speculation")
+async def debug_speculation():
+    return get_llm_service().speculation_stats()
@@ -0,0 +1,108 @@
+"""
+Logs estructurados y diferidos para los textos grandes (prompts, respuestas, historias).
+
+``log_event`` no construye el mensaje si el nivel está desactivado; si está
+activo, el mensaje (``evento clave=valor ...``) se formatea cuando un handler
+lo emite. Los valores envueltos en ``Payload`` se recortan a
+LOG_PAYLOAD_MAX_CHARS caracteres y solo se incluyen en una fracción
+LOG_PAYLOAD_SAMPLE_RATE de los eventos; en el resto se registra su longitud.
+Los campos también se añaden al registro (``record.event`` y
+``record.fields``) para los formateadores estructurados.
+"""
+
+import logging
+import os
+import random
+from typing import Any, Dict, Optional
+
+
+class PayloadPolicy:
+    """Tamaño máximo y fracción de muestreo de los textos grandes en los logs."""
+
+    def __init__(self, max_chars: int = 500, sample_rate: float = 1.0):
+        self.max_chars = max_chars
+        self.sample_rate = sample_rate
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+
+POLICY = PayloadPolicy(
+    max_chars=int(os.getenv('LOG_PAYLOAD_MAX_CHARS', '500')),
+    sample_rate=float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '1.0'))
+)
+
+
+def configure_payload_logging(max_chars: Optional[int] = None, sample_rate: Optional[float] = None) -> None:
+    """Cambia el tamaño máximo y la fracción de muestreo de los textos grandes."""
+    if max_chars is not None:
+        POLICY.max_chars = max_chars
+    if sample_rate is not None:
+        POLICY.sample_rate = sample_rate
+
+
+class Payload:
+    """Texto grande que solo se convierte (y recorta) al emitir el log."""
+
+    __slots__ = ('value', 'include')
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.include = True
+
+    def __len__(self) -> int:
+        return len(self.value) if isinstance(self.value, (str, list, dict, tuple)) else len(str(self.value))
+
+    def __str__(self) -> str:
+        if self.value is None:
+            return 'None'
+        if not self.include:
+            unit = 'elementos' if isinstance(self.value, (list, dict, tuple)) else 'caracteres'
+            return f"<{len(self)} {unit}>"
+        text = self.value if isinstance(self.value, str) else str(self.value)
+        max_chars = POLICY.max_chars
+        if max_chars > 0 and len(text) > max_chars:
+            return f"{text[:max_chars]}... (+{len(text) - max_chars} caracteres)"
+        return text
+
+    __repr__ = __str__
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, Payload):
+        text = str(value)
+        return repr(text) if value.include else text
+    if isinstance(value, str):
+        return value if value and ' ' not in value and '=' not in value else repr(value)
+    return str(value)
+
+
+class StructuredMessage:
+    """Mensaje ``evento clave=valor ...`` que se formatea al emitirse."""
+
+    __slots__ = ('event', 'fields')
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        if not self.fields:
+            return self.event
+        return self.event + ' ' + ' '.join(f"{key}={_format_value(value)}" for key, value in self.fields.items())
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
+    """
+    Registra un evento estructurado si ``logger`` tiene activo ``level``.
+
+    Los campos ``Payload`` se incluyen recortados en los eventos muestreados
+    y como longitud en los demás.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    payloads = [value for value in fields.values() if isinstance(value, Payload)]
+    if payloads and not POLICY.sample():
+        for payload in payloads:
+            payload.include = False
+    logger.log(level, StructuredMessage(event, fields), extra={'event': event, 'fields': fields}, stacklevel=2)
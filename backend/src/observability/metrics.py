@@ -0,0 +1,201 @@
+"""Métricas en el formato de texto de Prometheus, sin dependencias externas."""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los histogramas de latencia, en segundos: de milisegundos (caché,
+# Jira) a minutos (finalización con modelos grandes en CPU)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    """Métrica con etiquetas; cada combinación de valores tiene su propia serie."""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} requiere las etiquetas {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> Iterable[Tuple[str, List[Tuple[str, str]], float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Contador que solo crece."""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            yield self.name + '_total', list(zip(self.labelnames, key)), value
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja (se fija al recoger las métricas)."""
+
+    type = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = float(value)
+
+    def value(self, **labels: str) -> Optional[float]:
+        return self._series.get(self._key(labels))
+
+    def samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Histogram(_Metric):
+    """Distribución de observaciones en cubos acumulados."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield self.name + '_bucket', labels + [('le', _format_value(bound))], cumulative
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+class Registry:
+    """Conjunto de métricas que se exponen juntas."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Latencias de cada paso del flujo (etiqueta ``step``: valor de ProcessState)
+STEP_LATENCY = histogram('llm_step_duration_seconds', 'Latencia total de un paso del flujo, de la petición al resultado', ['step'])
+PROMPT_EVAL_TIME = histogram('llm_prompt_eval_seconds', 'Tiempo de evaluación del prompt (hasta el primer token en streaming o el prompt_eval_duration de Ollama, sin la espera en cola)', ['step'])
+TIME_TO_FIRST_TOKEN = histogram('llm_time_to_first_token_seconds', 'Tiempo hasta el primer token desde que llega la petición', ['step'])
+GENERATION_TIME = histogram('llm_generation_seconds', 'Tiempo de generación del LLM, sin la espera en cola', ['step'])
+QUEUE_WAIT = histogram('llm_queue_wait_seconds', 'Espera en la cola del planificador del LLM', ['priority'])
+
+PROMPT_TOKENS = counter('llm_prompt_tokens', 'Tokens de los prompts enviados al LLM', ['step'])
+COMPLETION_TOKENS = counter('llm_completion_tokens', 'Tokens de las respuestas del LLM', ['step'])
+CACHE_REQUESTS = counter('llm_cache_requests', 'Consultas a la caché de respuestas', ['step', 'result'])
+SECTION_EXTRACTION_FAILURES = counter('llm_section_extraction_failures', 'Marcadores de sección no encontrados en la respuesta del LLM', ['step', 'marker'])
+JIRA_REQUESTS = counter('jira_requests', 'Llamadas a la API de Jira', ['operation', 'outcome'])
+JIRA_LATENCY = histogram('jira_request_duration_seconds', 'Latencia de las llamadas a la API de Jira', ['operation'])
+
+CACHE_HIT_RATIO = gauge('llm_cache_hit_ratio', 'Proporción de aciertos de la caché de respuestas')
+ACTIVE_SESSIONS = gauge('llm_active_sessions', 'Sesiones activas en el almacén de sesiones')
+LLM_IN_FLIGHT = gauge('llm_in_flight', 'Llamadas al LLM en curso')
+LLM_QUEUE_DEPTH = gauge('llm_queue_depth', 'Llamadas al LLM en espera en el planificador')
+
+
+def cache_hit_ratio() -> float:
+    """Aciertos de la caché sobre el total de consultas (0 si no hay ninguna)."""
+    hits = sum(value for key, value in CACHE_REQUESTS._series.items() if key[1] == 'hit')
+    total = sum(CACHE_REQUESTS._series.values())
+    return hits / total if total else 0.0
+
+
+def render_metrics() -> str:
+    """Devuelve todas las métricas en el formato de texto de Prometheus."""
+    CACHE_HIT_RATIO.set(cache_hit_ratio())
+    return REGISTRY.render()
@@ -0,0 +1,339 @@
+"""
+Trazas con la estructura de OpenTelemetry, sin dependencias externas.
+
+Las trazas se exportan en el formato JSON de OTLP, a un fichero (una petición
+de exportación por línea, como el exportador de fichero del OpenTelemetry
+Collector) o por HTTP a un colector (``/v1/traces``). Sin exportador
+configurado ``span()`` devuelve siempre el mismo span vacío, de modo que la
+instrumentación no tiene coste.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCOPE_NAME = "user-story-assistant"
+
+
+class Span:
+    """Operación con nombre, duración, atributos y span padre."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'status_message', '_tracer', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any], parent: Optional['Span']):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128) or 1
+        self.span_id = random.getrandbits(64) or 1
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.status = 'UNSET'
+        self.status_message = ''
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = 'ERROR'
+        self.status_message = str(error)
+        self.attributes['exception.type'] = type(error).__name__
+
+    def __enter__(self) -> 'Span':
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.record_error(exc)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Generador asíncrono cerrado desde otro contexto
+            pass
+        self._tracer._on_end(self)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Representación del span en el JSON de OTLP."""
+        span = {
+            'traceId': f'{self.trace_id:032x}',
+            'spanId': f'{self.span_id:016x}',
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': otlp_attributes(self.attributes),
+            'status': {'code': {'UNSET': 0, 'OK': 1, 'ERROR': 2}[self.status]},
+        }
+        if self.parent_id is not None:
+            span['parentSpanId'] = f'{self.parent_id:016x}'
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Span que no registra nada: el que se usa con las trazas desactivadas."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def export_request(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Petición de exportación de OTLP (``ExportTraceServiceRequest``) con los spans."""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': otlp_attributes({'service.name': service_name})},
+            'scopeSpans': [{
+                'scope': {'name': SCOPE_NAME},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class InMemorySpanExporter:
+    """Guarda los spans exportados en memoria (tests y depuración)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileSpanExporter:
+    """Añade cada lote de spans a un fichero como una línea de JSON de OTLP."""
+
+    def __init__(self, path: str, service_name: str = SCOPE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(export_request(spans, self.service_name), ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OTLPHttpSpanExporter:
+    """Envía los spans a un colector de OpenTelemetry por OTLP/HTTP con JSON."""
+
+    def __init__(self, endpoint: str, service_name: str = SCOPE_NAME, timeout: float = 5.0):
+        import httpx
+
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Span]) -> None:
+        response = self._client.post(self.endpoint, json=export_request(spans, self.service_name))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class SimpleSpanProcessor:
+    """Exporta cada span al terminar, en el mismo hilo."""
+
+    def __init__(self, exporter: Any):
+        self.exporter = exporter
+
+    def on_end(self, span: Span) -> None:
+        self.exporter.export([span])
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+
+class BatchSpanProcessor:
+    """
+    Acumula los spans terminados y los exporta por lotes en un hilo aparte.
+
+    Exporta cada ``schedule_delay`` segundos o en cuanto hay ``max_batch_size``
+    spans; si la cola supera ``max_queue_size`` se descartan los más antiguos.
+    """
+
+    def __init__(self, exporter: Any, max_queue_size: int = 2048, max_batch_size: int = 512, schedule_delay: float = 2.0):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        self._queue: deque = deque(maxlen=max_queue_size)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._worker, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        with self._condition:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(span)
+            if len(self._queue) >= self.max_batch_size:
+                self._condition.notify()
+
+    def _drain(self) -> None:
+        while True:
+            with self._condition:
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch_size))]
+            if not batch:
+                return
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"No se pudieron exportar {len(batch)} spans: {str(e)}")
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                if not self._stopped and len(self._queue) < self.max_batch_size:
+                    self._condition.wait(self.schedule_delay)
+                stopped = self._stopped
+            self._drain()
+            if stopped:
+                return
+
+    def shutdown(self) -> None:
+        """Exporta los spans pendientes y detiene el hilo."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+        self.exporter.shutdown()
+
+
+class Tracer:
+    """Crea los spans y los entrega al procesador configurado."""
+
+    def __init__(self):
+        self.processor: Optional[Any] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Span:
+        return Span(self, name, attributes, _current_span.get())
+
+    def _on_end(self, span: Span) -> None:
+        processor = self.processor
+        if processor is not None:
+            processor.on_end(span)
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Span para usar con ``with``; hijo del span en curso del contexto.
+
+    Con las trazas desactivadas devuelve ``NOOP_SPAN`` sin crear nada.
+    """
+    if TRACER.processor is None:
+        return NOOP_SPAN
+    return TRACER.start_span(name, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def tracing_enabled() -> bool:
+    return TRACER.processor is not None
+
+
+def set_span_processor(processor: Optional[Any]) -> None:
+    """Activa las trazas con ``processor`` (o las desactiva con None)."""
+    TRACER.processor = processor
+
+
+def configure_tracing(
+    exporter: Optional[str] = None,
+    file_path: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    service_name: Optional[str] = None
+) -> bool:
+    """
+    Activa las trazas según TRACING_EXPORTER ('none', 'file' u 'otlp').
+
+    Los valores no indicados se leen de TRACING_EXPORTER, TRACING_FILE_PATH,
+    TRACING_OTLP_ENDPOINT y TRACING_SERVICE_NAME. Devuelve si quedan activas.
+    """
+    exporter = (exporter or os.getenv('TRACING_EXPORTER', 'none')).lower()
+    service_name = service_name or os.getenv('TRACING_SERVICE_NAME', SCOPE_NAME)
+    if exporter == 'file':
+        path = file_path or os.getenv('TRACING_FILE_PATH', 'traces.jsonl')
+        span_exporter = FileSpanExporter(path, service_name)
+        logger.info(f"Trazas activadas: exportando a {path}")
+    elif exporter == 'otlp':
+        url = endpoint or os.getenv('TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+        span_exporter = OTLPHttpSpanExporter(url, service_name)
+        logger.info(f"Trazas activadas: exportando a {url}")
+    else:
+        if exporter not in ('', 'none'):
+            logger.warning(f"Exportador de trazas desconocido: {exporter}; trazas desactivadas")
+        return False
+    shutdown_tracing()
+    set_span_processor(BatchSpanProcessor(span_exporter))
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Exporta los spans pendientes y desactiva las trazas."""
+    processor = TRACER.processor
+    TRACER.processor = None
+    if processor is not None:
+        processor.shutdown()
+
@@ -3,6 +3,8 @@ from fastapi.testclient import TestClient
 from src.main import app
 from src.dependencies import override_llm_service
 from tests.mocks.mock_llm import MockLLMService
+from src.llm.tokens import PromptTooLongError
+from unittest.mock import AsyncMock, MagicMock
 from uuid import UUID, uuid4
 
 @pytest.fixture
@@ -101,3 +103,19 @@ def test_finalize_story_endpoint_missing_components(client):
         }
     )
     assert response.status_code == 422  # Error de validación
+
+def test_finalize_story_prompt_too_long_returns_413():
+    """Test que si la petición no cabe en la ventana de contexto se responde 413"""
+    service = MagicMock()
+    service.finalize_story = AsyncMock(side_effect=PromptTooLongError(prompt_tokens=2000, prompt_budget=1536))
+    override_llm_service(service)
+    try:
+        response = TestClient(app).post(
+            "/api/v1/finalize_story",
+            json={"refined_story": "Historia", "corner_cases": ["Caso"], "testing_strategy": ["Estrategia"]}
+        )
+    finally:
+        override_llm_service(None)
+
+    assert response.status_code == 413
+    assert "1536" in response.json()["detail"]
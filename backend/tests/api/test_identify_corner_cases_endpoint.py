@@ -53,4 +53,22 @@ def test_identify_corner_cases_endpoint_with_session(client):
         }
     )
     assert response.status_code == 200
-    assert response.json()["session_id"] == session_id
\ No newline at end of file
+    assert response.json()["session_id"] == session_id
+
+def test_identify_corner_cases_endpoint_passes_fan_out(client, mock_llm):
+    """Test que el endpoint pasa al servicio el modo de generación por secciones"""
+    received = {}
+    original = mock_llm.identify_corner_cases
+
+    async def identify_corner_cases(**kwargs):
+        received.update(kwargs)
+        return await original(**kwargs)
+
+    mock_llm.identify_corner_cases = identify_corner_cases
+    response = client.post(
+        "/api/v1/identify_corner_cases",
+        json={"story": "Como usuario quiero iniciar sesión", "fan_out": True}
+    )
+
+    assert response.status_code == 200
+    assert received["fan_out"] is True
@@ -0,0 +1,146 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_jira_client, override_jira_story_cache
+from src.integrations.jira_cache import JiraStoryCache
+from src.integrations.jira_client import AsyncJira
+
+@pytest.fixture
+def mock_jira():
+    return MagicMock()
+
+@pytest.fixture
+def story_cache():
+    return JiraStoryCache()
+
+@pytest.fixture
+def client(mock_jira, story_cache, monkeypatch):
+    monkeypatch.setenv('JIRA_PROJECT_KEY', 'PROJ')
+    override_jira_client(AsyncJira(mock_jira))
+    override_jira_story_cache(story_cache)
+    yield TestClient(app)
+    override_jira_client(None)
+    override_jira_story_cache(JiraStoryCache())
+
+def test_bulk_write_creates_in_batches_and_updates(client, mock_jira):
+    """Test que las historias nuevas se crean en bloque y las existentes se actualizan"""
+    mock_jira.create_issues.return_value = {
+        'issues': [{'id': '1', 'key': 'PROJ-10'}, {'id': '2', 'key': 'PROJ-11'}],
+        'errors': []
+    }
+
+    response = client.post("/api/v1/jira/stories/bulk", json={"stories": [
+        {"title": "Nueva 1", "description": "Descripción 1"},
+        {"title": "Existente", "story_id": "PROJ-3"},
+        {"title": "Nueva 2"},
+    ]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [(r["index"], r["story_id"], r["action"], r["success"]) for r in data["results"]] == [
+        (0, "PROJ-10", "created", True),
+        (1, "PROJ-3", "updated", True),
+        (2, "PROJ-11", "created", True),
+    ]
+    assert (data["created"], data["updated"], data["failed"]) == (2, 1, 0)
+
+    mock_jira.create_issues.assert_called_once()
+    issues = mock_jira.create_issues.call_args.args[0]
+    assert issues[0]["fields"]["project"] == {"key": "PROJ"}
+    assert issues[0]["fields"]["issuetype"] == {"name": "Story"}
+    assert [i["fields"]["summary"] for i in issues] == ["Nueva 1", "Nueva 2"]
+    mock_jira.update_issue_field.assert_called_once_with(
+        "PROJ-3", fields={"summary": "Existente", "description": ""}
+    )
+
+def test_bulk_write_reports_partial_failures(client, mock_jira):
+    """Test que se informa del fallo de cada historia sin abortar el resto"""
+    mock_jira.create_issues.return_value = {
+        'issues': [{'id': '2', 'key': 'PROJ-11'}],
+        'errors': [{
+            'status': 400,
+            'failedElementNumber': 0,
+            'elementErrors': {'errorMessages': [], 'errors': {'summary': 'Campo obligatorio'}}
+        }]
+    }
+
+    def update(key, fields):
+        if key == "PROJ-4":
+            raise Exception("Issue Does Not Exist")
+    mock_jira.update_issue_field.side_effect = update
+
+    response = client.post("/api/v1/jira/stories/bulk", json={"stories": [
+        {"title": "Sin resumen válido"},
+        {"title": "Nueva"},
+        {"title": "Existe", "story_id": "PROJ-3"},
+        {"title": "No existe", "story_id": "PROJ-4"},
+    ]})
+
+    data = response.json()
+    assert [r["success"] for r in data["results"]] == [False, True, True, False]
+    assert "summary: Campo obligatorio" in data["results"][0]["message"]
+    assert data["results"][1]["story_id"] == "PROJ-11"
+    assert "Issue Does Not Exist" in data["results"][3]["message"]
+    assert (data["created"], data["updated"], data["failed"]) == (1, 1, 2)
+
+def test_bulk_write_splits_creates_into_batches(client, mock_jira):
+    """Test que las creaciones se dividen en lotes de 50"""
+    def create_issues(issues):
+        return {'issues': [{'key': f"PROJ-{i}"} for i in range(len(issues))], 'errors': []}
+    mock_jira.create_issues.side_effect = create_issues
+
+    response = client.post("/api/v1/jira/stories/bulk", json={
+        "stories": [{"title": f"Historia {i}"} for i in range(120)]
+    })
+
+    assert response.json()["created"] == 120
+    assert [len(call.args[0]) for call in mock_jira.create_issues.call_args_list] == [50, 50, 20]
+
+def test_bulk_updates_are_bounded(client, mock_jira, monkeypatch):
+    """Test que las actualizaciones respetan JIRA_BULK_CONCURRENCY"""
+    monkeypatch.setenv('JIRA_BULK_CONCURRENCY', '2')
+    lock = threading.Lock()
+    state = {"active": 0, "max": 0}
+
+    def update(key, fields):
+        with lock:
+            state["active"] += 1
+            state["max"] = max(state["max"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+    mock_jira.update_issue_field.side_effect = update
+
+    response = client.post("/api/v1/jira/stories/bulk", json={
+        "stories": [{"title": f"Historia {i}", "story_id": f"PROJ-{i}"} for i in range(1, 9)]
+    })
+
+    assert response.json()["updated"] == 8
+    assert state["max"] == 2
+
+def test_bulk_updates_invalidate_cache(client, mock_jira, story_cache):
+    """Test que las historias actualizadas se descartan de la caché"""
+    story_cache.put("PROJ-3", {'summary': 'Antigua', 'description': '', 'updated': '2024-01-01'})
+
+    client.post("/api/v1/jira/stories/bulk", json={"stories": [{"title": "Nueva", "story_id": "PROJ-3"}]})
+
+    assert len(story_cache) == 0
+
+def test_bulk_write_whole_batch_failure(client, mock_jira):
+    """Test que un error de Jira en un lote marca como fallidas todas sus historias"""
+    mock_jira.create_issues.side_effect = Exception("400 Bad Request")
+
+    response = client.post("/api/v1/jira/stories/bulk", json={"stories": [{"title": "A"}, {"title": "B"}]})
+
+    data = response.json()
+    assert data["failed"] == 2
+    assert all("400 Bad Request" in r["message"] for r in data["results"])
+
+def test_bulk_write_validates_input(client):
+    """Test la validación de la petición"""
+    assert client.post("/api/v1/jira/stories/bulk", json={"stories": []}).status_code == 422
+    response = client.post("/api/v1/jira/stories/bulk", json={"stories": [{"title": "A", "story_id": "malo"}]})
+    assert response.status_code == 400
@@ -0,0 +1,137 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_jira_client, override_jira_story_cache, override_llm_service
+from src.integrations.jira_cache import JiraStoryCache
+from src.integrations.jira_client import AsyncJira
+from src.llm.service import LLMService
+
+def make_issue(key):
+    return {
+        'key': key,
+        'fields': {
+            'summary': f'Historia {key}',
+            'description': f'Descripción {key}',
+            'updated': '2024-01-01T10:00:00.000+0000'
+        }
+    }
+
+def fake_search(issues):
+    """Simula Jira.jql paginando sobre una lista de issues"""
+    def jql(query, fields='*all', start=0, limit=None):
+        page = issues[start:start + limit]
+        return {'startAt': start, 'maxResults': limit, 'total': len(issues), 'issues': page}
+    return jql
+
+def parse_ndjson(body):
+    return [json.loads(line) for line in body.strip().split("\n")]
+
+@pytest.fixture
+def mock_jira():
+    return MagicMock()
+
+@pytest.fixture
+def service():
+    return LLMService(config=SimpleNamespace(), llm=MagicMock(), cache=None)
+
+@pytest.fixture
+def client(mock_jira, service):
+    override_jira_client(AsyncJira(mock_jira))
+    override_jira_story_cache(JiraStoryCache())
+    override_llm_service(service)
+    yield TestClient(app)
+    override_jira_client(None)
+    override_jira_story_cache(JiraStoryCache())
+    override_llm_service(None)
+
+def test_import_by_jql_pages_through_results(client, mock_jira, service):
+    """Test que la importación por JQL recorre todas las páginas y crea una sesión por historia"""
+    issues = [make_issue(f'PROJ-{i}') for i in range(1, 8)]
+    mock_jira.jql.side_effect = fake_search(issues)
+
+    response = client.post("/api/v1/jira/stories/import", json={
+        "jql": "project = PROJ AND sprint in openSprints()",
+        "page_size": 3
+    })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = parse_ndjson(response.text)
+    stories = [line for line in lines if line["type"] == "story"]
+    assert [s["story_id"] for s in stories] == [f'PROJ-{i}' for i in range(1, 8)]
+    assert stories[0]["title"] == "Historia PROJ-1"
+    assert lines[-1] == {"type": "done", "imported": 7, "failed": 0}
+    assert mock_jira.jql.call_count == 3
+    assert mock_jira.jql.call_args.kwargs["fields"] == "summary,description,updated"
+    assert len({s["session_id"] for s in stories}) == 7
+    assert len(service._sessions) == 7
+
+def test_import_respects_max_results(client, mock_jira):
+    """Test que max_results limita las historias importadas y las páginas pedidas"""
+    mock_jira.jql.side_effect = fake_search([make_issue(f'PROJ-{i}') for i in range(1, 20)])
+
+    response = client.post("/api/v1/jira/stories/import", json={
+        "jql": "project = PROJ", "page_size": 5, "max_results": 7
+    })
+
+    lines = parse_ndjson(response.text)
+    assert lines[-1]["imported"] == 7
+    assert mock_jira.jql.call_count == 2
+
+def test_import_by_keys_reports_missing_stories(client, mock_jira):
+    """Test que la importación por IDs informa de las historias que no existen"""
+    def jql(query, fields='*all', start=0, limit=None):
+        raise Exception("An issue with key 'PROJ-9' does not exist for field 'key'.")
+    mock_jira.jql.side_effect = jql
+
+    def issue(key, fields='*all'):
+        if key == 'PROJ-9':
+            raise Exception("Issue Does Not Exist")
+        return make_issue(key)
+    mock_jira.issue.side_effect = issue
+
+    response = client.post("/api/v1/jira/stories/import", json={
+        "story_ids": ["PROJ-1", "PROJ-9", "PROJ-2"]
+    })
+
+    lines = parse_ndjson(response.text)
+    assert [line["story_id"] for line in lines if line["type"] == "story"] == ["PROJ-1", "PROJ-2"]
+    errors = [line for line in lines if line["type"] == "error"]
+    assert errors[0]["story_id"] == "PROJ-9"
+    assert lines[-1] == {"type": "done", "imported": 2, "failed": 1}
+
+def test_imported_stories_are_cached(client, mock_jira):
+    """Test que las historias importadas se sirven después desde la caché"""
+    mock_jira.jql.side_effect = fake_search([make_issue('PROJ-1')])
+
+    client.post("/api/v1/jira/stories/import", json={"story_ids": ["PROJ-1"]})
+    response = client.get("/api/v1/jira/story/PROJ-1")
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Historia PROJ-1"
+    mock_jira.issue.assert_not_called()
+
+def test_import_requires_a_single_source(client):
+    """Test que se exige una consulta JQL o una lista de IDs"""
+    assert client.post("/api/v1/jira/stories/import", json={}).status_code == 400
+    assert client.post("/api/v1/jira/stories/import", json={
+        "jql": "project = PROJ", "story_ids": ["PROJ-1"]
+    }).status_code == 400
+    assert client.post("/api/v1/jira/stories/import", json={
+        "story_ids": ["proj-1"]
+    }).status_code == 400
+    assert client.post("/api/v1/jira/stories/import", json={
+        "jql": "project = PROJ", "fields": ["summary", "assignee"]
+    }).status_code == 400
+
+def test_import_search_error_is_returned_as_http_error(client, mock_jira):
+    """Test que un error en la primera página se devuelve como error HTTP"""
+    mock_jira.jql.side_effect = Exception("Error in the JQL Query")
+
+    response = client.post("/api/v1/jira/stories/import", json={"jql": "project = = PROJ"})
+
+    assert response.status_code == 500
+    assert "Error al conectar con Jira" in response.json()["detail"]
@@ -2,8 +2,19 @@ import pytest
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 from src.main import app
+from src.dependencies import override_jira_client, override_jira_story_cache
+from src.integrations.jira_cache import JiraStoryCache
 import os
 
+@pytest.fixture(autouse=True)
+def reset_jira_client():
+    """Descarta el cliente y la caché de Jira compartidos entre tests"""
+    override_jira_client(None)
+    override_jira_story_cache(JiraStoryCache())
+    yield
+    override_jira_client(None)
+    override_jira_story_cache(JiraStoryCache())
+
 @pytest.fixture
 def client():
     # Configurar variables de entorno para el test
@@ -20,7 +31,7 @@ def test_get_jira_story_success(client):
         }
     }
 
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.issue.return_value = mock_issue
         MockJira.return_value = mock_jira
@@ -34,7 +45,7 @@ def test_get_jira_story_success(client):
 
 def test_get_jira_story_not_found(client):
     """Test que el endpoint maneja correctamente historias no encontradas"""
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.issue.side_effect = Exception("Issue Does Not Exist")
         MockJira.return_value = mock_jira
@@ -46,7 +57,7 @@ def test_get_jira_story_not_found(client):
 
 def test_get_jira_story_server_error(client):
     """Test que el endpoint maneja correctamente errores del servidor de Jira"""
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.issue.side_effect = Exception("Error de conexión")
         MockJira.return_value = mock_jira
@@ -76,7 +87,7 @@ def test_update_jira_story_create_new(client):
         }
     }
 
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.create_issue.return_value = mock_new_issue
         MockJira.return_value = mock_jira
@@ -99,7 +110,7 @@ def test_update_existing_jira_story(client):
     # Configurar variables de entorno para la prueba
     os.environ['JIRA_PROJECT_KEY'] = 'TESTPROJ'
 
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.update_issue.return_value = None
         MockJira.return_value = mock_jira
@@ -179,7 +190,7 @@ def test_create_jira_story_success(mock_jira_env, client):
         }
     }
 
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.create_issue.return_value = mock_new_issue
         MockJira.return_value = mock_jira
@@ -199,7 +210,7 @@ def test_create_jira_story_success(mock_jira_env, client):
 
 def test_update_existing_jira_story_success(mock_jira_env, client):
     """Probar actualización exitosa de una historia de Jira existente"""
-    with patch('src.api.routes.jira_integration.Jira') as MockJira:
+    with patch('src.integrations.jira_client.Jira') as MockJira:
         mock_jira = MagicMock()
         mock_jira.update_issue_field.return_value = None
         MockJira.return_value = mock_jira
@@ -261,3 +272,31 @@ def test_update_jira_story_invalid_story_id(mock_jira_env, client):
 
     assert response.status_code == 400
     assert "ID de historia inválido" in response.json()['detail']
+
+def test_get_jira_story_is_cached_until_updated(mock_jira_env, client):
+    """Probar que las lecturas repetidas se sirven de la caché y que una escritura la invalida"""
+    mock_issue = {
+        'fields': {
+            'summary': 'Historia en caché',
+            'description': 'Descripción',
+            'updated': '2024-01-01T10:00:00.000+0000'
+        }
+    }
+
+    with patch('src.integrations.jira_client.Jira') as MockJira:
+        mock_jira = MagicMock()
+        mock_jira.issue.return_value = mock_issue
+        MockJira.return_value = mock_jira
+
+        assert client.get("/api/v1/jira/story/TESTPROJ-7").status_code == 200
+        assert client.get("/api/v1/jira/story/TESTPROJ-7").status_code == 200
+        assert mock_jira.issue.call_count == 1
+
+        response = client.post("/api/v1/jira/story", json={
+            "title": "Historia editada",
+            "story_id": "TESTPROJ-7"
+        })
+        assert response.status_code == 200
+
+        assert client.get("/api/v1/jira/story/TESTPROJ-7").status_code == 200
+        assert mock_jira.issue.call_count == 2
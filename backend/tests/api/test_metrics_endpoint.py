@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_llm_service
+from tests.mocks.mock_llm import MockLLMService
+
+def test_metrics_endpoint_exposes_prometheus_metrics():
+    """Test que /metrics devuelve las métricas en formato Prometheus"""
+    override_llm_service(MockLLMService())
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for name in [
+        "llm_step_duration_seconds",
+        "llm_prompt_eval_seconds",
+        "llm_time_to_first_token_seconds",
+        "llm_generation_seconds",
+        "llm_cache_hit_ratio",
+        "llm_active_sessions",
+        "llm_section_extraction_failures",
+        "jira_request_duration_seconds",
+    ]:
+        assert f"# TYPE {name} " in response.text
@@ -0,0 +1,54 @@
+import json
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_llm_service
+from src.llm.service import LLMService
+from tests.mocks.pipeline_llm import PipelineLLM
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_pipeline_stream_endpoint():
+    """Test que el endpoint del flujo completo emite secciones, etapas y el resultado combinado"""
+    override_llm_service(LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=PipelineLLM(tail_delay=0)))
+    client = TestClient(app)
+
+    response = client.post("/api/v1/pipeline/stream", json={"story": "Como usuario quiero iniciar sesión"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0][0] == "session"
+    session_id = events[0][1]["session_id"]
+
+    sections = [(data["step"], data["marker"]) for kind, data in events if kind == "section"]
+    assert ("refinement", "**Historia Refinada:**") in sections
+    assert ("finalization", "**Historia Finalizada:**") in sections
+    assert sorted(data["step"] for kind, data in events if kind == "stage") == [
+        "corner_cases", "finalization", "refinement", "testing_strategy"
+    ]
+
+    kind, result = events[-1]
+    assert kind == "result"
+    assert result["session_id"] == session_id
+    assert result["refined_story"] == "Historia refinada"
+    assert result["corner_cases"] == ["1. Caso A", "2. Caso B"]
+    assert result["testing_strategies"] == ["1. Test A"]
+    assert result["finalized_story"] == "Historia final"
+
+def test_pipeline_stream_with_unknown_session_returns_500():
+    """Test que una sesión inexistente devuelve error antes de abrir el stream"""
+    override_llm_service(LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=PipelineLLM()))
+    client = TestClient(app)
+
+    response = client.post(
+        "/api/v1/pipeline/stream",
+        json={"session_id": "123e4567-e89b-12d3-a456-426614174000", "story": "Historia"}
+    )
+
+    assert response.status_code == 500
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_llm_service
+from src.llm.service import LLMService
+from tests.mocks.mock_llm import MockLLMService
+
+class FakeLLM:
+    model = "test-model"
+    temperature = 0.7
+
+    async def ainvoke(self, prompt):
+        return "ok"
+
+def test_ready_returns_503_until_warm_up_finishes():
+    """Test que /ready responde 503 mientras el LLM no se ha precalentado"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", WARMUP_ENABLED=True), llm=FakeLLM())
+    override_llm_service(service)
+    client = TestClient(app)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["warmup"]["status"] == "pending"
+
+    asyncio.run(service.warmup.run())
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+def test_ready_without_warm_up():
+    """Test que /ready responde 200 si el precalentamiento está desactivado"""
+    override_llm_service(MockLLMService())
+
+    response = TestClient(app).get("/ready")
+
+    assert response.status_code == 200
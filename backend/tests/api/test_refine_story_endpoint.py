@@ -4,6 +4,8 @@ from src.main import app
 from src.dependencies import override_llm_service
 from tests.mocks.mock_llm import MockLLMService
 from uuid import UUID, uuid4
+from unittest.mock import MagicMock, AsyncMock
+from src.llm.scheduler import LLMQueueFullError
 
 @pytest.fixture
 def mock_llm():
@@ -51,4 +53,18 @@ def test_refine_story_endpoint_with_session(client):
         }
     )
     assert response.status_code == 200
-    assert response.json()["session_id"] == session_id
\ No newline at end of file
+    assert response.json()["session_id"] == session_id
+
+def test_refine_story_queue_full_returns_429():
+    """Test que con la cola del LLM llena se responde 429 con Retry-After"""
+    service = MagicMock()
+    service.create_session = AsyncMock(return_value="123e4567-e89b-12d3-a456-426614174000")
+    service.refine_story = AsyncMock(side_effect=LLMQueueFullError(retry_after=7))
+    override_llm_service(service)
+    try:
+        response = TestClient(app).post("/api/v1/refine_story", json={"story": "Historia"})
+    finally:
+        override_llm_service(None)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
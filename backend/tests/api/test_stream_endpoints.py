@@ -0,0 +1,84 @@
+import json
+import pytest
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_llm_service
+from src.llm.service import LLMService
+from src.llm.cache import InMemoryResponseCache
+
+CORNER_CASES_RESPONSE = """**Casos Esquina Actualizados:**
+1. Contraseña incorrecta
+2. Cuenta bloqueada
+**Análisis de Cambios:**
+Se añadieron casos de seguridad"""
+
+class FakeStreamingLLM:
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, response):
+        self.response = response
+
+    async def astream(self, prompt):
+        for i in range(0, len(self.response), 7):
+            yield self.response[i:i + 7]
+
+    async def ainvoke(self, prompt):
+        return self.response
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.fixture
+def client():
+    service = LLMService(
+        config=SimpleNamespace(),
+        llm=FakeStreamingLLM(CORNER_CASES_RESPONSE),
+        cache=InMemoryResponseCache()
+    )
+    override_llm_service(service)
+    return TestClient(app)
+
+def test_identify_corner_cases_stream(client):
+    """Test que el endpoint de streaming devuelve eventos SSE"""
+    response = client.post(
+        "/api/v1/identify_corner_cases/stream",
+        json={"story": "Como usuario quiero iniciar sesión"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    assert events[0][0] == "session"
+    session_id = events[0][1]["session_id"]
+
+    assert [data["marker"] for kind, data in events if kind == "section"] == [
+        "**Casos Esquina Actualizados:**",
+        "**Análisis de Cambios:**"
+    ]
+    kind, result = events[-1]
+    assert kind == "result"
+    assert result.pop("token_usage")["prompt_tokens"] > 0
+    assert result == {
+        "session_id": session_id,
+        "corner_cases": ["1. Contraseña incorrecta", "2. Cuenta bloqueada"],
+        "corner_cases_feedback": "Se añadieron casos de seguridad"
+    }
+
+def test_stream_with_unknown_session_returns_500(client):
+    """Test que una sesión inexistente devuelve error antes de abrir el stream"""
+    response = client.post(
+        "/api/v1/refine_story/stream",
+        json={
+            "session_id": "123e4567-e89b-12d3-a456-426614174000",
+            "story": "Como usuario quiero iniciar sesión"
+        }
+    )
+    assert response.status_code == 500
+    assert "Sesión no encontrada" in response.json()["detail"]
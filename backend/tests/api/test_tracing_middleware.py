@@ -0,0 +1,26 @@
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.dependencies import override_llm_service
+from src.observability import tracing
+from src.observability.tracing import InMemorySpanExporter, SimpleSpanProcessor
+from tests.mocks.mock_llm import MockLLMService
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.set_span_processor(SimpleSpanProcessor(exporter))
+    yield exporter
+    tracing.set_span_processor(None)
+
+def test_request_span_records_route_and_status(exporter):
+    """Test que cada petición HTTP genera un span con la ruta y el código de estado"""
+    override_llm_service(MockLLMService())
+
+    response = TestClient(app).post("/api/v1/refine_story", json={"story": "Historia de prueba"})
+
+    assert response.status_code == 200
+    span = exporter.spans[-1]
+    assert span.name == "POST /api/v1/refine_story"
+    assert span.attributes['http.status_code'] == 200
+    assert span.parent_id is None
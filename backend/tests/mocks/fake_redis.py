@@ -0,0 +1,93 @@
+import fnmatch
+import socketserver
+import threading
+import time
+
+class FakeRedisServer:
+    """Servidor local que implementa un subconjunto del protocolo de Redis para pruebas"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    args = server._read_command(self.rfile)
+                    if args is None:
+                        return
+                    self.wfile.write(server._dispatch(args))
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.url = f"redis://127.0.0.1:{self.port}/0"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _read_command(rfile):
+        line = rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(rfile.readline()[1:-2])
+            args.append(rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _alive(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _dispatch(self, args):
+        command = args[0].decode().upper()
+        with self._lock:
+            self.commands.append(command)
+            if command in ("PING", "AUTH", "SELECT"):
+                return b"+OK\r\n"
+            if command == "SET":
+                key, value = args[1], args[2]
+                self.data[key] = value
+                self.expires.pop(key, None)
+                if len(args) > 4 and args[3].upper() == b"EX":
+                    self.expires[key] = time.time() + int(args[4])
+                return b"+OK\r\n"
+            if command == "GET":
+                return self._bulk(self.data[args[1]] if self._alive(args[1]) else None)
+            if command == "EXISTS":
+                return b":%d\r\n" % int(self._alive(args[1]))
+            if command == "DEL":
+                existed = self._alive(args[1])
+                self.data.pop(args[1], None)
+                return b":%d\r\n" % int(existed)
+            if command == "EXPIRE":
+                if not self._alive(args[1]):
+                    return b":0\r\n"
+                self.expires[args[1]] = time.time() + int(args[2])
+                return b":1\r\n"
+            if command == "SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+                keys = [k for k in list(self.data) if self._alive(k) and fnmatch.fnmatchcase(k.decode(), pattern)]
+                return b"*2\r\n" + self._bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(self._bulk(k) for k in keys)
+            return b"-ERR unknown command\r\n"
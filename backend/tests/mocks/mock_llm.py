@@ -2,8 +2,9 @@ from langchain.callbacks.manager import CallbackManagerForLLMRun
 from langchain.llms.base import LLM
 from langchain.schema import LLMResult, Generation
 from typing import Any, List, Optional, Dict, Union
+from types import SimpleNamespace
 from src.llm.service import LLMService
-from uuid import UUID, uuid4
+from uuid import UUID
 
 class MockOllamaLLM(LLM):
     """Mock para OllamaLLM que retorna respuestas predefinidas"""
@@ -120,21 +121,16 @@ class MockLLMService(LLMService):
     """Mock del servicio LLM para pruebas"""
 
     def __init__(self):
-        """Inicializar el servicio mock"""
+        """Inicializar el servicio mock con la configuración por defecto y el LLM mock"""
         self._mock_llm = MockOllamaLLM()
-        self._sessions = {}
-
-    def create_session(self) -> UUID:
-        """Crear una nueva sesión"""
-        session_id = uuid4()
-        self._sessions[session_id] = {"history": []}
-        return session_id
+        super().__init__(config=SimpleNamespace(CACHE_BACKEND="none"), llm=self._mock_llm)
 
     async def refine_story(
         self,
         session_id: UUID,
         user_story: str,
-        feedback: Optional[str] = None
+        feedback: Optional[str] = None,
+        bypass_cache: bool = False
     ) -> Dict[str, str]:
         """Mock para refinar una historia de usuario"""
         prompt = f"Refina la historia de usuario: {user_story}"
@@ -152,7 +148,9 @@ class MockLLMService(LLMService):
         session_id: UUID,
         refined_story: str,
         feedback: Optional[str] = None,
-        existing_corner_cases: Optional[List[str]] = None
+        existing_corner_cases: Optional[List[str]] = None,
+        bypass_cache: bool = False,
+        fan_out: Optional[bool] = None
     ) -> Dict[str, Union[List[str], str]]:
         """Mock para identificar casos esquina"""
         prompt = f"Analiza los casos esquina para la historia: {refined_story}"
@@ -182,7 +180,9 @@ class MockLLMService(LLMService):
         refined_story: str,
         corner_cases: List[str],
         feedback: Optional[str] = None,
-        existing_testing_strategies: Optional[List[str]] = None
+        existing_testing_strategies: Optional[List[str]] = None,
+        bypass_cache: bool = False,
+        fan_out: Optional[bool] = None
     ) -> Dict[str, Union[List[str], str]]:
         """Mock para proponer estrategias de testing"""
         prompt = f"Propón estrategias de testing para la historia: {refined_story}"
@@ -216,7 +216,8 @@ class MockLLMService(LLMService):
         corner_cases: Optional[List[str]] = None,
         testing_strategy: Optional[List[str]] = None,
         feedback: Optional[str] = None,
-        format_preferences: Optional[Dict[str, str]] = None
+        format_preferences: Optional[Dict[str, str]] = None,
+        bypass_cache: bool = False
     ) -> Dict[str, Union[str, List[str]]]:
         """Mock para finalizar una historia de usuario"""
         # Si tenemos corner_cases y testing_strategy, es una solicitud con componentes individuales
@@ -0,0 +1,46 @@
+import asyncio
+
+RESPONSES = {
+    "refinement": "**Historia Refinada:**\nHistoria refinada\n**Cambios Realizados:**\nCambios del refinamiento",
+    "corner_cases": "**Casos Esquina Actualizados:**\n1. Caso A\n2. Caso B\n**Análisis de Cambios:**\nAnálisis de casos",
+    "testing_strategy": "**Estrategias de Testing Actualizadas:**\n1. Test A\n**Análisis de Cambios:**\nAnálisis de tests",
+    "finalization": "**Historia Finalizada:**\nHistoria final\n#### Tests Funcionales\n#### Test 1 - Caso A",
+}
+
+def step_of(prompt):
+    for step, marker in [
+        ("testing_strategy", "Estrategias de Testing Actualizadas:"),
+        ("corner_cases", "Casos Esquina Actualizados:"),
+        ("finalization", "Historia Finalizada:"),
+        ("refinement", "Historia Refinada:"),
+    ]:
+        if marker in prompt:
+            return step
+
+class PipelineLLM:
+    """LLM falso que responde a cada paso y registra cuándo empieza y termina cada generación"""
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, tail_delay=0.05, fail_step=None):
+        self.tail_delay = tail_delay
+        self.fail_step = fail_step
+        self.log = []
+        self.prompts = {}
+
+    async def astream(self, prompt):
+        step = step_of(prompt)
+        self.prompts[step] = prompt
+        self.log.append(("start", step))
+        try:
+            if step == self.fail_step:
+                raise RuntimeError(f"fallo en {step}")
+            for line in RESPONSES[step].splitlines(keepends=True):
+                yield line
+            # Cola lenta tras la última sección, como un resumen de cambios largo
+            await asyncio.sleep(self.tail_delay)
+        finally:
+            self.log.append(("end", step))
+
+    async def ainvoke(self, prompt):
+        return "".join([chunk async for chunk in self.astream(prompt)])
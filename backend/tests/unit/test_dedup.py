@@ -0,0 +1,108 @@
+import pytest
+from types import SimpleNamespace
+from src.llm.dedup import LSHIndex, MinHasher, NearDuplicateFilter, create_deduplicator, normalize, shingles
+from src.llm.service import LLMService
+
+CORNER_CASES_RESPONSE = """**Casos Esquina Actualizados:**
+1. **Intentos de Inicio de Sesión Fallidos:** El usuario ingresa una contraseña incorrecta repetidamente.
+2. Acceso desde ubicaciones no reconocidas.
+3. Intentos de inicio de sesion fallidos: el usuario introduce una contraseña incorrecta repetidamente
+4. Bloqueo por inactividad.
+**Análisis de Cambios:**
+Análisis"""
+
+class RecordingLLM:
+    """LLM falso que guarda el último prompt recibido"""
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, response=CORNER_CASES_RESPONSE):
+        self.response = response
+        self.prompt = None
+
+    async def ainvoke(self, prompt):
+        self.prompt = prompt
+        return self.response
+
+def test_normalize_ignores_numbering_format_and_accents():
+    """Test que la normalización ignora numeración, negritas, tildes y puntuación"""
+    assert normalize("3. **Sesión caducada:** el usuario, inactivo.") == "sesion caducada el usuario inactivo"
+
+def test_near_duplicates_are_collapsed_and_renumbered():
+    """Test que los casos parafraseados se eliminan conservando el primero"""
+    items = [
+        "1. El usuario pierde la conexión durante el pago.",
+        "2. Pago con tarjeta caducada.",
+        "3. el usuario pierde la conexion durante el pago",
+        "4. Pago con tarjeta caducada",
+    ]
+    deduplicator = NearDuplicateFilter(threshold=0.6)
+
+    assert deduplicator.dedupe(items) == [
+        "1. El usuario pierde la conexión durante el pago.",
+        "2. Pago con tarjeta caducada.",
+    ]
+    assert deduplicator.removed == 2
+
+def test_distinct_items_are_kept():
+    """Test que los casos distintos, o que solo difieren en sus números, se conservan"""
+    items = [
+        "1. Carrito con 0 artículos",
+        "2. Carrito con 1000 artículos",
+        "3. Acceso desde ubicaciones no reconocidas",
+        "4. Bloqueo por inactividad",
+    ]
+
+    assert NearDuplicateFilter().dedupe(items) == items
+
+def test_lsh_finds_similar_signatures():
+    """Test que el índice LSH devuelve como candidatos los conjuntos parecidos"""
+    hasher = MinHasher(num_perm=64)
+    index = LSHIndex(num_perm=64, bands=16)
+    index.add(0, hasher.signature(shingles("El usuario pierde la conexión durante el pago")))
+    index.add(1, hasher.signature(shingles("Bloqueo por inactividad")))
+
+    assert index.candidates(hasher.signature(shingles("el usuario pierde la conexion durante el pago."))) == [0]
+    with pytest.raises(ValueError):
+        LSHIndex(num_perm=64, bands=10)
+
+def test_existing_items_are_never_removed():
+    """Test que solo se descartan los elementos nuevos y los del usuario se conservan tal cual"""
+    existing = ["1. Bloqueo por inactividad", "2. bloqueo por inactividad."]
+    items = existing + ["3. Bloqueo por inactividad del usuario", "4. Pago con tarjeta caducada"]
+
+    assert NearDuplicateFilter(threshold=0.6).dedupe(items, existing) == [
+        "1. Bloqueo por inactividad",
+        "2. bloqueo por inactividad.",
+        "3. Pago con tarjeta caducada",
+    ]
+    assert NearDuplicateFilter(threshold=0.6).dedupe(existing, existing) == existing
+
+def test_deduplicator_is_disabled_by_default():
+    """Test que la eliminación de casi duplicados está desactivada salvo con DEDUP_THRESHOLD"""
+    assert create_deduplicator(SimpleNamespace()) is None
+    assert create_deduplicator(SimpleNamespace(DEDUP_THRESHOLD=0)) is None
+    assert create_deduplicator(SimpleNamespace(DEDUP_THRESHOLD=0.6)).threshold == 0.6
+
+@pytest.mark.asyncio
+async def test_service_dedupes_generated_items_only():
+    """Test que el servicio elimina los casi duplicados generados sin tocar las entradas del usuario"""
+    llm = RecordingLLM()
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", DEDUP_THRESHOLD=0.6), llm=llm)
+    session_id = await service.create_session()
+    existing = ["1. Bloqueo por inactividad", "2. bloqueo por inactividad."]
+
+    result = await service.identify_corner_cases(session_id, "Historia refinada", existing_corner_cases=existing)
+
+    assert result["corner_cases"] == [
+        "1. **Intentos de Inicio de Sesión Fallidos:** El usuario ingresa una contraseña incorrecta repetidamente.",
+        "2. Acceso desde ubicaciones no reconocidas.",
+        "3. Bloqueo por inactividad.",
+    ]
+    assert (await service._get_session(session_id)).corner_cases == result["corner_cases"]
+    # Las entradas del usuario se envían al LLM sin cambios
+    assert "1. Bloqueo por inactividad\n2. bloqueo por inactividad." in llm.prompt
+
+    corner_cases = result["corner_cases"] + ["3. Intentos de inicio de sesión fallidos"]
+    await service.propose_testing_strategy(session_id, "Historia refinada", corner_cases)
+    assert "3. Intentos de inicio de sesión fallidos" in llm.prompt
@@ -0,0 +1,150 @@
+import asyncio
+import re
+import time
+import pytest
+from types import SimpleNamespace
+from src.llm.fanout import combine_token_usage, merge_items, split_story
+from src.llm.service import LLMService
+
+EPIC = """Como cliente quiero gestionar mi cuenta para mantener mis datos al día.
+
+## Área 1: Inicio de sesión
+- Acceso con correo y contraseña
+
+## Área 2: Recuperación de contraseña
+- Envío de un enlace por correo
+
+## Área 3: Perfil
+- Edición del nombre y la foto"""
+
+class AreaLLM:
+    """LLM falso que devuelve casos esquina por área y mide la concurrencia"""
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        areas = re.findall(r"## Área (\d+)", prompt)
+        cases = "\n".join(f"{i}. Caso del área {area}" for i, area in enumerate(areas, 1))
+        return (
+            "**Casos Esquina Actualizados:**\n"
+            f"{cases}\n{len(areas) + 1}. Sesión caducada durante la operación\n"
+            "**Análisis de Cambios:**\n"
+            f"Análisis de las áreas {', '.join(areas)}"
+        )
+
+def make_service(llm, **config):
+    config.setdefault("FANOUT_MAX_SECTIONS", 4)
+    return LLMService(config=SimpleNamespace(CACHE_BACKEND="none", **config), llm=llm)
+
+def test_split_story_by_headings_keeps_preamble():
+    """Test que la historia se divide por encabezados y cada sección conserva el enunciado"""
+    sections = split_story(EPIC, 4)
+
+    assert len(sections) == 3
+    assert all(section.startswith("Como cliente quiero gestionar mi cuenta") for section in sections)
+    assert "## Área 2" in sections[1] and "## Área 1" not in sections[1]
+
+def test_split_story_groups_areas_and_falls_back_to_list_items():
+    """Test que las áreas se agrupan hasta el máximo y, sin encabezados, se usan los criterios"""
+    assert len(split_story(EPIC, 2)) == 2
+    assert split_story(EPIC, 1) == [EPIC]
+
+    story = "Como usuario quiero pagar.\nCriterios de aceptación:\n1. Con tarjeta\n2. Con PayPal"
+    sections = split_story(story, 4)
+    assert len(sections) == 2
+    assert "2. Con PayPal" in sections[1] and "1. Con tarjeta" not in sections[1]
+    assert split_story("Historia sin áreas", 4) == ["Historia sin áreas"]
+
+def test_merge_items_deduplicates_and_renumbers():
+    """Test que la combinación elimina repetidos y renumera los elementos"""
+    merged = merge_items([["1. Caso A", "2. Caso B", ""], ["1. caso a.", "2. Caso C"]])
+
+    assert merged == ["1. Caso A", "2. Caso B", "3. Caso C"]
+
+def test_combine_token_usage():
+    """Test que se suman los tokens de los prompts de las secciones"""
+    usage = {"prompt_tokens": 10, "prompt_budget": 100, "trimmed_inputs": []}
+
+    combined = combine_token_usage([usage, {**usage, "prompt_tokens": 5, "trimmed_inputs": ["feedback"]}])
+
+    assert combined["prompt_tokens"] == 15
+    assert combined["prompt_budget"] == 100
+    assert combined["trimmed_inputs"] == ["feedback"]
+
+@pytest.mark.asyncio
+async def test_corner_cases_fan_out_runs_sections_in_parallel():
+    """Test que los casos esquina de cada área se generan en paralelo y se combinan"""
+    llm = AreaLLM(delay=0.1)
+    service = make_service(llm, LLM_MAX_IN_FLIGHT=3, LLM_MAX_QUEUE=8)
+    session_id = await service.create_session()
+
+    started = time.perf_counter()
+    result = await service.identify_corner_cases(session_id, EPIC, fan_out=True)
+    elapsed = time.perf_counter() - started
+
+    assert len(llm.prompts) == 3
+    assert llm.max_running == 3
+    assert elapsed < 0.25
+    assert result["corner_cases"] == [
+        "1. Caso del área 1",
+        "2. Sesión caducada durante la operación",
+        "3. Caso del área 2",
+        "4. Caso del área 3",
+    ]
+    assert "Análisis de las áreas 1" in result["corner_cases_feedback"]
+    assert "Análisis de las áreas 3" in result["corner_cases_feedback"]
+    assert result["token_usage"]["prompt_tokens"] > 0
+
+    session = await service._get_session(session_id)
+    assert session.corner_cases == result["corner_cases"]
+    assert len(session.interactions) == 1
+    assert "## Área 3" in session.interactions[0].human_message
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_scheduler_limit():
+    """Test que la generación por secciones no supera el límite del planificador"""
+    llm = AreaLLM(delay=0.01)
+    service = make_service(llm, LLM_MAX_IN_FLIGHT=2, LLM_MAX_QUEUE=8)
+
+    await service.propose_testing_strategy(await service.create_session(), EPIC, ["1. Caso"], fan_out=True)
+
+    assert len(llm.prompts) == 3
+    assert llm.max_running == 2
+
+@pytest.mark.asyncio
+async def test_small_story_is_not_split_by_default():
+    """Test que por defecto solo se dividen las historias que alcanzan FANOUT_MIN_TOKENS"""
+    llm = AreaLLM(delay=0)
+    service = make_service(llm)
+
+    await service.identify_corner_cases(await service.create_session(), EPIC)
+    assert len(llm.prompts) == 1
+
+    service = make_service(llm, FANOUT_MIN_TOKENS=10)
+    await service.identify_corner_cases(await service.create_session(), EPIC)
+    assert len(llm.prompts) == 4
+
+    await service.identify_corner_cases(await service.create_session(), EPIC, fan_out=False)
+    assert len(llm.prompts) == 5
+
+@pytest.mark.asyncio
+async def test_fan_out_is_off_by_default():
+    """Test que sin FANOUT_MAX_SECTIONS la historia nunca se divide"""
+    llm = AreaLLM(delay=0)
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", FANOUT_MIN_TOKENS=10), llm=llm)
+
+    await service.identify_corner_cases(await service.create_session(), EPIC, fan_out=True)
+    assert len(llm.prompts) == 1
@@ -4,7 +4,7 @@ from uuid import UUID
 @pytest.mark.asyncio
 async def test_identify_corner_cases_without_feedback(mock_llm_service):
     """Test para identificar casos esquina sin feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     refined_story = "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal"
 
     result = await mock_llm_service.identify_corner_cases(
@@ -27,7 +27,7 @@ async def test_identify_corner_cases_without_feedback(mock_llm_service):
 @pytest.mark.asyncio
 async def test_identify_corner_cases_with_feedback(mock_llm_service):
     """Test para identificar casos esquina con feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     refined_story = "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal"
     feedback = "Considerar casos de seguridad y validación"
 
@@ -53,7 +53,7 @@ async def test_identify_corner_cases_with_feedback(mock_llm_service):
 @pytest.mark.asyncio
 async def test_identify_corner_cases_with_existing_cases(mock_llm_service):       
     """Test para identificar casos esquina utilizando casos previos y feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     refined_story = "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal"
     existing_corner_cases = [
         "1. **Intentos de Inicio de Sesión Fallidos:** El usuario ingresa una contraseña incorrecta repetidamente.",
@@ -0,0 +1,7 @@
+from benchmarks.bench_import_time import measure_import
+
+def test_importing_the_app_defers_heavy_modules():
+    """Test que importar la aplicación no carga langchain, Ollama, atlassian ni transformers"""
+    _, _, loaded = measure_import("src.main")
+
+    assert loaded == []
@@ -0,0 +1,186 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.integrations.jira_cache import JiraStoryCache
+
+def make_issue(summary, updated, description="Descripción"):
+    return {'key': 'TEST-1', 'fields': {'summary': summary, 'description': description, 'updated': updated}}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def jira():
+    jira = MagicMock()
+    jira.issue = AsyncMock(return_value=make_issue("Historia", "2024-01-01T10:00:00.000+0000"))
+    return jira
+
+@pytest.mark.asyncio
+async def test_fresh_entry_is_served_without_calling_jira(jira, clock):
+    """Test que dentro del TTL no se consulta Jira"""
+    cache = JiraStoryCache(ttl_seconds=30, clock=clock)
+
+    first = await cache.get('TEST-1', jira)
+    clock.now += 10
+    second = await cache.get('TEST-1', jira)
+
+    assert first['fields']['summary'] == second['fields']['summary'] == "Historia"
+    assert jira.issue.await_count == 1
+    assert cache.stats()['hits'] == 1
+
+@pytest.mark.asyncio
+async def test_unchanged_issue_is_revalidated_with_updated_field(jira, clock):
+    """Test que la revalidación solo pide el campo updated si la historia no ha cambiado"""
+    cache = JiraStoryCache(ttl_seconds=30, clock=clock)
+    await cache.get('TEST-1', jira)
+    jira.issue.return_value = {'fields': {'updated': "2024-01-01T10:00:00.000+0000"}}
+    clock.now += 31
+
+    issue = await cache.get('TEST-1', jira)
+
+    assert issue['fields']['summary'] == "Historia"
+    jira.issue.assert_awaited_with('TEST-1', fields='updated')
+    assert jira.issue.await_count == 2
+
+@pytest.mark.asyncio
+async def test_changed_issue_is_downloaded_again(jira, clock):
+    """Test que si updated cambia se descarga la historia completa"""
+    cache = JiraStoryCache(ttl_seconds=30, clock=clock)
+    await cache.get('TEST-1', jira)
+    jira.issue.side_effect = [
+        {'fields': {'updated': "2024-02-01T10:00:00.000+0000"}},
+        make_issue("Historia editada", "2024-02-01T10:00:00.000+0000"),
+    ]
+    clock.now += 31
+
+    issue = await cache.get('TEST-1', jira)
+
+    assert issue['fields']['summary'] == "Historia editada"
+    assert jira.issue.await_count == 3
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_jira_is_slow(jira, clock):
+    """Test que se sirve la copia si Jira tarda y la revalidación termina en segundo plano"""
+    cache = JiraStoryCache(ttl_seconds=30, stale_seconds=600, revalidate_timeout=0.05, clock=clock)
+    await cache.get('TEST-1', jira)
+
+    released = asyncio.Event()
+
+    async def slow_issue(key, **kwargs):
+        await released.wait()
+        return make_issue("Historia editada", "2024-02-01T10:00:00.000+0000")
+
+    jira.issue.side_effect = slow_issue
+    clock.now += 31
+
+    issue = await cache.get('TEST-1', jira)
+    assert issue['fields']['summary'] == "Historia"
+    assert cache.stats()['stale_served'] == 1
+
+    released.set()
+    await asyncio.sleep(0.01)
+    clock.now += 1
+    issue = await cache.get('TEST-1', jira)
+    assert issue['fields']['summary'] == "Historia editada"
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_when_jira_fails(jira, clock):
+    """Test que un error de Jira al revalidar no impide servir la copia"""
+    cache = JiraStoryCache(ttl_seconds=30, clock=clock)
+    await cache.get('TEST-1', jira)
+    jira.issue.side_effect = Exception("Error de conexión")
+    clock.now += 31
+
+    issue = await cache.get('TEST-1', jira)
+
+    assert issue['fields']['summary'] == "Historia"
+
+@pytest.mark.asyncio
+async def test_too_stale_entry_waits_for_jira(jira, clock):
+    """Test que pasada la ventana de copia antigua se propagan los errores de Jira"""
+    cache = JiraStoryCache(ttl_seconds=30, stale_seconds=60, clock=clock)
+    await cache.get('TEST-1', jira)
+    jira.issue.side_effect = Exception("Error de conexión")
+    clock.now += 100
+
+    with pytest.raises(Exception, match="Error de conexión"):
+        await cache.get('TEST-1', jira)
+
+@pytest.mark.asyncio
+async def test_deleted_issue_is_evicted(jira, clock):
+    """Test que una historia borrada en Jira deja de servirse"""
+    cache = JiraStoryCache(ttl_seconds=30, clock=clock)
+    await cache.get('TEST-1', jira)
+    jira.issue.side_effect = Exception("Issue Does Not Exist")
+    clock.now += 31
+
+    with pytest.raises(Exception, match="Issue Does Not Exist"):
+        await cache.get('TEST-1', jira)
+    assert len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_request(jira, clock):
+    """Test que las lecturas simultáneas de la misma clave comparten la consulta"""
+    cache = JiraStoryCache(clock=clock)
+
+    results = await asyncio.gather(*(cache.get('TEST-1', jira) for _ in range(5)))
+
+    assert all(r['fields']['summary'] == "Historia" for r in results)
+    assert jira.issue.await_count == 1
+
+@pytest.mark.asyncio
+async def test_miss_fetches_only_cached_fields(jira, clock):
+    """Test que en un fallo de caché solo se piden los campos que se guardan"""
+    cache = JiraStoryCache(clock=clock)
+
+    await cache.get('TEST-1', jira)
+
+    jira.issue.assert_awaited_once_with('TEST-1', fields='summary,description,updated')
+
+@pytest.mark.asyncio
+async def test_invalidate_cancels_inflight_download(jira, clock):
+    """Test que invalidar cancela la descarga en curso y quien la esperaba obtiene la historia nueva"""
+    cache = JiraStoryCache(clock=clock)
+    started = asyncio.Event()
+    cancelled = []
+
+    async def issue(key, **kwargs):
+        if started.is_set():
+            return make_issue("Historia nueva", "2024-02-01T10:00:00.000+0000")
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(key)
+            raise
+
+    jira.issue.side_effect = issue
+    pending = asyncio.create_task(cache.get('TEST-1', jira))
+    await started.wait()
+    cache.invalidate('TEST-1')
+    issue = await pending
+
+    assert cancelled == ['TEST-1']
+    assert issue['fields']['summary'] == "Historia nueva"
+    assert len(cache) == 1
+
+@pytest.mark.asyncio
+async def test_versions_are_pruned_with_entries(jira, clock):
+    """Test que no se retienen versiones de claves que ya no están en caché"""
+    cache = JiraStoryCache(max_entries=2, clock=clock)
+    for i in range(5):
+        await cache.get(f'TEST-{i}', jira)
+        cache.invalidate(f'TEST-{i}')
+    for i in range(5, 10):
+        await cache.get(f'TEST-{i}', jira)
+
+    assert len(cache) == 2
+    assert set(cache._versions) <= {'TEST-8', 'TEST-9'}
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from src.dependencies import close_jira_client, get_jira_client, override_jira_client
+from src.integrations.jira_client import AsyncJira, create_jira_client
+
+class SlowJira:
+    """Cliente de Jira falso con llamadas bloqueantes"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def issue(self, key, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return {"key": key, "fields": {"summary": f"Historia {key}"}}
+
+@pytest.mark.asyncio
+async def test_calls_are_forwarded_to_client():
+    """Test que el adaptador delega en el cliente síncrono"""
+    client = MagicMock()
+    client.issue.return_value = {"key": "TEST-1"}
+    client.create_issue.return_value = {"key": "TEST-2"}
+    jira = AsyncJira(client)
+
+    assert await jira.issue("TEST-1") == {"key": "TEST-1"}
+    assert await jira.create_issue({"summary": "Nueva"}) == {"key": "TEST-2"}
+    await jira.update_issue_field("TEST-1", {"summary": "Cambio"})
+
+    client.issue.assert_called_once_with("TEST-1")
+    client.create_issue.assert_called_once_with(fields={"summary": "Nueva"})
+    client.update_issue_field.assert_called_once_with("TEST-1", fields={"summary": "Cambio"})
+
+@pytest.mark.asyncio
+async def test_slow_jira_does_not_block_event_loop():
+    """Test que el bucle de eventos sigue atendiendo mientras Jira responde"""
+    jira = AsyncJira(SlowJira(delay=0.3))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    await jira.issue("TEST-1")
+    ticker_task.cancel()
+
+    assert ticks >= 10
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_by_executor():
+    """Test que el pool limita las llamadas simultáneas a Jira"""
+    client = SlowJira(delay=0.05)
+    executor = ThreadPoolExecutor(max_workers=2)
+    jira = AsyncJira(client, executor=executor)
+
+    results = await asyncio.gather(*(jira.issue(f"TEST-{i}") for i in range(6)))
+
+    assert [r["key"] for r in results] == [f"TEST-{i}" for i in range(6)]
+    assert client.max_active == 2
+    executor.shutdown()
+
+def test_create_jira_client_configures_pool_and_timeouts(monkeypatch):
+    """Test que el cliente comparte un pool keep-alive con el tamaño y timeouts configurados"""
+    monkeypatch.setenv("JIRA_POOL_SIZE", "4")
+    monkeypatch.setenv("JIRA_CONNECT_TIMEOUT", "2")
+    monkeypatch.setenv("JIRA_READ_TIMEOUT", "15")
+
+    jira = create_jira_client(url="http://test-jira.com", token="test-token")
+
+    adapter = jira.client.session.get_adapter("https://test-jira.com")
+    assert adapter._pool_maxsize == 4
+    assert jira.client.timeout == (2.0, 15.0)
+    assert jira.client.session.headers["Authorization"] == "Bearer test-token"
+    jira.close()
+
+def test_jira_client_dependency_is_reused(monkeypatch):
+    """Test que el proveedor reutiliza el mismo cliente y lo cierra al apagar"""
+    monkeypatch.setenv("JIRA_URL", "http://test-jira.com")
+    monkeypatch.setenv("JIRA_TOKEN", "test-token")
+    override_jira_client(None)
+
+    with patch("src.integrations.jira_client.Jira") as MockJira:
+        first = get_jira_client()
+        second = get_jira_client()
+        assert first is second
+        MockJira.assert_called_once()
+
+        close_jira_client()
+        MockJira.return_value.close.assert_called_once()
+
+    override_jira_client(None)
+
+def test_jira_client_dependency_without_configuration(monkeypatch):
+    """Test que el proveedor no crea cliente si falta la configuración"""
+    monkeypatch.delenv("JIRA_URL", raising=False)
+    override_jira_client(None)
+
+    assert get_jira_client() is None
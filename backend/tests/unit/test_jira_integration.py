@@ -1,7 +1,10 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 import os
 from src.api.routes.jira_integration import update_or_create_jira_story, get_jira_story, JiraStoryUpdateRequest, JiraStoryResponse
+from src.dependencies import get_jira_client, override_jira_client
+from src.integrations.jira_client import AsyncJira
+from src.integrations.jira_cache import JiraStoryCache
 from fastapi import HTTPException
 
 @pytest.fixture
@@ -34,6 +37,13 @@ def disable_llm_service():
     override_llm_service(None)
     yield
 
+@pytest.fixture(autouse=True)
+def reset_jira_client():
+    """Descarta el cliente de Jira compartido entre tests"""
+    override_jira_client(None)
+    yield
+    override_jira_client(None)
+
 class TestJiraIntegration:
     """Tests unitarios para la integración con Jira"""
 
@@ -75,9 +85,10 @@ class TestJiraIntegration:
             if key in os.environ:
                 del os.environ[key]
             
+            override_jira_client(None)
             with pytest.raises(HTTPException) as exc:
                 request = JiraStoryUpdateRequest(title="Test Story")
-                await update_or_create_jira_story(request)
+                await update_or_create_jira_story(request, get_jira_client(), JiraStoryCache())
             assert exc.value.status_code == 500
             assert "Configuración incompleta" in str(exc.value.detail)
 
@@ -87,31 +98,27 @@ class TestJiraIntegration:
                 os.environ[key] = value
 
     @pytest.mark.asyncio
-    @patch('src.api.routes.jira_integration.Jira')
-    async def test_create_story_success(self, mock_jira_class, mock_env_vars):
+    async def test_create_story_success(self, mock_env_vars):
         """Probar creación exitosa de historia"""
         mock_jira = MagicMock()
         mock_jira.create_issue.return_value = {'key': 'TEST-123'}
-        mock_jira_class.return_value = mock_jira
 
         request = JiraStoryUpdateRequest(
             title="Nueva Historia",
             description="Descripción de prueba"
         )
         
-        response = await update_or_create_jira_story(request)
+        response = await update_or_create_jira_story(request, AsyncJira(mock_jira), JiraStoryCache())
         
         assert response.story_id == 'TEST-123'
         assert response.action == 'created'
         mock_jira.create_issue.assert_called_once()
 
     @pytest.mark.asyncio
-    @patch('src.api.routes.jira_integration.Jira')
-    async def test_update_story_success(self, mock_jira_class, mock_env_vars):
+    async def test_update_story_success(self, mock_env_vars):
         """Probar actualización exitosa de historia"""
         mock_jira = MagicMock()
         mock_jira.update_issue_field.return_value = None
-        mock_jira_class.return_value = mock_jira
 
         request = JiraStoryUpdateRequest(
             title="Historia Actualizada",
@@ -119,15 +126,14 @@ class TestJiraIntegration:
             story_id="TEST-456"
         )
         
-        response = await update_or_create_jira_story(request)
+        response = await update_or_create_jira_story(request, AsyncJira(mock_jira), JiraStoryCache())
         
         assert response.story_id == 'TEST-456'
         assert response.action == 'updated'
         mock_jira.update_issue_field.assert_called_once()
 
     @pytest.mark.asyncio
-    @patch('src.api.routes.jira_integration.Jira')
-    async def test_get_story_success(self, mock_jira_class, mock_env_vars):
+    async def test_get_story_success(self, mock_env_vars):
         """Probar obtención exitosa de historia"""
         mock_issue = {
             'fields': {
@@ -138,40 +144,35 @@ class TestJiraIntegration:
         
         mock_jira = MagicMock()
         mock_jira.issue.return_value = mock_issue
-        mock_jira_class.return_value = mock_jira
 
-        response = await get_jira_story('TEST-789')
+        response = await get_jira_story('TEST-789', AsyncJira(mock_jira), JiraStoryCache())
         
         assert isinstance(response, JiraStoryResponse)
         assert response.title == 'Test Story'
         assert response.description == 'Test Description'
-        mock_jira.issue.assert_called_once_with('TEST-789')
+        mock_jira.issue.assert_called_once_with('TEST-789', fields='summary,description,updated')
 
     @pytest.mark.asyncio
-    @patch('src.api.routes.jira_integration.Jira')
-    async def test_get_story_not_found(self, mock_jira_class, mock_env_vars):
+    async def test_get_story_not_found(self, mock_env_vars):
         """Probar manejo de historia no encontrada"""
         mock_jira = MagicMock()
         mock_jira.issue.side_effect = Exception("Issue Does Not Exist")
-        mock_jira_class.return_value = mock_jira
 
         with pytest.raises(HTTPException) as exc:
-            await get_jira_story('TEST-999')
+            await get_jira_story('TEST-999', AsyncJira(mock_jira), JiraStoryCache())
         
         assert exc.value.status_code == 404
         assert "Historia no encontrada" in str(exc.value.detail)
 
     @pytest.mark.asyncio
-    @patch('src.api.routes.jira_integration.Jira')
-    async def test_jira_api_errors(self, mock_jira_class, mock_env_vars):
+    async def test_jira_api_errors(self, mock_env_vars):
         """Probar manejo de errores de la API de Jira"""
         mock_jira = MagicMock()
         mock_jira.create_issue.side_effect = Exception("API Error")
-        mock_jira_class.return_value = mock_jira
 
         with pytest.raises(HTTPException) as exc:
             request = JiraStoryUpdateRequest(title="Test Story")
-            await update_or_create_jira_story(request)
+            await update_or_create_jira_story(request, AsyncJira(mock_jira), JiraStoryCache())
         
         assert exc.value.status_code == 500
         assert "Error al crear historia" in str(exc.value.detail)
@@ -67,7 +67,7 @@ def llm_service(llm_config):
 @pytest.mark.asyncio
 async def test_finalize_story_with_components(llm_service):
     """Test finalizar historia con componentes individuales"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
 
     result = await llm_service.finalize_story(
         session_id=session_id,
@@ -82,13 +82,13 @@ async def test_finalize_story_with_components(llm_service):
     assert isinstance(result["feedback"], str)
 
     # Verificar que la sesión se actualizó
-    session = llm_service._get_session(session_id)
+    session = await llm_service._get_session(session_id)
     assert session.finalized_story == result["finalized_story"]
 
 @pytest.mark.asyncio
 async def test_finalize_story_with_existing_story(llm_service):
     """Test finalizar historia con una historia existente y feedback"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
 
     result = await llm_service.finalize_story(
         session_id=session_id,
@@ -108,13 +108,13 @@ Then debe obtener acceso""",
     assert isinstance(result["feedback"], str)
 
     # Verificar que la sesión se actualizó
-    session = llm_service._get_session(session_id)
+    session = await llm_service._get_session(session_id)
     assert session.finalized_story == result["finalized_story"]
 
 @pytest.mark.asyncio
 async def test_finalize_story_with_format_preferences(llm_service):
     """Test finalizar historia con preferencias de formato específicas"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
 
     format_preferences = {
         "acceptance_criteria_format": "gherkin",
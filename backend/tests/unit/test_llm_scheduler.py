@@ -0,0 +1,163 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.llm.models import ProcessState
+from src.llm.scheduler import LLMQueueFullError, LLMScheduler, create_llm_scheduler, priority_for
+from src.llm.service import LLMService
+
+REFINEMENT_RESPONSE = """**Historia Refinada:**
+Historia refinada
+**Cambios Realizados:**
+Cambios"""
+
+async def hold(scheduler, priority, order, name, release):
+    async with scheduler.slot(priority):
+        order.append(name)
+        await release.wait()
+
+@pytest.mark.asyncio
+async def test_max_in_flight_is_respected():
+    """Test que no se superan las llamadas simultáneas configuradas"""
+    scheduler = LLMScheduler(max_in_flight=2, max_queue=10)
+    active = 0
+    peak = 0
+
+    async def call():
+        nonlocal active, peak
+        async with scheduler.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert scheduler.stats()["admitted"] == 6
+    assert scheduler.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_short_steps_are_served_before_finalization():
+    """Test que la cola atiende antes el refinamiento que la finalización"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=10)
+    order = []
+    release = asyncio.Event()
+
+    first = asyncio.create_task(hold(scheduler, priority_for(ProcessState.FINALIZATION), order, "f1", release))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(hold(scheduler, priority_for(ProcessState.FINALIZATION), order, "f2", release)),
+        asyncio.create_task(hold(scheduler, priority_for(ProcessState.CORNER_CASES), order, "c1", release)),
+        asyncio.create_task(hold(scheduler, priority_for(ProcessState.REFINEMENT), order, "r1", release)),
+        asyncio.create_task(hold(scheduler, priority_for(ProcessState.REFINEMENT), order, "r2", release)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 4
+
+    release.set()
+    await asyncio.gather(first, *waiting)
+
+    assert order == ["f1", "r1", "r2", "c1", "f2"]
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after():
+    """Test que con la cola llena se rechaza la petición con un tiempo de reintento"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=1)
+    release = asyncio.Event()
+    order = []
+    running = asyncio.create_task(hold(scheduler, 0, order, "a", release))
+    queued = asyncio.create_task(hold(scheduler, 0, order, "b", release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(LLMQueueFullError) as exc:
+        async with scheduler.slot(0):
+            pass
+    assert exc.value.retry_after >= 1
+    assert scheduler.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    """Test que una petición cancelada mientras espera libera su puesto en la cola"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=5)
+    release = asyncio.Event()
+    order = []
+    running = asyncio.create_task(hold(scheduler, 0, order, "a", release))
+    cancelled = asyncio.create_task(hold(scheduler, 0, order, "b", release))
+    waiting = asyncio.create_task(hold(scheduler, 0, order, "c", release))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 1
+
+    release.set()
+    await asyncio.gather(running, waiting)
+    assert order == ["a", "c"]
+    assert scheduler.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_wait_time_metrics():
+    """Test que se registran los tiempos de espera por prioridad"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=5)
+
+    async def call(priority):
+        async with scheduler.slot(priority):
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(call(0), call(2))
+
+    waits = scheduler.stats()["wait_seconds"]
+    assert waits[0]["count"] == 1 and waits[2]["count"] == 1
+    assert waits[2]["max"] >= 0.015
+
+def test_create_llm_scheduler_from_config():
+    """Test la creación del planificador desde la configuración"""
+    assert create_llm_scheduler(SimpleNamespace()) is None
+    scheduler = create_llm_scheduler(SimpleNamespace(LLM_MAX_IN_FLIGHT=3, LLM_MAX_QUEUE=7))
+    assert (scheduler.max_in_flight, scheduler.max_queue) == (3, 7)
+
+@pytest.mark.asyncio
+async def test_queue_without_limit_never_rejects():
+    """Test que con LLM_MAX_QUEUE a 0 las peticiones esperan sin recibir 429"""
+    scheduler = create_llm_scheduler(SimpleNamespace(LLM_MAX_IN_FLIGHT=1))
+    release = asyncio.Event()
+    order = []
+    tasks = [asyncio.create_task(hold(scheduler, 0, order, str(i), release)) for i in range(20)]
+    await asyncio.sleep(0)
+
+    assert scheduler.queue_depth == 19
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.stats()["rejected"] == 0
+
+@pytest.mark.asyncio
+async def test_service_calls_go_through_scheduler():
+    """Test que el servicio reserva hueco en el planificador para cada generación"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=5)
+    active = 0
+    peak = 0
+
+    class FakeLLM:
+        model = "test-model"
+        temperature = 0.7
+
+        async def ainvoke(self, prompt):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return REFINEMENT_RESPONSE
+
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=FakeLLM(), scheduler=scheduler)
+
+    sessions = [await service.create_session() for _ in range(3)]
+    await asyncio.gather(*(
+        service.refine_story(session_id, f"Historia {i}") for i, session_id in enumerate(sessions)
+    ))
+
+    assert peak == 1
+    assert service.scheduler_stats()["admitted"] == 3
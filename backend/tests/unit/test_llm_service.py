@@ -68,17 +68,18 @@ def llm_service(llm_config):
 @pytest.mark.asyncio
 async def test_create_session(llm_service):
     """Test la creación de una nueva sesión"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
     assert isinstance(session_id, UUID)
     assert session_id in llm_service._sessions
-    assert session_id in llm_service._memories
-    assert isinstance(llm_service._memories[session_id], ChatMessageHistory)
+    memory = await llm_service.get_memory(session_id)
+    assert isinstance(memory, ChatMessageHistory)
+    assert memory.messages == []
 
 @pytest.mark.asyncio
 async def test_get_session_with_invalid_id(llm_service):
     """Test el manejo de un ID de sesión inválido"""
     with pytest.raises(ValueError, match="ID de sesión inválido"):
-        llm_service._get_session("invalid-id")
+        await llm_service._get_session("invalid-id")
 
 @pytest.mark.asyncio
 async def test_extract_sections(llm_service):
@@ -109,14 +110,13 @@ Contenido 1"""
 @pytest.mark.asyncio
 async def test_memory_integration(llm_service):
     """Test la integración de la memoria en las conversaciones"""
-    session_id = llm_service.create_session()
-    memory = llm_service._memories[session_id]
+    session_id = await llm_service.create_session()
+    session = await llm_service._get_session(session_id)
     
     # Simular una conversación
-    memory.add_message(HumanMessage(content="¿Cómo estás?"))
-    memory.add_message(AIMessage(content="¡Muy bien!"))
+    session.add_interaction("¿Cómo estás?", "¡Muy bien!", ProcessState.REFINEMENT)
     
-    messages = memory.messages
+    messages = (await llm_service.get_memory(session_id)).messages
     assert len(messages) == 2
     assert isinstance(messages[0], HumanMessage)
     assert isinstance(messages[1], AIMessage)
@@ -126,7 +126,7 @@ async def test_memory_integration(llm_service):
 @pytest.mark.asyncio
 async def test_process_step_error_handling(llm_service):
     """Test el manejo de errores en el procesamiento de pasos"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
     mock_llm = Mock(spec=OllamaLLM)
     mock_llm.ainvoke = AsyncMock(side_effect=Exception("LLM Error"))
     llm_service.llm = mock_llm
@@ -146,8 +146,8 @@ async def test_process_step_error_handling(llm_service):
 @pytest.mark.asyncio
 async def test_session_state_management(llm_service):
     """Test el manejo del estado de la sesión"""
-    session_id = llm_service.create_session()
-    session = llm_service._get_session(session_id)
+    session_id = await llm_service.create_session()
+    session = await llm_service._get_session(session_id)
     
     # Verificar estado inicial
     assert session.state == ProcessState.REFINEMENT
@@ -166,31 +166,10 @@ async def test_session_state_management(llm_service):
     # Verificar cambio de estado
     assert session.state == ProcessState.CORNER_CASES
 
-@pytest.mark.asyncio
-async def test_extract_section_with_end_marker(llm_service):
-    """Test la extracción de una sección con marcador de fin"""
-    text = """**Inicio:**
-Contenido
-**Fin:**
-Otro contenido"""
-    
-    section = llm_service._extract_section(text, "**Inicio:**", "**Fin:**")
-    assert section.strip() == "Contenido"
-
-@pytest.mark.asyncio
-async def test_extract_section_without_end_marker(llm_service):
-    """Test la extracción de una sección sin marcador de fin"""
-    text = """**Inicio:**
-Contenido
-Más contenido"""
-    
-    section = llm_service._extract_section(text, "**Inicio:**")
-    assert section.strip() == "Contenido\nMás contenido"
-
 @pytest.mark.asyncio
 async def test_process_step_with_post_processing(llm_service):
     """Test el procesamiento de pasos con post-procesamiento"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
     
     def post_process(sections):
         return {"processed": sections.get("**Sección:**", "")}
@@ -209,17 +188,21 @@ async def test_process_step_with_post_processing(llm_service):
     assert "processed" in result
 
 @pytest.mark.asyncio
-async def test_add_to_memory(llm_service):
-    """Test la adición de mensajes a la memoria"""
-    session_id = llm_service.create_session()
+async def test_get_memory_after_step(llm_service):
+    """Test que la memoria incluye las interacciones de los pasos completados"""
+    session_id = await llm_service.create_session()
     
-    await llm_service._add_to_memory(
+    await llm_service._process_step(
         session_id=session_id,
-        human_message="Pregunta de prueba",
-        ai_message="Respuesta de prueba"
+        prompt_template="Test prompt",
+        input_variables={},
+        process_state=ProcessState.REFINEMENT,
+        extract_markers=[],
+        update_session_callback=lambda s, r: None,
+        format_interaction=lambda r: ("Pregunta de prueba", "Respuesta de prueba")
     )
     
-    memory = llm_service._memories[session_id]
+    memory = await llm_service.get_memory(session_id)
     messages = memory.messages
     
     assert len(messages) == 2
@@ -229,10 +212,7 @@ async def test_add_to_memory(llm_service):
 @pytest.mark.asyncio
 async def test_refine_story_complete_flow(llm_service):
     """Test el flujo completo de refinamiento de historia"""
-    session_id = llm_service.create_session()
-    
-    # Asegurarnos de que la memoria está inicializada
-    llm_service._memories[session_id] = ChatMessageHistory()
+    session_id = await llm_service.create_session()
     
     result = await llm_service.refine_story(
         session_id=session_id,
@@ -245,7 +225,7 @@ async def test_refine_story_complete_flow(llm_service):
     assert result["refined_story"] == "Historia refinada de prueba"
     assert result["refinement_feedback"] == "Cambios de prueba"
     
-    session = llm_service._get_session(session_id)
+    session = await llm_service._get_session(session_id)
     assert session.refined_story == result["refined_story"]
     assert len(session.interactions) > 0
     assert session.state == ProcessState.REFINEMENT
@@ -253,10 +233,7 @@ async def test_refine_story_complete_flow(llm_service):
 @pytest.mark.asyncio
 async def test_identify_corner_cases_complete_flow(llm_service):
     """Test el flujo completo de identificación de casos esquina"""
-    session_id = llm_service.create_session()
-    
-    # Asegurarnos de que la memoria está inicializada
-    llm_service._memories[session_id] = ChatMessageHistory()
+    session_id = await llm_service.create_session()
     
     result = await llm_service.identify_corner_cases(
         session_id=session_id,
@@ -271,17 +248,14 @@ async def test_identify_corner_cases_complete_flow(llm_service):
     assert result["corner_cases"] == ["- Caso 1", "- Caso 2"]
     assert result["corner_cases_feedback"] == "Análisis de prueba"
     
-    session = llm_service._get_session(session_id)
+    session = await llm_service._get_session(session_id)
     assert session.corner_cases == result["corner_cases"]
     assert len(session.interactions) > 0
 
 @pytest.mark.asyncio
 async def test_propose_testing_strategy_complete_flow(llm_service):
     """Test el flujo completo de propuesta de estrategia de testing"""
-    session_id = llm_service.create_session()
-    
-    # Asegurarnos de que la memoria está inicializada
-    llm_service._memories[session_id] = ChatMessageHistory()
+    session_id = await llm_service.create_session()
     
     result = await llm_service.propose_testing_strategy(
         session_id=session_id,
@@ -297,7 +271,7 @@ async def test_propose_testing_strategy_complete_flow(llm_service):
     assert result["testing_strategies"] == ["- Estrategia 1", "- Estrategia 2"]
     assert result["testing_feedback"] == "Justificación de prueba"
     
-    session = llm_service._get_session(session_id)
+    session = await llm_service._get_session(session_id)
     assert session.testing_strategy == result["testing_strategies"]
     assert len(session.interactions) > 0
 
@@ -321,7 +295,7 @@ async def test_process_step_with_invalid_session(llm_service):
 @pytest.mark.asyncio
 async def test_process_step_with_failed_post_processing(llm_service):
     """Test el manejo de errores en post-procesamiento"""
-    session_id = llm_service.create_session()
+    session_id = await llm_service.create_session()
     
     def failing_post_process(sections):
         raise Exception("Post-processing error")
@@ -356,49 +330,16 @@ async def test_service_initialization():
     service = LLMService(config=config, llm=mock_llm)
     assert service.llm == mock_llm
     assert service._sessions == {}
-    assert service._memories == {}
-
-@pytest.mark.asyncio
-async def test_extract_section_with_non_string_input(llm_service):
-    """Test la extracción de sección con entrada no string."""
-    # Test con un número
-    result = llm_service._extract_section(123, "start", "end")
-    assert result == "123"
-    
-    # Test con None
-    result = llm_service._extract_section(None, "start", "end")
-    assert result == "None"
-    
-    # Test con objeto
-    class TestObj:
-        def __str__(self):
-            return "test_object"
-    result = llm_service._extract_section(TestObj(), "start", "end")
-    assert result == "test_object"
 
 @pytest.mark.asyncio
-async def test_extract_section_error_handling(llm_service):
-    """Test el manejo de errores en extract_section."""
-    # Test con texto vacío
-    result = llm_service._extract_section("", "start", "end")
-    assert result == ""
-    
-    # Test con marcadores None
-    result = llm_service._extract_section("text", None, None)
-    assert result == ""
-    
-    # Test con marcadores vacíos
-    result = llm_service._extract_section("text", "", "")
-    assert result == "text"
-
-@pytest.mark.asyncio
-async def test_add_to_memory_edge_cases(llm_service):
-    """Test casos extremos de add_to_memory."""
-    session_id = llm_service.create_session()
+async def test_get_memory_edge_cases(llm_service):
+    """Test casos extremos de get_memory."""
+    session_id = await llm_service.create_session()
+    session = await llm_service._get_session(session_id)
     
     # Test con mensajes vacíos
-    await llm_service._add_to_memory(session_id, "", "")
-    memory = llm_service._memories[session_id]
+    session.add_interaction("", "", ProcessState.REFINEMENT)
+    memory = await llm_service.get_memory(session_id)
     assert len(memory.messages) == 2
     assert isinstance(memory.messages[0], HumanMessage)
     assert isinstance(memory.messages[1], AIMessage)
@@ -407,39 +348,32 @@ async def test_add_to_memory_edge_cases(llm_service):
     
     # Test con mensajes muy largos
     long_message = "x" * 10000
-    await llm_service._add_to_memory(session_id, long_message, long_message)
-    memory = llm_service._memories[session_id]
+    session.add_interaction(long_message, long_message, ProcessState.REFINEMENT)
+    memory = await llm_service.get_memory(session_id)
     assert len(memory.messages) == 4
     assert memory.messages[2].content == long_message
     assert memory.messages[3].content == long_message
     
     # Test con sesión inválida
-    with pytest.raises(KeyError):
-        await llm_service._add_to_memory(uuid4(), "test", "test")
+    with pytest.raises(ValueError, match="Sesión no encontrada"):
+        await llm_service.get_memory(uuid4())
 
 @pytest.mark.asyncio
 async def test_service_cleanup(llm_service):
     """Test la limpieza de recursos del servicio."""
-    # Crear algunas sesiones y memorias
-    session_id1 = llm_service.create_session()
-    session_id2 = llm_service.create_session()
-    
-    # Añadir algunos mensajes
-    await llm_service._add_to_memory(session_id1, "test1", "test1")
-    await llm_service._add_to_memory(session_id2, "test2", "test2")
+    # Crear algunas sesiones con mensajes
+    session_id1 = await llm_service.create_session()
+    session_id2 = await llm_service.create_session()
+    (await llm_service._get_session(session_id1)).add_interaction("test1", "test1", ProcessState.REFINEMENT)
+    (await llm_service._get_session(session_id2)).add_interaction("test2", "test2", ProcessState.REFINEMENT)
     
     # Verificar que hay datos antes de cerrar
-    assert len(llm_service._memories) == 2
     assert len(llm_service._sessions) == 2
-    
-    # Verificar que los mensajes se guardaron correctamente
-    assert len(llm_service._memories[session_id1].messages) == 2
-    assert len(llm_service._memories[session_id2].messages) == 2
+    assert len((await llm_service.get_memory(session_id1)).messages) == 2
+    assert len((await llm_service.get_memory(session_id2)).messages) == 2
     
     # Cerrar el servicio
     await llm_service.close()
     
-    # Verificar que se limpiaron los recursos
-    assert len(llm_service._memories) == 0
     # Las sesiones deberían mantenerse para referencia
     assert len(llm_service._sessions) == 2
@@ -0,0 +1,170 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.llm.service import LLMService
+from src.llm.cache import InMemoryResponseCache
+from src.llm.models import ProcessState
+
+REFINEMENT_CHUNKS = [
+    "**Historia ", "Refinada:**\nComo usuario ", "quiero iniciar sesión\n",
+    "**Cambios Rea", "lizados:**\n- Se añadió ", "el rol"
+]
+
+class FakeStreamingLLM:
+    """LLM falso que emite la respuesta en fragmentos"""
+
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.stream_calls = 0
+
+    async def astream(self, prompt):
+        self.stream_calls += 1
+        for chunk in self.chunks:
+            yield chunk
+
+    async def ainvoke(self, prompt):
+        return "".join(self.chunks)
+
+class SlowStreamingLLM(FakeStreamingLLM):
+    """LLM falso que tarda en emitir cada fragmento y cuenta las llamadas sin streaming"""
+
+    def __init__(self, chunks):
+        super().__init__(chunks)
+        self.invoke_calls = 0
+
+    async def astream(self, prompt):
+        self.stream_calls += 1
+        for chunk in self.chunks:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def ainvoke(self, prompt):
+        self.invoke_calls += 1
+        return "".join(self.chunks)
+
+@pytest.fixture
+def streaming_llm():
+    return FakeStreamingLLM(REFINEMENT_CHUNKS)
+
+@pytest.fixture
+def llm_service(streaming_llm):
+    return LLMService(config=SimpleNamespace(), llm=streaming_llm, cache=InMemoryResponseCache())
+
+async def collect(events):
+    return [event async for event in events]
+
+@pytest.mark.asyncio
+async def test_refine_story_stream_emits_tokens_sections_and_result(llm_service):
+    """Test que el streaming emite tokens, secciones y el resultado final"""
+    session_id = await llm_service.create_session()
+
+    events = await collect(await llm_service.refine_story_stream(session_id, "Historia original"))
+
+    tokens = [e['data'] for e in events if e['event'] == 'token']
+    assert "".join(tokens) == "".join(REFINEMENT_CHUNKS)
+
+    sections = [e['data'] for e in events if e['event'] == 'section']
+    assert sections == [
+        {'marker': '**Historia Refinada:**', 'content': 'Como usuario quiero iniciar sesión'},
+        {'marker': '**Cambios Realizados:**', 'content': '- Se añadió el rol'},
+    ]
+
+    token_usage = events[-1]['data'].pop('token_usage')
+    assert token_usage['prompt_tokens'] > 0 and token_usage['completion_tokens'] > 0
+    assert events[-1] == {
+        'event': 'result',
+        'data': {
+            'refined_story': 'Como usuario quiero iniciar sesión',
+            'refinement_feedback': '- Se añadió el rol'
+        }
+    }
+    session = await llm_service._get_session(session_id)
+    assert session.refined_story == 'Como usuario quiero iniciar sesión'
+    assert session.state == ProcessState.REFINEMENT
+    assert len(session.interactions) == 1
+
+@pytest.mark.asyncio
+async def test_section_event_is_emitted_before_generation_ends(llm_service):
+    """Test que la primera sección se emite en cuanto aparece el siguiente marcador"""
+    session_id = await llm_service.create_session()
+
+    events = await collect(await llm_service.refine_story_stream(session_id, "Historia original"))
+    kinds = [e['event'] for e in events]
+
+    first_section = kinds.index('section')
+    assert 'token' in kinds[first_section + 1:]
+
+@pytest.mark.asyncio
+async def test_stream_populates_and_uses_cache(llm_service, streaming_llm):
+    """Test que el streaming guarda la respuesta en caché y la reutiliza"""
+    first = await collect(await llm_service.refine_story_stream(await llm_service.create_session(), "Historia"))
+    second = await collect(await llm_service.refine_story_stream(await llm_service.create_session(), "Historia"))
+
+    assert streaming_llm.stream_calls == 1
+    assert first[-1] == second[-1]
+
+@pytest.mark.asyncio
+async def test_stream_with_invalid_session_fails_eagerly(llm_service):
+    """Test que una sesión inexistente falla antes de empezar el streaming"""
+    from uuid import uuid4
+    with pytest.raises(ValueError, match="Sesión no encontrada"):
+        await llm_service.refine_story_stream(uuid4(), "Historia")
+
+@pytest.mark.asyncio
+async def test_stream_with_missing_marker_falls_back_to_full_extraction(llm_service, streaming_llm):
+    """Test que si falta un marcador el resultado se extrae de la respuesta completa"""
+    streaming_llm.chunks = ["**Historia Refinada:**\nSolo la historia"]
+    session_id = await llm_service.create_session()
+
+    events = await collect(await llm_service.refine_story_stream(session_id, "Historia"))
+
+    events[-1]['data'].pop('token_usage')
+    assert events[-1]['data'] == {
+        'refined_story': 'Solo la historia',
+        'refinement_feedback': ''
+    }
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_streams_share_one_generation():
+    """Test que las peticiones iguales que llegan durante un streaming comparten su generación"""
+    llm = SlowStreamingLLM(REFINEMENT_CHUNKS)
+    service = LLMService(config=SimpleNamespace(), llm=llm, cache=InMemoryResponseCache())
+    first = await service.refine_story_stream(await service.create_session(), "Historia")
+    second = await service.refine_story_stream(await service.create_session(), "Historia")
+
+    leader = asyncio.ensure_future(collect(first))
+    await asyncio.sleep(0.015)
+    follower, result = await asyncio.gather(
+        collect(second), service.refine_story(await service.create_session(), "Historia")
+    )
+    events = await leader
+
+    assert llm.stream_calls == 1
+    assert llm.invoke_calls == 0
+    assert len([e for e in events if e["event"] == "token"]) == len(REFINEMENT_CHUNKS)
+    assert follower[-1]["data"]["refined_story"] == events[-1]["data"]["refined_story"] == result["refined_story"]
+
+@pytest.mark.asyncio
+async def test_bypass_cache_coalesces_and_refreshes_the_cache_in_both_paths():
+    """Test que sin caché el streaming y la versión normal comparten la generación y refrescan la caché"""
+    llm = SlowStreamingLLM(REFINEMENT_CHUNKS)
+    service = LLMService(config=SimpleNamespace(), llm=llm, cache=InMemoryResponseCache())
+    stream = await service.refine_story_stream(await service.create_session(), "Historia", bypass_cache=True)
+
+    leader = asyncio.ensure_future(collect(stream))
+    await asyncio.sleep(0.015)
+    result = await service.refine_story(await service.create_session(), "Historia", bypass_cache=True)
+    events = await leader
+
+    assert llm.stream_calls == 1
+    assert llm.invoke_calls == 0
+    assert events[-1]["data"]["refined_story"] == result["refined_story"]
+
+    # La generación sin caché deja la respuesta en la caché para las siguientes peticiones
+    await service.refine_story(await service.create_session(), "Historia")
+    await collect(await service.refine_story_stream(await service.create_session(), "Historia"))
+    assert llm.stream_calls == 1
+    assert llm.invoke_calls == 0
@@ -0,0 +1,153 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from src.integrations.jira_client import AsyncJira
+from src.llm.service import LLMService
+from src.observability import metrics
+from src.observability.metrics import Counter, Gauge, Histogram, Registry
+
+REFINEMENT_RESPONSE = "**Historia Refinada:**\nHistoria refinada\n**Cambios Realizados:**\nCambios"
+
+class FakeLLM:
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, response=REFINEMENT_RESPONSE):
+        self.response = response
+
+    async def ainvoke(self, prompt):
+        return self.response
+
+    async def astream(self, prompt):
+        for line in self.response.splitlines(keepends=True):
+            yield line
+
+def test_registry_renders_prometheus_text_format():
+    """Test que las métricas se exponen en el formato de texto de Prometheus"""
+    registry = Registry()
+    requests = registry.register(Counter("peticiones", "Peticiones", ["ruta"]))
+    latency = registry.register(Histogram("latencia_seconds", "Latencia", ["paso"], buckets=(0.1, 1)))
+    sessions = registry.register(Gauge("sesiones", "Sesiones"))
+    requests.inc(ruta='/a "b"')
+    latency.observe(0.5, paso="refinement")
+    latency.observe(2, paso="refinement")
+    sessions.set(3)
+
+    text = registry.render()
+
+    assert '# TYPE peticiones counter' in text
+    assert 'peticiones_total{ruta="/a \\"b\\""} 1.0' in text
+    assert 'latencia_seconds_bucket{paso="refinement",le="0.1"} 0' in text
+    assert 'latencia_seconds_bucket{paso="refinement",le="1.0"} 1' in text
+    assert 'latencia_seconds_bucket{paso="refinement",le="+Inf"} 2' in text
+    assert 'latencia_seconds_sum{paso="refinement"} 2.5' in text
+    assert 'latencia_seconds_count{paso="refinement"} 2' in text
+    assert 'sesiones 3.0' in text
+    with pytest.raises(ValueError):
+        requests.inc(otra="x")
+
+@pytest.mark.asyncio
+async def test_service_records_step_metrics():
+    """Test que el servicio registra latencias, tokens y aciertos de caché por paso"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="memory"), llm=FakeLLM())
+    session_id = await service.create_session()
+    latency_before = metrics.STEP_LATENCY.count(step="refinement")
+    generation_before = metrics.GENERATION_TIME.count(step="refinement")
+    tokens_before = metrics.COMPLETION_TOKENS.value(step="refinement")
+    hits_before = metrics.CACHE_REQUESTS.value(step="refinement", result="hit")
+
+    await service.refine_story(session_id, "Historia de métricas")
+    await service.refine_story(session_id, "Historia de métricas")
+
+    assert metrics.STEP_LATENCY.count(step="refinement") == latency_before + 2
+    assert metrics.GENERATION_TIME.count(step="refinement") == generation_before + 1
+    assert metrics.COMPLETION_TOKENS.value(step="refinement") > tokens_before
+    assert metrics.CACHE_REQUESTS.value(step="refinement", result="hit") == hits_before + 1
+
+    await service.refresh_metrics()
+    assert metrics.ACTIVE_SESSIONS.value() == 1
+
+@pytest.mark.asyncio
+async def test_non_streaming_records_prompt_eval_from_ollama():
+    """Test que sin streaming se registra el prompt_eval_duration que devuelve Ollama"""
+    from langchain_core.language_models.llms import BaseLLM
+    from langchain_core.outputs import Generation, LLMResult
+
+    class OllamaLikeLLM(BaseLLM):
+        model: str = "test-model"
+        temperature: float = 0.7
+
+        @property
+        def _llm_type(self) -> str:
+            return "ollama_like"
+
+        def _generate(self, prompts, stop=None, run_manager=None, **kwargs):
+            return LLMResult(generations=[
+                [Generation(text=REFINEMENT_RESPONSE, generation_info={"prompt_eval_duration": 250_000_000})]
+                for _ in prompts
+            ])
+
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=OllamaLikeLLM())
+    count_before = metrics.PROMPT_EVAL_TIME.count(step="refinement")
+
+    await service.refine_story(await service.create_session(), "Historia")
+
+    assert metrics.PROMPT_EVAL_TIME.count(step="refinement") == count_before + 1
+
+@pytest.mark.asyncio
+async def test_refresh_metrics_skips_sessions_of_uncountable_stores():
+    """Test que no se cuentan las sesiones de los almacenes en los que contar es caro"""
+    from src.llm.session_store import InMemorySessionStore
+
+    class RemoteStore(InMemorySessionStore):
+        countable = False
+
+        def __len__(self):
+            raise AssertionError("No se debe recorrer el almacén")
+
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=FakeLLM(), session_store=RemoteStore())
+    metrics.ACTIVE_SESSIONS.set(7)
+    await service.create_session()
+
+    await service.refresh_metrics()
+    assert metrics.ACTIVE_SESSIONS.value() == 7
+
+@pytest.mark.asyncio
+async def test_streaming_records_time_to_first_token():
+    """Test que en streaming se registran el tiempo hasta el primer token y la evaluación del prompt"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=FakeLLM())
+    ttft_before = metrics.TIME_TO_FIRST_TOKEN.count(step="refinement")
+    prompt_eval_before = metrics.PROMPT_EVAL_TIME.count(step="refinement")
+
+    events = [e async for e in await service.refine_story_stream(await service.create_session(), "Historia")]
+
+    assert events[-1]["event"] == "result"
+    assert metrics.TIME_TO_FIRST_TOKEN.count(step="refinement") == ttft_before + 1
+    assert metrics.PROMPT_EVAL_TIME.count(step="refinement") == prompt_eval_before + 1
+
+@pytest.mark.asyncio
+async def test_missing_markers_are_counted():
+    """Test que se cuentan los marcadores de sección no encontrados"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=FakeLLM("Respuesta sin secciones"))
+    before = metrics.SECTION_EXTRACTION_FAILURES.value(step="refinement", marker="**Historia Refinada:**")
+
+    await service.refine_story(await service.create_session(), "Historia sin marcadores")
+
+    assert metrics.SECTION_EXTRACTION_FAILURES.value(step="refinement", marker="**Historia Refinada:**") == before + 1
+
+@pytest.mark.asyncio
+async def test_jira_calls_are_timed():
+    """Test que se mide la latencia de las llamadas a Jira y se cuentan los errores"""
+    client = Mock()
+    client.issue.return_value = {"key": "PROJ-1"}
+    client.create_issue.side_effect = RuntimeError("Jira caído")
+    jira = AsyncJira(client)
+    before = metrics.JIRA_LATENCY.count(operation="issue")
+    errors_before = metrics.JIRA_REQUESTS.value(operation="create_issue", outcome="error")
+
+    await jira.issue("PROJ-1")
+    with pytest.raises(RuntimeError):
+        await jira.create_issue({"summary": "Historia"})
+
+    assert metrics.JIRA_LATENCY.count(operation="issue") == before + 1
+    assert metrics.JIRA_REQUESTS.value(operation="create_issue", outcome="error") == errors_before + 1
@@ -0,0 +1,201 @@
+import asyncio
+import socket
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from langchain_ollama import OllamaLLM
+from src.llm.backends import BalancedLLM, OllamaBackend, create_llm, parse_base_urls
+from src.llm.service import LLMService
+
+REFINEMENT_RESPONSE = """**Historia Refinada:**
+Historia refinada
+**Cambios Realizados:**
+Cambios"""
+
+class FakeOllama:
+    """LLM falso que registra las llamadas recibidas"""
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} caído")
+        return REFINEMENT_RESPONSE
+
+    async def astream(self, prompt):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} caído")
+        for word in REFINEMENT_RESPONSE.split(" "):
+            yield word + " "
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def make_balancer(*llms, **kwargs):
+    return BalancedLLM([OllamaBackend(f"http://{llm.name}", llm) for llm in llms], **kwargs)
+
+def test_parse_base_urls():
+    """Test la lectura de la lista de instancias desde la configuración"""
+    assert parse_base_urls(SimpleNamespace(OLLAMA_BASE_URL="http://a:11434/")) == ["http://a:11434"]
+    assert parse_base_urls(SimpleNamespace(
+        OLLAMA_BASE_URL="http://a:11434", OLLAMA_BASE_URLS="http://b:1, http://c:2,http://b:1"
+    )) == ["http://b:1", "http://c:2"]
+
+def test_create_llm_builds_balancer_for_several_urls():
+    """Test que con varias URLs se crea un LLM balanceado"""
+    config = SimpleNamespace(
+        MODEL_NAME="modelo", TEMPERATURE=0.2, MAX_LENGTH=2048,
+        OLLAMA_BASE_URL="http://a:11434", OLLAMA_BASE_URLS="http://b:1,http://c:2"
+    )
+    llm = create_llm(config)
+    assert isinstance(llm, BalancedLLM)
+    assert [b.url for b in llm.backends] == ["http://b:1", "http://c:2"]
+    assert llm.model == "modelo"
+
+    config.OLLAMA_BASE_URLS = ""
+    assert isinstance(create_llm(config), OllamaLLM)
+
+@pytest.mark.asyncio
+async def test_least_outstanding_requests_balancing():
+    """Test que las llamadas simultáneas se reparten entre las instancias"""
+    a, b = FakeOllama("a", delay=0.02), FakeOllama("b", delay=0.02)
+    balancer = make_balancer(a, b)
+
+    await asyncio.gather(*(balancer.ainvoke("prompt") for _ in range(6)))
+
+    assert (a.calls, b.calls) == (3, 3)
+
+@pytest.mark.asyncio
+async def test_session_affinity_prefers_previous_backend():
+    """Test que una sesión vuelve a la instancia que la atendió"""
+    a, b = FakeOllama("a"), FakeOllama("b")
+    balancer = make_balancer(a, b)
+
+    await balancer.ainvoke("prompt", affinity_key="sesion-1")
+    first = a if a.calls else b
+    for _ in range(3):
+        await balancer.ainvoke("prompt", affinity_key="sesion-1")
+
+    assert first.calls == 4
+
+@pytest.mark.asyncio
+async def test_affinity_yields_to_overloaded_backend():
+    """Test que la afinidad se ignora si la instancia preferida está mucho más cargada"""
+    a, b = FakeOllama("a"), FakeOllama("b")
+    balancer = make_balancer(a, b, affinity_slack=1)
+    await balancer.ainvoke("prompt", affinity_key="sesion-1")
+    preferred = balancer.backends[0] if a.calls else balancer.backends[1]
+    preferred.outstanding = 3
+
+    assert balancer.choose("sesion-1") is not preferred
+
+@pytest.mark.asyncio
+async def test_failing_backend_is_retried_elsewhere_and_ejected():
+    """Test que una instancia que falla se reintenta en otra y se expulsa"""
+    clock = FakeClock()
+    down, up = FakeOllama("down", fail=True), FakeOllama("up")
+    balancer = make_balancer(down, up, max_failures=2, eject_seconds=30, clock=clock)
+
+    for _ in range(4):
+        assert await balancer.ainvoke("prompt") == REFINEMENT_RESPONSE
+
+    assert down.calls == 2
+    assert not balancer.backends[0].is_available(clock())
+
+    clock.now += 31
+    assert balancer.backends[0].is_available(clock())
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises():
+    """Test que si todas las instancias fallan se propaga el error"""
+    balancer = make_balancer(FakeOllama("a", fail=True), FakeOllama("b", fail=True))
+
+    with pytest.raises(ConnectionError):
+        await balancer.ainvoke("prompt")
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_chunk():
+    """Test que el streaming cambia de instancia si falla antes de emitir nada"""
+    down, up = FakeOllama("down", fail=True), FakeOllama("up")
+    balancer = make_balancer(down, up)
+
+    chunks = [chunk async for chunk in balancer.astream("prompt")]
+
+    assert "".join(chunks).strip() == REFINEMENT_RESPONSE
+    assert up.calls == 1
+
+class TagsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == "/api/tags" else 404)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"models": []}')
+
+    def log_message(self, *args):
+        pass
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.mark.asyncio
+async def test_health_check_ejects_and_readmits():
+    """Test que la comprobación de salud expulsa las instancias caídas y readmite las sanas"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TagsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        healthy = OllamaBackend(f"http://127.0.0.1:{server.server_port}", FakeOllama("sano"))
+        dead = OllamaBackend(f"http://127.0.0.1:{free_port()}", FakeOllama("caido"))
+        healthy.ejected_until = float("inf")
+        balancer = BalancedLLM([healthy, dead], health_timeout=1.0)
+
+        await balancer.check_health()
+
+        assert healthy.is_available(balancer._clock())
+        assert not dead.is_available(balancer._clock())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.mark.asyncio
+async def test_service_passes_session_as_affinity_key():
+    """Test que el servicio usa la sesión como clave de afinidad"""
+    a, b = FakeOllama("a"), FakeOllama("b")
+    balancer = make_balancer(a, b)
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=balancer)
+    session_id = await service.create_session()
+
+    for i in range(3):
+        await service.refine_story(session_id, f"Historia {i}")
+
+    assert sorted([a.calls, b.calls]) == [0, 3]
+    assert service.backend_stats()["affinity_entries"] == 1
+
+def test_create_llm_keeps_model_loaded():
+    """Test que OLLAMA_KEEP_ALIVE llega a Ollama en el formato que espera"""
+    config = SimpleNamespace(
+        MODEL_NAME="modelo", TEMPERATURE=0.2, MAX_LENGTH=2048,
+        OLLAMA_BASE_URL="http://a:11434", OLLAMA_KEEP_ALIVE="30m"
+    )
+    assert create_llm(config).keep_alive == "30m"
+
+    config.OLLAMA_KEEP_ALIVE = "-1"
+    assert create_llm(config).keep_alive == -1
+
+    config.OLLAMA_KEEP_ALIVE = ""
+    assert create_llm(config).keep_alive is None
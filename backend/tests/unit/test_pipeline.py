@@ -0,0 +1,83 @@
+import pytest
+from types import SimpleNamespace
+from src.llm.service import LLMService
+from tests.mocks.pipeline_llm import PipelineLLM
+
+async def collect(events):
+    return [event async for event in events]
+
+def make_service(llm, **config):
+    return LLMService(config=SimpleNamespace(CACHE_BACKEND="none", **config), llm=llm)
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_all_steps_and_combines_results():
+    """Test que el flujo completo ejecuta los cuatro pasos y combina sus resultados"""
+    llm = PipelineLLM(tail_delay=0)
+    service = make_service(llm)
+    session_id = await service.create_session()
+
+    events = await collect(await service.pipeline_stream(session_id, "Historia original"))
+
+    stages = [e["data"]["step"] for e in events if e["event"] == "stage"]
+    assert sorted(stages) == ["corner_cases", "finalization", "refinement", "testing_strategy"]
+    assert events[-1]["event"] == "result"
+    result = events[-1]["data"]
+    assert result["refined_story"] == "Historia refinada"
+    assert result["corner_cases"] == ["1. Caso A", "2. Caso B"]
+    assert result["testing_strategies"] == ["1. Test A"]
+    assert result["finalized_story"] == "Historia final"
+    # Los pasos siguientes reciben la salida de los anteriores
+    assert "Historia refinada" in llm.prompts["corner_cases"]
+    assert "2. Caso B" in llm.prompts["testing_strategy"]
+    assert "1. Test A" in llm.prompts["finalization"]
+
+    session = await service._get_session(session_id)
+    assert session.refined_story == "Historia refinada"
+    assert session.corner_cases == ["1. Caso A", "2. Caso B"]
+    assert session.testing_strategy == ["1. Test A"]
+    assert len(session.interactions) == 4
+
+@pytest.mark.asyncio
+async def test_downstream_step_starts_when_upstream_section_closes():
+    """Test que los casos esquina empiezan antes de que termine la generación del refinamiento"""
+    llm = PipelineLLM(tail_delay=0.05)
+    service = make_service(llm)
+
+    await collect(await service.pipeline_stream(await service.create_session(), "Historia original"))
+
+    assert llm.log.index(("start", "corner_cases")) < llm.log.index(("end", "refinement"))
+    assert llm.log.index(("start", "testing_strategy")) < llm.log.index(("end", "corner_cases"))
+
+@pytest.mark.asyncio
+async def test_pipeline_respects_scheduler_limit():
+    """Test que el solapamiento no supera el límite de llamadas simultáneas al LLM"""
+    llm = PipelineLLM(tail_delay=0.02)
+    service = make_service(llm, LLM_MAX_IN_FLIGHT=1, LLM_MAX_QUEUE=8)
+
+    events = await collect(await service.pipeline_stream(await service.create_session(), "Historia original"))
+
+    assert events[-1]["event"] == "result"
+    running = 0
+    for kind, _ in llm.log:
+        running += 1 if kind == "start" else -1
+        assert running <= 1
+
+@pytest.mark.asyncio
+async def test_failing_step_cancels_pipeline():
+    """Test que el fallo de un paso se propaga y cancela los demás"""
+    llm = PipelineLLM(fail_step="corner_cases")
+    service = make_service(llm)
+
+    with pytest.raises(RuntimeError, match="fallo en corner_cases"):
+        await collect(await service.pipeline_stream(await service.create_session(), "Historia original"))
+
+    assert ("start", "finalization") not in llm.log
+
+@pytest.mark.asyncio
+async def test_pipeline_with_unknown_session_fails_eagerly():
+    """Test que una sesión inexistente falla antes de empezar el flujo"""
+    from uuid import uuid4
+    service = make_service(PipelineLLM())
+
+    with pytest.raises(ValueError, match="Sesión no encontrada"):
+        await service.pipeline_stream(uuid4(), "Historia")
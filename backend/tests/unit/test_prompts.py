@@ -0,0 +1,29 @@
+import pytest
+from src.llm.prompts.corner_case import CORNER_CASE_INSTRUCTIONS, corner_case_prompt
+from src.llm.prompts.finalize import FINALIZE_INSTRUCTIONS, finalize_story_prompt
+from src.llm.prompts.refinement import REFINEMENT_INSTRUCTIONS, refinement_prompt
+from src.llm.prompts.testing import TESTING_STRATEGY_INSTRUCTIONS, testing_strategy_prompt
+
+PROMPTS = [
+    (refinement_prompt, REFINEMENT_INSTRUCTIONS, ["**Historia Refinada:**", "**Cambios Realizados:**"]),
+    (corner_case_prompt, CORNER_CASE_INSTRUCTIONS, ["**Casos Esquina Actualizados:**", "**Análisis de Cambios:**"]),
+    (testing_strategy_prompt, TESTING_STRATEGY_INSTRUCTIONS, ["**Estrategias de Testing Actualizadas:**", "**Análisis de Cambios:**"]),
+    (finalize_story_prompt, FINALIZE_INSTRUCTIONS, ["**Historia Finalizada:**"]),
+]
+
+def render(prompt, value):
+    variables = prompt.input_variables if hasattr(prompt, "input_variables") else [
+        "story_input", "corner_cases", "testing_strategy", "feedback"
+    ]
+    return prompt.format(**{name: f"{value} {name}" for name in variables})
+
+@pytest.mark.parametrize("prompt,instructions,markers", PROMPTS)
+def test_prompt_starts_with_static_instructions(prompt, instructions, markers):
+    """Test que las instrucciones fijas forman un prefijo idéntico en todas las peticiones"""
+    first, second = render(prompt, "Historia A"), render(prompt, "Historia B")
+
+    assert first.startswith(instructions) and second.startswith(instructions)
+    assert "{" not in instructions
+    assert all(marker in instructions for marker in markers)
+    # Los datos de la petición van después de las instrucciones
+    assert first.index("Historia A") >= len(instructions)
@@ -4,7 +4,7 @@ from uuid import UUID
 @pytest.mark.asyncio
 async def test_propose_testing_strategy_without_feedback(mock_llm_service):
     """Test para proponer estrategia de pruebas sin feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     refined_story = "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal"
     corner_cases = [
         "1. **Intentos de Inicio de Sesión Fallidos:** El usuario ingresa una contraseña incorrecta repetidamente.",
@@ -32,7 +32,7 @@ async def test_propose_testing_strategy_without_feedback(mock_llm_service):
 @pytest.mark.asyncio
 async def test_propose_testing_strategy_with_feedback(mock_llm_service):
     """Test para proponer estrategia de pruebas con feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     refined_story = "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal"
     corner_cases = [
         "1. **Intentos de Inicio de Sesión Fallidos:** El usuario ingresa una contraseña incorrecta repetidamente.",
@@ -66,7 +66,7 @@ async def test_propose_testing_strategy_with_feedback(mock_llm_service):
 @pytest.mark.asyncio
 async def test_propose_testing_strategy_with_existing_strategies(mock_llm_service):
     """Test para proponer estrategia de pruebas con estrategias existentes"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     refined_story = "Como usuario quiero poder iniciar sesión para acceder a mi cuenta personal"
     corner_cases = [
         "1. **Intentos de Inicio de Sesión Fallidos:** El usuario ingresa una contraseña incorrecta repetidamente.",
@@ -4,7 +4,7 @@ from uuid import uuid4
 @pytest.mark.asyncio
 async def test_refine_story_without_feedback(mock_llm_service):
     """Test para refinar una historia de usuario sin feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     user_story = "Como usuario quiero poder iniciar sesión"
 
     result = await mock_llm_service.refine_story(
@@ -27,7 +27,7 @@ async def test_refine_story_without_feedback(mock_llm_service):
 @pytest.mark.asyncio
 async def test_refine_story_with_feedback(mock_llm_service):
     """Test para refinar una historia de usuario con feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     user_story = "Como usuario quiero poder iniciar sesión"
     feedback = "Especificar el propósito del inicio de sesión"
 
@@ -53,7 +53,7 @@ async def test_refine_story_with_feedback(mock_llm_service):
 @pytest.mark.asyncio
 async def test_refine_story_with_existing_story(mock_llm_service):
     """Test para refinar una historia de usuario con una versión previa y feedback"""
-    session_id = mock_llm_service.create_session()
+    session_id = await mock_llm_service.create_session()
     user_story = "Como usuario quiero poder iniciar sesión"
     feedback = "Agregar detalles sobre el método de autenticación"
 
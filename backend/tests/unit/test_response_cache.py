@@ -0,0 +1,135 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, AsyncMock
+from src.llm.cache import (
+    InMemoryResponseCache,
+    SQLiteResponseCache,
+    build_cache_key,
+    create_response_cache,
+)
+from src.llm.service import LLMService
+from src.config.llm_config import LLMConfig
+from langchain_ollama import OllamaLLM
+
+RESPONSE = """**Historia Refinada:**
+Historia refinada de prueba
+**Cambios Realizados:**
+Cambios de prueba"""
+
+@pytest.fixture
+def mock_ollama_llm():
+    mock = Mock(spec=OllamaLLM)
+    mock.ainvoke = AsyncMock(return_value=RESPONSE)
+    mock.model = "test-model"
+    mock.temperature = 0.7
+    return mock
+
+@pytest.fixture
+def llm_service(mock_ollama_llm):
+    config = LLMConfig(
+        llm=mock_ollama_llm,
+        refinement_prompt_template="Refina la historia: {story}",
+        corner_case_prompt_template="Identifica casos esquina: {story}",
+        testing_strategy_prompt_template="Propón estrategias: {story}"
+    )
+    return LLMService(config=config, llm=mock_ollama_llm, cache=InMemoryResponseCache())
+
+def test_build_cache_key_depends_on_all_inputs():
+    """Test que la clave cambia con el modelo, la temperatura, la plantilla y el prompt"""
+    base = build_cache_key("modelo", 0.7, "plantilla {x}", "prompt")
+    assert base == build_cache_key("modelo", 0.7, "plantilla {x}", "prompt")
+    assert base != build_cache_key("otro", 0.7, "plantilla {x}", "prompt")
+    assert base != build_cache_key("modelo", 0.2, "plantilla {x}", "prompt")
+    assert base != build_cache_key("modelo", 0.7, "otra {x}", "prompt")
+    assert base != build_cache_key("modelo", 0.7, "plantilla {x}", "otro prompt")
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_lru_eviction():
+    """Test que la caché en memoria expulsa la entrada menos usada"""
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=0)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    assert await cache.get("a") == "1"
+    await cache.set("c", "3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert await cache.get("c") == "3"
+    assert len(cache) == 2
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_ttl_expiry(monkeypatch):
+    """Test que las entradas caducan tras el TTL"""
+    now = [1000.0]
+    monkeypatch.setattr("src.llm.cache.time.monotonic", lambda: now[0])
+    cache = InMemoryResponseCache(max_entries=10, ttl_seconds=60)
+    await cache.set("a", "1")
+    now[0] += 30
+    assert await cache.get("a") == "1"
+    now[0] += 31
+    assert await cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_persists_between_instances(tmp_path):
+    """Test que la caché SQLite conserva las respuestas en disco"""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteResponseCache(path, max_entries=2, ttl_seconds=0)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    await cache.close()
+
+    reopened = SQLiteResponseCache(path, max_entries=2, ttl_seconds=0)
+    assert await reopened.get("a") == "1"
+    await reopened.set("c", "3")
+    assert await reopened.get("b") is None
+    assert len(reopened) == 2
+    await reopened.close()
+
+def test_create_response_cache_backends(tmp_path):
+    """Test la creación de backends desde la configuración"""
+    assert isinstance(create_response_cache(SimpleNamespace(CACHE_BACKEND="memory")), InMemoryResponseCache)
+    assert create_response_cache(SimpleNamespace(CACHE_BACKEND="none")) is None
+    sqlite_cache = create_response_cache(SimpleNamespace(
+        CACHE_BACKEND="sqlite", CACHE_MAX_ENTRIES=5, CACHE_TTL_SECONDS=10,
+        CACHE_PATH=str(tmp_path / "c.sqlite3")
+    ))
+    assert isinstance(sqlite_cache, SQLiteResponseCache)
+    with pytest.raises(ValueError, match="Backend de caché desconocido"):
+        create_response_cache(SimpleNamespace(CACHE_BACKEND="memcached"))
+
+@pytest.mark.asyncio
+async def test_repeated_request_is_served_from_cache(llm_service, mock_ollama_llm):
+    """Test que una petición repetida no vuelve a invocar el LLM"""
+    first_session = await llm_service.create_session()
+    second_session = await llm_service.create_session()
+
+    first = await llm_service.refine_story(first_session, "Historia original")
+    second = await llm_service.refine_story(second_session, "Historia original")
+
+    assert first == second
+    assert mock_ollama_llm.ainvoke.await_count == 1
+    # Cada sesión recibe su propia actualización aunque la respuesta venga de caché
+    assert (await llm_service._get_session(second_session)).refined_story == "Historia refinada de prueba"
+    assert len((await llm_service._get_session(second_session)).interactions) == 1
+
+@pytest.mark.asyncio
+async def test_bypass_cache_forces_generation(llm_service, mock_ollama_llm):
+    """Test que bypass_cache fuerza una nueva generación"""
+    session_id = await llm_service.create_session()
+
+    await llm_service.refine_story(session_id, "Historia original")
+    await llm_service.refine_story(session_id, "Historia original", bypass_cache=True)
+
+    assert mock_ollama_llm.ainvoke.await_count == 2
+
+@pytest.mark.asyncio
+async def test_different_feedback_is_not_cached(llm_service, mock_ollama_llm):
+    """Test que un prompt distinto no reutiliza la respuesta cacheada"""
+    session_id = await llm_service.create_session()
+
+    await llm_service.refine_story(session_id, "Historia original")
+    await llm_service.refine_story(session_id, "Historia original", feedback="Más detalle")
+
+    assert mock_ollama_llm.ainvoke.await_count == 2
@@ -0,0 +1,64 @@
+import pytest
+from src.llm.parsing import SectionParser
+
+MARKERS = ["**Casos Esquina Actualizados:**", "**Análisis de Cambios:**"]
+RESPONSE = """Preámbulo del modelo
+**Casos Esquina Actualizados:**
+1. Caso uno
+2. Caso dos
+
+**Análisis de Cambios:**
+- Cambio aplicado"""
+
+EXPECTED = {
+    "**Casos Esquina Actualizados:**": "1. Caso uno\n2. Caso dos",
+    "**Análisis de Cambios:**": "- Cambio aplicado"
+}
+
+def test_parse_complete_text():
+    """Test la extracción de secciones de un texto completo"""
+    assert SectionParser(MARKERS).parse(RESPONSE) == EXPECTED
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 13, 1000])
+def test_feed_by_chunks_matches_complete_parse(chunk_size):
+    """Test que el resultado no depende de cómo se fragmenta el texto"""
+    parser = SectionParser(MARKERS)
+    for i in range(0, len(RESPONSE), chunk_size):
+        parser.feed(RESPONSE[i:i + chunk_size])
+    parser.close()
+    assert parser.sections == EXPECTED
+
+def test_section_is_emitted_when_next_marker_arrives():
+    """Test que una sección se emite en cuanto se cierra"""
+    parser = SectionParser(MARKERS)
+    assert parser.feed("**Casos Esquina Actualizados:**\n1. Caso") == []
+    assert parser.feed(" uno\n**Análisis de ") == []
+    assert parser.feed("Cambios:**\nNada") == [("**Casos Esquina Actualizados:**", "1. Caso uno")]
+    assert parser.close() == [("**Análisis de Cambios:**", "Nada")]
+
+def test_several_markers_in_one_chunk():
+    """Test varios marcadores dentro del mismo fragmento"""
+    parser = SectionParser(["**A:**", "**B:**", "**C:**"])
+    completed = parser.feed("**A:** uno **B:** dos **C:** tres")
+    assert completed == [("**A:**", "uno"), ("**B:**", "dos")]
+    assert parser.close() == [("**C:**", "tres")]
+
+def test_missing_markers():
+    """Test que los marcadores ausentes quedan vacíos y se informan"""
+    parser = SectionParser(["**A:**", "**B:**", "**C:**"])
+    sections = parser.parse("**A:** uno **C:** tres")
+    assert sections == {"**A:**": "uno", "**B:**": "", "**C:**": "tres"}
+    assert parser.missing_markers == ["**B:**"]
+
+def test_text_without_markers():
+    """Test un texto sin ningún marcador"""
+    parser = SectionParser(MARKERS)
+    assert parser.parse("Respuesta libre") == {marker: "" for marker in MARKERS}
+    assert parser.missing_markers == MARKERS
+
+def test_feed_after_close_is_ignored():
+    """Test que no se consume texto tras cerrar el parser"""
+    parser = SectionParser(["**A:**"])
+    parser.parse("**A:** uno")
+    assert parser.feed("**A:** dos") == []
+    assert parser.sections == {"**A:**": "uno"}
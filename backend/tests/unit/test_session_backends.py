@@ -0,0 +1,202 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+from src.llm.models import ProcessState, Session
+from src.llm.session_backends import (
+    RedisProtocolClient,
+    RedisSessionStore,
+    SQLiteSessionStore,
+    deserialize_session,
+    serialize_session,
+)
+from src.llm.session_store import create_session_store
+from src.llm.service import LLMService
+from src.llm.cache import InMemoryResponseCache
+from tests.mocks.fake_redis import FakeRedisServer
+
+REFINEMENT = "**Historia Refinada:**\nHistoria refinada\n**Cambios Realizados:**\nCambios"
+CORNER_CASES = "**Casos Esquina Actualizados:**\n- Caso 1\n**Análisis de Cambios:**\nAnálisis"
+
+def build_session(interactions=1):
+    session = Session(session_id=uuid4(), state=ProcessState.CORNER_CASES)
+    session.refined_story = "Historia refinada"
+    session.corner_cases = ["Caso 1", "Caso 2"]
+    session.functional_tests = "Test 1"
+    for i in range(interactions):
+        session.add_interaction(f"Pregunta {i}", f"Respuesta {i}", ProcessState.REFINEMENT)
+    return session
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+def build_worker(store):
+    """Crea un servicio que simula un worker independiente sobre el mismo almacén"""
+    llm = Mock()
+    llm.ainvoke = AsyncMock(side_effect=lambda prompt: REFINEMENT if "Historia de Usuario Original" in prompt else CORNER_CASES)
+    return LLMService(config=SimpleNamespace(), llm=llm, cache=InMemoryResponseCache(), session_store=store)
+
+@pytest.mark.parametrize("interactions", [1, 30])
+def test_serialization_roundtrip(interactions):
+    """Test que la serialización conserva la sesión, con y sin compresión"""
+    session = build_session(interactions)
+    data = serialize_session(session)
+    assert data[:1] == (b"Z" if interactions > 1 else b"J")
+    assert deserialize_session(data) == session
+
+def test_deserialize_rejects_unknown_version():
+    """Test que una versión desconocida se rechaza"""
+    data = serialize_session(build_session()).replace(b"[1,", b"[99,", 1)
+    with pytest.raises(ValueError, match="Versión de sesión no soportada"):
+        deserialize_session(data)
+
+def test_sqlite_store_idle_ttl(tmp_path):
+    """Test la caducidad por inactividad en el almacén SQLite"""
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), idle_ttl=60)
+    session = build_session()
+    store[session.session_id] = session
+    assert store.sweep() == 0
+    store._conn.execute("UPDATE sessions SET last_access = last_access - 120")
+    assert session.session_id not in store
+    assert store.sweep() == 1
+    assert len(store) == 0
+    assert store.evictions == {"idle_ttl": 1}
+
+@pytest.mark.asyncio
+async def test_sqlite_store_async_api_runs_off_the_loop(tmp_path):
+    """Test que las operaciones asíncronas del almacén SQLite se ejecutan en otro hilo"""
+    import threading
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), idle_ttl=60)
+    threads = []
+    original_get = store.get
+    store.get = lambda *args: threads.append(threading.get_ident()) or original_get(*args)
+    session = build_session()
+
+    await store.save(session.session_id, session)
+    assert await store.load(session.session_id) == session
+    assert await store.count() == 1
+    await store.remove(session.session_id)
+    assert await store.load(session.session_id) is None
+    assert threads and threading.get_ident() not in threads
+    await store.aclose()
+
+@pytest.mark.asyncio
+async def test_sqlite_eviction_is_notified_on_the_loop(tmp_path):
+    """Test que una expulsión detectada en el hilo del almacén se avisa desde el bucle"""
+    import asyncio
+    import threading
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), idle_ttl=60)
+    notified = []
+    store.add_eviction_listener(lambda key, value, reason: notified.append((key, reason, threading.get_ident())))
+    session = build_session()
+    await store.save(session.session_id, session)
+    store._conn.execute("UPDATE sessions SET last_access = last_access - 120")
+
+    assert await store.load(session.session_id) is None
+    await asyncio.sleep(0)
+    assert notified == [(session.session_id, "idle_ttl", threading.get_ident())]
+    await store.aclose()
+
+@pytest.mark.asyncio
+async def test_concurrent_steps_on_one_session_keep_both_interactions(tmp_path):
+    """Test que dos pasos simultáneos de una sesión no se pisan al guardarla"""
+    worker = build_worker(SQLiteSessionStore(str(tmp_path / "sessions.sqlite3")))
+    session_id = await worker.create_session()
+    both_generating = asyncio.Barrier(2)
+
+    async def generate(prompt):
+        # Las dos generaciones terminan a la vez y releen la sesión a la par
+        await both_generating.wait()
+        return REFINEMENT if "Historia de Usuario Original" in prompt else CORNER_CASES
+
+    worker.llm.ainvoke = AsyncMock(side_effect=generate)
+
+    await asyncio.gather(
+        worker.refine_story(session_id, "Historia original"),
+        worker.identify_corner_cases(session_id, "Historia refinada"),
+    )
+
+    session = await worker._get_session(session_id)
+    assert session.refined_story == "Historia refinada"
+    assert session.corner_cases == ["- Caso 1"]
+    assert len(session.interactions) == 2
+    await worker.close()
+
+def test_redis_store_is_not_countable(redis_server):
+    """Test que el almacén Redis no se cuenta para la métrica de sesiones activas"""
+    store = RedisSessionStore(RedisProtocolClient.from_url(redis_server.url))
+    assert store.blocking and not store.countable
+    assert SQLiteSessionStore.blocking and SQLiteSessionStore.countable
+    store.close()
+
+def test_create_shared_stores_from_config(tmp_path, redis_server):
+    """Test la selección del backend de sesiones desde la configuración"""
+    sqlite_store = create_session_store(SimpleNamespace(
+        SESSION_BACKEND="sqlite", SESSION_DB_PATH=str(tmp_path / "s.sqlite3")
+    ))
+    assert isinstance(sqlite_store, SQLiteSessionStore)
+    redis_store = create_session_store(SimpleNamespace(
+        SESSION_BACKEND="redis", SESSION_REDIS_URL=redis_server.url, SESSION_TTL_SECONDS=30
+    ))
+    assert isinstance(redis_store, RedisSessionStore)
+    assert redis_store.idle_ttl == 30
+    with pytest.raises(ValueError, match="Backend de sesiones desconocido"):
+        create_session_store(SimpleNamespace(SESSION_BACKEND="mongo"))
+
+def test_redis_store_mapping_operations(redis_server):
+    """Test las operaciones de diccionario contra el servidor local"""
+    store = RedisSessionStore(RedisProtocolClient.from_url(redis_server.url), idle_ttl=60)
+    session = build_session()
+    store[session.session_id] = session
+
+    assert session.session_id in store
+    assert store[session.session_id] == session
+    assert list(store) == [session.session_id]
+    assert len(store) == 1
+    assert "EXPIRE" in redis_server.commands
+
+    del store[session.session_id]
+    assert session.session_id not in store
+    with pytest.raises(KeyError):
+        store[session.session_id]
+    store.close()
+
+def test_redis_client_reconnects(redis_server):
+    """Test que el cliente se reconecta si se pierde la conexión"""
+    client = RedisProtocolClient.from_url(redis_server.url)
+    assert client.execute("PING") == "OK"
+    client._sock.close()
+    assert client.execute("PING") == "OK"
+    client.close()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+async def test_conversation_continues_on_another_worker(backend, tmp_path, redis_server):
+    """Test que un worker puede continuar la sesión creada por otro"""
+    def make_store():
+        if backend == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+        return RedisSessionStore(RedisProtocolClient.from_url(redis_server.url))
+
+    worker_a = build_worker(make_store())
+    worker_b = build_worker(make_store())
+
+    session_id = await worker_a.create_session()
+    await worker_a.refine_story(session_id, "Historia")
+    result = await worker_b.identify_corner_cases(session_id, "Historia refinada")
+
+    assert result["corner_cases"] == ["- Caso 1"]
+    session = await worker_a._get_session(session_id)
+    assert session.refined_story == "Historia refinada"
+    assert session.corner_cases == ["- Caso 1"]
+    assert session.state == ProcessState.CORNER_CASES
+    assert len(session.interactions) == 2
+    # La memoria del worker B se reconstruye a partir de las interacciones
+    assert len((await worker_b.get_memory(session_id)).messages) == 4
+
+    await worker_a.close()
+    await worker_b.close()
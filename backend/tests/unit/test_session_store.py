@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from src.llm.session_store import (
+    BoundedSessionStore,
+    InMemorySessionStore,
+    create_session_store,
+)
+from src.llm.service import LLMService
+from src.llm.cache import InMemoryResponseCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_default_store_keeps_dict_semantics():
+    """Test que sin límites se usa el almacén equivalente a un diccionario"""
+    store = create_session_store(SimpleNamespace())
+    assert isinstance(store, InMemorySessionStore)
+    store["a"] = 1
+    assert store == {"a": 1}
+    assert "a" in store
+    del store["a"]
+    assert store == {}
+
+def test_create_bounded_store_from_config():
+    """Test que cualquier límite configurado activa el almacén acotado"""
+    store = create_session_store(SimpleNamespace(SESSION_TTL_SECONDS=60))
+    assert isinstance(store, BoundedSessionStore)
+    assert store.idle_ttl == 60
+
+def test_idle_ttl_expires_on_access(clock):
+    """Test que una sesión inactiva caduca al accederla"""
+    store = BoundedSessionStore(idle_ttl=60, clock=clock)
+    store["a"] = "sesión"
+    clock.now += 30
+    assert store["a"] == "sesión"
+    clock.now += 45
+    assert "a" in store
+    clock.now += 61
+    assert "a" not in store
+    assert store.evictions == {"idle_ttl": 1}
+
+def test_sweep_evicts_only_idle_entries(clock):
+    """Test que el barrido elimina solo las sesiones inactivas"""
+    store = BoundedSessionStore(idle_ttl=60, clock=clock)
+    store["old"] = 1
+    clock.now += 50
+    store["new"] = 2
+    clock.now += 20
+    assert store.sweep() == 1
+    assert list(store) == ["new"]
+
+def test_max_entries_evicts_least_recently_used(clock):
+    """Test que se expulsa la sesión usada hace más tiempo"""
+    store = BoundedSessionStore(max_entries=2, clock=clock)
+    store["a"] = 1
+    store["b"] = 2
+    store["a"]
+    store["c"] = 3
+    assert set(store) == {"a", "c"}
+    assert store.evictions == {"max_entries": 1}
+
+def test_max_bytes_eviction(clock):
+    """Test que se respeta el límite de bytes estimados"""
+    store = BoundedSessionStore(max_bytes=10, sizeof=lambda key, value: len(value), clock=clock)
+    store["a"] = "xxxx"
+    store["b"] = "xxxx"
+    store["c"] = "xxxx"
+    assert set(store) == {"b", "c"}
+    assert store.stats()["bytes"] == 8
+    assert store.evictions == {"max_bytes": 1}
+
+def test_eviction_listener_is_notified(clock):
+    """Test que los listeners reciben la clave, el valor y el motivo"""
+    store = BoundedSessionStore(max_entries=1, clock=clock)
+    listener = Mock()
+    store.add_eviction_listener(listener)
+    store["a"] = 1
+    store["b"] = 2
+    listener.assert_called_once_with("a", 1, "max_entries")
+
+@pytest.mark.asyncio
+async def test_background_sweeper(clock):
+    """Test que el barrido en segundo plano expulsa las sesiones caducadas"""
+    store = BoundedSessionStore(idle_ttl=60, clock=clock)
+    store["a"] = 1
+    clock.now += 120
+    store.start_sweeper(0.01)
+    await asyncio.sleep(0.05)
+    await store.stop_sweeper()
+    assert len(store) == 0
+
+@pytest.fixture
+def llm_service(clock):
+    llm = Mock()
+    llm.ainvoke = AsyncMock(return_value="**Historia Refinada:**\nHistoria\n**Cambios Realizados:**\nCambios")
+    store = BoundedSessionStore(idle_ttl=60, clock=clock)
+    config = SimpleNamespace(SESSION_MAX_INTERACTIONS=2)
+    return LLMService(config=config, llm=llm, cache=InMemoryResponseCache(), session_store=store)
+
+@pytest.mark.asyncio
+async def test_service_eviction_releases_session(llm_service, clock):
+    """Test que una sesión expulsada deja de estar disponible"""
+    session_id = await llm_service.create_session()
+    clock.now += 120
+    llm_service._sessions.sweep()
+
+    with pytest.raises(ValueError, match="Sesión no encontrada"):
+        await llm_service._get_session(session_id)
+    assert (await llm_service.session_stats())["evictions"] == {"idle_ttl": 1}
+
+@pytest.mark.asyncio
+async def test_service_trims_interactions(llm_service):
+    """Test que se limita el historial retenido por sesión"""
+    session_id = await llm_service.create_session()
+    for i in range(4):
+        await llm_service.refine_story(session_id, f"Historia {i}")
+
+    session = await llm_service._get_session(session_id)
+    assert len(session.interactions) == 2
+    assert "Historia 3" in session.interactions[-1].human_message
+    assert len((await llm_service.get_memory(session_id)).messages) == 4
+
+@pytest.mark.asyncio
+async def test_session_evicted_during_generation_is_not_recreated(llm_service):
+    """Test que si la sesión se expulsa mientras se genera no se vuelve a guardar"""
+    session_id = await llm_service.create_session()
+    response = "**Historia Refinada:**\nHistoria\n**Cambios Realizados:**\nCambios"
+
+    async def evict_while_generating(prompt):
+        await llm_service._sessions.remove(session_id)
+        return response
+
+    llm_service.llm.ainvoke = AsyncMock(side_effect=evict_while_generating)
+
+    with pytest.raises(ValueError, match="Sesión no encontrada"):
+        await llm_service.refine_story(session_id, "Historia")
+    assert await llm_service._sessions.load(session_id) is None
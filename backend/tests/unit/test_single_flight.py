@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.llm.singleflight import SingleFlight
+from src.llm.service import LLMService
+
+RESPONSE = """**Historia Refinada:**
+Historia refinada de prueba
+**Cambios Realizados:**
+Cambios de prueba"""
+
+class SlowLLM:
+    """LLM falso que tarda en responder y cuenta las invocaciones"""
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return RESPONSE
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test que las llamadas simultáneas con la misma clave comparten la ejecución"""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "resultado"
+
+    results = await asyncio.gather(*(flight.do("clave", work) for _ in range(5)))
+
+    assert results == ["resultado"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_remembered():
+    """Test que el error llega a todos los llamantes y la siguiente llamada vuelve a ejecutar"""
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("fallo")
+
+    results = await asyncio.gather(*(flight.do("clave", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "ok"
+    assert await flight.do("clave", ok) == "ok"
+    assert flight.executions == 2
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_shared_execution():
+    """Test que cancelar un llamante no cancela la ejecución de los demás"""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    first = asyncio.create_task(flight.do("clave", work))
+    second = asyncio.create_task(flight.do("clave", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "resultado"
+    assert first.cancelled()
+
+@pytest.mark.asyncio
+async def test_execution_is_cancelled_when_nobody_waits():
+    """Test que la ejecución se cancela si todos los llamantes se cancelan"""
+    flight = SingleFlight()
+    finished = False
+
+    async def work():
+        nonlocal finished
+        await asyncio.sleep(0.05)
+        finished = True
+
+    caller = asyncio.create_task(flight.do("clave", work))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+    await asyncio.sleep(0.06)
+
+    assert not finished
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_identical_refinements_invoke_llm_once():
+    """Test que varias sesiones refinando la misma historia a la vez comparten la generación"""
+    llm = SlowLLM()
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=llm)
+    sessions = [await service.create_session() for _ in range(3)]
+
+    results = await asyncio.gather(*(
+        service.refine_story(session_id, "Historia compartida") for session_id in sessions
+    ))
+
+    assert llm.calls == 1
+    assert all(r["refined_story"] == "Historia refinada de prueba" for r in results)
+    # Cada llamante actualiza su propia sesión
+    for session_id in sessions:
+        session = await service._get_session(session_id)
+        assert session.refined_story == "Historia refinada de prueba"
+        assert len(session.interactions) == 1
+
+@pytest.mark.asyncio
+async def test_different_prompts_are_not_coalesced():
+    """Test que prompts distintos generan por separado"""
+    llm = SlowLLM()
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=llm)
+
+    await asyncio.gather(
+        service.refine_story(await service.create_session(), "Historia A"),
+        service.refine_story(await service.create_session(), "Historia B"),
+    )
+
+    assert llm.calls == 2
@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.llm.service import LLMService
+from src.llm.speculation import SpeculativePrefetcher, create_speculative_prefetcher
+from tests.mocks.pipeline_llm import PipelineLLM
+
+def make_service(llm, **config):
+    config.setdefault("CACHE_BACKEND", "memory")
+    return LLMService(config=SimpleNamespace(SPECULATIVE_PREFETCH=True, **config), llm=llm)
+
+def generations(llm, step):
+    return llm.log.count(("start", step))
+
+async def wait_idle(service):
+    while len(service.speculation):
+        await asyncio.sleep(0.001)
+
+def test_speculation_is_disabled_by_default():
+    """Test que la generación especulativa está desactivada si no se configura"""
+    assert create_speculative_prefetcher(SimpleNamespace()) is None
+    assert create_speculative_prefetcher(SimpleNamespace(SPECULATIVE_PREFETCH="true")).max_in_flight == 1
+
+@pytest.mark.asyncio
+async def test_next_step_is_served_from_speculation():
+    """Test que el siguiente paso se genera en segundo plano y la petición real lo reutiliza"""
+    llm = PipelineLLM(tail_delay=0.02)
+    service = make_service(llm)
+    session_id = await service.create_session()
+
+    await service.refine_story(session_id, "Historia original")
+    await asyncio.sleep(0.005)
+    assert generations(llm, "corner_cases") == 1
+
+    # La petición llega mientras la especulación sigue generando y se une a ella
+    result = await service.identify_corner_cases(session_id, "Historia refinada")
+
+    assert result["corner_cases"] == ["1. Caso A", "2. Caso B"]
+    assert generations(llm, "corner_cases") == 1
+    assert service.speculation_stats()["hits"] == 1
+    await wait_idle(service)
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_streaming_step_joins_speculation():
+    """Test que la versión en streaming también aprovecha la generación especulativa"""
+    llm = PipelineLLM(tail_delay=0.02)
+    service = make_service(llm)
+    session_id = await service.create_session()
+    await service.refine_story(session_id, "Historia original")
+    await asyncio.sleep(0.005)
+
+    events = [e async for e in await service.identify_corner_cases_stream(session_id, "Historia refinada")]
+
+    assert events[-1]["data"]["corner_cases"] == ["1. Caso A", "2. Caso B"]
+    assert generations(llm, "corner_cases") == 1
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_mismatching_request_cancels_speculation():
+    """Test que una petición con otras entradas cancela la especulación"""
+    llm = PipelineLLM(tail_delay=0.05)
+    service = make_service(llm)
+    session_id = await service.create_session()
+    await service.refine_story(session_id, "Historia original")
+    await asyncio.sleep(0.005)
+
+    await service.identify_corner_cases(session_id, "Historia refinada", feedback="Añadir casos de red")
+
+    stats = service.speculation_stats()
+    assert stats["mismatches"] == 1
+    assert stats["hits"] == 0
+    assert generations(llm, "corner_cases") == 2
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_fan_out_cancels_speculation():
+    """Test que la generación por secciones cancela la especulación del paso, que no puede aprovechar"""
+    llm = PipelineLLM(tail_delay=0.05)
+    service = make_service(llm, FANOUT_MAX_SECTIONS=4)
+    session_id = await service.create_session()
+    await service.refine_story(session_id, "Historia original")
+    await asyncio.sleep(0.005)
+    assert len(service.speculation) == 1
+
+    story = "Historia refinada\n\n## Área 1\n- Acceso\n\n## Área 2\n- Perfil"
+    await service.identify_corner_cases(session_id, story, fan_out=True)
+
+    stats = service.speculation_stats()
+    assert stats["mismatches"] == 1
+    assert stats["hits"] == 0
+    # Una generación especulativa cancelada y una por área
+    assert generations(llm, "corner_cases") == 3
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_speculation_only_uses_idle_capacity():
+    """Test que no se especula con el planificador ocupado ni por encima del límite"""
+    llm = PipelineLLM(tail_delay=0.05)
+    service = make_service(llm, LLM_MAX_IN_FLIGHT=2, LLM_MAX_QUEUE=8)
+    first, second = await service.create_session(), await service.create_session()
+
+    await service.refine_story(first, "Historia uno")
+    await service.refine_story(second, "Historia dos")
+
+    stats = service.speculation_stats()
+    assert stats["started"] == 1
+    assert stats["skipped"] == 1
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_real_request_preempts_speculation():
+    """Test que una petición real expulsa la especulación cuando no hay huecos libres"""
+    llm = PipelineLLM(tail_delay=0.2)
+    service = make_service(llm, LLM_MAX_IN_FLIGHT=1, LLM_MAX_QUEUE=8)
+    first, second = await service.create_session(), await service.create_session()
+    await service.refine_story(first, "Historia uno")
+    await asyncio.sleep(0.01)
+    assert service.scheduler.in_flight == 1
+
+    await asyncio.wait_for(service.refine_story(second, "Historia dos"), timeout=0.5)
+
+    assert service.speculation_stats()["preempted"] == 1
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_prefetcher_cancels_previous_speculation_of_session():
+    """Test que una nueva especulación de la sesión sustituye a la anterior"""
+    prefetcher = SpeculativePrefetcher(max_in_flight=2)
+    first_started = asyncio.Event()
+
+    async def slow():
+        first_started.set()
+        await asyncio.sleep(10)
+
+    prefetcher.start("sesion", "clave-1", slow)
+    first = prefetcher._speculations["sesion"].task
+    await first_started.wait()
+    prefetcher.start("sesion", "clave-2", lambda: asyncio.sleep(0))
+    await asyncio.gather(first, return_exceptions=True)
+
+    assert first.cancelled()
+    assert prefetcher.claim("sesion", "clave-2")
+    await prefetcher.close()
+    assert len(prefetcher) == 0
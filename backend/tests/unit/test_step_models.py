@@ -0,0 +1,106 @@
+import pytest
+from types import SimpleNamespace
+from src.llm.backends import create_llm, create_step_llms
+from src.llm.models import ProcessState
+from src.llm.service import LLMService
+from src.llm.step_models import StepModelConfig, resolve_step_models
+
+REFINEMENT_RESPONSE = """**Historia Refinada:**
+Historia refinada
+**Cambios Realizados:**
+Cambios"""
+
+CORNER_CASES_RESPONSE = """**Casos Esquina Actualizados:**
+1. Caso 1
+**Análisis de Cambios:**
+Análisis"""
+
+class NamedLLM:
+    """LLM falso que registra los prompts recibidos"""
+
+    def __init__(self, model, response, temperature=0.7):
+        self.model = model
+        self.temperature = temperature
+        self.response = response
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return self.response
+
+    async def astream(self, prompt):
+        self.prompts.append(prompt)
+        yield self.response
+
+def make_config(**overrides):
+    return SimpleNamespace(
+        MODEL_NAME="global", TEMPERATURE=0.7, MAX_LENGTH=4096,
+        OLLAMA_BASE_URL="http://localhost:11434", CACHE_BACKEND="none", **overrides
+    )
+
+def test_resolve_step_models_inherits_global_config():
+    """Test que cada paso hereda la configuración global salvo lo que sobrescribe"""
+    steps = resolve_step_models(make_config(
+        REFINEMENT_MODEL_NAME="pequeño", REFINEMENT_MAX_LENGTH=2048, FINALIZATION_TEMPERATURE=0.0
+    ))
+
+    assert steps[ProcessState.REFINEMENT] == StepModelConfig("pequeño", 0.7, 2048)
+    assert steps[ProcessState.FINALIZATION] == StepModelConfig("global", 0.0, 4096)
+    assert steps[ProcessState.CORNER_CASES] == StepModelConfig("global", 0.7, 4096)
+
+def test_create_llm_uses_step_context_window():
+    """Test que la ventana de contexto del paso llega a Ollama como num_ctx"""
+    llm = create_llm(make_config(), StepModelConfig("pequeño", 0.1, 2048))
+
+    assert (llm.model, llm.temperature, llm.num_ctx) == ("pequeño", 0.1, 2048)
+    assert create_llm(make_config()).num_ctx == 4096
+
+def test_create_step_llms_only_builds_overridden_steps():
+    """Test que solo se crean LLM para los pasos que difieren y se comparten si coinciden"""
+    llms = create_step_llms(make_config(CORNER_CASES_MODEL_NAME="rápido", TESTING_STRATEGY_MODEL_NAME="rápido"))
+
+    assert set(llms) == {ProcessState.CORNER_CASES, ProcessState.TESTING_STRATEGY}
+    assert llms[ProcessState.CORNER_CASES] is llms[ProcessState.TESTING_STRATEGY]
+
+@pytest.mark.asyncio
+async def test_each_step_uses_its_own_llm():
+    """Test que el servicio envía cada paso a su LLM"""
+    default = NamedLLM("global", REFINEMENT_RESPONSE)
+    corner = NamedLLM("rápido", CORNER_CASES_RESPONSE)
+    service = LLMService(
+        config=make_config(), llm=default, step_llms={ProcessState.CORNER_CASES: corner}
+    )
+    session_id = await service.create_session()
+
+    await service.refine_story(session_id, "Historia")
+    result = await service.identify_corner_cases(session_id, "Historia refinada")
+
+    assert len(default.prompts) == 1
+    assert len(corner.prompts) == 1
+    assert result["corner_cases"] == ["1. Caso 1"]
+    assert service.step_models()["corner_cases"]["model"] == "rápido"
+
+@pytest.mark.asyncio
+async def test_stream_uses_step_llm():
+    """Test que el streaming también usa el LLM del paso"""
+    default = NamedLLM("global", REFINEMENT_RESPONSE)
+    corner = NamedLLM("rápido", CORNER_CASES_RESPONSE)
+    service = LLMService(config=make_config(), llm=default, step_llms={ProcessState.CORNER_CASES: corner})
+    session_id = await service.create_session()
+
+    events = [e async for e in await service.identify_corner_cases_stream(session_id, "Historia refinada")]
+
+    assert events[-1]["data"]["corner_cases"] == ["1. Caso 1"]
+    assert not default.prompts and len(corner.prompts) == 1
+
+def test_cache_key_depends_on_step_model():
+    """Test que la clave de caché distingue el modelo del paso"""
+    service = LLMService(
+        config=make_config(), llm=NamedLLM("global", ""),
+        step_llms={ProcessState.FINALIZATION: NamedLLM("grande", "")}
+    )
+
+    assert (
+        service._prompt_key("plantilla", "prompt", ProcessState.REFINEMENT)
+        != service._prompt_key("plantilla", "prompt", ProcessState.FINALIZATION)
+    )
@@ -0,0 +1,56 @@
+import logging
+import pytest
+from benchmarks.bench_logging import build_request, legacy_logging, measure, structured_logging
+from src.observability import log
+from src.observability.log import Payload, log_event
+
+logger = logging.getLogger("tests.structured_logging")
+
+class Exploding:
+    def __str__(self):
+        raise AssertionError("No debe convertirse a texto")
+
+@pytest.fixture(autouse=True)
+def policy():
+    max_chars, sample_rate = log.POLICY.max_chars, log.POLICY.sample_rate
+    yield log.POLICY
+    log.configure_payload_logging(max_chars=max_chars, sample_rate=sample_rate)
+
+def test_disabled_level_does_not_format_payloads(caplog):
+    """Test que con el nivel desactivado no se convierte nada a texto"""
+    caplog.set_level(logging.INFO, logger=logger.name)
+
+    log_event(logger, logging.DEBUG, "llm.prompt", prompt=Payload(Exploding()))
+
+    assert caplog.records == []
+
+def test_event_fields_and_payload_cap(caplog):
+    """Test que el evento se registra como clave=valor y recorta los textos grandes"""
+    caplog.set_level(logging.DEBUG, logger=logger.name)
+    log.configure_payload_logging(max_chars=10, sample_rate=1)
+
+    log_event(logger, logging.DEBUG, "llm.prompt", step="refinement", tokens=42, prompt=Payload("x" * 25))
+
+    record = caplog.records[0]
+    assert record.getMessage() == "llm.prompt step=refinement tokens=42 prompt='xxxxxxxxxx... (+15 caracteres)'"
+    assert record.event == "llm.prompt"
+    assert record.fields["tokens"] == 42
+
+def test_unsampled_events_log_only_payload_size(caplog):
+    """Test que en los eventos no muestreados solo se registra el tamaño de los textos"""
+    caplog.set_level(logging.DEBUG, logger=logger.name)
+    log.configure_payload_logging(sample_rate=0)
+
+    log_event(logger, logging.DEBUG, "llm.result", text=Payload("respuesta"), items=Payload(["a", "b"]))
+
+    assert caplog.records[0].getMessage() == "llm.result text=<9 caracteres> items=<2 elementos>"
+
+def test_structured_logging_writes_less_than_legacy_at_info():
+    """Test que en INFO los logs de una finalización ya no incluyen los textos completos"""
+    data = build_request()
+
+    legacy = measure(legacy_logging, data, requests=5)
+    structured = measure(structured_logging, data, requests=5)
+
+    assert structured["bytes"] < legacy["bytes"] / 10
+    assert len(data["result"]["finalized_story"]) > structured["bytes"]
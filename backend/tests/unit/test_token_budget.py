@@ -0,0 +1,193 @@
+import pytest
+from types import SimpleNamespace
+from src.llm.models import ProcessState
+from src.llm.service import LLMService
+from src.llm.tokens import (
+    MIN_KEPT_ITEMS, MIN_KEPT_WORDS, PromptTooLongError, TokenBudget, TokenCounter, estimate_tokens, fit_prompt
+)
+
+TEMPLATE = "Instrucciones fijas.\nHistoria:\n{story}\nCasos anteriores:\n{cases}\n"
+
+CORNER_CASES_RESPONSE = """**Casos Esquina Actualizados:**
+1. Caso nuevo
+**Análisis de Cambios:**
+Análisis"""
+
+class RecordingLLM:
+    """LLM falso que guarda el último prompt recibido"""
+    model = "test-model"
+    temperature = 0.7
+
+    def __init__(self):
+        self.prompt = None
+        self.ainvoke_response = CORNER_CASES_RESPONSE
+
+    async def ainvoke(self, prompt):
+        self.prompt = prompt
+        return self.ainvoke_response
+
+def test_estimate_tokens():
+    """Test la estimación de tokens sin tokenizador"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hola, mundo") == 3
+    assert estimate_tokens("internacionalización") == 4
+
+def test_missing_tokenizer_falls_back_to_estimate():
+    """Test que sin tokenizador disponible se usa la estimación"""
+    counter = TokenCounter("tokenizador/inexistente")
+
+    assert counter.name == "estimate"
+    assert counter.count("hola, mundo") == 3
+
+def test_prompt_within_budget_is_not_trimmed():
+    """Test que un prompt que cabe se envía sin cambios"""
+    prompt, usage = fit_prompt(
+        TEMPLATE, {"story": "Historia", "cases": "Caso 1"},
+        TokenBudget(context_window=1000, output_reserve=100), TokenCounter(), ["cases"]
+    )
+
+    assert prompt == TEMPLATE.format(story="Historia", cases="Caso 1")
+    assert usage["trimmed"] is False
+    assert usage["trimmed_inputs"] == []
+    assert usage["prompt_budget"] == 900
+    assert usage["prompt_tokens"] == estimate_tokens(prompt)
+
+def test_lowest_priority_input_is_trimmed_first():
+    """Test que se recortan primero las entradas menos prioritarias y se conserva la historia"""
+    story = "Como usuario quiero iniciar sesión"
+    cases = "\n".join(f"{i}. Caso esquina número {i} con bastante detalle" for i in range(200))
+    budget = TokenBudget(context_window=300, output_reserve=100)
+
+    prompt, usage = fit_prompt(TEMPLATE, {"story": story, "cases": cases}, budget, TokenCounter(), ["cases", "story"])
+
+    assert usage["trimmed_inputs"] == ["cases"]
+    assert usage["prompt_tokens"] <= budget.prompt_budget
+    assert story in prompt
+    assert "0. Caso esquina número 0" in prompt
+    assert "líneas omitidas para ajustarse a la ventana de contexto" in prompt
+    # El recorte es determinista
+    assert fit_prompt(TEMPLATE, {"story": story, "cases": cases}, budget, TokenCounter(), ["cases", "story"])[0] == prompt
+
+def test_next_input_is_trimmed_when_first_is_not_enough():
+    """Test que si dejar una entrada en el mínimo no basta se recorta la siguiente"""
+    story = " ".join(f"palabra{i}" for i in range(500))
+    cases = [f"Caso {i}" for i in range(10)]
+    budget = TokenBudget(context_window=200, output_reserve=50)
+
+    prompt, usage = fit_prompt(
+        TEMPLATE, {"story": story, "cases": cases}, budget, TokenCounter(), ["cases", "story"]
+    )
+
+    assert usage["trimmed_inputs"] == ["cases", "story"]
+    assert usage["prompt_tokens"] <= budget.prompt_budget
+    assert "palabra0 palabra1" in prompt
+    assert "palabra499" not in prompt
+    # La entrada menos prioritaria conserva sus primeros elementos
+    assert all(f"Caso {i}'" in prompt for i in range(MIN_KEPT_ITEMS))
+    assert f"Caso {MIN_KEPT_ITEMS}'" not in prompt
+
+def test_inputs_are_never_trimmed_to_nothing():
+    """Test que si el prompt no cabe ni con el mínimo de cada entrada se lanza un error"""
+    story = " ".join(f"palabra{i}" for i in range(500))
+    cases = [f"Caso {i}" for i in range(10)]
+    budget = TokenBudget(context_window=100, output_reserve=50)
+
+    with pytest.raises(PromptTooLongError) as excinfo:
+        fit_prompt(TEMPLATE, {"story": story, "cases": cases}, budget, TokenCounter(), ["cases", "story"])
+
+    assert excinfo.value.prompt_budget == 50
+    assert excinfo.value.prompt_tokens > 50
+    # Con un presupuesto algo mayor cabe el mínimo de cada entrada
+    prompt, _ = fit_prompt(
+        TEMPLATE, {"story": story, "cases": cases}, TokenBudget(context_window=200, output_reserve=50),
+        TokenCounter(), ["cases", "story"]
+    )
+    assert " ".join(f"palabra{i}" for i in range(MIN_KEPT_WORDS)) in prompt
+
+@pytest.mark.asyncio
+async def test_service_trims_existing_corner_cases_and_reports_tokens():
+    """Test que el servicio ajusta el prompt a la ventana de contexto e informa de los tokens"""
+    llm = RecordingLLM()
+    service = LLMService(
+        config=SimpleNamespace(CACHE_BACKEND="none", MAX_LENGTH=1500, LLM_OUTPUT_RESERVE_TOKENS=500),
+        llm=llm
+    )
+    existing = [f"{i}. Caso esquina anterior número {i} con una descripción larga" for i in range(300)]
+
+    result = await service.identify_corner_cases(
+        await service.create_session(), "Historia refinada de prueba", existing_corner_cases=existing
+    )
+
+    usage = result["token_usage"]
+    assert usage["trimmed"] is True
+    assert usage["trimmed_inputs"] == ["existing_corner_cases"]
+    assert usage["context_window"] == 1500
+    assert usage["prompt_tokens"] <= usage["prompt_budget"] == 1000
+    assert usage["completion_tokens"] == estimate_tokens(CORNER_CASES_RESPONSE)
+    assert "Historia refinada de prueba" in llm.prompt
+    assert "0. Caso esquina anterior número 0 " in llm.prompt
+    assert "anterior número 299 " not in llm.prompt
+
+def test_default_output_reserve_is_proportional_to_context_window():
+    """Test que sin reserva configurada se reserva un cuarto de la ventana, hasta 1024 tokens"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", MAX_LENGTH=2048), llm=RecordingLLM())
+    assert service._token_budget(ProcessState.REFINEMENT).prompt_budget == 1536
+
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", MAX_LENGTH=32768), llm=RecordingLLM())
+    assert service._token_budget(ProcessState.REFINEMENT).output_reserve == 1024
+
+    service = LLMService(
+        config=SimpleNamespace(CACHE_BACKEND="none", MAX_LENGTH=2048, LLM_OUTPUT_RESERVE_TOKENS=100),
+        llm=RecordingLLM()
+    )
+    assert service._token_budget(ProcessState.REFINEMENT).output_reserve == 100
+
+FINALIZE_RESPONSE = """**Historia Finalizada:**
+Historia
+#### Tests Funcionales
+#### Test 1 - Escenario"""
+
+@pytest.mark.asyncio
+async def test_finalize_keeps_corner_cases_and_strategies_at_default_config():
+    """Test que con la configuración por defecto la finalización no descarta casos ni estrategias"""
+    llm = RecordingLLM()
+    llm.ainvoke_response = FINALIZE_RESPONSE
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", MAX_LENGTH=2048), llm=llm)
+    story = (
+        "Como usuario registrado, quiero poder iniciar sesión en mi cuenta usando mi correo electrónico "
+        "y contraseña para acceder a mis datos personales de manera segura. "
+    ) * 4
+    corner_cases = [
+        f"{i}. Intentos de inicio de sesión con credenciales incorrectas y bloqueo temporal de la cuenta "
+        f"tras varios fallos consecutivos en el caso {i}"
+        for i in range(15)
+    ]
+    strategies = [
+        f"{i}. Pruebas de integración del proceso de autenticación completo con base de datos real, "
+        f"servicio de correo y registro de auditoría {i}"
+        for i in range(15)
+    ]
+
+    result = await service.finalize_story(await service.create_session(), story, corner_cases, strategies)
+
+    usage = result["token_usage"]
+    assert usage["context_window"] == 2048
+    assert usage["prompt_tokens"] <= usage["prompt_budget"]
+    assert all(case in llm.prompt for case in corner_cases)
+    # Solo se omiten las últimas estrategias, y el prompt y la respuesta lo indican
+    assert usage["trimmed_inputs"] == ["testing_strategy"]
+    assert all(strategy in llm.prompt for strategy in strategies[:13])
+    assert "[... 2 elementos omitidos para ajustarse a la ventana de contexto]" in llm.prompt
+
+@pytest.mark.asyncio
+async def test_service_raises_when_prompt_does_not_fit():
+    """Test que el servicio no genera una historia recortada si el prompt no cabe"""
+    llm = RecordingLLM()
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none", MAX_LENGTH=512), llm=llm)
+    story = " ".join(f"palabra{i}" for i in range(100))
+    corner_cases = [" ".join(f"caso{i}_{j}" for j in range(100)) for i in range(5)]
+
+    with pytest.raises(PromptTooLongError):
+        await service.finalize_story(await service.create_session(), story, corner_cases, corner_cases)
+
+    assert llm.prompt is None
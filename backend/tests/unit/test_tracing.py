@@ -0,0 +1,137 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from src.integrations.jira_client import AsyncJira
+from src.llm.service import LLMService
+from src.observability import tracing
+from src.observability.tracing import (
+    BatchSpanProcessor, FileSpanExporter, InMemorySpanExporter, SimpleSpanProcessor
+)
+
+REFINEMENT_RESPONSE = "**Historia Refinada:**\nHistoria refinada\n**Cambios Realizados:**\nCambios"
+
+class FakeLLM:
+    model = "test-model"
+    temperature = 0.7
+
+    async def ainvoke(self, prompt):
+        return REFINEMENT_RESPONSE
+
+    async def astream(self, prompt):
+        for line in REFINEMENT_RESPONSE.splitlines(keepends=True):
+            yield line
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.set_span_processor(SimpleSpanProcessor(exporter))
+    yield exporter
+    tracing.set_span_processor(None)
+
+def by_name(exporter):
+    return {span.name: span for span in exporter.spans}
+
+def test_span_is_noop_when_tracing_disabled():
+    """Test que sin exportador configurado no se crea ningún span"""
+    assert not tracing.tracing_enabled()
+    assert tracing.span('llm.process_step', step='refinement') is tracing.NOOP_SPAN
+
+def test_nested_spans_share_trace(exporter):
+    """Test que los spans anidados comparten traza y enlazan con su padre"""
+    with tracing.span('padre') as parent:
+        with tracing.span('hijo', step='refinement'):
+            pass
+
+    spans = by_name(exporter)
+    assert spans['hijo'].trace_id == parent.trace_id
+    assert spans['hijo'].parent_id == parent.span_id
+    assert spans['padre'].parent_id is None
+    assert tracing.current_span() is None
+
+def test_span_records_errors(exporter):
+    """Test que un span marca como error la excepción que lo atraviesa"""
+    with pytest.raises(ValueError):
+        with tracing.span('fallo'):
+            raise ValueError("boom")
+
+    span = exporter.spans[0]
+    assert span.status == 'ERROR'
+    assert span.to_otlp()['status'] == {'code': 2, 'message': 'boom'}
+    assert span.attributes['exception.type'] == 'ValueError'
+
+@pytest.mark.asyncio
+async def test_process_step_spans(exporter):
+    """Test que un paso del flujo genera los spans del prompt, el LLM, el parser y la memoria"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=FakeLLM())
+    session_id = await service.create_session()
+
+    await service.refine_story(session_id, "Historia con trazas")
+
+    spans = by_name(exporter)
+    step = spans['llm.process_step']
+    assert step.attributes == {'session_id': session_id, 'step': 'refinement'}
+    for name in ['llm.render_prompt', 'llm.ainvoke', 'llm.extract_sections', 'llm.save_session']:
+        assert spans[name].trace_id == step.trace_id
+        assert spans[name].parent_id == step.span_id
+    assert spans['llm.ainvoke'].attributes['model'] == 'test-model'
+    assert spans['llm.ainvoke'].attributes['queue_seconds'] >= 0
+    assert spans['llm.render_prompt'].attributes['prompt_tokens'] > 0
+    assert spans['llm.extract_sections'].attributes['missing_markers'] == 0
+    assert spans['llm.save_session'].attributes['session_id'] == session_id
+
+@pytest.mark.asyncio
+async def test_stream_step_spans(exporter):
+    """Test que el streaming genera el span del paso y el de la generación"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=FakeLLM())
+
+    [event async for event in await service.refine_story_stream(await service.create_session(), "Historia")]
+
+    spans = by_name(exporter)
+    assert spans['llm.astream'].parent_id == spans['llm.stream_step'].span_id
+    assert 'prompt_eval_seconds' in spans['llm.astream'].attributes
+
+@pytest.mark.asyncio
+async def test_jira_call_span(exporter):
+    """Test que cada llamada a Jira genera un span con la operación"""
+    client = Mock()
+    client.issue.return_value = {"key": "PROJ-1"}
+
+    await AsyncJira(client).issue("PROJ-1")
+
+    assert by_name(exporter)['jira.issue'].attributes == {'operation': 'issue'}
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    """Test que el exportador de fichero escribe los lotes en el JSON de OTLP"""
+    path = tmp_path / "traces.jsonl"
+    processor = BatchSpanProcessor(FileSpanExporter(str(path), "servicio"), schedule_delay=60)
+    tracing.set_span_processor(processor)
+    try:
+        with tracing.span('llm.process_step', session_id='abc', step='refinement', speculative=False):
+            pass
+    finally:
+        tracing.shutdown_tracing()
+
+    request = json.loads(path.read_text().splitlines()[0])
+    resource_spans = request['resourceSpans'][0]
+    assert resource_spans['resource']['attributes'] == [{'key': 'service.name', 'value': {'stringValue': 'servicio'}}]
+    span = resource_spans['scopeSpans'][0]['spans'][0]
+    assert span['name'] == 'llm.process_step'
+    assert len(span['traceId']) == 32 and len(span['spanId']) == 16
+    assert {'key': 'session_id', 'value': {'stringValue': 'abc'}} in span['attributes']
+    assert {'key': 'speculative', 'value': {'boolValue': False}} in span['attributes']
+    assert not tracing.tracing_enabled()
+
+def test_configure_tracing_from_environment(monkeypatch, tmp_path):
+    """Test que TRACING_EXPORTER activa o deja desactivadas las trazas"""
+    monkeypatch.setenv('TRACING_EXPORTER', 'none')
+    assert tracing.configure_tracing() is False
+    assert not tracing.tracing_enabled()
+
+    monkeypatch.setenv('TRACING_EXPORTER', 'file')
+    monkeypatch.setenv('TRACING_FILE_PATH', str(tmp_path / "traces.jsonl"))
+    try:
+        assert tracing.configure_tracing() is True
+        assert isinstance(tracing.TRACER.processor.exporter, FileSpanExporter)
+    finally:
+        tracing.shutdown_tracing()
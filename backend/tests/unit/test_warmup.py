@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from langchain_ollama import OllamaLLM
+from src.llm.backends import BalancedLLM, OllamaBackend
+from src.llm.models import ProcessState
+from src.llm.service import LLMService
+from src.llm.warmup import WARMUP_PROMPT, WarmUp, short_generation, static_prefix
+
+class RecordingLLM:
+    """LLM falso que registra los prompts y puede fallar las primeras llamadas"""
+    temperature = 0.7
+
+    def __init__(self, model="test-model", failures=0):
+        self.model = model
+        self.failures = failures
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Ollama no disponible")
+        self.prompts.append(prompt)
+        return "ok"
+
+def make_service(llm, **config):
+    return LLMService(config=SimpleNamespace(CACHE_BACKEND="none", WARMUP_ENABLED=True, **config), llm=llm)
+
+def test_static_prefix_stops_at_first_variable():
+    """Test que el prefijo de una plantilla es el texto anterior a la primera variable"""
+    assert static_prefix("Instrucciones fijas.\nHistoria: {story}\n{feedback}") == "Instrucciones fijas.\nHistoria: "
+
+def test_short_generation_limits_output_tokens():
+    """Test que las llamadas de precalentamiento generan un solo token"""
+    llm = OllamaLLM(model="llama3.2:1b", base_url="http://localhost:11434")
+
+    assert short_generation(llm).num_predict == 1
+    assert llm.num_predict is None
+
+@pytest.mark.asyncio
+async def test_warm_up_loads_each_model_and_primes_each_template():
+    """Test que se carga cada modelo y se precarga el prefijo de cada plantilla"""
+    llm = RecordingLLM()
+    finalization_llm = RecordingLLM(model="modelo-grande")
+    service = LLMService(
+        config=SimpleNamespace(CACHE_BACKEND="none", WARMUP_ENABLED=True),
+        llm=llm,
+        step_llms={ProcessState.FINALIZATION: finalization_llm}
+    )
+
+    await service.warmup.run()
+
+    assert service.readiness()["ready"]
+    assert llm.prompts[0] == WARMUP_PROMPT
+    assert finalization_llm.prompts[0] == WARMUP_PROMPT
+    assert static_prefix(service.refinement_prompt) in llm.prompts
+    assert static_prefix(service.testing_strategy_prompt) in llm.prompts
+    assert finalization_llm.prompts[1:] == [static_prefix(service.finalize_story_prompt)]
+    assert service.warmup.stats()["calls"] == 6
+
+@pytest.mark.asyncio
+async def test_warm_up_reaches_every_ollama_instance():
+    """Test que con varias instancias de Ollama se precalientan todas"""
+    first, second = RecordingLLM(), RecordingLLM()
+    service = make_service(BalancedLLM([OllamaBackend("http://a", first), OllamaBackend("http://b", second)]))
+
+    await service.warmup.run()
+
+    assert first.prompts == second.prompts
+    assert len(first.prompts) == 5
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_until_ollama_answers():
+    """Test que el servicio no está disponible hasta que el precalentamiento termina"""
+    llm = RecordingLLM(failures=1)
+    service = make_service(llm, WARMUP_RETRY_SECONDS=0.01)
+    assert not service.readiness()["ready"]
+
+    await service.start()
+    for _ in range(100):
+        if service.readiness()["ready"]:
+            break
+        await asyncio.sleep(0.01)
+
+    readiness = service.readiness()
+    assert readiness["ready"]
+    assert readiness["warmup"]["attempts"] == 2
+    await service.close()
+
+def test_service_is_ready_without_warm_up():
+    """Test que sin precalentamiento el servicio está disponible desde el principio"""
+    service = LLMService(config=SimpleNamespace(CACHE_BACKEND="none"), llm=RecordingLLM())
+
+    assert service.warmup is None
+    assert service.readiness() == {"ready": True, "warmup": {"status": "disabled"}}